@@ -4,12 +4,13 @@ Portfolio composition analysis and KPI comparison for executive reporting
 """
 
 from datetime import date, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 
-from app.core.dependencies import get_dashboard_service, get_cache_service
+from app.core.cache_tags import entry_tags
+from app.core.dependencies import get_dashboard_service, get_response_cache
 from app.core.logging import LoggerMixin
 from app.models.assignment import (
     AssignmentAnalysisResponse,
@@ -17,7 +18,7 @@ from app.models.assignment import (
     CompositionDataPoint,
     DetailBreakdownRow
 )
-from app.services.cache_service import CacheService
+from app.services.response_cache import ResponseCache
 from app.services.dashboard_service_v2 import DashboardServiceV2
 
 router = APIRouter(prefix="/assignment", tags=["assignment"])
@@ -26,16 +27,17 @@ router = APIRouter(prefix="/assignment", tags=["assignment"])
 class AssignmentController(LoggerMixin):
     """Controller for assignment analysis endpoints"""
     
-    def __init__(self, dashboard_service: DashboardServiceV2, cache_service: CacheService):
+    def __init__(self, dashboard_service: DashboardServiceV2, response_cache: Optional[ResponseCache] = None):
         self.dashboard_service = dashboard_service
-        self.cache_service = cache_service
+        self.response_cache = response_cache
     
     async def get_assignment_analysis(
         self,
         fecha_actual: Optional[date] = None,
         fecha_anterior: Optional[date] = None,
-        cartera_filter: Optional[str] = None
-    ) -> AssignmentAnalysisResponse:
+        cartera_filter: Optional[str] = None,
+        request: Optional[Request] = None
+    ) -> Union[AssignmentAnalysisResponse, Response]:
         """
         Generate assignment composition analysis with period comparison
         
@@ -43,6 +45,8 @@ class AssignmentController(LoggerMixin):
             fecha_actual: Current period date for comparison
             fecha_anterior: Previous period date for comparison  
             cartera_filter: Optional filter by specific cartera
+            request: Incoming request; with a response cache, the cached
+                body is returned as-is (304 if the ETag matches)
             
         Returns:
             Assignment analysis with KPIs and composition breakdown
@@ -64,47 +68,43 @@ class AssignmentController(LoggerMixin):
         )
         
         try:
-            # Check cache first
-            cache_key = f"assignment:{cartera_filter or 'all'}:{fecha_actual}:{fecha_anterior}"
-            cached_data = await self.cache_service.get(cache_key)
-            
-            if cached_data:
-                self.logger.info(f"Returning cached assignment data for key: {cache_key}")
-                return AssignmentAnalysisResponse.model_validate(cached_data)
-            
-            # Get dashboard data for both periods
-            current_data = await self.dashboard_service.get_dashboard_data(
-                filters=filters,
-                fecha_corte=fecha_actual
-            )
-            
-            previous_data = await self.dashboard_service.get_dashboard_data(
-                filters=filters,
-                fecha_corte=fecha_anterior
-            )
-            
-            # Generate assignment analysis
-            analysis_response = self._generate_assignment_analysis(
-                current_data=current_data,
-                previous_data=previous_data,
-                fecha_actual=fecha_actual,
-                fecha_anterior=fecha_anterior
-            )
+            async def build() -> AssignmentAnalysisResponse:
+                # Get dashboard data for both periods
+                current_data = await self.dashboard_service.get_dashboard_data(
+                    filters=filters,
+                    fecha_corte=fecha_actual
+                )
+                
+                previous_data = await self.dashboard_service.get_dashboard_data(
+                    filters=filters,
+                    fecha_corte=fecha_anterior
+                )
+                
+                # Generate assignment analysis
+                analysis_response = self._generate_assignment_analysis(
+                    current_data=current_data,
+                    previous_data=previous_data,
+                    fecha_actual=fecha_actual,
+                    fecha_anterior=fecha_anterior
+                )
+                
+                self.logger.info(
+                    f"Generated assignment analysis with {len(analysis_response.kpis)} KPIs "
+                    f"and {len(analysis_response.detailBreakdown)} detail rows"
+                )
+                return analysis_response
             
-            # Cache for 2 hours
-            await self.cache_service.set(
-                cache_key,
-                analysis_response.model_dump(),
-                expire_in=7200
-            )
+            if self.response_cache is None or request is None:
+                return await build()
             
-            self.logger.info(
-                f"Generated assignment analysis with {len(analysis_response.kpis)} KPIs "
-                f"and {len(analysis_response.detailBreakdown)} detail rows"
+            # Cache the encoded body for 2 hours
+            cache_key = f"assignment:{cartera_filter or 'all'}:{fecha_actual}:{fecha_anterior}"
+            cache_key = await self.response_cache.generations.versioned_key("assignment", cache_key)
+            return await self.response_cache.get_or_build(
+                request, cache_key, build, expire_in=7200,
+                tags=entry_tags("assignment", carteras=[cartera_filter], fechas=[fecha_actual, fecha_anterior])
             )
             
-            return analysis_response
-            
         except Exception as e:
             self.logger.error(f"Error generating assignment analysis: {str(e)}")
             raise HTTPException(
@@ -401,12 +401,13 @@ class AssignmentController(LoggerMixin):
 
 @router.get("/", response_model=AssignmentAnalysisResponse)
 async def get_assignment_analysis(
+    http_request: Request,
     fecha_actual: Optional[date] = Query(None, description="Current period date (YYYY-MM-DD)"),
     fecha_anterior: Optional[date] = Query(None, description="Previous period date (YYYY-MM-DD)"),
     cartera: Optional[str] = Query(None, description="Filter by specific cartera"),
     dashboard_service: DashboardServiceV2 = Depends(get_dashboard_service),
-    cache_service: CacheService = Depends(get_cache_service)
-):
+    response_cache: ResponseCache = Depends(get_response_cache)
+) -> Response:
     """
     Get assignment composition analysis with period comparison
     
@@ -421,12 +422,13 @@ async def get_assignment_analysis(
     - Portfolio composition by cartera
     - Detailed breakdown with comparisons
     """
-    controller = AssignmentController(dashboard_service, cache_service)
+    controller = AssignmentController(dashboard_service, response_cache)
     
     return await controller.get_assignment_analysis(
         fecha_actual=fecha_actual,
         fecha_anterior=fecha_anterior,
-        cartera_filter=cartera
+        cartera_filter=cartera,
+        request=http_request
     )
 
 
@@ -4,12 +4,19 @@ FastAPI endpoints that expose dashboard services with proper typing
 """
 
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks, Request, Response
 
-from app.core.dependencies import get_dashboard_service, get_cache_service
-from app.core.logging import LoggerMixin
+from app.core.cache_tags import entry_tags
+from app.core.dependencies import (
+    get_binary_redis_client,
+    get_cache_service,
+    get_dashboard_service,
+    get_postgres_repo,
+    get_response_cache,
+)
+from app.core.logging import LoggerMixin, get_logger
 from app.models.dashboard import (
     DashboardData,
     DashboardRequest, 
@@ -18,7 +25,10 @@ from app.models.dashboard import (
 )
 from app.models.base import success_response, error_response
 from app.services.dashboard_service_v2 import DashboardServiceV2
+from app.services.cache_namespaces import ENDPOINT_MARTS, AccessStats, CacheGenerations, prewarmer
 from app.services.cache_service import CacheService
+from app.services.response_cache import ResponseCache
+from shared.core.config import settings
 
 
 # =============================================================================
@@ -26,6 +36,7 @@ from app.services.cache_service import CacheService
 # =============================================================================
 
 router = APIRouter(prefix="/api/v1", tags=["dashboard"])
+logger = get_logger(__name__)
 
 
 class DashboardAPI(LoggerMixin):
@@ -40,13 +51,16 @@ class DashboardAPI(LoggerMixin):
     @router.post("/dashboard", response_model=DashboardData)
     async def get_dashboard_data(
         request: DashboardRequest,
-        service: DashboardServiceV2 = Depends(get_dashboard_service)
-    ) -> DashboardData:
+        http_request: Request,
+        service: DashboardServiceV2 = Depends(get_dashboard_service),
+        response_cache: ResponseCache = Depends(get_response_cache)
+    ) -> Response:
         """
         Get dashboard data with filters
         
         Returns DashboardData - EXACT match with Frontend interface.
-        Uses FrontendCompatibleModel for automatic camelCase serialization.
+        The JSON body is built once and cached in Redis with its ETag; cache
+        hits are returned as-is (304 if If-None-Match matches).
         
         This endpoint provides the main dashboard data matching the React frontend
         structure. Supports filtering by cartera, servicio, and date ranges.
@@ -56,15 +70,15 @@ class DashboardAPI(LoggerMixin):
             if request.fechaCorte is None:
                 request.fechaCorte = date.today()
             
-            # Get dashboard data from service
-            dashboard_data = await service.get_dashboard_data(
+            return await _dashboard_json_response(
+                http_request,
+                service,
+                response_cache,
                 filters=request.filters.model_dump() if request.filters else {},
+                dimensions=request.dimensions,
                 fecha_corte=request.fechaCorte
             )
             
-            # Service returns DashboardData directly - no wrapper needed
-            return dashboard_data
-            
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -74,11 +88,13 @@ class DashboardAPI(LoggerMixin):
     @staticmethod
     @router.get("/dashboard", response_model=DashboardData)
     async def get_dashboard_data_get(
+        http_request: Request,
         cartera: Optional[List[str]] = Query(default=None, description="Portfolio filters"),
         servicio: Optional[List[str]] = Query(default=None, description="Service filters"),
         fecha_corte: Optional[date] = Query(default=None, description="Cut-off date"),
-        service: DashboardServiceV2 = Depends(get_dashboard_service)
-    ) -> DashboardData:
+        service: DashboardServiceV2 = Depends(get_dashboard_service),
+        response_cache: ResponseCache = Depends(get_response_cache)
+    ) -> Response:
         """
         Get dashboard data with GET method (for simple queries)
         
@@ -96,14 +112,15 @@ class DashboardAPI(LoggerMixin):
             if fecha_corte is None:
                 fecha_corte = date.today()
             
-            # Get dashboard data from service
-            dashboard_data = await service.get_dashboard_data(
+            return await _dashboard_json_response(
+                http_request,
+                service,
+                response_cache,
                 filters=filters.model_dump(),
+                dimensions=None,
                 fecha_corte=fecha_corte
             )
             
-            return dashboard_data
-            
         except Exception as e:
             raise HTTPException(
                 status_code=500,
@@ -182,23 +199,28 @@ class DashboardAPI(LoggerMixin):
     async def refresh_data(
         background_tasks: BackgroundTasks,
         force: bool = Query(default=False, description="Force refresh even if recently updated"),
+        tags: Optional[List[str]] = Query(
+            default=None, description="Only invalidate these cache tags (e.g. cartera:TEMPRANA, fecha:2025-06-20)"
+        ),
         cache_service: CacheService = Depends(get_cache_service)
     ):
         """
         Trigger data refresh
         
         Initiates a background refresh of cached data.
-        Used for the scheduled refresh functionality.
+        Used for the scheduled refresh functionality. With tags, only the
+        cached entries registered under those tags are invalidated.
         """
         try:
             # Add background task for data refresh
-            background_tasks.add_task(_refresh_data_task, cache_service, force)
+            background_tasks.add_task(_refresh_data_task, cache_service, force, tags)
             
             return success_response(
                 message="Data refresh started in background",
                 data={
                     "status": "refresh_initiated",
                     "force": force,
+                    "tags": tags,
                     "timestamp": datetime.now().isoformat()
                 }
             )
@@ -244,21 +266,101 @@ class DashboardAPI(LoggerMixin):
             )
 
 
+# =============================================================================
+# RESPONSE HELPERS
+# =============================================================================
+
+async def _dashboard_cache_key(
+    response_cache: ResponseCache,
+    filters: dict,
+    dimensions: Optional[List[str]],
+    fecha_corte: date
+) -> str:
+    """
+    Cache key for a dashboard body, versioned with the dashboard_data mart generation
+    """
+    cache_key = CacheService._generate_cache_key(
+        "dashboard",
+        filters={k: v for k, v in filters.items() if v},
+        dimensions=dimensions,
+        fecha_corte=fecha_corte
+    )
+    return await response_cache.generations.versioned_key("dashboard", cache_key)
+
+
+async def _dashboard_json_response(
+    request: Request,
+    service: DashboardServiceV2,
+    response_cache: ResponseCache,
+    filters: dict,
+    dimensions: Optional[List[str]],
+    fecha_corte: date
+) -> Response:
+    """
+    Dashboard JSON body from the response cache or freshly built by the service
+    """
+    # 🆕 Access stats drive the post-ETL prewarm (today's cut-off is stored as "latest")
+    AccessStats(response_cache.redis).record_in_background("dashboard", {
+        "filters": {k: v for k, v in filters.items() if v},
+        "dimensions": dimensions,
+        "fecha_corte": None if fecha_corte == date.today() else fecha_corte.isoformat()
+    })
+
+    cache_key = await _dashboard_cache_key(response_cache, filters, dimensions, fecha_corte)
+    return await response_cache.get_or_build(
+        request,
+        cache_key,
+        lambda: service.get_dashboard_json(filters=filters, dimensions=dimensions, fecha_corte=fecha_corte),
+        expire_in=settings.CACHE_TTL_DASHBOARD,
+        stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+        tags=entry_tags("dashboard", carteras=filters.get("cartera"), fechas=[fecha_corte])
+    )
+
+
+async def _warm_dashboard(params: Dict[str, Any]) -> None:
+    """
+    Rebuild one dashboard body recorded in the access stats (post-ETL prewarm)
+    """
+    response_cache = get_response_cache(await get_binary_redis_client())
+    service = get_dashboard_service(get_postgres_repo())
+    filters = params.get("filters") or {}
+    dimensions = params.get("dimensions")
+    fecha_corte = date.fromisoformat(params["fecha_corte"]) if params.get("fecha_corte") else date.today()
+
+    cache_key = await _dashboard_cache_key(response_cache, filters, dimensions, fecha_corte)
+    await response_cache.prewarm(
+        cache_key,
+        lambda: service.get_dashboard_json(filters=filters, dimensions=dimensions, fecha_corte=fecha_corte),
+        expire_in=settings.CACHE_TTL_DASHBOARD,
+        stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+        tags=entry_tags("dashboard", carteras=filters.get("cartera"), fechas=[fecha_corte])
+    )
+
+
+prewarmer.register("dashboard", _warm_dashboard)
+
+
 # =============================================================================
 # BACKGROUND TASKS
 # =============================================================================
 
-async def _refresh_data_task(cache_service: CacheService, force: bool = False):
+async def _refresh_data_task(cache_service: CacheService, force: bool = False, tags: Optional[List[str]] = None):
     """
     Background task for data refresh
     """
     try:
-        print(f"Data refresh task started (force={force}) at {datetime.now()}")
+        print(f"Data refresh task started (force={force}, tags={tags}) at {datetime.now()}")
         
-        # Clear cache if force refresh
-        if force:
-            await cache_service.clear_by_pattern("*")
-            print("Cache cleared due to force refresh")
+        # Targeted invalidation: only the entries registered under the tags
+        if tags:
+            invalidated = await cache_service.invalidate_tags(tags)
+            logger.info(f"🏷️ Invalidated {invalidated} cache entries for tags {tags}")
+
+        # Invalidate cached responses if force refresh: bumping the mart
+        # generations orphans every key in O(1) and triggers the prewarm
+        elif force:
+            generations = await CacheGenerations(cache_service.redis).bump(set(ENDPOINT_MARTS.values()))
+            logger.info(f"🔄 Cache generations bumped due to force refresh: {generations}")
         
         # TODO: Implement actual refresh logic
         # - Trigger ETL pipeline
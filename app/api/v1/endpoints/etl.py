@@ -4,7 +4,7 @@ Production-ready HTTP interface for incremental extractions
 
 Features:
 - Trigger dashboard refresh from frontend
-- Monitor extraction status and progress
+- Monitor extraction status and progress (per-batch checkpoints: rows/s, ETA)
 - Manual table refresh capabilities
 - Comprehensive ETL health monitoring
 - Cancel running extractions
@@ -23,6 +23,7 @@ from etl import (
 )
 from etl.config import ETLConfig
 from etl import get_watermark_manager
+from etl.watermarks import get_checkpoint_progress
 from app.core.logging import LoggerMixin
 from app.models.base import success_response
 
@@ -483,6 +484,38 @@ class ETLAPI(LoggerMixin):
                 detail=f"Failed to get table status: {str(e)}"
             )
 
+    @staticmethod
+    @router.get("/progress")
+    async def get_extraction_progress(
+            table_name: Optional[str] = Query(None, description="Filter by table (None = all)")
+    ):
+        """
+        🆕 Live progress of running incremental loads
+
+        Built from the per-batch checkpoints: rows loaded, rows/s,
+        percentage of the extraction range covered and ETA per table.
+        """
+        try:
+            if table_name and table_name not in ETLConfig.list_tables():
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Table {table_name} not found in ETL configuration"
+                )
+
+            progress = await get_checkpoint_progress(table_name)
+            return success_response(
+                data={"tables": progress, "timestamp": datetime.now(timezone.utc).isoformat()},
+                message=f"Progress for {len(progress)} tables"
+            )
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to get extraction progress: {str(e)}"
+            )
+
     # =============================================================================
     # 🧠 INTELLIGENT COORDINATOR ENDPOINTS
     # =============================================================================
@@ -4,11 +4,12 @@ Daily KPI tracking and evolution charts for React frontend
 """
 
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 
-from app.core.dependencies import get_dashboard_service, get_cache_service
+from app.core.cache_tags import entry_tags
+from app.core.dependencies import get_dashboard_service, get_response_cache
 from app.core.logging import LoggerMixin
 from app.models.evolution import (
     EvolutionRequest,
@@ -19,8 +20,10 @@ from app.models.evolution import (
     EvolutionFilters
 )
 from app.models.base import success_response, error_response
+from app.services.dashboard_engines import DailySeriesUnavailableError
 from app.services.dashboard_service_v2 import DashboardServiceV2
-from app.services.cache_service import CacheService
+from app.services.response_cache import ResponseCache
+from shared.core.config import settings
 
 router = APIRouter(prefix="/evolution", tags=["evolution"])
 
@@ -28,9 +31,9 @@ router = APIRouter(prefix="/evolution", tags=["evolution"])
 class EvolutionController(LoggerMixin):
     """Controller for evolution-related endpoints"""
     
-    def __init__(self, dashboard_service: DashboardServiceV2, cache_service: CacheService):
+    def __init__(self, dashboard_service: DashboardServiceV2, response_cache: Optional[ResponseCache] = None):
         self.dashboard_service = dashboard_service
-        self.cache_service = cache_service
+        self.response_cache = response_cache
     
     async def get_evolution_data(
         self,
@@ -38,8 +41,9 @@ class EvolutionController(LoggerMixin):
         servicio: Optional[str] = None,
         fecha_inicio: Optional[date] = None,
         fecha_fin: Optional[date] = None,
-        metrics: List[str] = None
-    ) -> EvolutionData:  # ✅ Devuelve array directo
+        metrics: List[str] = None,
+        request: Optional[Request] = None
+    ) -> Union[EvolutionData, Response]:  # ✅ Devuelve array directo
         """
         Generate evolution data for daily KPI tracking
         
@@ -49,6 +53,8 @@ class EvolutionController(LoggerMixin):
             fecha_inicio: Start date for evolution tracking
             fecha_fin: End date for evolution tracking
             metrics: List of metrics to track
+            request: Incoming request; with a response cache, the cached
+                body is returned as-is (304 if the ETag matches)
             
         Returns:
             EvolutionData - Direct array of EvolutionMetric (no wrapper)
@@ -76,42 +82,46 @@ class EvolutionController(LoggerMixin):
         )
         
         try:
-            # Check cache first
-            cache_key = f"evolution:{cartera or 'all'}:{servicio or 'all'}:{fecha_inicio}:{fecha_fin}"
-            cached_data = await self.cache_service.get(cache_key)
-            
-            if cached_data:
-                self.logger.info(f"Returning cached evolution data for key: {cache_key}")
-                # Cached data is already EvolutionData format
-                return [EvolutionMetric.model_validate(item) for item in cached_data]
+            async def build() -> EvolutionData:
+                # Generate evolution data using dashboard service
+                evolution_data = await self.dashboard_service.get_evolution_data(
+                    filters=filters,
+                    fecha_inicio=fecha_inicio,
+                    fecha_fin=fecha_fin
+                )
+                
+                # Transform to frontend format (direct array)
+                response_data = self._transform_evolution_data(
+                    evolution_data, 
+                    metrics
+                )
+                
+                self.logger.info(
+                    f"Generated evolution data with {len(response_data)} metrics "
+                    f"across {len(evolution_data.get('evolutionData', []))} days"
+                )
+                return response_data
             
-            # Generate evolution data using dashboard service
-            evolution_data = await self.dashboard_service.get_evolution_data(
-                filters=filters,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin
-            )
+            if self.response_cache is None or request is None:
+                return await build()
             
-            # Transform to frontend format (direct array)
-            response_data = self._transform_evolution_data(
-                evolution_data, 
-                metrics
+            # Cache the encoded body for 1 hour
+            cache_key = (
+                f"evolution:{cartera or 'all'}:{servicio or 'all'}:{fecha_inicio}:{fecha_fin}:"
+                f"{','.join(metrics)}"
             )
-            
-            # Cache for 1 hour (serialize the array)
-            await self.cache_service.set(
-                cache_key, 
-                [metric.model_dump() for metric in response_data],
-                expire_in=3600
+            cache_key = await self.response_cache.generations.versioned_key("evolution", cache_key)
+            return await self.response_cache.get_or_build(
+                request, cache_key, build, expire_in=3600, stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+                tags=entry_tags("evolution", carteras=[cartera], fechas=[fecha_inicio, fecha_fin])
             )
             
-            self.logger.info(
-                f"Generated evolution data with {len(response_data)} metrics "
-                f"across {len(evolution_data.get('evolutionData', []))} days"
+        except DailySeriesUnavailableError as e:
+            self.logger.error(f"Evolution data unavailable: {str(e)}")
+            raise HTTPException(
+                status_code=503,
+                detail=f"Evolution data is temporarily unavailable: {str(e)}"
             )
-            
-            return response_data
-            
         except Exception as e:
             self.logger.error(f"Error generating evolution data: {str(e)}")
             raise HTTPException(
@@ -226,6 +236,7 @@ class EvolutionController(LoggerMixin):
 
 @router.get("/", response_model=EvolutionData)  # ✅ Array directo
 async def get_evolution_data(
+    http_request: Request,
     cartera: Optional[str] = Query(None, description="Filter by cartera type"),
     servicio: Optional[str] = Query(None, description="Filter by service type (MOVIL/FIJA)"),
     fecha_inicio: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
@@ -235,8 +246,8 @@ async def get_evolution_data(
         description="Comma-separated list of metrics"
     ),
     dashboard_service: DashboardServiceV2 = Depends(get_dashboard_service),
-    cache_service: CacheService = Depends(get_cache_service)
-) -> EvolutionData:  # ✅ Array directo
+    response_cache: ResponseCache = Depends(get_response_cache)
+) -> Response:  # ✅ Array directo
     """
     Get evolution data for daily KPI tracking
     
@@ -260,7 +271,7 @@ async def get_evolution_data(
     - `recupero`: Recovery amount (currency)
     - `intensidad`: Intensity (attempts per account)
     """
-    controller = EvolutionController(dashboard_service, cache_service)
+    controller = EvolutionController(dashboard_service, response_cache)
     
     # Parse metrics string
     metrics_list = [m.strip() for m in metrics.split(',') if m.strip()] if metrics else None
@@ -270,22 +281,24 @@ async def get_evolution_data(
         servicio=servicio,
         fecha_inicio=fecha_inicio,
         fecha_fin=fecha_fin,
-        metrics=metrics_list
+        metrics=metrics_list,
+        request=http_request
     )
 
 
 @router.post("/", response_model=EvolutionData)  # ✅ Array directo
 async def get_evolution_data_post(
     request: EvolutionRequest,
+    http_request: Request,
     dashboard_service: DashboardServiceV2 = Depends(get_dashboard_service),
-    cache_service: CacheService = Depends(get_cache_service)
-) -> EvolutionData:
+    response_cache: ResponseCache = Depends(get_response_cache)
+) -> Response:
     """
     Get evolution data with POST method for complex filters
     
     Returns EvolutionData directly - EXACT match with Frontend expectations.
     """
-    controller = EvolutionController(dashboard_service, cache_service)
+    controller = EvolutionController(dashboard_service, response_cache)
     
     # Parse dates from request
     fecha_inicio = datetime.strptime(request.fechaInicio, '%Y-%m-%d').date()
@@ -300,7 +313,8 @@ async def get_evolution_data_post(
         servicio=servicio,
         fecha_inicio=fecha_inicio,
         fecha_fin=fecha_fin,
-        metrics=request.includeMetrics
+        metrics=request.includeMetrics,
+        request=http_request
     )
 
 
@@ -4,14 +4,15 @@ Monitoreo diario del rendimiento del call center y análisis GTR (Global Tasa de
 """
 # Imports estándar
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
 # Imports de terceros
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import JSONResponse
 
 # Imports internos
-from app.core.dependencies import get_cache_service, get_dashboard_service
+from app.core.cache_tags import entry_tags
+from app.core.dependencies import get_dashboard_service, get_response_cache
 from app.core.logging import LoggerMixin
 from app.models.base import error_response, success_response
 from app.models.operation import (  # ✅ USADO: POST endpoint
@@ -22,8 +23,9 @@ from app.models.operation import (  # ✅ USADO: POST endpoint
     OperationDayKPI,
     OperationDayRequest,
     QueuePerformance)
-from app.services.cache_service import CacheService
+from app.services.response_cache import ResponseCache
 from app.services.dashboard_service_v2 import DashboardServiceV2
+from shared.core.config import settings
 
 # Router para los endpoints de operación
 router = APIRouter(prefix="/operation", tags=["operation"])
@@ -32,9 +34,9 @@ router = APIRouter(prefix="/operation", tags=["operation"])
 class OperationController(LoggerMixin):
     """Controlador para los endpoints de análisis de operación diaria."""
 
-    def __init__(self, dashboard_service: DashboardServiceV2, cache_service: Optional[CacheService] = None):
+    def __init__(self, dashboard_service: DashboardServiceV2, response_cache: Optional[ResponseCache] = None):
         self.dashboard_service = dashboard_service
-        self.cache_service = cache_service
+        self.response_cache = response_cache
 
     async def get_operation_analysis(
         self,
@@ -42,7 +44,8 @@ class OperationController(LoggerMixin):
         include_hourly: bool = True,
         include_attempts: bool = True,
         include_queues: bool = True,
-    ) -> OperationDayAnalysisData:  # ✅ CORRECTO: Devuelve datos directos
+        request: Optional[Request] = None,
+    ) -> Union[OperationDayAnalysisData, Response]:  # ✅ CORRECTO: Devuelve datos directos
         """
         Genera el análisis de operación diaria para el rendimiento del call center.
 
@@ -51,6 +54,8 @@ class OperationController(LoggerMixin):
             include_hourly: Incluir desglose de rendimiento por hora.
             include_attempts: Incluir análisis de efectividad por intento.
             include_queues: Incluir métricas de rendimiento de cola.
+            request: Request entrante; con caché de respuestas el cuerpo
+                cacheado se devuelve tal cual (304 si el ETag coincide).
 
         Returns:
             OperationDayAnalysisData: Datos directos como espera el Frontend.
@@ -61,40 +66,40 @@ class OperationController(LoggerMixin):
         self.logger.info(f"Generando análisis de operación para {fecha_analisis}")
 
         try:
-            # Verificar caché primero si el servicio de caché está disponible
-            if self.cache_service:
-                cache_key = f"operation:{fecha_analisis}:{include_hourly}:{include_attempts}:{include_queues}"
-                cached_data = await self.cache_service.get(cache_key)
-                if cached_data:
-                    self.logger.info(f"Retornando datos de operación cacheados para la clave: {cache_key}")
-                    return OperationDayAnalysisData.model_validate(cached_data)
-
-            # Obtener datos del dashboard para la fecha de análisis
-            dashboard_data = await self.dashboard_service.get_dashboard_data(
-                filters={}, fecha_corte=fecha_analisis
-            )
-
-            # Generar componentes del análisis de operación
-            analysis_data = await self._generate_operation_analysis(
-                dashboard_data=dashboard_data,
-                fecha_analisis=fecha_analisis,
-                include_hourly=include_hourly,
-                include_attempts=include_attempts,
-                include_queues=include_queues,
-            )
+            async def build() -> OperationDayAnalysisData:
+                # Obtener datos del dashboard para la fecha de análisis
+                dashboard_data = await self.dashboard_service.get_dashboard_data(
+                    filters={}, fecha_corte=fecha_analisis
+                )
 
-            # Cachear por 30 minutos si el servicio de caché está disponible
-            if self.cache_service:
-                await self.cache_service.set(cache_key, analysis_data.model_dump(), expire_in=1800)
+                # Generar componentes del análisis de operación
+                analysis_data = await self._generate_operation_analysis(
+                    dashboard_data=dashboard_data,
+                    fecha_analisis=fecha_analisis,
+                    include_hourly=include_hourly,
+                    include_attempts=include_attempts,
+                    include_queues=include_queues,
+                )
 
-            self.logger.info(
-                f"Análisis de operación generado para {fecha_analisis} con "
-                f"{len(analysis_data.kpis)} KPIs y "
-                f"{len(analysis_data.channelPerformance)} canales"
+                self.logger.info(
+                    f"Análisis de operación generado para {fecha_analisis} con "
+                    f"{len(analysis_data.kpis)} KPIs y "
+                    f"{len(analysis_data.channelPerformance)} canales"
+                )
+                return analysis_data
+
+            # Sin caché de respuestas (o sin request) se devuelve el modelo directamente
+            if self.response_cache is None or request is None:
+                return await build()
+
+            # Cachear el cuerpo codificado por 30 minutos
+            cache_key = f"operation:{fecha_analisis}:{include_hourly}:{include_attempts}:{include_queues}"
+            cache_key = await self.response_cache.generations.versioned_key("operation", cache_key)
+            return await self.response_cache.get_or_build(
+                request, cache_key, build, expire_in=1800, stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+                tags=entry_tags("operation", fechas=[fecha_analisis])
             )
 
-            return analysis_data
-
         except Exception as e:
             self.logger.error(f"Error generando análisis de operación: {str(e)}")
             raise HTTPException(
@@ -434,13 +439,14 @@ class OperationController(LoggerMixin):
 
 @router.get("/", response_model=OperationDayAnalysisData)
 async def get_operation_analysis_endpoint( # Renombrado para evitar conflicto con el método del controller
+    http_request: Request,
     fecha_analisis: Optional[date] = Query(None, description="Fecha de análisis (YYYY-MM-DD)"),
     include_hourly: bool = Query(True, description="Incluir desglose de rendimiento por hora"),
     include_attempts: bool = Query(True, description="Incluir análisis de efectividad por intento"),
     include_queues: bool = Query(True, description="Incluir métricas de rendimiento de cola"),
     dashboard_service: DashboardServiceV2 = Depends(get_dashboard_service),
-    cache_service: CacheService = Depends(get_cache_service),
-) -> OperationDayAnalysisData:
+    response_cache: ResponseCache = Depends(get_response_cache),
+) -> Response:
     """
     Obtiene el análisis de operación diaria para el monitoreo del rendimiento del call center.
 
@@ -460,27 +466,29 @@ async def get_operation_analysis_endpoint( # Renombrado para evitar conflicto co
     - Análisis de efectividad por intento (opcional)
     - Rendimiento de cola por cartera (opcional)
     """
-    controller = OperationController(dashboard_service, cache_service)
+    controller = OperationController(dashboard_service, response_cache)
     return await controller.get_operation_analysis(
         fecha_analisis=fecha_analisis,
         include_hourly=include_hourly,
         include_attempts=include_attempts,
         include_queues=include_queues,
+        request=http_request,
     )
 
 
 @router.post("/", response_model=OperationDayAnalysisData)
 async def get_operation_analysis_post_endpoint( # Renombrado para evitar conflicto
     request: OperationDayRequest,
+    http_request: Request,
     dashboard_service: DashboardServiceV2 = Depends(get_dashboard_service),
-    cache_service: CacheService = Depends(get_cache_service),
-) -> OperationDayAnalysisData:
+    response_cache: ResponseCache = Depends(get_response_cache),
+) -> Response:
     """
     Obtiene el análisis de operación con método POST para solicitudes complejas.
 
     Retorna `OperationDayAnalysisData` directamente - COINCIDENCIA EXACTA con las expectativas del Frontend.
     """
-    controller = OperationController(dashboard_service, cache_service)
+    controller = OperationController(dashboard_service, response_cache)
 
     try:
         # Parsear fecha desde la solicitud
@@ -494,6 +502,7 @@ async def get_operation_analysis_post_endpoint( # Renombrado para evitar conflic
         include_hourly=request.includeHourlyBreakdown,
         include_attempts=request.includeAttemptAnalysis,
         include_queues=request.includeQueueDetails,
+        request=http_request,
     )
 
 
@@ -513,7 +522,7 @@ async def get_daily_kpis_endpoint( # Renombrado
             filters={}, fecha_corte=current_date
         )
 
-        # No se necesita cache_service para este endpoint específico del controller
+        # No se necesita response_cache para este endpoint específico del controller
         controller = OperationController(dashboard_service, None)
         kpis = controller._calculate_daily_kpis(dashboard_data)
         return kpis
@@ -541,7 +550,7 @@ async def get_channel_performance_endpoint( # Renombrado
             filters={}, fecha_corte=current_date
         )
         
-        # No se necesita cache_service para este método específico del controller
+        # No se necesita response_cache para este método específico del controller
         controller = OperationController(dashboard_service, None)
         channels = controller._generate_channel_performance(dashboard_data)
         return channels
@@ -12,10 +12,11 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 # BaseModel y Field ya no son necesarios aquí directamente si todos los modelos se importan.
 
 # Imports internos
-from app.core.dependencies import get_dashboard_service # Asegúrate que existe o crea get_productivity_service si es específico
+from app.core.dependencies import get_dashboard_service, get_productivity_service
 from app.core.logging import LoggerMixin
 # from app.repositories.data_adapters import DataSourceFactory, DataSourceAdapter # Comentado si no se usa directamente
-from app.services.dashboard_service_v2 import DashboardServiceV2 # Asumiendo que este servicio maneja productividad
+from app.services.dashboard_service_v2 import DashboardServiceV2
+from app.services.productivity_service import ProductivityService
 from app.models.productivity import (
     ProductivityRequest,
     ProductivityResponse,
@@ -46,7 +47,7 @@ class ProductivityAPI(LoggerMixin):
     @router.post("/", response_model=ProductivityResponse) # Ruta simplificada a "/" ya que el prefijo está en el router
     async def get_productivity_data_post_endpoint( # Renombrado para claridad
         request: ProductivityRequest,
-        service: DashboardServiceV2 = Depends(get_dashboard_service) # Usar el servicio adecuado
+        service: ProductivityService = Depends(get_productivity_service)
     ) -> ProductivityResponse:
         """
         Obtiene datos de análisis de productividad.
@@ -68,17 +69,9 @@ class ProductivityAPI(LoggerMixin):
                     detail="La fecha de fin debe ser posterior a la fecha de inicio."
                 )
             
-            # Generar datos de productividad usando el servicio
-            # El servicio debería devolver un diccionario que coincida con ProductivityResponse
-            productivity_data_dict = await service.get_productivity_data(
-                filters=request.filtros if request.filtros else {}, # Usar el nombre de campo unificado
-                fecha_inicio=current_fecha_inicio,
-                fecha_fin=current_fecha_fin,
-                metric_type=request.metric_type if request.metric_type else "gestiones" # Usar el nombre de campo unificado
-            )
-            
-            # Pydantic validará y convertirá el diccionario al modelo ProductivityResponse
-            return ProductivityResponse(**productivity_data_dict)
+            # 🆕 Rollups agente × día/hora del mart (fechas explícitas: la clave de caché no depende de "hoy")
+            request.fecha_inicio, request.fecha_fin = current_fecha_inicio, current_fecha_fin
+            return await service.get_productivity_analysis(request)
             
         except HTTPException:
             raise  # Re-lanzar excepciones HTTP directamente
@@ -95,7 +88,7 @@ class ProductivityAPI(LoggerMixin):
         fecha_fin: Optional[date] = Query(None, description="Fecha de fin (YYYY-MM-DD)"),
         # agente: Optional[str] = Query(None, description="ID o nombre del agente"), # Si se quiere filtrar por GET
         # metric_type: Optional[str] = Query("gestiones", description="Tipo de métrica para heatmap"), # Si se quiere filtrar por GET
-        service: DashboardServiceV2 = Depends(get_dashboard_service)
+        service: ProductivityService = Depends(get_productivity_service)
     ) -> ProductivityResponse:
         """
         Obtiene datos de productividad con método GET (para consultas simples).
@@ -113,16 +106,10 @@ class ProductivityAPI(LoggerMixin):
 
             # Aquí se asume que el GET request no pasará filtros complejos ni metric_type específico
             # Si se necesitaran, deberían añadirse como Query params y pasarse al servicio.
-            # Por ahora, se pasan filtros vacíos y metric_type por defecto.
-            productivity_data_dict = await service.get_productivity_data(
-                filters={}, # Filtros no soportados en este GET simple, o añadir como Query params
-                fecha_inicio=current_fecha_inicio,
-                fecha_fin=current_fecha_fin,
-                metric_type="gestiones" # Metric type por defecto, o añadir como Query param
+            return await service.get_productivity_analysis(
+                ProductivityRequest(fecha_inicio=current_fecha_inicio, fecha_fin=current_fecha_fin)
             )
             
-            return ProductivityResponse(**productivity_data_dict)
-            
         except Exception as e:
             self.logger.error(f"Error al generar datos de productividad (GET): {str(e)}")
             raise HTTPException(
@@ -1,16 +1,27 @@
 """
 🗄️ Redis cache configuration and management
 Cache setup with connection pooling
+
+🆕 Two-tier: in-process L1 (app.core.local_cache) in front of Redis, kept
+consistent across workers through pub/sub invalidation messages
 """
 
-import json
 import logging
-from typing import Any, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
 import redis.asyncio as redis
 from redis.asyncio import ConnectionPool
 
+from app.core.cache_codec import cache_codec
+from app.core.cache_tags import invalidate_tags, register_tags, scan_delete
 from app.core.config import settings
+from app.core.local_cache import (
+    INVALIDATION_CHANNEL,
+    CacheInvalidationListener,
+    invalidation_message,
+    local_cache,
+)
+from app.core.middleware import track_cache_hit, track_cache_miss
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +34,10 @@ class RedisCache:
     def __init__(self):
         self.pool: Optional[ConnectionPool] = None
         self.redis: Optional[redis.Redis] = None
+        # 🆕 Cliente binario (sin decode) para cuerpos de respuesta gzip/bytes
+        self.binary_pool: Optional[ConnectionPool] = None
+        self.binary_redis: Optional[redis.Redis] = None
+        self.invalidation_listener: Optional[CacheInvalidationListener] = None
     
     async def init_redis(self) -> None:
         """
@@ -36,9 +51,20 @@ class RedisCache:
                 decode_responses=True,
             )
             self.redis = redis.Redis(connection_pool=self.pool)
+            self.binary_pool = ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=20,
+                retry_on_timeout=True,
+                decode_responses=False,
+            )
+            self.binary_redis = redis.Redis(connection_pool=self.binary_pool)
             
             # Test connection
             await self.redis.ping()
+
+            # 🆕 Mantener el L1 de este worker al día con las escrituras de los demás
+            self.invalidation_listener = CacheInvalidationListener(self.redis, local_cache)
+            self.invalidation_listener.start()
             logger.info("Redis connection initialized successfully")
             
         except Exception as e:
@@ -49,48 +75,79 @@ class RedisCache:
         """
         Close Redis connections
         """
+        if self.invalidation_listener:
+            await self.invalidation_listener.stop()
+            self.invalidation_listener = None
+        local_cache.clear()
         if self.redis:
             await self.redis.close()
         if self.pool:
             await self.pool.disconnect()
+        if self.binary_redis:
+            await self.binary_redis.close()
+        if self.binary_pool:
+            await self.binary_pool.disconnect()
         logger.info("Redis connections closed")
     
     async def get(self, key: str) -> Optional[Any]:
         """
-        Get value from cache
+        Get value from cache (L1 first, then Redis)
         """
+        hit, value = local_cache.get(key)
+        if hit:
+            track_cache_hit("memory")
+            return value
+        track_cache_miss("memory")
+
         try:
             if not self.redis:
                 await self.init_redis()
             
-            value = await self.redis.get(key)
-            if value:
-                return json.loads(value)
-            return None
+            # 🆕 Valores binarios (cache_codec): se leen con el cliente sin decode
+            async with self.binary_redis.pipeline(transaction=False) as pipe:
+                pipe.get(key)
+                pipe.ttl(key)
+                raw, ttl = await pipe.execute()
+            if not raw:
+                track_cache_miss("redis")
+                return None
+
+            track_cache_hit("redis")
+            value = cache_codec.decode(raw)
+            local_cache.set(key, value, ttl if ttl > 0 else None)
+            return value
             
         except Exception as e:
             logger.error(f"Cache get error for key {key}: {e}")
+            track_cache_miss("redis")
             return None
     
     async def set(
         self, 
         key: str, 
         value: Any, 
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None
     ) -> bool:
         """
-        Set value in cache with optional TTL
+        Set value in cache with optional TTL and invalidation tags
         """
         try:
             if not self.redis:
                 await self.init_redis()
             
-            json_value = json.dumps(value, default=str)
-            if ttl:
-                await self.redis.setex(key, ttl, json_value)
-            else:
-                await self.redis.set(key, json_value)
-            
+            encoded = cache_codec.encode(value)
+            async with self.binary_redis.pipeline(transaction=False) as pipe:
+                if ttl:
+                    pipe.setex(key, ttl, encoded)
+                else:
+                    pipe.set(key, encoded)
+                register_tags(pipe, key, tags, ttl)
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+                await pipe.execute()
+
+            # Guardar la forma decodificada (igual a lo que devolvería Redis)
+            local_cache.set(key, cache_codec.decode(encoded), ttl)
             return True
             
         except Exception as e:
@@ -105,7 +162,11 @@ class RedisCache:
             if not self.redis:
                 await self.init_redis()
             
-            result = await self.redis.delete(key)
+            local_cache.delete([key])
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.unlink(key)
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+                result, _ = await pipe.execute()
             return bool(result)
             
         except Exception as e:
@@ -114,20 +175,42 @@ class RedisCache:
     
     async def clear_pattern(self, pattern: str) -> int:
         """
-        Clear all keys matching pattern
+        Clear all keys matching pattern (SCAN + chunked UNLINK, never KEYS)
         """
         try:
             if not self.redis:
                 await self.init_redis()
             
-            keys = await self.redis.keys(pattern)
-            if keys:
-                return await self.redis.delete(*keys)
-            return 0
+            local_cache.delete_pattern(pattern)
+            await self.redis.publish(INVALIDATION_CHANNEL, invalidation_message(pattern=pattern))
+
+            deleted = 0
+            async for keys in scan_delete(self.redis, pattern):
+                deleted += len(keys)
+            return deleted
             
         except Exception as e:
             logger.error(f"Cache clear pattern error for {pattern}: {e}")
             return 0
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Clear all keys registered under any of the tags
+        """
+        try:
+            if not self.redis:
+                await self.init_redis()
+
+            deleted = 0
+            async for keys in invalidate_tags(self.redis, tags):
+                local_cache.delete(keys)
+                await self.redis.publish(INVALIDATION_CHANNEL, invalidation_message(keys=keys))
+                deleted += len(keys)
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Cache invalidate tags error for {tags}: {e}")
+            return 0
     
     async def exists(self, key: str) -> bool:
         """
@@ -0,0 +1,193 @@
+"""
+🗜️ Cache codec - Valores de caché binarios, compactos y versionados
+
+Formato: 1 byte de cabecera + payload.
+
+    cabecera = 0xC0 | (serializador << 2) | compresor
+
+- Serializador: 0 = JSON (orjson), 1 = msgpack (opcional)
+- Compresor: 0 = ninguno, 1 = zlib, 2 = zstd (opcional), 3 = lz4 (opcional)
+
+Solo se comprime por encima de CACHE_COMPRESSION_MIN_BYTES. Las entradas
+viejas (texto JSON de json.dumps) empiezan con un byte ASCII < 0x80 y se
+siguen leyendo sin cabecera: no hace falta vaciar Redis al desplegar.
+
+Las librerías opcionales se instalan con el extra "cache" (pip install .[cache]);
+si faltan, se usa el siguiente disponible (zstd → lz4 → zlib, msgpack → JSON).
+"""
+
+import json
+import logging
+import time
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import orjson
+
+from app.core.middleware import track_cache_codec, track_cache_compression
+from shared.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - dependencia opcional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependencia opcional
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover - dependencia opcional
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+HEADER_BASE = 0xC0
+
+SERIALIZER_JSON = 0
+SERIALIZER_MSGPACK = 1
+
+COMPRESSOR_NONE = 0
+COMPRESSOR_ZLIB = 1
+COMPRESSOR_ZSTD = 2
+COMPRESSOR_LZ4 = 3
+
+SERIALIZER_NAMES = {SERIALIZER_JSON: "json", SERIALIZER_MSGPACK: "msgpack"}
+COMPRESSOR_NAMES = {COMPRESSOR_NONE: "none", COMPRESSOR_ZLIB: "zlib", COMPRESSOR_ZSTD: "zstd", COMPRESSOR_LZ4: "lz4"}
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _msgpack_default(value: Any) -> Any:
+    # Fechas, Decimal, etc. como texto (igual que json.dumps(default=str))
+    return str(value)
+
+
+def _serializers() -> Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]]:
+    serializers = {
+        SERIALIZER_JSON: (lambda value: orjson.dumps(value, default=str, option=_ORJSON_OPTIONS), orjson.loads),
+    }
+    if msgpack is not None:
+        serializers[SERIALIZER_MSGPACK] = (
+            lambda value: msgpack.packb(value, default=_msgpack_default, use_bin_type=True),
+            lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+        )
+    return serializers
+
+
+def _compressors() -> Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    compressors = {COMPRESSOR_ZLIB: (lambda data: zlib.compress(data, 6), zlib.decompress)}
+    if zstandard is not None:
+        compressors[COMPRESSOR_ZSTD] = (
+            lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+            lambda data: zstandard.ZstdDecompressor().decompress(data),
+        )
+    if lz4_frame is not None:
+        compressors[COMPRESSOR_LZ4] = (lz4_frame.compress, lz4_frame.decompress)
+    return compressors
+
+
+class CacheCodec:
+    """
+    Codifica/decodifica valores de caché (bytes con cabecera de 1 byte)
+    """
+
+    SERIALIZER_IDS = {"json": SERIALIZER_JSON, "msgpack": SERIALIZER_MSGPACK}
+    # Preferencia de compresores: el configurado primero, luego el más rápido disponible
+    COMPRESSOR_PREFERENCE = ("zstd", "lz4", "zlib")
+    COMPRESSOR_IDS = {"zlib": COMPRESSOR_ZLIB, "zstd": COMPRESSOR_ZSTD, "lz4": COMPRESSOR_LZ4}
+
+    def __init__(
+        self,
+        serializer: str = settings.CACHE_SERIALIZER,
+        compressor: str = settings.CACHE_COMPRESSOR,
+        compression_min_bytes: int = settings.CACHE_COMPRESSION_MIN_BYTES
+    ):
+        """
+        Args:
+            serializer: "json" o "msgpack" (si msgpack no está instalado se usa JSON)
+            compressor: "zstd", "lz4", "zlib" o "none"
+            compression_min_bytes: Tamaño serializado mínimo para comprimir
+        """
+        self.serializers = _serializers()
+        self.compressors = _compressors()
+        self.compression_min_bytes = compression_min_bytes
+
+        self.serializer_id = self.SERIALIZER_IDS.get(serializer, SERIALIZER_JSON)
+        if self.serializer_id not in self.serializers:
+            logger.warning(f"Cache serializer '{serializer}' not installed, using json")
+            self.serializer_id = SERIALIZER_JSON
+
+        self.compressor_id = COMPRESSOR_NONE
+        if compressor != "none":
+            for name in (compressor, *self.COMPRESSOR_PREFERENCE):
+                if self.COMPRESSOR_IDS.get(name) in self.compressors:
+                    self.compressor_id = self.COMPRESSOR_IDS[name]
+                    break
+            if COMPRESSOR_NAMES[self.compressor_id] != compressor:
+                logger.warning(
+                    f"Cache compressor '{compressor}' not available, using {COMPRESSOR_NAMES[self.compressor_id]}"
+                )
+
+    @staticmethod
+    def _codec_name(serializer_id: int, compressor_id: int) -> str:
+        return f"{SERIALIZER_NAMES[serializer_id]}+{COMPRESSOR_NAMES[compressor_id]}"
+
+    def encode(self, value: Any) -> bytes:
+        start = time.perf_counter()
+        dumps, _ = self.serializers[self.serializer_id]
+        payload = dumps(value)
+        raw_size = len(payload)
+
+        compressor_id = COMPRESSOR_NONE
+        if self.compressor_id != COMPRESSOR_NONE and raw_size >= self.compression_min_bytes:
+            compress, _ = self.compressors[self.compressor_id]
+            compressed = compress(payload)
+            # Datos poco comprimibles: guardar sin comprimir
+            if len(compressed) < raw_size:
+                payload, compressor_id = compressed, self.compressor_id
+
+        codec = self._codec_name(self.serializer_id, compressor_id)
+        track_cache_codec("encode", codec, time.perf_counter() - start)
+        track_cache_compression(codec, raw_size, len(payload) + 1)
+        return bytes([HEADER_BASE | (self.serializer_id << 2) | compressor_id]) + payload
+
+    def decode(self, data: Optional[bytes]) -> Any:
+        if not data:
+            return None
+
+        start = time.perf_counter()
+        if isinstance(data, str):
+            data = data.encode()
+
+        header = data[0]
+        if header < 0x80:
+            # Entrada legacy: texto JSON sin cabecera
+            value = json.loads(data)
+            track_cache_codec("decode", "legacy", time.perf_counter() - start)
+            return value
+
+        if (header & 0xF0) != HEADER_BASE:
+            raise ValueError(f"Unknown cache value header: {header:#x}")
+
+        serializer_id, compressor_id = (header >> 2) & 0x03, header & 0x03
+        if serializer_id not in self.serializers or (
+            compressor_id != COMPRESSOR_NONE and compressor_id not in self.compressors
+        ):
+            raise ValueError(f"Cache codec {header:#x} not installed in this worker")
+
+        payload = data[1:]
+        if compressor_id != COMPRESSOR_NONE:
+            _, decompress = self.compressors[compressor_id]
+            payload = decompress(payload)
+        _, loads = self.serializers[serializer_id]
+        value = loads(payload)
+
+        track_cache_codec("decode", self._codec_name(serializer_id, compressor_id), time.perf_counter() - start)
+        return value
+
+
+# Codec global del proceso
+cache_codec = CacheCodec()
@@ -0,0 +1,127 @@
+"""
+🏷️ Cache tags - Invalidación por etiquetas sin KEYS
+
+Cada entrada cacheada se registra en sorted sets de Redis por etiqueta (ej.
+"endpoint:dashboard", "cartera:TEMPRANA", "fecha:2025-06-20"), con la hora de
+expiración de la entrada como score. Invalidar una etiqueta recorre solo su
+set (ZSCAN) y borra sus claves con UNLINK en lotes pipelineados: el costo
+depende de las entradas de la etiqueta, no del total de claves en Redis.
+
+Los miembros vencidos se podan (ZREMRANGEBYSCORE) en cada escritura y antes
+de invalidar, así el set de una etiqueta muy escrita no acumula claves muertas.
+
+scan_delete() cubre claves legacy sin etiquetas con SCAN (no bloqueante)
+en lugar de KEYS.
+"""
+
+import time
+from typing import Any, AsyncIterator, Iterable, List, Optional
+
+import redis.asyncio as redis
+
+from shared.core.config import settings
+
+# Prefijo propio de los sorted sets: los sets de la versión anterior darían WRONGTYPE
+TAG_KEY_PREFIX = "cache:ztag:"
+
+
+def tag_key(tag: str) -> str:
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+def entry_tags(
+    endpoint: str,
+    carteras: Optional[Iterable[Optional[str]]] = None,
+    fechas: Optional[Iterable[Any]] = None
+) -> List[str]:
+    """Etiquetas estándar de una entrada: endpoint, carteras filtradas y fechas"""
+    tags = [f"endpoint:{endpoint}"]
+    tags.extend(f"cartera:{cartera}" for cartera in carteras or () if cartera)
+    tags.extend(f"fecha:{fecha}" for fecha in fechas or () if fecha)
+    return tags
+
+
+def register_tags(pipe: Any, key: str, tags: Optional[Iterable[str]], ttl: Optional[int] = None) -> None:
+    """
+    Agregar al pipeline el registro de la clave en los sets de sus etiquetas
+
+    El score es la hora en que vence la entrada (ttl = TTL duro en segundos);
+    cada escritura poda los miembros ya vencidos. El set vive al menos tanto
+    como la entrada (CACHE_TAG_TTL_SECONDS cubre el TTL duro más largo).
+    """
+    now = time.time()
+    retention = max(ttl or 0, settings.CACHE_TAG_TTL_SECONDS)
+    expires_at = now + (ttl or retention)
+    for tag in tags or ():
+        pipe.zremrangebyscore(tag_key(tag), "-inf", now)
+        pipe.zadd(tag_key(tag), {key: expires_at})
+        pipe.expire(tag_key(tag), retention)
+
+
+def _as_str(key: Any) -> str:
+    return key.decode() if isinstance(key, bytes) else key
+
+
+async def _members(entries: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """Solo los miembros de un ZSCAN (que devuelve pares miembro, score)"""
+    async for member, _ in entries:
+        yield member
+
+
+async def _chunks(keys: AsyncIterator[Any], chunk_size: int) -> AsyncIterator[List[str]]:
+    chunk: List[str] = []
+    async for key in keys:
+        chunk.append(_as_str(key))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def unlink_chunk(redis_client: redis.Redis, keys: List[str]) -> int:
+    """UNLINK de un lote (la memoria se libera en segundo plano en Redis)"""
+    if not keys:
+        return 0
+    return await redis_client.unlink(*keys)
+
+
+async def invalidate_tags(
+    redis_client: redis.Redis,
+    tags: Iterable[str],
+    chunk_size: int = settings.CACHE_INVALIDATION_CHUNK_SIZE
+) -> AsyncIterator[List[str]]:
+    """
+    Borrar las entradas de las etiquetas en lotes; devuelve cada lote borrado
+
+    Uso: async for keys in invalidate_tags(redis, ["cartera:TEMPRANA"]): ...
+    """
+    for tag in tags:
+        set_key = tag_key(tag)
+        # Las entradas vencidas ya no existen: no hace falta recorrerlas
+        await redis_client.zremrangebyscore(set_key, "-inf", time.time())
+        members = _members(redis_client.zscan_iter(set_key, count=chunk_size))
+        async for chunk in _chunks(members, chunk_size):
+            # Borrar las entradas y sacarlas del set en el mismo round-trip
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.unlink(*chunk)
+                pipe.zrem(set_key, *chunk)
+                await pipe.execute()
+            yield chunk
+        await redis_client.unlink(set_key)
+
+
+async def scan_delete(
+    redis_client: redis.Redis,
+    pattern: str,
+    chunk_size: int = settings.CACHE_INVALIDATION_CHUNK_SIZE
+) -> AsyncIterator[List[str]]:
+    """
+    Fallback para claves sin etiquetas: SCAN + UNLINK por lotes; devuelve cada lote
+
+    SCAN es incremental (no bloquea Redis como KEYS), pero recorre todo el
+    keyspace: preferir invalidate_tags() o generaciones.
+    """
+    async for chunk in _chunks(redis_client.scan_iter(match=pattern, count=chunk_size), chunk_size):
+        await unlink_chunk(redis_client, chunk)
+        yield chunk
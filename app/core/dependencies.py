@@ -2,7 +2,7 @@
 💧 Dependency Injection Container
 Centralizes the creation and provisioning of resources, repositories, and services.
 """
-from typing import Annotated
+from typing import Annotated, Optional
 from fastapi import Depends
 import redis.asyncio as redis
 
@@ -11,9 +11,13 @@ from app.repositories.bigquery_repo import BigQueryRepository
 from app.repositories.postgres_repo import PostgresRepository
 from app.repositories.user_repo import UserRepository
 from app.repositories.cache_repo import CacheRepository
+from app.services.dashboard_engines import BigQueryDashboardEngine, PostgresDashboardEngine
 from app.services.dashboard_service_v2 import DashboardServiceV2
 from app.services.cache_service import CacheService
+from app.services.productivity_service import ProductivityService
+from app.services.response_cache import ResponseCache
 from app.services.user_service import UserService
+from shared.core.config import settings
 
 # -------------------------------------------------------------------
 # Core Resources
@@ -25,6 +29,12 @@ async def get_redis_client() -> redis.Redis:
         await redis_cache_manager.init_redis()
     return redis_cache_manager.redis
 
+async def get_binary_redis_client() -> redis.Redis:
+    """Provides the binary Redis client (decode_responses=False), initializing if necessary."""
+    if not redis_cache_manager.binary_redis:
+        await redis_cache_manager.init_redis()
+    return redis_cache_manager.binary_redis
+
 # -------------------------------------------------------------------
 # Repositories
 # -------------------------------------------------------------------
@@ -56,16 +66,54 @@ async def get_cache_repo() -> CacheRepository:
 # -------------------------------------------------------------------
 
 def get_cache_service(
-    client: redis.Redis = Depends(get_redis_client)
+    client: redis.Redis = Depends(get_binary_redis_client)
 ) -> CacheService:
-    """Provides the cache service, which wraps the Redis client."""
+    """Provides the cache service, which wraps the binary Redis client (encoded values)."""
     return CacheService(redis_client=client)
 
+def get_response_cache(
+    client: redis.Redis = Depends(get_binary_redis_client)
+) -> ResponseCache:
+    """Provides the HTTP response cache (encoded bodies + ETag)."""
+    return ResponseCache(redis_client=client)
+
+_bigquery_dashboard_engine: Optional[BigQueryDashboardEngine] = None
+
+def get_bigquery_dashboard_engine() -> BigQueryDashboardEngine:
+    """
+    Provides the process-wide BigQuery dashboard engine.
+
+    Built on first use (the repository needs a running loop) and shared, so
+    requests and prewarms don't each open a thread pool and a BigQuery connection.
+    """
+    global _bigquery_dashboard_engine
+    if _bigquery_dashboard_engine is None:
+        _bigquery_dashboard_engine = BigQueryDashboardEngine(get_bigquery_repo())
+    return _bigquery_dashboard_engine
+
 def get_dashboard_service(
     postgres_repo: PostgresRepository = Depends(get_postgres_repo)
 ) -> DashboardServiceV2:
-    """Provides the main dashboard service, which depends on the PostgresRepository."""
-    return DashboardServiceV2(postgres_repo)
+    """
+    Provides the main dashboard service.
+
+    DATA_SOURCE_TYPE=postgresql reads the local mart, with BigQuery only as
+    fallback (DASHBOARD_BIGQUERY_FALLBACK); bigquery keeps the original source.
+    The daily evolution series always comes from the mart (BigQuery only
+    holds the latest snapshot).
+    """
+    postgres_engine = PostgresDashboardEngine(postgres_repo)
+    if settings.DATA_SOURCE_TYPE == "postgresql":
+        fallback_engine = get_bigquery_dashboard_engine() if settings.DASHBOARD_BIGQUERY_FALLBACK else None
+        return DashboardServiceV2(postgres_engine, fallback_engine=fallback_engine)
+    return DashboardServiceV2(get_bigquery_dashboard_engine(), daily_engine=postgres_engine)
+
+def get_productivity_service(
+    postgres_repo: PostgresRepository = Depends(get_postgres_repo),
+    cache_service: CacheService = Depends(get_cache_service)
+) -> ProductivityService:
+    """Provides the productivity service (ETL rollups in the Postgres mart)."""
+    return ProductivityService(postgres_repo, cache_service)
 
 async def get_user_service(
     user_repo: UserRepository = Depends(get_user_repo),
@@ -89,5 +137,7 @@ CacheRepo = Annotated[CacheRepository, Depends(get_cache_repo)]
 
 # Service aliases
 CacheSvc = Annotated[CacheService, Depends(get_cache_service)]
+ResponseCacheSvc = Annotated[ResponseCache, Depends(get_response_cache)]
 DashboardSvc = Annotated[DashboardServiceV2, Depends(get_dashboard_service)]
+ProductivitySvc = Annotated[ProductivityService, Depends(get_productivity_service)]
 UserSvc = Annotated[UserService, Depends(get_user_service)]
@@ -0,0 +1,158 @@
+"""
+🧠 Local (L1) cache - In-process LRU/TTL cache in front of Redis
+
+Evita el round-trip a Redis y el json.loads en claves calientes. Cada worker
+tiene su propio L1; la consistencia entre workers viene de mensajes de
+invalidación por Redis pub/sub: quien escribe o borra una clave publica la
+invalidación y los demás la descartan de su L1.
+
+El TTL del L1 es corto: acota lo que un worker puede servir desactualizado si
+pierde un mensaje (al reconectar la suscripción se vacía el L1 completo).
+
+⚠️ Los valores se comparten entre requests: tratarlos como solo lectura.
+"""
+
+import asyncio
+import fnmatch
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Tuple
+
+import redis.asyncio as redis
+
+from shared.core.cache_generations import INVALIDATION_CHANNEL
+from shared.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifica los mensajes propios (ya aplicados localmente)
+INSTANCE_ID = uuid.uuid4().hex
+
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    Caché LRU en memoria con TTL por entrada, acotada en número de entradas
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Returns:
+            (True, valor) si la clave está vigente; (False, None) si no
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            return False, None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else min(ttl, self.default_ttl)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]) -> int:
+        return sum(1 for key in keys if self._entries.pop(key, _MISSING) is not _MISSING)
+
+    def delete_pattern(self, pattern: str) -> int:
+        """Borrar claves con un patrón glob estilo Redis (ej. 'assignment:*')"""
+        matching = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        return self.delete(matching)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def invalidation_message(keys: Optional[Iterable[str]] = None, pattern: Optional[str] = None) -> str:
+    """Mensaje de invalidación para publicar en INVALIDATION_CHANNEL"""
+    return json.dumps({"origin": INSTANCE_ID, "keys": list(keys or []), "pattern": pattern})
+
+
+def apply_invalidation(cache: LocalCache, message: str) -> int:
+    """Aplicar un mensaje de invalidación recibido de otro worker"""
+    try:
+        payload = json.loads(message)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed cache invalidation message: {message!r}")
+        return 0
+
+    if payload.get("origin") == INSTANCE_ID:
+        return 0
+
+    removed = cache.delete(payload.get("keys") or [])
+    if payload.get("pattern"):
+        removed += cache.delete_pattern(payload["pattern"])
+    return removed
+
+
+class CacheInvalidationListener:
+    """
+    Suscripción a INVALIDATION_CHANNEL que mantiene el L1 de este worker al día
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(self, redis_client: redis.Redis, cache: LocalCache):
+        self.redis = redis_client
+        self.cache = cache
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(INVALIDATION_CHANNEL)
+                    # Mensajes perdidos mientras no había suscripción: empezar de cero
+                    self.cache.clear()
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            apply_invalidation(self.cache, message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscription lost ({e}), reconnecting")
+                self.cache.clear()
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+
+# L1 global del proceso (compartido por RedisCache y CacheService)
+local_cache = LocalCache(
+    max_entries=settings.CACHE_L1_MAX_ENTRIES,
+    default_ttl=settings.CACHE_L1_TTL_SECONDS
+)
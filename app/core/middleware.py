@@ -45,6 +45,44 @@ CACHE_MISSES = Counter(
     ["cache_type"]
 )
 
+CACHE_COALESCED_REQUESTS = Counter(
+    "cache_coalesced_requests_total",
+    "Cache misses served by an in-flight computation instead of recomputing",
+    ["scope"]
+)
+
+CACHE_STALE_SERVED = Counter(
+    "cache_stale_served_total",
+    "Stale cache entries served while a background refresh recomputes them",
+    ["cache_type"]
+)
+
+CACHE_BACKGROUND_REFRESHES = Counter(
+    "cache_background_refreshes_total",
+    "Background refreshes of stale cache entries",
+    ["status"]
+)
+
+CACHE_CODEC_DURATION = Histogram(
+    "cache_codec_duration_seconds",
+    "Cache value encode/decode time in seconds",
+    ["operation", "codec"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5)
+)
+
+CACHE_COMPRESSION_RATIO = Histogram(
+    "cache_compression_ratio",
+    "Serialized size / stored size of cache values",
+    ["codec"],
+    buckets=(1, 1.5, 2, 3, 5, 8, 12, 20)
+)
+
+CACHE_STORED_BYTES = Counter(
+    "cache_stored_bytes_total",
+    "Bytes of cache values before (raw) and after (stored) compression",
+    ["codec", "stage"]
+)
+
 BIGQUERY_QUERIES = Counter(
     "bigquery_queries_total",
     "Total BigQuery queries",
@@ -57,6 +95,47 @@ BIGQUERY_DURATION = Histogram(
     ["dataset", "view"]
 )
 
+BIGQUERY_BYTES_PROCESSED = Counter(
+    "bigquery_bytes_processed_total",
+    "Bytes processed by BigQuery queries issued by the API",
+    ["endpoint"]
+)
+
+BIGQUERY_SLOT_MS = Counter(
+    "bigquery_slot_milliseconds_total",
+    "Slot milliseconds consumed by BigQuery queries issued by the API",
+    ["endpoint"]
+)
+
+BIGQUERY_DRY_RUNS = Counter(
+    "bigquery_dry_runs_total",
+    "BigQuery dry-runs for new query templates",
+    ["endpoint"]
+)
+
+BIGQUERY_COST_GATE_DECISIONS = Counter(
+    "bigquery_cost_gate_decisions_total",
+    "BigQuery cost gate decisions (allow, downgrade, reject)",
+    ["endpoint", "action"]
+)
+
+BIGQUERY_CACHE_BYTES_SAVED = Counter(
+    "bigquery_cache_bytes_saved_total",
+    "BigQuery bytes processed avoided by query result cache hits",
+    ["tier"]
+)
+
+BIGQUERY_CACHE_COST_AVOIDED = Counter(
+    "bigquery_cache_cost_avoided_usd_total",
+    "Estimated BigQuery on-demand cost avoided by query result cache hits (USD)",
+    ["tier"]
+)
+
+BIGQUERY_RESULT_CACHE_SIZE = Gauge(
+    "bigquery_result_cache_bytes",
+    "Estimated size of the in-memory BigQuery query result cache"
+)
+
 
 class TimingMiddleware(BaseHTTPMiddleware):
     """
@@ -199,9 +278,84 @@ def track_cache_miss(cache_type: str) -> None:
     CACHE_MISSES.labels(cache_type=cache_type).inc()
 
 
+def track_coalesced_request(scope: str) -> None:
+    """
+    Track a cache miss coalesced onto an in-flight computation
+    (scope: "local" = same worker, "redis" = another worker holding the lock)
+    """
+    CACHE_COALESCED_REQUESTS.labels(scope=scope).inc()
+
+
+def track_stale_served(cache_type: str) -> None:
+    """
+    Track a stale cache entry served (stale-while-revalidate)
+    """
+    CACHE_STALE_SERVED.labels(cache_type=cache_type).inc()
+
+
+def track_background_refresh(status: str) -> None:
+    """
+    Track a background refresh (status: success, error, skipped)
+    """
+    CACHE_BACKGROUND_REFRESHES.labels(status=status).inc()
+
+
+def track_cache_codec(operation: str, codec: str, duration: float) -> None:
+    """
+    Track cache value encode/decode time
+    """
+    CACHE_CODEC_DURATION.labels(operation=operation, codec=codec).observe(duration)
+
+
+def track_cache_compression(codec: str, raw_bytes: int, stored_bytes: int) -> None:
+    """
+    Track cache value size before and after compression
+    """
+    CACHE_COMPRESSION_RATIO.labels(codec=codec).observe(raw_bytes / stored_bytes if stored_bytes else 1)
+    CACHE_STORED_BYTES.labels(codec=codec, stage="raw").inc(raw_bytes)
+    CACHE_STORED_BYTES.labels(codec=codec, stage="stored").inc(stored_bytes)
+
+
 def track_bigquery_query(dataset: str, view: str, duration: float) -> None:
     """
     Track BigQuery query metrics
     """
     BIGQUERY_QUERIES.labels(dataset=dataset, view=view).inc()
-    BIGQUERY_DURATION.labels(dataset=dataset, view=view).observe(duration)
\ No newline at end of file
+    BIGQUERY_DURATION.labels(dataset=dataset, view=view).observe(duration)
+
+
+def track_bigquery_cache_saving(tier: str, bytes_processed: int, cost_usd: float) -> None:
+    """
+    Track BigQuery bytes and cost avoided by a query result cache hit
+    """
+    BIGQUERY_CACHE_BYTES_SAVED.labels(tier=tier).inc(bytes_processed)
+    BIGQUERY_CACHE_COST_AVOIDED.labels(tier=tier).inc(cost_usd)
+
+
+def track_bigquery_result_cache_size(size_bytes: int) -> None:
+    """
+    Track the in-memory BigQuery query result cache size
+    """
+    BIGQUERY_RESULT_CACHE_SIZE.set(size_bytes)
+
+
+def track_bigquery_job(endpoint: str, bytes_processed: int, slot_ms: int) -> None:
+    """
+    Track bytes processed and slot time of a BigQuery job
+    """
+    BIGQUERY_BYTES_PROCESSED.labels(endpoint=endpoint).inc(bytes_processed)
+    BIGQUERY_SLOT_MS.labels(endpoint=endpoint).inc(slot_ms)
+
+
+def track_bigquery_dry_run(endpoint: str) -> None:
+    """
+    Track a BigQuery dry-run (new query template)
+    """
+    BIGQUERY_DRY_RUNS.labels(endpoint=endpoint).inc()
+
+
+def track_bigquery_cost_gate(endpoint: str, action: str) -> None:
+    """
+    Track a BigQuery cost gate decision
+    """
+    BIGQUERY_COST_GATE_DECISIONS.labels(endpoint=endpoint, action=action).inc()
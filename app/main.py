@@ -18,6 +18,7 @@ from app.core.config import settings
 from app.core.cache import cache as redis_cache
 from app.core.logging import setup_logging
 from app.core.middleware import TimingMiddleware, PrometheusMiddleware, SecurityMiddleware
+from app.services.cache_namespaces import MartRebuiltListener, prewarmer
 
 # Configurar el logging tan pronto como sea posible
 setup_logging()
@@ -36,6 +37,10 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     await redis_cache.init_redis()
     logger.info("Pool de conexiones de Redis inicializado.")
 
+    # 🆕 Precalentar la caché cuando el ETL reconstruye un mart
+    mart_rebuilt_listener = MartRebuiltListener(redis_cache.redis, prewarmer)
+    mart_rebuilt_listener.start()
+
     # ❌ REMOVIDO: init_db ya no existe (refactorizado a asyncpg directo)
     # await init_db()  # Descomentar si necesitas crear tablas al inicio
     # logger.info("Base de datos inicializada.")
@@ -53,6 +58,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     logger.info("Deteniendo la API Pulso-Back...")
 
     # Cerrar el pool de conexiones de Redis
+    await mart_rebuilt_listener.stop()
     await redis_cache.close()
     logger.info("Conexiones de Redis cerradas.")
 
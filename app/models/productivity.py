@@ -68,8 +68,8 @@ class AgentHeatmapRow(FrontendCompatibleModel):
     id: str = Field(description="Identificador único del agente")
     dni: str = Field(description="DNI del agente")
     agentName: str = Field(description="Nombre completo del agente")
-    dailyPerformance: Dict[int, Optional[AgentDailyPerformance]] = Field(
-        description="Rendimiento diario por número de día"
+    dailyPerformance: Dict[str, Optional[AgentDailyPerformance]] = Field(
+        description="Rendimiento diario por fecha (YYYY-MM-DD)"
     )
 
 
@@ -78,7 +78,8 @@ class ProductivityTrendPoint(FrontendCompatibleModel):
     Punto de datos para la tendencia de productividad.
     (Coincide con el modelo inline y el de app/models/productivity.py)
     """
-    day: Optional[int] = Field(None, description="Número del día (para tendencia diaria)")
+    fecha: Optional[str] = Field(None, description="Fecha YYYY-MM-DD (para tendencia diaria)")
+    day: Optional[int] = Field(None, description="Número del día del mes (para tendencia diaria)")
     hour: Optional[str] = Field(None, description="Cadena de hora (para tendencia horaria, ej: '09:00')")
     llamadas: int = Field(description="Número de llamadas")
     compromisos: int = Field(description="Número de compromisos")
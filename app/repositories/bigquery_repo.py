@@ -13,16 +13,25 @@ from functools import wraps
 
 import pandas as pd
 from google.cloud import bigquery
-from google.cloud.bigquery import QueryJobConfig
+from google.cloud.bigquery import QueryJobConfig, QueryPriority
 from google.oauth2 import service_account
 from tenacity import (
     retry,
     stop_after_attempt,
     wait_exponential,
-    retry_if_exception_type,
+    retry_if_not_exception_type,
 )
 
+from app.core.logging import LoggerMixin
+from app.core.middleware import track_bigquery_job, track_bigquery_query
 from app.repositories.base import BaseRepository
+from app.repositories.query_cost import (
+    QueryCostExceededError,
+    QueryCostGate,
+    query_cost_gate,
+    query_template_key,
+)
+from app.repositories.query_result_cache import QueryResultCache, bigquery_result_cache, query_cache_key
 from shared.core.config import settings
 
 
@@ -32,7 +41,8 @@ def async_retry(func):
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
-        retry=retry_if_exception_type((Exception,)),
+        # 🔧 Un rechazo por costo no se reintenta
+        retry=retry_if_not_exception_type(QueryCostExceededError),
     )
     @wraps(func)
     async def wrapper(*args, **kwargs):
@@ -41,28 +51,35 @@ def async_retry(func):
     return wrapper
 
 
-class BigQueryRepository(BaseRepository):
+class BigQueryRepository(BaseRepository, LoggerMixin):
     """
     Enhanced BigQuery repository with async support, retry logic, and advanced features.
 
     Features:
     - True async operations using ThreadPoolExecutor
     - Automatic retry on failures
-    - Query result caching
+    - Query result caching (🆕 shared, memory-bounded LRU/TTL + optional Redis tier)
     - Pagination support
     - Data type conversion utilities
-    - Performance metrics
+    - Performance metrics (🆕 bytes processed and slot-ms per endpoint)
+    - 🆕 Dry-run cost gate per query template (downgrade/reject over budget)
     - Structured logging
     """
 
-    def __init__(self, max_workers: int = 4):
+    def __init__(
+            self,
+            max_workers: int = 4,
+            result_cache: Optional[QueryResultCache] = None,
+            cost_gate: Optional[QueryCostGate] = None
+    ):
         super().__init__()
         self.client: Optional[bigquery.Client] = None
         self.project_id = settings.BIGQUERY_PROJECT_ID
         self.dataset_id = settings.BIGQUERY_DATASET
         self.location = settings.BIGQUERY_LOCATION
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
-        self._query_cache: Dict[str, Any] = {}
+        self.result_cache = result_cache if result_cache is not None else bigquery_result_cache
+        self.cost_gate = cost_gate if cost_gate is not None else query_cost_gate
         self._connection_attempts = 0
         self._max_connection_attempts = 3
 
@@ -166,7 +183,7 @@ class BigQueryRepository(BaseRepository):
             return False
 
         try:
-            await self.execute_query("SELECT 1 as health_check")
+            await self.execute_query("SELECT 1 as health_check", endpoint="health")
             return True
         except Exception as e:
             self.logger.error(f"BigQuery health check failed: {e}")
@@ -179,7 +196,8 @@ class BigQueryRepository(BaseRepository):
             params: Optional[Dict[str, Any]] = None,
             use_cache: bool = False,
             cache_ttl: int = 3600,
-            max_results: Optional[int] = None
+            max_results: Optional[int] = None,
+            endpoint: str = "other"
     ) -> List[Dict[str, Any]]:
         """
         Executes a BigQuery query with advanced features
@@ -190,18 +208,28 @@ class BigQueryRepository(BaseRepository):
             use_cache: Whether to cache results
             cache_ttl: Cache TTL in seconds
             max_results: Maximum number of results to return
+            endpoint: Label for cost metrics (bytes processed, slot-ms, gate decisions)
 
         Returns:
             List of dictionaries with query results
+
+        Raises:
+            QueryCostExceededError: If the estimated bytes exceed the cost gate limit
         """
         if not self.client:
             await self.connect()
 
         # Check cache first
         cache_key = self._get_cache_key(query, params) if use_cache else None
-        if cache_key and cache_key in self._query_cache:
-            self.logger.debug(f"📋 Cache hit for query: {query[:100]}...")
-            return self._query_cache[cache_key]
+        if cache_key:
+            cached = await self.result_cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug(f"📋 Cache hit for query: {query[:100]}...")
+                return cached
+
+        # 🆕 Cost gate: dry-run once per query template, downgrade/reject over budget
+        template = query_template_key(query, params, self._get_bigquery_type)
+        decision = await self.cost_gate.check(template, endpoint, lambda: self.dry_run(query, params))
 
         start_time = datetime.now(timezone.utc)
 
@@ -211,8 +239,9 @@ class BigQueryRepository(BaseRepository):
             if params:
                 job_config.query_parameters = self._build_query_parameters(params)
 
-            if max_results:
-                job_config.maximum_bytes_billed = 100 * 1024 * 1024 * 1024  # 100 GB limit
+            job_config.maximum_bytes_billed = self.cost_gate.max_bytes_billed
+            if decision.downgrade:
+                job_config.priority = QueryPriority.BATCH
 
             # Execute query in thread pool
             loop = asyncio.get_event_loop()
@@ -229,22 +258,29 @@ class BigQueryRepository(BaseRepository):
 
             # Convert to dict format
             data = [dict(row) for row in results]
+            bytes_processed = getattr(query_job, 'total_bytes_processed', 0) or 0
+            slot_ms = getattr(query_job, 'slot_millis', 0) or 0
+            self.cost_gate.record_actual(template, bytes_processed, bool(getattr(query_job, 'cache_hit', False)))
 
             # Cache results if requested
             if cache_key:
-                self._query_cache[cache_key] = data
-                # Simple TTL - in production use Redis with proper TTL
-                asyncio.create_task(self._expire_cache_key(cache_key, cache_ttl))
+                await self.result_cache.set(cache_key, data, bytes_processed, cache_ttl)
 
             # Log metrics
             execution_time = (datetime.now(timezone.utc) - start_time).total_seconds()
+            track_bigquery_query(self.dataset_id, endpoint, execution_time)
+            track_bigquery_job(endpoint, bytes_processed, slot_ms)
             self.logger.info(
                 f"🔍 BigQuery query executed successfully",
                 extra={
                     "query_hash": hash(query) % 10000,
                     "execution_time": execution_time,
                     "rows_returned": len(data),
-                    "bytes_processed": getattr(query_job, 'total_bytes_processed', 0),
+                    "bytes_processed": bytes_processed,
+                    "estimated_bytes": decision.estimated_bytes,
+                    "slot_ms": slot_ms,
+                    "priority": "batch" if decision.downgrade else "interactive",
+                    "endpoint": endpoint,
                     "cached": bool(cache_key),
                 }
             )
@@ -265,6 +301,22 @@ class BigQueryRepository(BaseRepository):
             )
             raise
 
+    async def dry_run(self, query: str, params: Optional[Dict[str, Any]] = None) -> int:
+        """Estimate bytes processed by a query without running it (dry-runs are free)"""
+        if not self.client:
+            await self.connect()
+
+        job_config = QueryJobConfig(dry_run=True, use_query_cache=False)
+        if params:
+            job_config.query_parameters = self._build_query_parameters(params)
+
+        loop = asyncio.get_event_loop()
+        query_job = await loop.run_in_executor(
+            self.executor,
+            lambda: self.client.query(query, job_config=job_config)
+        )
+        return query_job.total_bytes_processed or 0
+
     async def execute_query_to_dataframe(
             self,
             query: str,
@@ -407,23 +459,12 @@ class BigQueryRepository(BaseRepository):
             return "STRING"
 
     def _get_cache_key(self, query: str, params: Optional[Dict[str, Any]] = None) -> str:
-        """Generate cache key for query and parameters"""
-        import hashlib
-
-        key_data = {"query": query, "params": params or {}}
-        key_string = json.dumps(key_data, sort_keys=True, default=str)
-        return hashlib.md5(key_string.encode()).hexdigest()
-
-    async def _expire_cache_key(self, cache_key: str, ttl: int) -> None:
-        """Remove cache key after TTL expires"""
-        await asyncio.sleep(ttl)
-        self._query_cache.pop(cache_key, None)
+        """Generate cache key from normalized SQL and typed parameters"""
+        return query_cache_key(query, params, self._get_bigquery_type)
 
     def clear_cache(self) -> int:
-        """Clear all cached queries"""
-        count = len(self._query_cache)
-        self._query_cache.clear()
-        return count
+        """Clear cached query results held in memory by this worker"""
+        return self.result_cache.clear()
 
     async def __aenter__(self):
         """Async context manager entry"""
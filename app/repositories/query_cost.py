@@ -0,0 +1,147 @@
+"""
+💸 Query cost gate - Dry-run y presupuesto de bytes para las consultas de la API
+
+Cada forma de consulta nueva (plantilla = SQL normalizada + nombres y tipos de
+parámetros, sin valores) se estima una vez con un dry-run (gratis) y la
+estimación se cachea BIGQUERY_DRY_RUN_TTL_SECONDS. Después de cada ejecución
+real la estimación se actualiza con los bytes procesados.
+
+Según BIGQUERY_COST_GATE, una consulta estimada por encima de
+BIGQUERY_QUERY_BYTES_BUDGET:
+- "downgrade": se ejecuta con prioridad BATCH (no compite por slots interactivos)
+- "reject": falla con QueryCostExceededError antes de ejecutarse
+- "off": sin dry-run
+
+Lo que supere BIGQUERY_MAXIMUM_BYTES_BILLED se rechaza siempre: BigQuery
+fallaría el job igual después de encolarlo.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import orjson
+
+from app.core.local_cache import LocalCache
+from app.core.logging import LoggerMixin
+from app.core.middleware import track_bigquery_cost_gate, track_bigquery_dry_run
+from app.repositories.query_result_cache import normalize_sql
+from shared.core.config import settings
+
+GATE_MODES = ("off", "downgrade", "reject")
+
+
+class QueryCostExceededError(Exception):
+    """La consulta escanearía más bytes de los permitidos"""
+
+    def __init__(self, endpoint: str, estimated_bytes: int, limit_bytes: int):
+        self.endpoint = endpoint
+        self.estimated_bytes = estimated_bytes
+        self.limit_bytes = limit_bytes
+        super().__init__(
+            f"BigQuery query for '{endpoint}' would process {estimated_bytes:,} bytes "
+            f"(limit {limit_bytes:,})"
+        )
+
+
+def query_template_key(
+    query: str,
+    params: Optional[Dict[str, Any]],
+    type_of: Callable[[Any], str]
+) -> str:
+    """Clave de la forma de la consulta: SQL normalizada + parámetros tipados sin valores"""
+    typed_names = [[name, type_of(value)] for name, value in sorted((params or {}).items())]
+    payload = orjson.dumps([normalize_sql(query), typed_names])
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+@dataclass
+class CostDecision:
+    action: str  # allow | downgrade
+    estimated_bytes: Optional[int] = None
+
+    @property
+    def downgrade(self) -> bool:
+        return self.action == "downgrade"
+
+
+class QueryCostGate(LoggerMixin):
+    """
+    Estimaciones de bytes por plantilla y decisión de ejecución
+    """
+
+    MAX_TEMPLATES = 2048
+
+    def __init__(
+        self,
+        mode: str = settings.BIGQUERY_COST_GATE,
+        budget_bytes: int = settings.BIGQUERY_QUERY_BYTES_BUDGET,
+        max_bytes_billed: int = settings.BIGQUERY_MAXIMUM_BYTES_BILLED,
+        estimate_ttl: float = settings.BIGQUERY_DRY_RUN_TTL_SECONDS
+    ):
+        if mode not in GATE_MODES:
+            self.logger.warning(f"Unknown BigQuery cost gate mode '{mode}', using 'downgrade'")
+            mode = "downgrade"
+        self.mode = mode
+        self.budget_bytes = budget_bytes
+        self.max_bytes_billed = max_bytes_billed
+        self.estimates = LocalCache(max_entries=self.MAX_TEMPLATES, default_ttl=estimate_ttl)
+
+    async def check(
+        self,
+        template: str,
+        endpoint: str,
+        dry_run: Callable[[], Awaitable[int]]
+    ) -> CostDecision:
+        """
+        Decidir cómo ejecutar una consulta
+
+        Args:
+            template: query_template_key() de la consulta
+            endpoint: Etiqueta de métricas
+            dry_run: Estima los bytes de la consulta (solo si la plantilla es nueva)
+
+        Raises:
+            QueryCostExceededError: Si la estimación supera el límite aplicable
+        """
+        if self.mode == "off":
+            return CostDecision("allow")
+
+        hit, estimated = self.estimates.get(template)
+        if not hit:
+            try:
+                estimated = await dry_run()
+            except Exception as e:
+                # Un dry-run fallido no bloquea: la ejecución real reportará el error
+                self.logger.warning(f"BigQuery dry-run failed for '{endpoint}': {e}")
+                return CostDecision("allow")
+            track_bigquery_dry_run(endpoint)
+            self.estimates.set(template, estimated)
+
+        if estimated > self.max_bytes_billed:
+            self._reject(endpoint, estimated, self.max_bytes_billed)
+        if estimated > self.budget_bytes:
+            if self.mode == "reject":
+                self._reject(endpoint, estimated, self.budget_bytes)
+            track_bigquery_cost_gate(endpoint, "downgrade")
+            self.logger.info(
+                f"⬇️ BigQuery query for '{endpoint}' downgraded to batch priority",
+                extra={"estimated_bytes": estimated, "budget_bytes": self.budget_bytes}
+            )
+            return CostDecision("downgrade", estimated)
+
+        track_bigquery_cost_gate(endpoint, "allow")
+        return CostDecision("allow", estimated)
+
+    def record_actual(self, template: str, bytes_processed: int, cache_hit: bool) -> None:
+        """Actualizar la estimación con los bytes reales (salvo hits de la caché de BigQuery)"""
+        if self.mode != "off" and not cache_hit:
+            self.estimates.set(template, bytes_processed)
+
+    def _reject(self, endpoint: str, estimated: int, limit: int) -> None:
+        track_bigquery_cost_gate(endpoint, "reject")
+        raise QueryCostExceededError(endpoint, estimated, limit)
+
+
+# Gate global del proceso (estimaciones compartidas por todos los BigQueryRepository)
+query_cost_gate = QueryCostGate()
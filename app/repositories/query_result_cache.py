@@ -0,0 +1,218 @@
+"""
+🧮 Query result cache - Resultados de BigQuery compartidos y acotados en memoria
+
+- Clave: SQL normalizada (sin comentarios ni espacios redundantes fuera de
+  literales) + parámetros con su tipo BigQuery. Dos consultas iguales con
+  otro formato comparten entrada; 1 (INT64) y "1" (STRING) no.
+- Memoria: LRU + TTL por entrada, acotada en bytes (tamaño JSON estimado de
+  las filas). Es global del proceso: get_bigquery_repo() crea un repositorio
+  por request y una caché por instancia nunca se reutilizaba.
+- Redis (opcional, BIGQUERY_RESULT_CACHE_REDIS): segundo nivel compartido por
+  todos los workers, codificado con cache_codec. Las filas que vienen de Redis
+  traen tipos JSON (fechas y Decimal como texto).
+- Métricas: bytes de BigQuery y costo evitados por cada hit.
+
+⚠️ Las filas se comparten entre requests: tratarlas como solo lectura.
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+import orjson
+
+from app.core.cache import cache as redis_cache
+from app.core.cache_codec import cache_codec
+from app.core.logging import LoggerMixin
+from app.core.middleware import (
+    track_bigquery_cache_saving,
+    track_bigquery_result_cache_size,
+    track_cache_hit,
+    track_cache_miss,
+)
+from shared.core.config import settings
+
+REDIS_KEY_PREFIX = "bq:result:"
+
+BYTES_PER_TIB = 1024 ** 4
+
+# Literales (se conservan tal cual) | secuencias de espacios y comentarios
+_SQL_TOKENS = re.compile(
+    r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|`[^`]*`)|((?:\s+|--[^\n]*|#[^\n]*|/\*.*?\*/)+)""",
+    re.DOTALL
+)
+
+
+def bigquery_cost_usd(bytes_processed: int, price_per_tib: float = settings.BIGQUERY_PRICE_PER_TIB_USD) -> float:
+    """Costo on-demand de escanear bytes_processed"""
+    return bytes_processed / BYTES_PER_TIB * price_per_tib
+
+
+def normalize_sql(query: str) -> str:
+    """Quitar comentarios y colapsar espacios fuera de los literales"""
+    def replace(match: "re.Match[str]") -> str:
+        return match.group(1) or " "
+
+    return _SQL_TOKENS.sub(replace, query).strip()
+
+
+def query_cache_key(
+    query: str,
+    params: Optional[Dict[str, Any]],
+    type_of: Callable[[Any], str]
+) -> str:
+    """
+    Clave de caché de una consulta
+
+    Args:
+        query: SQL
+        params: Parámetros de la consulta
+        type_of: Tipo BigQuery de un valor (BigQueryRepository._get_bigquery_type)
+    """
+    typed_params = [
+        [name, type_of(value), value] for name, value in sorted((params or {}).items())
+    ]
+    payload = orjson.dumps([normalize_sql(query), typed_params], default=str)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    rows: List[Dict[str, Any]]
+    bytes_processed: int
+    size: int
+    expires_at: float
+
+
+class QueryResultCache(LoggerMixin):
+    """
+    Caché LRU/TTL de resultados acotada en bytes, con nivel Redis opcional
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = settings.BIGQUERY_RESULT_CACHE_MAX_BYTES,
+        use_redis: bool = settings.BIGQUERY_RESULT_CACHE_REDIS,
+        price_per_tib: float = settings.BIGQUERY_PRICE_PER_TIB_USD
+    ):
+        self.max_bytes = max_bytes
+        self.use_redis = use_redis
+        self.price_per_tib = price_per_tib
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, CachedResult]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        entry = self._get_local(key)
+        if entry is not None:
+            track_cache_hit("bigquery_memory")
+            self._track_saving("memory", entry.bytes_processed)
+            return list(entry.rows)
+        track_cache_miss("bigquery_memory")
+
+        if not self._redis_available():
+            return None
+
+        try:
+            async with redis_cache.binary_redis.pipeline(transaction=False) as pipe:
+                pipe.get(f"{REDIS_KEY_PREFIX}{key}")
+                pipe.ttl(f"{REDIS_KEY_PREFIX}{key}")
+                raw, ttl = await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"BigQuery result cache Redis get failed: {e}")
+            return None
+
+        if raw is None:
+            track_cache_miss("bigquery_redis")
+            return None
+
+        try:
+            payload = cache_codec.decode(raw)
+            rows, bytes_processed = payload["rows"], payload["bytes_processed"]
+        except Exception as e:
+            # Valor corrupto o de un codec que este worker no tiene: se consulta BigQuery
+            self.logger.warning(f"BigQuery result cache entry {key} unreadable: {e}")
+            track_cache_miss("bigquery_redis")
+            return None
+
+        track_cache_hit("bigquery_redis")
+        self._track_saving("redis", bytes_processed)
+        if ttl > 0:
+            self._set_local(key, rows, bytes_processed, ttl)
+        return list(rows)
+
+    async def set(self, key: str, rows: List[Dict[str, Any]], bytes_processed: int, ttl: int) -> None:
+        if ttl <= 0:
+            return
+
+        self._set_local(key, rows, bytes_processed, ttl)
+
+        if not self._redis_available():
+            return
+
+        try:
+            encoded = cache_codec.encode({"rows": rows, "bytes_processed": bytes_processed})
+            await redis_cache.binary_redis.setex(f"{REDIS_KEY_PREFIX}{key}", ttl, encoded)
+        except Exception as e:
+            self.logger.warning(f"BigQuery result cache Redis set failed: {e}")
+
+    def clear(self) -> int:
+        """Vaciar el nivel en memoria de este worker; devuelve las entradas borradas"""
+        count = len(self._entries)
+        self._entries.clear()
+        self.total_bytes = 0
+        track_bigquery_result_cache_size(0)
+        return count
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _redis_available(self) -> bool:
+        return self.use_redis and redis_cache.binary_redis is not None
+
+    def _get_local(self, key: str) -> Optional[CachedResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return entry
+
+    def _set_local(self, key: str, rows: List[Dict[str, Any]], bytes_processed: int, ttl: float) -> None:
+        size = len(orjson.dumps(rows, default=str))
+        if size > self.max_bytes:
+            self.logger.debug(f"BigQuery result too large for memory cache ({size} bytes)")
+            return
+
+        self._remove(key)
+        self._entries[key] = CachedResult(rows, bytes_processed, size, time.monotonic() + ttl)
+        self.total_bytes += size
+        self._evict()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry.size
+
+    def _evict(self) -> None:
+        # Primero las expiradas al frente del LRU, luego las menos usadas hasta entrar en el límite
+        now = time.monotonic()
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now and self.total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+        track_bigquery_result_cache_size(self.total_bytes)
+
+    def _track_saving(self, tier: str, bytes_processed: int) -> None:
+        track_bigquery_cache_saving(tier, bytes_processed, bigquery_cost_usd(bytes_processed, self.price_per_tib))
+
+
+# Caché global del proceso (compartida por todos los BigQueryRepository)
+bigquery_result_cache = QueryResultCache()
@@ -0,0 +1,252 @@
+# app/services/cache_namespaces.py
+"""
+🔢 Cache Namespaces - Claves versionadas por mart y precalentado post-ETL
+
+- CacheGenerations: agrega a cada clave la generación del mart del que sale
+  (shared.core.cache_generations). Cuando el ETL reconstruye un mart avanza la
+  generación y las claves viejas quedan huérfanas: invalidación O(1), sin KEYS.
+- AccessStats: ZSET por endpoint con las combinaciones de filtros pedidas.
+- CachePrewarmer: tras un rebuild recalcula las top-N combinaciones de los
+  endpoints afectados antes de que las pida un usuario.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import redis.asyncio as redis
+
+from app.core.local_cache import INSTANCE_ID, LocalCache, local_cache
+from app.core.logging import LoggerMixin
+from shared.core.cache_generations import MART_REBUILT_CHANNEL, bump_generations, generation_key
+from shared.core.config import settings
+
+# Endpoint cacheado -> mart (etapa de ETLConfig.REBUILD_STAGES) del que dependen sus datos
+ENDPOINT_MARTS = {
+    "dashboard": "dashboard_data",
+    "evolution": "dashboard_data",
+    "assignment": "dashboard_data",
+    "operation": "dashboard_data",
+    "productivity": "productivity_data",
+}
+
+# Recalcula y guarda en caché la respuesta para unos parámetros registrados en AccessStats
+WarmFunction = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class CacheGenerations(LoggerMixin):
+    """
+    Generación vigente de cada mart (L1 en memoria + Redis)
+
+    El L1 se invalida por pub/sub cuando el ETL avanza la generación.
+    """
+
+    def __init__(self, redis_client: redis.Redis, l1_cache: Optional[LocalCache] = None):
+        self.redis = redis_client
+        self.l1 = l1_cache if l1_cache is not None else local_cache
+
+    async def get(self, mart: str) -> int:
+        key = generation_key(mart)
+        hit, generation = self.l1.get(key)
+        if hit:
+            return generation
+
+        try:
+            generation = int(await self.redis.get(key) or 0)
+        except Exception as e:
+            self.logger.warning(f"No se pudo leer la generación de {mart}: {e}")
+            return 0
+
+        self.l1.set(key, generation)
+        return generation
+
+    async def versioned_key(self, endpoint: str, key: str) -> str:
+        """Clave con la generación del mart del endpoint (ej. 'dashboard:...:g42')"""
+        return f"{key}:g{await self.get(ENDPOINT_MARTS[endpoint])}"
+
+    async def bump(self, marts: Iterable[str]) -> Dict[str, int]:
+        """Invalidar las claves de los marts (y disparar su precalentado)"""
+        generations = await bump_generations(self.redis, marts, origin=INSTANCE_ID)
+        # Nuestro propio mensaje de invalidación se ignora: actualizar el L1 aquí
+        for mart, generation in generations.items():
+            self.l1.set(generation_key(mart), generation)
+        return generations
+
+
+class AccessStats(LoggerMixin):
+    """
+    Combinaciones de parámetros más pedidas por endpoint (ZSET en Redis)
+    """
+
+    KEY_PREFIX = "cache:access:"
+    RETENTION_SECONDS = 7 * 24 * 3600
+    MAX_TRACKED = 1000
+
+    # Tasks de registro en curso (se registra fuera del camino de la respuesta)
+    _pending: Set["asyncio.Task[None]"] = set()
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis = redis_client
+
+    @staticmethod
+    def encode_params(params: Dict[str, Any]) -> str:
+        return json.dumps(params, sort_keys=True, default=str)
+
+    async def record(self, endpoint: str, params: Dict[str, Any]) -> None:
+        key = f"{self.KEY_PREFIX}{endpoint}"
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zincrby(key, 1, self.encode_params(params))
+                # Conservar solo las combinaciones más pedidas
+                pipe.zremrangebyrank(key, 0, -(self.MAX_TRACKED + 1))
+                pipe.expire(key, self.RETENTION_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            self.logger.debug(f"No se pudo registrar el acceso a {endpoint}: {e}")
+
+    def record_in_background(self, endpoint: str, params: Dict[str, Any]) -> None:
+        task = asyncio.create_task(self.record(endpoint, params))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def top(self, endpoint: str, limit: int) -> List[Dict[str, Any]]:
+        members = await self.redis.zrevrange(f"{self.KEY_PREFIX}{endpoint}", 0, limit - 1)
+        return [json.loads(member) for member in members]
+
+
+class CachePrewarmer(LoggerMixin):
+    """
+    Precalentado de las combinaciones más pedidas tras reconstruir un mart
+    """
+
+    LOCK_TTL_SECONDS = 600
+
+    def __init__(self):
+        self._warmers: Dict[str, WarmFunction] = {}
+
+    def register(self, endpoint: str, warm: WarmFunction) -> None:
+        """Registrar la función que recalcula un endpoint (ver ENDPOINT_MARTS)"""
+        self._warmers[endpoint] = warm
+
+    async def prewarm(
+        self,
+        redis_client: redis.Redis,
+        generations: Dict[str, int],
+        limit: int = settings.CACHE_PREWARM_TOP_N
+    ) -> Dict[str, int]:
+        """
+        Recalcular las top-N combinaciones de los endpoints de los marts reconstruidos
+
+        Un solo worker precalienta cada rebuild (lock por generación).
+
+        Returns:
+            Combinaciones recalculadas por endpoint
+        """
+        endpoints = [endpoint for endpoint in self._warmers if ENDPOINT_MARTS.get(endpoint) in generations]
+        if not endpoints or limit <= 0:
+            return {}
+
+        signature = ",".join(f"{mart}={generation}" for mart, generation in sorted(generations.items()))
+        if not await redis_client.set(f"lock:prewarm:{signature}", INSTANCE_ID, nx=True, ex=self.LOCK_TTL_SECONDS):
+            return {}
+
+        stats = AccessStats(redis_client)
+        semaphore = asyncio.Semaphore(settings.CACHE_MAX_BACKGROUND_REFRESHES)
+
+        async def warm(endpoint: str, params: Dict[str, Any]) -> bool:
+            async with semaphore:
+                try:
+                    await self._warmers[endpoint](params)
+                    return True
+                except Exception as e:
+                    self.logger.warning(f"Precalentado fallido para {endpoint} {params}: {e}")
+                    return False
+
+        warmed = {}
+        for endpoint in endpoints:
+            top_params = await stats.top(endpoint, limit)
+            results = await asyncio.gather(*(warm(endpoint, params) for params in top_params))
+            warmed[endpoint] = sum(results)
+
+        self.logger.info(f"🔥 Caché precalentada tras rebuild ({signature}): {warmed}")
+        return warmed
+
+
+class MartRebuiltListener(LoggerMixin):
+    """
+    Suscripción a MART_REBUILT_CHANNEL que dispara el precalentado
+
+    Las generaciones del mensaje se escriben en el L1 antes de precalentar: la
+    invalidación llega por otro canal, sin orden garantizado, y el precalentado
+    no debe reconstruir las claves de la generación anterior.
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        cache_prewarmer: CachePrewarmer,
+        l1_cache: Optional[LocalCache] = None
+    ):
+        self.redis = redis_client
+        self.prewarmer = cache_prewarmer
+        self.l1 = l1_cache if l1_cache is not None else local_cache
+        self._task: Optional[asyncio.Task] = None
+        self._prewarm_tasks: Set["asyncio.Task[Dict[str, int]]"] = set()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        tasks = list(self._prewarm_tasks)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(MART_REBUILT_CHANNEL)
+                    async for message in pubsub.listen():
+                        if message.get("type") == "message":
+                            self._on_message(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"Suscripción a {MART_REBUILT_CHANNEL} perdida ({e}), reconectando")
+                await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+
+    def _on_message(self, data: Any) -> None:
+        try:
+            generations = json.loads(data)["marts"]
+        except (TypeError, ValueError, KeyError):
+            self.logger.warning(f"Mensaje de rebuild inválido: {data!r}")
+            return
+
+        for mart, generation in generations.items():
+            key = generation_key(mart)
+            hit, current = self.l1.get(key)
+            # Un mensaje atrasado no debe volver a una generación anterior
+            if not hit or generation > current:
+                self.l1.set(key, generation)
+
+        task = asyncio.create_task(self._prewarm(generations))
+        self._prewarm_tasks.add(task)
+        task.add_done_callback(self._prewarm_tasks.discard)
+
+    async def _prewarm(self, generations: Dict[str, int]) -> Dict[str, int]:
+        try:
+            return await self.prewarmer.prewarm(self.redis, generations)
+        except Exception as e:
+            self.logger.error(f"Error en el precalentado tras rebuild {generations}: {e}")
+            return {}
+
+
+# Registro global: cada módulo de endpoints registra su función de precalentado
+prewarmer = CachePrewarmer()
@@ -3,14 +3,254 @@
 📦 Servicio de Caching
 Encapsula la lógica para interactuar con el caché de Redis.
 Construye claves, serializa/deserializa datos y gestiona el TTL.
+
+🆕 Dos niveles: L1 en memoria del proceso (app.core.local_cache) delante de
+Redis. Las escrituras y borrados publican una invalidación para los L1 de los
+demás workers.
+
+🆕 Single-flight: get_or_compute() hace que los misses concurrentes de una
+misma clave esperen UNA sola computación (en el worker y, con un lock corto en
+Redis, entre workers).
+
+🆕 Stale-while-revalidate: con stale_ttl la entrada vive expire_in + stale_ttl
+en Redis. Pasado expire_in (TTL blando) se sirve el valor viejo al instante y
+se recalcula en segundo plano, con un máximo de refrescos concurrentes.
+
+🆕 Invalidación por etiquetas (app.core.cache_tags): set(..., tags=[...]) e
+invalidate_tags(); los patrones usan SCAN + UNLINK por lotes, nunca KEYS.
+
+🆕 Valores binarios (app.core.cache_codec): orjson/msgpack + compresión por
+encima de un umbral, con cabecera de 1 byte. Requiere un cliente Redis con
+decode_responses=False; las entradas JSON viejas se siguen leyendo.
 """
+import asyncio
 import json
-from typing import Any, Optional
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
 
 import redis.asyncio as redis
 
+from app.core.cache_codec import cache_codec
+from app.core.cache_tags import invalidate_tags, register_tags, scan_delete
+from app.core.local_cache import INVALIDATION_CHANNEL, LocalCache, invalidation_message, local_cache
 from app.core.logging import LoggerMixin
-from app.core.middleware import track_cache_hit, track_cache_miss
+from app.core.middleware import (
+    track_background_refresh,
+    track_cache_hit,
+    track_cache_miss,
+    track_coalesced_request,
+    track_stale_served,
+)
+from app.services.cache_namespaces import CacheGenerations
+from shared.core.config import settings
+
+# Borra el lock solo si sigue siendo nuestro (otro worker pudo tomarlo tras expirar)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class _LeaderCancelled(Exception):
+    """La computación compartida se canceló junto con el request que la lanzó"""
+
+
+class SingleFlight(LoggerMixin):
+    """
+    Coalescencia de misses: una sola computación por clave a la vez
+
+    - En el worker: las corrutinas que llegan mientras hay una computación en
+      curso esperan su resultado (registro de futures compartido por el proceso).
+    - Entre workers: quien gana un SET NX en Redis computa; los demás consultan
+      la caché hasta que aparezca el valor, o computan ellos si el lock se
+      libera sin valor (fallo) o se agota la espera.
+    """
+
+    # Futures en curso del proceso (CacheService se crea por request)
+    _inflight: Dict[str, "asyncio.Future[Any]"] = {}
+    # Refrescos en segundo plano del proceso (claves y tasks vivas)
+    _refreshing: Set[str] = set()
+    _refresh_tasks: Set["asyncio.Task[None]"] = set()
+
+    POLL_INTERVAL_SECONDS = 0.05
+    MAX_POLL_INTERVAL_SECONDS = 0.5
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        namespace: str = "cache",
+        lock_ttl: int = settings.CACHE_LOCK_TTL_SECONDS,
+        lock_wait: float = settings.CACHE_LOCK_WAIT_SECONDS,
+        max_refreshes: int = settings.CACHE_MAX_BACKGROUND_REFRESHES
+    ):
+        """
+        Args:
+            redis_client: Cliente redis.asyncio (texto o binario)
+            namespace: Separa cachés que podrían compartir claves (ej. "response")
+            lock_ttl: Vida máxima del lock si el dueño muere sin liberarlo
+            lock_wait: Espera máxima por el valor que calcula otro worker
+            max_refreshes: Refrescos en segundo plano simultáneos por worker
+        """
+        self.redis = redis_client
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self.max_refreshes = max_refreshes
+
+    def lock_key(self, key: str) -> str:
+        return f"lock:{self.namespace}:{key}"
+
+    async def run(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Any:
+        """
+        Ejecutar compute() una sola vez para la clave
+
+        Args:
+            key: Clave de caché que se está calculando
+            compute: Corrutina que calcula Y guarda el valor en caché
+            lookup: Corrutina que lee la caché sin efectos (None = no está)
+        """
+        flight_key = f"{self.namespace}:{key}"
+        inflight = self._inflight.get(flight_key)
+        while inflight is not None:
+            track_coalesced_request("local")
+            try:
+                return await asyncio.shield(inflight)
+            except _LeaderCancelled:
+                # El que calculaba fue cancelado: unirse al siguiente o calcular
+                inflight = self._inflight.get(flight_key)
+
+        future = asyncio.get_running_loop().create_future()
+        # Evita "exception was never retrieved" si nadie más la esperaba
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[flight_key] = future
+        try:
+            value = await self._run_locked(key, compute, lookup)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # La cancelación es del request que calculaba, no de los que esperan
+            self._inflight.pop(flight_key, None)
+            future.set_exception(_LeaderCancelled())
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(flight_key) is future:
+                self._inflight.pop(flight_key)
+
+    def refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]]) -> bool:
+        """
+        Recalcular una entrada vencida (blanda) sin bloquear al que la pidió
+
+        No se lanza si la clave ya se está calculando, si se alcanzó el máximo
+        de refrescos del worker, o (dentro del task) si otro worker tiene el lock.
+
+        Args:
+            key: Clave de caché vencida
+            compute: Corrutina que calcula Y guarda el valor en caché
+
+        Returns:
+            True si se lanzó el refresco
+        """
+        flight_key = f"{self.namespace}:{key}"
+        if flight_key in self._refreshing or flight_key in self._inflight:
+            return False
+        if len(self._refreshing) >= self.max_refreshes:
+            track_background_refresh("skipped")
+            return False
+
+        self._refreshing.add(flight_key)
+        task = asyncio.create_task(self._refresh(key, flight_key, compute))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+        return True
+
+    async def _refresh(self, key: str, flight_key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+        try:
+            if not await self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl):
+                return  # Otro worker ya lo está recalculando
+            try:
+                await compute()
+                track_background_refresh("success")
+            finally:
+                await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+        except Exception as e:
+            # Se sigue sirviendo el valor viejo hasta el TTL duro
+            track_background_refresh("error")
+            self.logger.error(f"Error refrescando en segundo plano la clave {key}: {e}")
+        finally:
+            self._refreshing.discard(flight_key)
+
+    async def _run_locked(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        lookup: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Any:
+        lock_key = self.lock_key(key)
+        token = uuid.uuid4().hex
+
+        try:
+            acquired = await self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            self.logger.warning(f"No se pudo tomar el lock de caché {lock_key}: {e}. Se calcula sin coordinar.")
+            return await compute()
+
+        if not acquired:
+            value = await self._wait_for_value(lock_key, lookup)
+            if value is not None:
+                track_coalesced_request("redis")
+                return value
+            # El dueño del lock falló o tarda demasiado: intentar quedarse con el lock
+            try:
+                acquired = await self.redis.set(lock_key, token, nx=True, ex=self.lock_ttl)
+            except Exception:
+                acquired = False
+
+        try:
+            return await compute()
+        finally:
+            if acquired:
+                try:
+                    await self.redis.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    self.logger.warning(f"No se pudo liberar el lock de caché {lock_key}: {e}")
+
+    async def _wait_for_value(
+        self,
+        lock_key: str,
+        lookup: Callable[[], Awaitable[Optional[Any]]]
+    ) -> Optional[Any]:
+        """Esperar a que otro worker publique el valor (None si libera el lock sin él o se agota la espera)"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_wait
+        interval = self.POLL_INTERVAL_SECONDS
+
+        while loop.time() < deadline:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.MAX_POLL_INTERVAL_SECONDS)
+            try:
+                value = await lookup()
+                if value is not None:
+                    return value
+                if not await self.redis.exists(lock_key):
+                    return await lookup()
+            except Exception as e:
+                self.logger.warning(f"Error esperando el valor de {lock_key}: {e}")
+                return None
+
+        self.logger.warning(f"Tiempo de espera agotado para {lock_key}; se calcula localmente")
+        return None
 
 
 class CacheService(LoggerMixin):
@@ -18,14 +258,18 @@ class CacheService(LoggerMixin):
     Servicio para gestionar las operaciones de caché de la aplicación.
     """
 
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, l1_cache: Optional[LocalCache] = None):
         """
         Inicializa el servicio con un cliente de Redis asíncrono.
 
         Args:
-            redis_client: Una instancia del cliente de redis.asyncio.
+            redis_client: Una instancia del cliente de redis.asyncio (decode_responses=False).
+            l1_cache: Caché en memoria delante de Redis (por defecto el L1 global del proceso).
         """
         self.redis = redis_client
+        self.l1 = l1_cache if l1_cache is not None else local_cache
+        self.single_flight = SingleFlight(redis_client)
+        self.generations = CacheGenerations(redis_client, self.l1)
 
     @staticmethod
     def _generate_cache_key(prefix: str, **kwargs: Any) -> str:
@@ -48,14 +292,21 @@ class CacheService(LoggerMixin):
 
     async def get(self, key: str) -> Optional[Any]:
         """
-        Obtiene un valor del caché. Deserializa desde JSON.
+        Obtiene un valor del caché: primero el L1 en memoria, luego Redis (JSON).
         """
+        hit, value = self.l1.get(key)
+        if hit:
+            track_cache_hit("memory")
+            self.logger.debug(f"Cache L1 HIT para la clave: {key}")
+            return value
+        track_cache_miss("memory")
+
         try:
-            value = await self.redis.get(key)
-            if value:
+            value, _ = await self._get_from_redis(key)
+            if value is not None:
                 track_cache_hit("redis")
                 self.logger.debug(f"Cache HIT para la clave: {key}")
-                return json.loads(value)
+                return value
 
             track_cache_miss("redis")
             self.logger.debug(f"Cache MISS para la clave: {key}")
@@ -65,21 +316,136 @@ class CacheService(LoggerMixin):
             track_cache_miss("redis")  # Contar como miss si hay un error
             return None
 
-    async def set(self, key: str, value: Any, expire_in: int) -> bool:
+    async def _get_from_redis(self, key: str, stale_ttl: int = 0) -> Tuple[Optional[Any], Optional[int]]:
+        """
+        Leer de Redis (sin métricas) y poblar el L1 si la entrada está fresca
+
+        Returns:
+            (valor, segundos de frescura restantes); frescura <= 0 = vencida
+            (blanda), None = sin expiración
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.ttl(key)
+            raw, ttl = await pipe.execute()
+        if not raw:
+            return None, None
+
+        value = cache_codec.decode(raw)
+        fresh_for = ttl - stale_ttl if ttl >= 0 else None
+        # El L1 no debe servir la entrada más allá de su frescura en Redis
+        if fresh_for is None or fresh_for > 0:
+            self.l1.set(key, value, fresh_for)
+        return value, fresh_for
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expire_in: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None
+    ) -> Any:
+        """
+        Valor cacheado, o calculado con compute() y guardado con TTL expire_in
+
+        Los misses concurrentes de la misma clave comparten una sola llamada a
+        compute() (ver SingleFlight), así una clave popular que expira no
+        dispara N consultas idénticas a BigQuery.
+
+        Args:
+            key: Clave de caché
+            compute: Corrutina que calcula el valor en un miss
+            expire_in: TTL blando (segundos que la entrada se considera fresca)
+            stale_ttl: Segundos extra en que una entrada vencida se sirve
+                mientras se refresca en segundo plano (0 = sin SWR)
+            tags: Etiquetas de invalidación de la entrada (ej. "cartera:TEMPRANA")
+
+        Returns:
+            El valor tal como lo devuelve la caché (decodificado)
+        """
+        tags = list(tags or [])
+
+        async def compute_and_store() -> Any:
+            encoded = cache_codec.encode(await compute())
+            # Mismo resultado para quien calcula y para quien espera
+            value = cache_codec.decode(encoded)
+            await self._write(key, encoded, value, expire_in, stale_ttl, tags)
+            return value
+
+        async def lookup() -> Optional[Any]:
+            value, _ = await self._get_from_redis(key, stale_ttl)
+            return value
+
+        hit, value = self.l1.get(key)
+        if hit:
+            track_cache_hit("memory")
+            return value
+        track_cache_miss("memory")
+
+        try:
+            value, fresh_for = await self._get_from_redis(key, stale_ttl)
+        except Exception as e:
+            self.logger.error(f"Error al obtener del caché para la clave {key}: {e}")
+            value, fresh_for = None, None
+
+        if value is not None:
+            track_cache_hit("redis")
+            if stale_ttl and fresh_for is not None and fresh_for <= 0:
+                track_stale_served("redis")
+                self.single_flight.refresh_in_background(key, compute_and_store)
+            return value
+
+        track_cache_miss("redis")
+        return await self.single_flight.run(key, compute_and_store, lookup)
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        expire_in: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None
+    ) -> bool:
         """
         Almacena un valor en el caché con un TTL (Time-To-Live) en segundos.
-        Serializa a JSON.
+        Se codifica con cache_codec (JSON/msgpack, comprimido si es grande).
+
+        Con stale_ttl la clave vive expire_in + stale_ttl en Redis (TTL duro);
+        el L1 solo la guarda mientras está fresca. Con tags la clave se
+        registra en los sets de sus etiquetas (ver invalidate_tags).
         """
+        try:
+            encoded = cache_codec.encode(value)
+            # En el L1 va lo mismo que devolvería Redis al decodificar
+            return await self._write(key, encoded, cache_codec.decode(encoded), expire_in, stale_ttl, tags)
+        except Exception as e:
+            self.logger.error(f"Error al codificar el valor de la clave {key}: {e}")
+            return False
+
+    async def _write(
+        self,
+        key: str,
+        encoded: bytes,
+        value: Any,
+        expire_in: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None
+    ) -> bool:
+        """Guardar un valor ya codificado en Redis (y su forma decodificada en el L1)"""
         if expire_in <= 0:
             self.logger.warning(
                 f"Intento de establecer una clave de caché '{key}' con TTL no positivo. No se guardará.")
             return False
 
         try:
-            # Serializamos el valor a un string JSON. `default=str` maneja tipos no serializables como datetime.
-            json_value = json.dumps(value, default=str)
-            await self.redis.setex(key, expire_in, json_value)
-            self.logger.debug(f"Cache SET para la clave: {key}, TTL: {expire_in}s")
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.setex(key, expire_in + stale_ttl, encoded)
+                register_tags(pipe, key, tags, expire_in + stale_ttl)
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+                await pipe.execute()
+            self.l1.set(key, value, expire_in)
+            self.logger.debug(f"Cache SET para la clave: {key}, {len(encoded)} bytes, TTL: {expire_in}s")
             return True
         except Exception as e:
             self.logger.error(f"Error al guardar en caché para la clave {key}: {e}")
@@ -90,7 +456,11 @@ class CacheService(LoggerMixin):
         Elimina una clave específica del caché.
         """
         try:
-            result = await self.redis.delete(key)
+            self.l1.delete([key])
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.unlink(key)
+                pipe.publish(INVALIDATION_CHANNEL, invalidation_message(keys=[key]))
+                result, _ = await pipe.execute()
             if result > 0:
                 self.logger.info(f"Clave de caché eliminada: {key}")
             return result > 0
@@ -98,17 +468,40 @@ class CacheService(LoggerMixin):
             self.logger.error(f"Error al eliminar la clave de caché {key}: {e}")
             return False
 
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Elimina todas las entradas registradas con alguna de las etiquetas.
+
+        Recorre solo los sets de las etiquetas (ZSCAN) y borra con UNLINK por
+        lotes: la latencia no crece con el total de claves en Redis.
+        """
+        tags = list(tags)
+        try:
+            invalidated = 0
+            async for keys in invalidate_tags(self.redis, tags):
+                self.l1.delete(keys)
+                await self.redis.publish(INVALIDATION_CHANNEL, invalidation_message(keys=keys))
+                invalidated += len(keys)
+            self.logger.info(f"Se invalidaron {invalidated} claves de caché con las etiquetas: {tags}")
+            return invalidated
+        except Exception as e:
+            self.logger.error(f"Error al invalidar las etiquetas {tags}: {e}")
+            return 0
+
     async def clear_by_pattern(self, pattern: str) -> int:
         """
         Elimina todas las claves que coincidan con un patrón (ej: 'assignment:*').
-        ¡Usar con precaución en producción!
+
+        Fallback para claves sin etiquetas: SCAN incremental + UNLINK por lotes
+        (no bloquea Redis como KEYS, pero recorre todo el keyspace).
         """
         try:
-            keys = await self.redis.keys(pattern)
-            if not keys:
-                return 0
+            self.l1.delete_pattern(pattern)
+            await self.redis.publish(INVALIDATION_CHANNEL, invalidation_message(pattern=pattern))
 
-            deleted_count = await self.redis.delete(*keys)
+            deleted_count = 0
+            async for keys in scan_delete(self.redis, pattern):
+                deleted_count += len(keys)
             self.logger.info(f"Se eliminaron {deleted_count} claves de caché con el patrón: {pattern}")
             return deleted_count
         except Exception as e:
@@ -0,0 +1,472 @@
+# app/services/dashboard_engines.py
+"""
+🛠️ Dashboard Engines - Origen de las métricas base del dashboard "última foto"
+
+Cada engine devuelve, por dimensión solicitada, los contadores base ya
+agrupados (una fila por valor de la dimensión). DashboardServiceV2 calcula
+los KPIs sobre esos totales, sin importar el origen.
+
+🚀 Todas las dimensiones salen de UNA consulta con GROUPING SETS: la
+transferencia y la memoria escalan con los valores de cartera/servicio/periodo,
+no con las filas base.
+
+- PostgresDashboardEngine: mart.dashboard_data en TimescaleDB (GROUP BY y SUM en SQL)
+- BigQueryDashboardEngine: tabla tbldashboard_metricas_base (fallback; solo
+  tiene la última foto, sin serie diaria)
+
+🆕 Series diarias (evolución): PostgresDashboardEngine lee los continuous
+aggregates dashboard_daily y gestion_cuenta_impact_daily (migración 022)
+cuando están materializados hasta el final del rango pedido; si no, agrega
+las tablas base. Con los aggregates el costo es O(días), no O(gestiones).
+"""
+
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from app.core.logging import LoggerMixin
+from app.repositories.base import BaseRepository
+from shared.core.config import settings
+
+# Contadores base que todo engine debe devolver por grupo
+BASE_METRIC_COLUMNS = [
+    "cuentas_asignadas",
+    "deuda_inicial_total",
+    "deuda_actual_total",
+    "cuentas_gestionadas",
+    "cuentas_con_contacto_directo",
+    "cuentas_con_contacto_indirecto",
+    "cuentas_con_compromiso",
+    "cuentas_pagadoras",
+    "total_gestiones_validas",
+]
+
+# Contador base -> columna de dashboard_data (y de dashboard_daily) que se suma
+BASE_METRIC_SOURCES = {
+    "cuentas_asignadas": "cuentas",
+    "deuda_inicial_total": "deuda_asig",
+    "deuda_actual_total": "deuda_act",
+    "cuentas_gestionadas": "cuentas_gestionadas",
+    "cuentas_con_contacto_directo": "cuentas_cd",
+    "cuentas_con_contacto_indirecto": "cuentas_ci",
+    "cuentas_con_compromiso": "cuentas_pdp",
+    "cuentas_pagadoras": "cuentas_pagadoras",
+    "total_gestiones_validas": "total_gestiones",
+}
+
+# Actividad diaria de gestión (gestiones del día, no acumuladas)
+ACTIVITY_COLUMNS = ["gestiones", "contactos_efectivos", "compromisos"]
+
+# Resultado de un engine: dimensión API -> filas {"name": valor, <contadores base>}
+DimensionTotals = Dict[str, List[Dict[str, Any]]]
+
+
+class DailySeriesUnavailableError(Exception):
+    """El origen no tiene (o no pudo leer) la serie diaria de evolución"""
+
+
+class DashboardEngine(LoggerMixin, ABC):
+    """
+    Interfaz común de los engines del dashboard
+    """
+
+    source_name = "unknown"
+
+    def __init__(self, repo: BaseRepository):
+        self.repo = repo
+
+    @abstractmethod
+    async def get_dimension_totals(
+            self,
+            filters: Dict[str, Any],
+            dimensions: List[str],
+            fecha_corte: Optional[date] = None
+    ) -> DimensionTotals: ...
+
+    async def get_daily_totals(
+            self,
+            filters: Dict[str, Any],
+            fecha_inicio: date,
+            fecha_fin: date
+    ) -> List[Dict[str, Any]]:
+        """Una fila por día con los contadores base (y actividad si el origen la tiene)"""
+        raise DailySeriesUnavailableError(f"{self.source_name} engine has no daily series")
+
+    async def health_check(self) -> bool:
+        return await self.repo.health_check()
+
+    def _valid_dimensions(self, dimensions: List[str], dimension_expressions: Dict[str, str]) -> List[str]:
+        valid_dims = []
+        for dimension in dimensions:
+            if dimension not in dimension_expressions:
+                self.logger.warning(f"Dimensión API '{dimension}' no soportada por {self.source_name}. Saltando.")
+            elif dimension not in valid_dims:
+                valid_dims.append(dimension)
+        return valid_dims
+
+    @staticmethod
+    def _grouping_sets(dimension_expressions: Dict[str, str], text_cast: str) -> Dict[str, str]:
+        """
+        Fragmentos SQL para agrupar por cada dimensión en una sola pasada
+
+        GROUPING(expr) = 0 identifica el grouping set de cada fila, así un
+        valor NULL de la dimensión no se confunde con otra dimensión.
+
+        Args:
+            dimension_expressions: Dimensión API -> expresión SQL (en orden)
+            text_cast: Plantilla de cast a texto, ej. "CAST({} AS STRING)"
+
+        Returns:
+            Dict con las expresiones 'dimension', 'name' y 'group_by'
+        """
+        dimension_cases = " ".join(
+            f"WHEN GROUPING({expr}) = 0 THEN '{dimension}'" for dimension, expr in dimension_expressions.items()
+        )
+        name_cases = " ".join(
+            f"WHEN GROUPING({expr}) = 0 THEN {text_cast.format(expr)}" for expr in dimension_expressions.values()
+        )
+        grouping_sets = ", ".join(f"({expr})" for expr in dimension_expressions.values())
+        return {
+            "dimension": f"CASE {dimension_cases} END",
+            "name": f"CASE {name_cases} END",
+            "group_by": f"GROUPING SETS ({grouping_sets})",
+        }
+
+    @staticmethod
+    def _split_by_dimension(records: List[Dict[str, Any]], dimensions: List[str]) -> DimensionTotals:
+        """
+        Separar las filas de GROUPING SETS por dimensión (columna 'dimension')
+
+        Los grupos con valor NULL se descartan, igual que el groupby de pandas
+        que reemplazan (así los porcentajes sobre el total no cambian).
+        """
+        totals: DimensionTotals = {dimension: [] for dimension in dimensions}
+        for record in records:
+            if record.get("name") is not None:
+                # Copia sin 'dimension': las filas pueden venir de una caché compartida
+                totals[record["dimension"]].append({k: v for k, v in record.items() if k != "dimension"})
+        return {dimension: rows for dimension, rows in totals.items() if rows}
+
+
+class PostgresDashboardEngine(DashboardEngine):
+    """
+    Engine sobre mart.dashboard_data (cargado por el ETL en TimescaleDB)
+
+    "Última foto" = la fecha_foto más reciente de cada campaña hasta
+    fecha_corte. Toda la agregación corre en Postgres: a la API solo llegan
+    los totales por valor de dimensión.
+    """
+
+    source_name = "postgresql"
+
+    # Dimensión API -> expresión SQL sobre dashboard_data (alias d) y el
+    # periodo de la campaña en calendario (alias p, igual que PERIODO en BigQuery)
+    DIMENSION_EXPRESSIONS = {
+        "cartera": "d.cartera",
+        "servicio": "d.servicio",
+        "periodo": "p.periodo_mes",
+    }
+
+    # Días de gestion_cuenta_impact_daily y de las particiones del ETL
+    LOCAL_TIMEZONE = "America/Lima"
+
+    def __init__(self, repo: BaseRepository, schema: Optional[str] = None):
+        super().__init__(repo)
+        schema = schema or f"mart_{settings.PROJECT_UID}"
+        self.table = f"{schema}.dashboard_data"
+        self.daily_view = f"{schema}.dashboard_daily"
+        self.impact_table = f"aux_{settings.PROJECT_UID}.gestion_cuenta_impact"
+        self.activity_view = f"aux_{settings.PROJECT_UID}.gestion_cuenta_impact_daily"
+        self.calendar_table = f"raw_{settings.PROJECT_UID}.calendario"
+
+    def build_query(self, dimensions: List[str]) -> str:
+        """
+        Consulta agregada para todas las dimensiones (GROUPING SETS)
+
+        Parámetros posicionales: $1 fecha_corte, $2 carteras, $3 servicios,
+        $4 periodos (NULL = sin filtro). El periodo es el de la campaña
+        (calendario.periodo_mes), no el mes de su última foto.
+        """
+        grouping = self._grouping_sets(
+            {dimension: self.DIMENSION_EXPRESSIONS[dimension] for dimension in dimensions}, "({})::text"
+        )
+        return f"""
+        WITH ultima_foto AS (
+            SELECT archivo, MAX(fecha_foto) AS fecha_foto
+            FROM {self.table}
+            WHERE fecha_foto <= $1
+            GROUP BY archivo
+        ),
+        periodos AS (
+            SELECT CONCAT(c.archivo, '.txt') AS archivo, MAX(c.periodo_mes) AS periodo_mes
+            FROM {self.calendar_table} c
+            GROUP BY c.archivo
+        )
+        SELECT
+            {grouping["dimension"]} AS dimension,
+            {grouping["name"]} AS name,
+            {self._base_metric_sums("d.")}
+        FROM {self.table} d
+        JOIN ultima_foto u ON d.archivo = u.archivo AND d.fecha_foto = u.fecha_foto
+        LEFT JOIN periodos p ON p.archivo = d.archivo
+        WHERE ($2::text[] IS NULL OR d.cartera = ANY($2::text[]))
+          AND ($3::text[] IS NULL OR d.servicio = ANY($3::text[]))
+          AND ($4::text[] IS NULL OR p.periodo_mes = ANY($4::text[]))
+        GROUP BY {grouping["group_by"]}
+        ORDER BY 1, 2
+        """
+
+    async def get_dimension_totals(
+            self,
+            filters: Dict[str, Any],
+            dimensions: List[str],
+            fecha_corte: Optional[date] = None
+    ) -> DimensionTotals:
+        valid_dims = self._valid_dimensions(dimensions, self.DIMENSION_EXPRESSIONS)
+        if not valid_dims:
+            return {}
+
+        # El orden del dict define $1..$4 (PostgresRepository pasa los valores posicionalmente)
+        params = {
+            "fecha_corte": fecha_corte or date.today(),
+            "cartera": filters.get("cartera") or None,
+            "servicio": filters.get("servicio") or None,
+            "periodo": filters.get("periodo") or None,
+        }
+
+        records = await self.repo.execute_query(self.build_query(valid_dims), params)
+        return self._split_by_dimension(records, valid_dims)
+
+    # ===============================================
+    # SERIES DIARIAS (continuous aggregates)
+    # ===============================================
+
+    @staticmethod
+    def _base_metric_sums(prefix: str = "") -> str:
+        return ",\n            ".join(
+            f"SUM({prefix}{column}) AS {metric}" for metric, column in BASE_METRIC_SOURCES.items()
+        )
+
+    def build_daily_query(self, from_view: bool) -> str:
+        """
+        Contadores base por día (snapshot acumulado de todas las campañas)
+
+        Parámetros posicionales: $1 fecha_inicio, $2 fecha_fin, $3 carteras,
+        $4 servicios (NULL = sin filtro).
+        """
+        source, day = (self.daily_view, "dia") if from_view else (self.table, "fecha_foto")
+        return f"""
+        SELECT
+            {day} AS dia,
+            {self._base_metric_sums()},
+            SUM(recupero) AS recupero
+        FROM {source}
+        WHERE {day} BETWEEN $1 AND $2
+          AND ($3::text[] IS NULL OR cartera = ANY($3::text[]))
+          AND ($4::text[] IS NULL OR servicio = ANY($4::text[]))
+        GROUP BY 1
+        ORDER BY 1
+        """
+
+    def build_activity_query(self, from_view: bool) -> str:
+        """
+        Gestiones, contactos efectivos y compromisos de cada día (hora de Lima)
+
+        La cartera de una campaña sale de calendario; la actividad no se puede
+        separar por servicio. Parámetros: $1 fecha_inicio, $2 fecha_fin, $3 carteras.
+        """
+        if from_view:
+            source, time_column = self.activity_view, "g.dia"
+            gestiones, contactos, compromisos = "SUM(g.gestiones)", "SUM(g.contactos_efectivos)", "SUM(g.compromisos)"
+        else:
+            source, time_column = self.impact_table, "g.timestamp_gestion"
+            gestiones = "COUNT(*)"
+            contactos = "COUNT(*) FILTER (WHERE g.es_contacto_efectivo)"
+            compromisos = "COUNT(*) FILTER (WHERE g.es_compromiso)"
+        return f"""
+        SELECT
+            ({time_column} AT TIME ZONE '{self.LOCAL_TIMEZONE}')::date AS dia,
+            {gestiones} AS gestiones,
+            {contactos} AS contactos_efectivos,
+            {compromisos} AS compromisos
+        FROM {source} g
+        WHERE {time_column} >= ($1::date::timestamp AT TIME ZONE '{self.LOCAL_TIMEZONE}')
+          AND {time_column} < (($2::date + 1)::timestamp AT TIME ZONE '{self.LOCAL_TIMEZONE}')
+          AND ($3::text[] IS NULL OR g.archivo IN (
+              SELECT CONCAT(c.archivo, '.txt') FROM {self.calendar_table} c WHERE c.tipo_cartera = ANY($3::text[])
+          ))
+        GROUP BY 1
+        ORDER BY 1
+        """
+
+    async def _aggregates_coverage(self, fecha_fin: date) -> Dict[str, bool]:
+        """
+        Qué continuous aggregates cubren el rango hasta fecha_fin
+
+        Un aggregate cubre el rango si está materializado hasta fecha_fin o
+        hasta el último día con datos de su tabla base (los MAX usan el índice
+        temporal de cada hypertable).
+        """
+        try:
+            row = await self.repo.execute_single(
+                f"""
+                SELECT
+                    (SELECT MAX(dia) FROM {self.daily_view}) AS daily_view_until,
+                    (SELECT MAX(fecha_foto) FROM {self.table}) AS daily_data_until,
+                    (SELECT (MAX(dia) AT TIME ZONE '{self.LOCAL_TIMEZONE}')::date
+                     FROM {self.activity_view}) AS activity_view_until,
+                    (SELECT (MAX(timestamp_gestion) AT TIME ZONE '{self.LOCAL_TIMEZONE}')::date
+                     FROM {self.impact_table}) AS activity_data_until
+                """
+            ) or {}
+        except Exception as e:
+            # Sin la migración 022 (o sin permisos) se leen las tablas base
+            self.logger.warning(f"⚠️ Could not read continuous aggregate coverage: {e}")
+            return {"daily": False, "activity": False}
+
+        def covers(view_until: Optional[date], data_until: Optional[date]) -> bool:
+            if data_until is None:
+                return True
+            return view_until is not None and view_until >= min(fecha_fin, data_until)
+
+        return {
+            "daily": covers(row.get("daily_view_until"), row.get("daily_data_until")),
+            "activity": covers(row.get("activity_view_until"), row.get("activity_data_until")),
+        }
+
+    async def get_daily_totals(
+            self,
+            filters: Dict[str, Any],
+            fecha_inicio: date,
+            fecha_fin: date
+    ) -> List[Dict[str, Any]]:
+        carteras = filters.get("cartera") or None
+        servicios = filters.get("servicio") or None
+        coverage = await self._aggregates_coverage(fecha_fin)
+        self.logger.info(
+            f"📈 Daily series {fecha_inicio}..{fecha_fin} from "
+            f"{'dashboard_daily' if coverage['daily'] else 'dashboard_data'} / "
+            f"{'gestion_cuenta_impact_daily' if coverage['activity'] else 'gestion_cuenta_impact'}"
+        )
+
+        records = await self.repo.execute_query(
+            self.build_daily_query(coverage["daily"]),
+            {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "cartera": carteras, "servicio": servicios}
+        )
+        if servicios:
+            return records
+
+        activity = await self.repo.execute_query(
+            self.build_activity_query(coverage["activity"]),
+            {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "cartera": carteras}
+        )
+        activity_by_day = {row.pop("dia"): row for row in activity}
+        for record in records:
+            record.update(activity_by_day.get(record["dia"], dict.fromkeys(ACTIVITY_COLUMNS, 0)))
+        return records
+
+
+class BigQueryDashboardEngine(DashboardEngine):
+    """
+    Engine sobre la tabla base de BigQuery (ya es la "última foto": no usa fecha_corte)
+    """
+
+    source_name = "bigquery"
+
+    api_to_db_map = {
+        "cartera": "TIPO_CARTERA",
+        "servicio": "SERVICIO",
+        "periodo": "PERIODO"
+    }
+
+    def __init__(self, repo: BaseRepository):
+        super().__init__(repo)
+        self.dataset = "BI_USA"
+        self.table_name = "bi_P3fV4dWNeMkN5RJMhV8e_tbldashboard_metricas_base"
+        self.base_table = f"`{self.dataset}.{self.table_name}`"
+        # Contadores base presentes en la tabla (se lee una vez del esquema)
+        self._metric_columns: Optional[List[str]] = None
+
+    async def _available_metric_columns(self) -> List[str]:
+        """
+        Contadores base que existen en la tabla (INFORMATION_SCHEMA, una vez)
+
+        Si el esquema no se puede leer se asumen todos y se reintenta la próxima vez.
+        """
+        if self._metric_columns is not None:
+            return self._metric_columns
+        try:
+            rows = await self.repo.execute_query(
+                f"""
+                SELECT column_name
+                FROM `{self.dataset}.INFORMATION_SCHEMA.COLUMNS`
+                WHERE table_name = @table_name
+                """,
+                {"table_name": self.table_name},
+                endpoint="dashboard"
+            )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not read the columns of {self.base_table}: {e}")
+            return BASE_METRIC_COLUMNS
+
+        existing = {row["column_name"].lower() for row in rows}
+        self._metric_columns = [column for column in BASE_METRIC_COLUMNS if column in existing]
+        missing = [column for column in BASE_METRIC_COLUMNS if column not in existing]
+        if missing:
+            self.logger.warning(f"⚠️ {self.base_table} has no {', '.join(missing)}; reported as 0")
+        return self._metric_columns
+
+    def build_query(self, dimensions: List[str], where_sql: str, metric_columns: Optional[List[str]] = None) -> str:
+        """
+        Consulta agregada para todas las dimensiones (GROUPING SETS)
+
+        Los contadores base que no están en metric_columns (None = todos)
+        salen como 0 en lugar de romper la consulta.
+        """
+        grouping = self._grouping_sets(
+            {dimension: self.api_to_db_map[dimension] for dimension in dimensions}, "CAST({} AS STRING)"
+        )
+        available = BASE_METRIC_COLUMNS if metric_columns is None else metric_columns
+        sums = ",\n            ".join(
+            f"SUM({column}) AS {column}" if column in available else f"0 AS {column}"
+            for column in BASE_METRIC_COLUMNS
+        )
+        return f"""
+        SELECT
+            {grouping["dimension"]} AS dimension,
+            {grouping["name"]} AS name,
+            {sums}
+        FROM {self.base_table}
+        WHERE {where_sql}
+        GROUP BY {grouping["group_by"]}
+        """
+
+    async def get_dimension_totals(
+            self,
+            filters: Dict[str, Any],
+            dimensions: List[str],
+            fecha_corte: Optional[date] = None
+    ) -> DimensionTotals:
+        valid_dims = self._valid_dimensions(dimensions, self.api_to_db_map)
+        if not valid_dims:
+            return {}
+
+        query_params = {}
+        where_clauses = ["1=1"]
+
+        for api_filter, values in filters.items():
+            if values and api_filter in self.api_to_db_map:
+                db_column = self.api_to_db_map[api_filter]
+                param_name = f"filter_{api_filter}"
+                where_clauses.append(f"{db_column} IN UNNEST(@{param_name})")
+                query_params[param_name] = values
+
+        where_sql = " AND ".join(where_clauses)
+
+        # La tabla solo contiene contadores y sumas, no ratios: se suman por grupo en BigQuery
+        records = await self.repo.execute_query(
+            self.build_query(valid_dims, where_sql, await self._available_metric_columns()),
+            query_params,
+            endpoint="dashboard"
+        )
+        return self._split_by_dimension(records, valid_dims)
@@ -1,86 +1,109 @@
 # app/services/dashboard_service_v2.py
 """
 📊 Dashboard Service V2 - "Última Foto" POC Approach (Dynamic Dimensions & KPI Calculation)
-Service layer that queries BigQuery for base metrics and calculates all KPIs in-app.
+Service layer that reads base metrics from a dashboard engine and calculates all KPIs in-app.
+
+🆕 Engine seleccionable por settings.DATA_SOURCE_TYPE: "postgresql" lee el mart
+local (agregado en SQL); BigQuery queda solo como fallback ante errores.
+
+🆕 La evolución diaria sale siempre del mart de Postgres (daily_engine): la
+tabla de BigQuery no guarda historia por día.
+
+🚀 Las filas de respuesta se construyen por columnas (sin iterrows ni un modelo
+Pydantic por fila) y get_dashboard_json() devuelve los bytes JSON finales, que
+el endpoint guarda en Redis y sirve tal cual en cada hit.
 """
 
-from datetime import datetime
-from typing import Any, Dict, List
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
+import orjson
 import pandas as pd
 
 from app.core.logging import LoggerMixin  # Asegúrate que el import sea correcto
-from app.repositories.bigquery_repo import BigQueryRepository
-from app.models.dashboard import DashboardData, DataRow, IntegralChartDataPoint, IconStatus
+from app.services.dashboard_engines import (
+    BASE_METRIC_COLUMNS,
+    DailySeriesUnavailableError,
+    DashboardEngine,
+    DimensionTotals,
+)
+from app.models.dashboard import DashboardData, IconStatus
 
 
 class DashboardServiceV2(LoggerMixin):
     """
-    Dashboard service that queries a BigQuery table with base metrics
-    and calculates all KPIs before returning the response.
+    Dashboard service that reads base metrics grouped by dimension from an
+    engine and calculates all KPIs before returning the response.
     """
 
-    def __init__(self, bigquery_repo: BigQueryRepository):
-        self.repo = bigquery_repo
-        self.base_table = "`BI_USA.bi_P3fV4dWNeMkN5RJMhV8e_tbldashboard_metricas_base`"
+    DEFAULT_DIMENSIONS = ["cartera", "servicio"]
 
-        self.api_to_db_map = {
-            "cartera": "TIPO_CARTERA",
-            "servicio": "SERVICIO",
-            "periodo": "PERIODO"
-        }
+    def __init__(
+            self,
+            engine: DashboardEngine,
+            fallback_engine: Optional[DashboardEngine] = None,
+            daily_engine: Optional[DashboardEngine] = None
+    ):
+        self.engine = engine
+        self.fallback_engine = fallback_engine
+        # Engine de la serie diaria (por defecto el principal)
+        self.daily_engine = daily_engine or engine
+
+    async def _get_dimension_totals(
+            self,
+            filters: Dict[str, Any],
+            dimensions: List[str],
+            fecha_corte: Optional[date]
+    ) -> DimensionTotals:
+        """Totales por dimensión del engine principal; fallback si falla"""
+        try:
+            return await self.engine.get_dimension_totals(filters, dimensions, fecha_corte)
+        except Exception as e:
+            if self.fallback_engine is None:
+                raise
+            self.logger.warning(
+                f"⚠️ Dashboard engine '{self.engine.source_name}' failed ({e}), "
+                f"falling back to '{self.fallback_engine.source_name}'"
+            )
+            return await self.fallback_engine.get_dimension_totals(filters, dimensions, fecha_corte)
 
-    async def get_dashboard_data(
+    async def get_dashboard_payload(
             self,
             filters: Dict[str, Any],
-            dimensions: List[str]
-    ) -> DashboardData:
+            dimensions: Optional[List[str]] = None,
+            fecha_corte: Optional[date] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
         """
-        Generates dashboard data by querying base metrics and calculating KPIs.
+        Generates the dashboard response as plain dicts (DashboardData shape) by
+        querying base metrics and calculating KPIs.
         """
+        dimensions = dimensions or self.DEFAULT_DIMENSIONS
         self.logger.info(
-            f"Generating dashboard data from BigQuery 'última foto' with filters: {filters} and dimensions: {dimensions}"
+            f"Generating dashboard data from '{self.engine.source_name}' 'última foto' with filters: {filters}, "
+            f"dimensions: {dimensions}, fecha_corte: {fecha_corte}"
         )
 
-        query_params = {}
-        where_clauses = ["1=1"]
-
-        for api_filter, values in filters.items():
-            if values and api_filter in self.api_to_db_map:
-                db_column = self.api_to_db_map[api_filter]
-                param_name = f"filter_{api_filter}"
-                where_clauses.append(f"{db_column} IN UNNEST(@{param_name})")
-                query_params[param_name] = values
-
-        where_sql = " AND ".join(where_clauses)
-
-        # La tabla solo contiene contadores y sumas, no ratios.
-        query = f"SELECT * FROM {self.base_table} WHERE {where_sql};"
-
-        records = await self.repo.execute_query(query, query_params)
-        if not records:
-            return DashboardData(segmentoData=[], negocioData=[], integralChartData=[])
-
-        df = pd.DataFrame(records)
+        totals = await self._get_dimension_totals(filters, dimensions, fecha_corte)
 
         processed_tables = {}
         processed_dfs = {}
 
         for api_dim in dimensions:
-            db_column = self.api_to_db_map.get(api_dim)
-
-            if not db_column or db_column not in df.columns:
-                self.logger.warning(f"Dimensión API '{api_dim}' o su columna '{db_column}' no es válida. Saltando.")
+            records = totals.get(api_dim)
+            if not records:
                 continue
 
-            # Agrupar y sumar los contadores base
-            grouped_df = df.groupby(db_column).sum(numeric_only=True).reset_index()
+            grouped_df = pd.DataFrame(records)
+            for column in BASE_METRIC_COLUMNS:
+                if column not in grouped_df.columns:
+                    grouped_df[column] = 0
+            grouped_df[BASE_METRIC_COLUMNS] = grouped_df[BASE_METRIC_COLUMNS].fillna(0).astype(float)
 
             # --- MODIFICACIÓN CLAVE: Calcular KPIs después de agrupar ---
             self._calculate_kpis_on_df(grouped_df)
 
             processed_dfs[api_dim] = grouped_df
-            processed_tables[api_dim] = self._build_datarows_from_df(grouped_df.copy(), db_column)
+            processed_tables[api_dim] = self._build_datarows_from_df(grouped_df)
 
         valid_dims = list(processed_tables.keys())
 
@@ -89,15 +112,77 @@ class DashboardServiceV2(LoggerMixin):
 
         integral_chart_data = []
         if len(valid_dims) > 0:
-            first_dim_df = processed_dfs[valid_dims[0]]
-            integral_chart_data = self._build_integral_chart_data(first_dim_df.copy(),
-                                                                  self.api_to_db_map[valid_dims[0]])
-
-        return DashboardData(
-            segmentoData=segmento_data,
-            negocioData=negocio_data,
-            integralChartData=integral_chart_data,
-        )
+            integral_chart_data = self._build_integral_chart_data(processed_dfs[valid_dims[0]])
+
+        return {
+            "segmentoData": segmento_data,
+            "negocioData": negocio_data,
+            "integralChartData": integral_chart_data,
+        }
+
+    async def get_dashboard_json(
+            self,
+            filters: Dict[str, Any],
+            dimensions: Optional[List[str]] = None,
+            fecha_corte: Optional[date] = None
+    ) -> bytes:
+        """
+        Dashboard response already encoded as JSON bytes (ready for Redis and Response)
+        """
+        payload = await self.get_dashboard_payload(filters, dimensions, fecha_corte)
+        return orjson.dumps(payload)
+
+    async def get_dashboard_data(
+            self,
+            filters: Dict[str, Any],
+            dimensions: Optional[List[str]] = None,
+            fecha_corte: Optional[date] = None
+    ) -> DashboardData:
+        """
+        Generates dashboard data as a validated DashboardData model.
+        """
+        payload = await self.get_dashboard_payload(filters, dimensions, fecha_corte)
+        return DashboardData.model_validate(payload)
+
+    async def get_evolution_data(
+            self,
+            filters: Dict[str, Any],
+            fecha_inicio: date,
+            fecha_fin: date
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        🆕 KPIs diarios entre fecha_inicio y fecha_fin (un punto por día con datos)
+
+        El engine devuelve los contadores base por día (de los continuous
+        aggregates cuando cubren el rango) y los KPIs se calculan aquí con las
+        mismas fórmulas del dashboard. No hay fallback: si el origen diario
+        falla se lanza DailySeriesUnavailableError.
+        """
+        try:
+            records = await self.daily_engine.get_daily_totals(filters, fecha_inicio, fecha_fin)
+        except DailySeriesUnavailableError:
+            raise
+        except Exception as e:
+            self.logger.error(f"❌ Daily series from '{self.daily_engine.source_name}' failed: {e}")
+            raise DailySeriesUnavailableError(
+                f"{self.daily_engine.source_name} daily series unavailable"
+            ) from e
+        if not records:
+            return {"evolutionData": []}
+
+        df = pd.DataFrame(records)
+        numeric_columns = [column for column in df.columns if column != "dia"]
+        df[numeric_columns] = df[numeric_columns].fillna(0).astype(float)
+        self._calculate_kpis_on_df(df)
+
+        cuentas_asignadas = df['cuentas_asignadas'].replace(0, 1)
+        df['cd'] = (df['cuentas_con_contacto_directo'] / cuentas_asignadas * 100).fillna(0)
+        df['ci'] = (df['cuentas_con_contacto_indirecto'] / cuentas_asignadas * 100).fillna(0)
+        df['intensidad'] = df['inten']
+        df['dia_gestion'] = df['dia'].map(lambda dia: (dia - fecha_inicio).days + 1)
+        df['fecha'] = df['dia'].map(lambda dia: dia.isoformat())
+
+        return {"evolutionData": df.drop(columns=["dia"]).to_dict(orient='records')}
 
     @staticmethod
     def _calculate_kpis_on_df(df: pd.DataFrame):
@@ -133,73 +218,68 @@ class DashboardServiceV2(LoggerMixin):
         df['pdpFracCount'] = df.get('cuentas_con_compromiso',
                                     0)  # Asumimos que no hay 'fraccionamiento' separado por ahora
 
-    def _build_datarows_from_df(self, df: pd.DataFrame, group_by_dim_db: str) -> List[DataRow]:
+    @staticmethod
+    def _build_datarows_from_df(df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
-        Construye una lista de DataRow a partir de un DataFrame que ya tiene los KPIs calculados.
+        Construye las filas DataRow (como dicts) a partir de un DataFrame que ya
+        tiene los KPIs calculados. El valor de la dimensión viene en la columna 'name'.
+        Las columnas siguen el orden de los campos de DataRow.
         """
         if df.empty:
             return []
 
-        df = df.rename(columns={group_by_dim_db: 'name'})
-
-        data_rows = []
-        for _, row in df.iterrows():
-            data_rows.append(
-                DataRow(
-                    id=str(row['name']), name=str(row['name']), status=IconStatus.NONE,
-                    cuentas=int(row.get('cuentas_asignadas', 0)),
-                    porcentajeCuentas=row.get('porcentajeCuentas', 0.0),
-                    deudaAsig=row.get('deuda_inicial_total', 0.0),
-                    porcentajeDeuda=row.get('porcentajeDeuda', 0.0),
-                    porcentajeDeudaStatus=IconStatus.NONE,
-                    deudaAct=row.get('deuda_actual_total', 0.0),
-                    porcentajeDeudaAct=0.0, porcentajeDeudaActStatus=IconStatus.NONE,
-                    cobertura=row.get('cobertura', 0.0),
-                    contacto=row.get('contacto', 0.0), contactoStatus=IconStatus.NONE,
-                    cd=0.0, ci=0.0, sc=0.0,  # Placeholders, se pueden calcular si es necesario
-                    cierre=row.get('cierre', 0.0), cierreStatus=IconStatus.NONE,
-                    inten=row.get('inten', 0.0), intenStatus=IconStatus.NONE,
-                    cdCount=int(row.get('cuentas_con_contacto_directo', 0)),
-                    ciCount=int(row.get('cuentas_con_contacto_indirecto', 0)),
-                    scCount=0,  # Placeholder
-                    sgCount=int(row.get('sgCount', 0)),
-                    pdpCount=int(row.get('cuentas_con_compromiso', 0)),
-                    fracCount=0,  # Placeholder
-                    pdpFracCount=int(row.get('pdpFracCount', 0)),
-                )
-            )
-        return data_rows
+        names = df['name'].map(str)
+        zeros = pd.Series(0, index=df.index)
+        rows = pd.DataFrame({
+            'id': names, 'name': names, 'status': IconStatus.NONE.value,
+            'cuentas': df['cuentas_asignadas'].astype('int64'),
+            'porcentajeCuentas': df['porcentajeCuentas'].astype(float),
+            'deudaAsig': df['deuda_inicial_total'],
+            'porcentajeDeuda': df['porcentajeDeuda'].astype(float),
+            'porcentajeDeudaStatus': IconStatus.NONE.value,
+            'deudaAct': df['deuda_actual_total'],
+            'porcentajeDeudaAct': 0.0, 'porcentajeDeudaActStatus': IconStatus.NONE.value,
+            'cobertura': df['cobertura'],
+            'contacto': df['contacto'], 'contactoStatus': IconStatus.NONE.value,
+            'cd': 0.0, 'ci': 0.0, 'sc': 0.0,  # Placeholders, se pueden calcular si es necesario
+            'cierre': df['cierre'], 'cierreStatus': IconStatus.NONE.value,
+            'inten': df['inten'], 'intenStatus': IconStatus.NONE.value,
+            'cdCount': df['cuentas_con_contacto_directo'].astype('int64'),
+            'ciCount': df['cuentas_con_contacto_indirecto'].astype('int64'),
+            'scCount': zeros,  # Placeholder
+            'sgCount': df['sgCount'].astype('int64'),
+            'pdpCount': df['cuentas_con_compromiso'].astype('int64'),
+            'fracCount': zeros,  # Placeholder
+            'pdpFracCount': df['pdpFracCount'].astype('int64'),
+            'fechaAsignacion': None, 'fechaCierre': None, 'diasGestion': None, 'diasHabiles': None,
+        })
+        return rows.to_dict(orient='records')
 
-    def _build_integral_chart_data(self, df: pd.DataFrame, group_by_dim_db: str) -> List[IntegralChartDataPoint]:
+    @staticmethod
+    def _build_integral_chart_data(df: pd.DataFrame) -> List[Dict[str, Any]]:
         """
         Construye los datos para el gráfico integral. Reutiliza los KPIs ya calculados en el DF.
         """
         if df.empty:
             return []
 
-        df = df.rename(columns={group_by_dim_db: 'name'})
-
         # KPIs adicionales para el gráfico
-        cuentas_asignadas = df.get('cuentas_asignadas', 1).replace(0, 1)
-        df['contactoDirecto_pct'] = (df.get('cuentas_con_contacto_directo', 0) / cuentas_asignadas * 100).fillna(0)
-        df['contactoIndirecto_pct'] = (df.get('cuentas_con_contacto_indirecto', 0) / cuentas_asignadas * 100).fillna(0)
-
-        chart_points = []
-        for _, row in df.iterrows():
-            chart_points.append(
-                IntegralChartDataPoint(
-                    name=str(row['name']),
-                    cobertura=row.get('cobertura', 0.0),
-                    contacto=row.get('contacto', 0.0),
-                    contactoDirecto=row.get('contactoDirecto_pct', 0.0),
-                    contactoIndirecto=row.get('contactoIndirecto_pct', 0.0),
-                    tasaDeCierre=row.get('cierre', 0.0),
-                    intensidad=row.get('inten', 0.0)
-                )
-            )
-        return chart_points
+        cuentas_asignadas = df['cuentas_asignadas'].replace(0, 1)
+        points = pd.DataFrame({
+            'name': df['name'].map(str),
+            'cobertura': df['cobertura'],
+            'contacto': df['contacto'],
+            'contactoDirecto': (df['cuentas_con_contacto_directo'] / cuentas_asignadas * 100).fillna(0),
+            'contactoIndirecto': (df['cuentas_con_contacto_indirecto'] / cuentas_asignadas * 100).fillna(0),
+            'tasaDeCierre': df['cierre'],
+            'intensidad': df['inten'],
+        })
+        return points.to_dict(orient='records')
 
     async def health_check(self) -> Dict[str, Any]:
-        is_healthy = await self.repo.health_check()
+        is_healthy = await self.engine.health_check()
+        dependencies = [self.engine.source_name]
+        if self.fallback_engine is not None:
+            dependencies.append(f"{self.fallback_engine.source_name} (fallback)")
         return {'status': 'healthy' if is_healthy else 'unhealthy', 'timestamp': datetime.now().isoformat(),
-                'dependencies': ['Google BigQuery']}
\ No newline at end of file
+                'dependencies': dependencies}
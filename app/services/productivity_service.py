@@ -1,15 +1,19 @@
 # app/services/productivity_service.py
 """
 🏆 ProductivityService - Servicio especializado para la página de Productividad
-Coordina múltiples consultas BigQuery para análisis de agentes
+
+🆕 Lee los rollups que mantiene el ETL en el mart de Postgres
+(productivity_data = agente × día, productivity_hourly = agente × hora):
+cada vista es una suma por rango, sin recorrer las gestiones crudas.
 """
 
 import asyncio
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Any
 
-from app.repositories.bigquery_repo import BigQueryRepository
-from app.repositories.cache_repo import CacheRepository
+from app.core.cache_tags import entry_tags
+from app.repositories.base import BaseRepository
+from app.services.cache_service import CacheService
 from app.models.productivity import (
     ProductivityData,
     ProductivityRequest,
@@ -27,7 +31,7 @@ class ProductivityService:
     Servicio especializado para la página de Productividad
 
     Responsabilidades:
-    - Coordinar múltiples consultas BigQuery
+    - Coordinar las consultas sobre los rollups de productividad
     - Transformar datos a modelos Pydantic
     - Manejar cache de resultados
     - Proporcionar datos para diferentes visualizaciones
@@ -40,10 +44,17 @@ class ProductivityService:
     5. Lista de agentes disponibles
     """
 
-    def __init__(self, bq_repo: BigQueryRepository, cache_repo: CacheRepository):
-        self.bq_repo = bq_repo
-        self.cache_repo = cache_repo
+    # Rango por defecto si el request no trae fecha_inicio (igual que el endpoint)
+    DEFAULT_RANGE_DAYS = 30
+
+    def __init__(self, db_repo: BaseRepository, cache_service: CacheService, schema: Optional[str] = None):
+        self.db_repo = db_repo
+        self.cache_service = cache_service
         self.cache_ttl = settings.CACHE_TTL_ASSIGNMENT  # 2 horas por defecto
+        mart_schema = schema or f"mart_{settings.PROJECT_UID}"
+        self.daily_table = f"{mart_schema}.productivity_data"
+        self.hourly_table = f"{mart_schema}.productivity_hourly"
+        self.calendar_table = f"raw_{settings.PROJECT_UID}.calendario"
 
     async def get_productivity_analysis(
             self,
@@ -59,14 +70,23 @@ class ProductivityService:
             ProductivityResponse con todos los datos para el frontend
         """
         # Generate cache key based on request parameters
-        cache_key = self._generate_cache_key("productivity_analysis", request)
-
-        # Try cache first
-        cached_data = await self.cache_repo.get_from_cache(cache_key)
-        if cached_data:
-            self.logger.info("📋 Cache hit for productivity analysis")
-            return ProductivityResponse(**cached_data)
-
+        cache_key = await self.cache_service.generations.versioned_key(
+            "productivity", self._generate_cache_key("productivity_analysis", request)
+        )
+
+        # 🔧 Cache + single-flight + stale-while-revalidate: misses concurrentes
+        # esperan un solo análisis y una entrada vencida se refresca en segundo plano
+        cached_data = await self.cache_service.get_or_compute(
+            cache_key,
+            lambda: self._compute_productivity_analysis(request),
+            self.cache_ttl,
+            stale_ttl=settings.CACHE_STALE_TTL_SECONDS,
+            tags=entry_tags("productivity", fechas=[request.fecha_inicio, request.fecha_fin])
+        )
+        return ProductivityResponse(**cached_data)
+
+    async def _compute_productivity_analysis(self, request: ProductivityRequest) -> Dict[str, Any]:
+        """Ejecutar las consultas del análisis (miss de caché)"""
         self.logger.info("🔍 Executing productivity analysis with multiple queries")
 
         # Execute multiple queries in parallel for better performance
@@ -101,17 +121,11 @@ class ProductivityService:
                     "execution_time_seconds": execution_time,
                     "total_agents": len(agent_ranking),
                     "query_count": 4,
+                    "source": "postgresql",
                     "cache_status": "miss"
                 }
             )
 
-            # Cache the successful result
-            await self.cache_repo.set_to_cache(
-                cache_key,
-                response.dict(),
-                self.cache_ttl
-            )
-
             self.logger.info(
                 f"✅ Productivity analysis completed in {execution_time:.2f}s",
                 extra={
@@ -122,7 +136,7 @@ class ProductivityService:
                 }
             )
 
-            return response
+            return response.dict()
 
         except Exception as e:
             self.logger.error(f"❌ Productivity analysis failed: {e}", exc_info=True)
@@ -143,85 +157,86 @@ class ProductivityService:
         """
         cache_key = self._generate_cache_key("available_agents", request)
 
-        # Try cache first
-        cached_agents = await self.cache_repo.get_from_cache(cache_key)
-        if cached_agents:
-            return cached_agents
-
-        # TODO: Implementar query específica para obtener agentes disponibles
-        # Esta query debe ser optimizada y rápida
-        query = """
-        -- Query para obtener agentes disponibles en el período
-        -- TODO: Definir query específica basada en las tablas reales
-        SELECT 
-            'placeholder' as agent_name,
-            'placeholder' as dni
+        # Cache for shorter time (agents list changes less frequently)
+        return await self.cache_service.get_or_compute(
+            cache_key, lambda: self._query_available_agents(request), 3600  # 1 hour
+        )
+
+    async def _query_available_agents(self, request: ProductivityRequest) -> List[Dict[str, Any]]:
+        query = f"""
+        SELECT
+            p.correo_agente,
+            COALESCE(MAX(p.nombre_agente), p.correo_agente) AS agent_name,
+            COALESCE(MAX(p.dni_agente), 'SIN DNI') AS dni,
+            MIN(p.fecha_foto) AS fecha_inicio,
+            MAX(p.fecha_foto) AS fecha_fin
+        FROM {self.daily_table} p
+        WHERE {self._rollup_filters()}
+        GROUP BY p.correo_agente
+        ORDER BY agent_name
         """
 
-        params = self._build_query_params(request)
-        results = await self.bq_repo.execute_query(query, params, use_cache=True)
+        results = await self.db_repo.execute_query(query, self._build_query_params(request))
 
         # Transform to frontend format
-        agents = self._transform_to_user_selector_format(results)
-
-        # Cache for shorter time (agents list changes less frequently)
-        await self.cache_repo.set_to_cache(cache_key, agents, 3600)  # 1 hour
-
-        return agents
+        return self._transform_to_user_selector_format(results)
 
     async def _get_agent_ranking(self, request: ProductivityRequest) -> List[AgentRankingRow]:
         """
         Query 1: Ranking de agentes con métricas principales y cuartiles
 
-        Esta query debe obtener:
-        - Ranking ordenado por performance
-        - Métricas de llamadas, contactos, compromisos
-        - Montos recuperados
-        - Tasas de conversión
-        - Cuartiles de performance
+        Suma el rollup agente × día del rango; ranking y cuartil por compromisos
+        (desempate por llamadas). closingRate = compromisos / contactos efectivos,
+        commitmentConversion = compromisos / llamadas. amountRecovered es el monto
+        comprometido (el rollup no tiene pagos).
         """
         self.logger.debug("🏆 Executing agent ranking query")
 
-        # TODO: Implementar query específica para ranking de agentes
-        # Debe incluir todas las métricas necesarias para AgentRankingRow
-        query = """
-        -- Query para ranking de agentes con métricas completas
-        -- TODO: Definir query específica basada en las tablas reales
-        SELECT 
-            'placeholder' as agent_name,
-            1 as rank,
-            100 as calls,
-            50 as direct_contacts,
-            25 as commitments,
-            5000.0 as amount_recovered,
-            50.0 as closing_rate,
-            75.0 as commitment_conversion,
-            1 as quartile
+        query = f"""
+        WITH agentes AS (
+            SELECT
+                p.correo_agente,
+                COALESCE(MAX(p.nombre_agente), p.correo_agente) AS agent_name,
+                SUM(p.total_gestiones) AS calls,
+                SUM(p.contactos_efectivos) AS direct_contacts,
+                SUM(p.total_pdp) AS commitments,
+                SUM(p.monto_compromiso) AS amount_recovered
+            FROM {self.daily_table} p
+            WHERE {self._rollup_filters()}
+            GROUP BY p.correo_agente
+        )
+        SELECT
+            a.*,
+            ROW_NUMBER() OVER (ORDER BY a.commitments DESC, a.calls DESC, a.correo_agente) AS rank,
+            NTILE(4) OVER (ORDER BY a.commitments DESC, a.calls DESC, a.correo_agente) AS quartile,
+            COALESCE(ROUND(a.commitments * 100.0 / NULLIF(a.direct_contacts, 0), 2), 0) AS closing_rate,
+            COALESCE(ROUND(a.commitments * 100.0 / NULLIF(a.calls, 0), 2), 0) AS commitment_conversion
+        FROM agentes a
+        ORDER BY rank
         """
 
-        params = self._build_query_params(request)
-        results = await self.bq_repo.execute_query(query, params, use_cache=True)
+        results = await self.db_repo.execute_query(query, self._build_query_params(request))
 
         # Transform to Pydantic models
-        ranking = []
-        for i, result in enumerate(results):
-            agent = AgentRankingRow(
-                id=f"agent-{i + 1}",
-                rank=result.get('rank', i + 1),
-                agentName=result.get('agent_name', f'Agent {i + 1}'),
-                calls=result.get('calls', 0),
-                directContacts=result.get('direct_contacts', 0),
-                commitments=result.get('commitments', 0),
-                amountRecovered=result.get('amount_recovered', 0.0),
-                closingRate=result.get('closing_rate', 0.0),
-                commitmentConversion=result.get('commitment_conversion', 0.0),
-                quartile=result.get('quartile', 4)
+        ranking = [
+            AgentRankingRow(
+                id=result['correo_agente'],
+                rank=result['rank'],
+                agentName=result['agent_name'],
+                calls=result['calls'],
+                directContacts=result['direct_contacts'],
+                commitments=result['commitments'],
+                amountRecovered=float(result['amount_recovered']),
+                closingRate=float(result['closing_rate']),
+                commitmentConversion=float(result['commitment_conversion']),
+                quartile=result['quartile']
             )
-            ranking.append(agent)
+            for result in results
+        ]
 
-        # Apply agent filter if specified
+        # Apply agent filter if specified (after ranking: rank and quartile stay global)
         if request.agente:
-            ranking = [a for a in ranking if a.agentName == request.agente]
+            ranking = [a for a in ranking if request.agente in (a.agentName, a.id)]
 
         return ranking
 
@@ -229,139 +244,140 @@ class ProductivityService:
         """
         Query 2: Tendencias diarias de productividad
 
-        Esta query debe obtener por día:
-        - Total de llamadas
-        - Total de compromisos
-        - Monto recuperado estimado
+        Por fecha: llamadas, compromisos y monto comprometido. 'fecha' identifica
+        el punto; 'day' (día del mes) se repite si el rango cruza un mes.
         """
         self.logger.debug("📅 Executing daily trends query")
 
-        # TODO: Implementar query específica para tendencias diarias
-        query = """
-        -- Query para tendencias de productividad por día
-        -- TODO: Definir query específica basada en las tablas reales
-        SELECT 
-            1 as day,
-            100 as llamadas,
-            25 as compromisos,
-            5000.0 as recupero
+        query = f"""
+        SELECT
+            p.fecha_foto,
+            SUM(p.total_gestiones) AS llamadas,
+            SUM(p.total_pdp) AS compromisos,
+            SUM(p.monto_compromiso) AS recupero
+        FROM {self.daily_table} p
+        WHERE {self._rollup_filters()}
+        GROUP BY p.fecha_foto
+        ORDER BY p.fecha_foto
         """
 
-        params = self._build_query_params(request)
-        results = await self.bq_repo.execute_query(query, params, use_cache=True)
+        results = await self.db_repo.execute_query(query, self._build_query_params(request))
 
-        # Transform to Pydantic models
-        daily_trends = []
-        for result in results:
-            trend = ProductivityTrendPoint(
-                day=result.get('day'),
-                llamadas=result.get('llamadas', 0),
-                compromisos=result.get('compromisos', 0),
-                recupero=result.get('recupero')
+        return [
+            ProductivityTrendPoint(
+                fecha=result['fecha_foto'].isoformat(),
+                day=result['fecha_foto'].day,
+                llamadas=result['llamadas'],
+                compromisos=result['compromisos'],
+                recupero=float(result['recupero'])
             )
-            daily_trends.append(trend)
-
-        return daily_trends
+            for result in results
+        ]
 
     async def _get_hourly_trends(self, request: ProductivityRequest) -> List[ProductivityTrendPoint]:
         """
         Query 3: Tendencias por horas del día
 
-        Esta query debe obtener por hora (7:00-20:00):
-        - Total de llamadas
-        - Total de compromisos
+        Por hora: llamadas y compromisos (rollup agente × hora)
         """
         self.logger.debug("⏰ Executing hourly trends query")
 
-        # TODO: Implementar query específica para tendencias por hora
-        query = """
-        -- Query para tendencias de productividad por hora
-        -- TODO: Definir query específica basada en las tablas reales
-        SELECT 
-            '09:00' as hour,
-            50 as llamadas,
-            12 as compromisos
+        query = f"""
+        SELECT
+            p.hora,
+            SUM(p.total_gestiones) AS llamadas,
+            SUM(p.total_pdp) AS compromisos
+        FROM {self.hourly_table} p
+        WHERE {self._rollup_filters()}
+        GROUP BY p.hora
+        ORDER BY p.hora
         """
 
-        params = self._build_query_params(request)
-        results = await self.bq_repo.execute_query(query, params, use_cache=True)
+        results = await self.db_repo.execute_query(query, self._build_query_params(request))
 
-        # Transform to Pydantic models
-        hourly_trends = []
-        for result in results:
-            trend = ProductivityTrendPoint(
-                hour=result.get('hour'),
-                llamadas=result.get('llamadas', 0),
-                compromisos=result.get('compromisos', 0)
+        return [
+            ProductivityTrendPoint(
+                hour=f"{result['hora']:02d}:00",
+                llamadas=result['llamadas'],
+                compromisos=result['compromisos']
             )
-            hourly_trends.append(trend)
-
-        return hourly_trends
+            for result in results
+        ]
 
     async def _get_agent_heatmap(self, request: ProductivityRequest) -> List[AgentHeatmapRow]:
         """
         Query 4: Heatmap de productividad por agente y día
 
-        Esta query debe obtener para cada agente y día:
-        - Gestiones por hora trabajada
-        - Contactos efectivos por hora trabajada
-        - Compromisos por hora trabajada
+        Para cada agente y fecha del rango (clave YYYY-MM-DD, así un rango que
+        cruza un mes no mezcla días con el mismo número): gestiones, contactos
+        efectivos y compromisos
         """
         self.logger.debug("🔥 Executing agent heatmap query")
 
-        # TODO: Implementar query específica para heatmap de agentes
-        query = """
-        -- Query para heatmap de productividad por agente y día
-        -- TODO: Definir query específica basada en las tablas reales
-        SELECT 
-            'Agent 1' as agent_name,
-            'DNI123' as dni,
-            1 as day,
-            10.5 as gestiones,
-            8.2 as contactos_efectivos,
-            5.1 as compromisos
+        query = f"""
+        SELECT
+            p.correo_agente,
+            COALESCE(MAX(p.nombre_agente), p.correo_agente) AS agent_name,
+            COALESCE(MAX(p.dni_agente), 'SIN DNI') AS dni,
+            p.fecha_foto,
+            SUM(p.total_gestiones) AS gestiones,
+            SUM(p.contactos_efectivos) AS contactos_efectivos,
+            SUM(p.total_pdp) AS compromisos
+        FROM {self.daily_table} p
+        WHERE {self._rollup_filters()}
+        GROUP BY p.correo_agente, p.fecha_foto
+        ORDER BY agent_name, p.fecha_foto
         """
 
-        params = self._build_query_params(request)
-        results = await self.bq_repo.execute_query(query, params, use_cache=True)
+        results = await self.db_repo.execute_query(query, self._build_query_params(request))
 
         # Group by agent and build daily performance
         agent_heatmap_dict = {}
         for result in results:
-            agent_key = result['agent_name']
+            agent_key = result['correo_agente']
             if agent_key not in agent_heatmap_dict:
                 agent_heatmap_dict[agent_key] = {
                     "agent_name": result['agent_name'],
-                    "dni": result.get('dni', 'SIN DNI'),
+                    "dni": result['dni'],
                     "daily_performance": {}
                 }
 
-            day = result['day']
-            daily_perf = AgentDailyPerformance(
-                gestiones=result.get('gestiones'),
-                contactosEfectivos=result.get('contactos_efectivos'),
-                compromisos=result.get('compromisos')
+            agent_heatmap_dict[agent_key]["daily_performance"][result['fecha_foto'].isoformat()] = AgentDailyPerformance(
+                gestiones=result['gestiones'],
+                contactosEfectivos=result['contactos_efectivos'],
+                compromisos=result['compromisos']
             )
 
-            agent_heatmap_dict[agent_key]["daily_performance"][day] = daily_perf
-
-        # Convert to list of AgentHeatmapRow objects
-        heatmap_list = []
-        for i, (agent_name, data) in enumerate(agent_heatmap_dict.items()):
-            heatmap_row = AgentHeatmapRow(
-                id=f"agent-{i + 1}",
+        heatmap_list = [
+            AgentHeatmapRow(
+                id=agent_key,
                 dni=data["dni"],
                 agentName=data["agent_name"],
                 dailyPerformance=data["daily_performance"]
             )
-            heatmap_list.append(heatmap_row)
+            for agent_key, data in agent_heatmap_dict.items()
+        ]
 
         # Apply agent filter if specified
         if request.agente:
-            heatmap_list = [h for h in heatmap_list if h.agentName == request.agente]
+            heatmap_list = [h for h in heatmap_list if request.agente in (h.agentName, h.id)]
 
         return heatmap_list
 
+    def _rollup_filters(self) -> str:
+        """
+        WHERE común sobre los rollups (alias p)
+
+        Parámetros posicionales (ver _build_query_params): $1 fecha_inicio,
+        $2 fecha_fin, $3 archivos, $4 carteras (NULL = sin filtro).
+        """
+        return f"""p.fecha_foto BETWEEN $1 AND $2
+          AND ($3::text[] IS NULL OR p.archivo = ANY($3::text[]))
+          AND ($4::text[] IS NULL OR p.archivo IN (
+              SELECT CONCAT(c.archivo, '.txt') FROM {self.calendar_table} c
+              WHERE c.tipo_cartera = ANY($4::text[])
+          ))"""
+
     def _build_query_params(self, request: ProductivityRequest) -> Dict[str, Any]:
         """
         Construir parámetros para las queries basado en el request
@@ -370,24 +386,28 @@ class ProductivityService:
             request: Parámetros de solicitud
 
         Returns:
-            Diccionario con parámetros para BigQuery
+            Diccionario con parámetros para Postgres (el orden define $1..$4)
         """
-        params = {}
-
-        # Fechas
-        if request.fecha_inicio:
-            params['fecha_inicio'] = request.fecha_inicio
-        if request.fecha_fin:
-            params['fecha_fin'] = request.fecha_fin
-
-        # Filtros adicionales si están definidos
-        if request.filtros:
-            # TODO: Mapear filtros específicos según las necesidades
-            for key, value in request.filtros.items():
-                if value and value != ['TODAS']:
-                    params[f'filter_{key}'] = value
+        fecha_fin = request.fecha_fin or date.today()
+        fecha_inicio = request.fecha_inicio or fecha_fin - timedelta(days=self.DEFAULT_RANGE_DAYS)
+
+        filtros = request.filtros or {}
+        return {
+            "fecha_inicio": fecha_inicio,
+            "fecha_fin": fecha_fin,
+            # Los rollups guardan el archivo como asignaciones ('CAMPANA.txt')
+            "archivos": [
+                archivo if archivo.endswith(".txt") else f"{archivo}.txt"
+                for archivo in self._filter_values(filtros.get("archivo"))
+            ] or None,
+            "carteras": self._filter_values(filtros.get("cartera")) or None,
+        }
 
-        return params
+    @staticmethod
+    def _filter_values(value: Any) -> List[str]:
+        if not value or value == ['TODAS']:
+            return []
+        return [value] if isinstance(value, str) else [str(v) for v in value]
 
     def _generate_cache_key(self, operation: str, request: ProductivityRequest) -> str:
         """
@@ -420,7 +440,7 @@ class ProductivityService:
         Transformar resultados de query a formato UserSelector del frontend
 
         Args:
-            results: Resultados crudos de BigQuery
+            results: Filas de la consulta de agentes disponibles
 
         Returns:
             Lista en formato compatible con UserSelector
@@ -446,17 +466,17 @@ class ProductivityService:
 
 # Factory function for dependency injection
 async def get_productivity_service(
-        bq_repo: BigQueryRepository,
-        cache_repo: CacheRepository
+        db_repo: BaseRepository,
+        cache_service: CacheService
 ) -> ProductivityService:
     """
     Factory function para obtener instancia del ProductivityService
 
     Args:
-        bq_repo: Repositorio BigQuery inicializado
-        cache_repo: Repositorio Cache inicializado
+        db_repo: Repositorio Postgres (mart con los rollups de productividad)
+        cache_service: Servicio de caché (Redis + L1)
 
     Returns:
         Instancia configurada del ProductivityService
     """
-    return ProductivityService(bq_repo, cache_repo)
\ No newline at end of file
+    return ProductivityService(db_repo, cache_service)
\ No newline at end of file
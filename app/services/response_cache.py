@@ -0,0 +1,254 @@
+# app/services/response_cache.py
+"""
+📦 Response Cache - Cuerpos HTTP finales en Redis
+
+Guarda la respuesta ya codificada (JSON con orjson, gzip si vale la pena) junto
+a su ETag. En un hit el cuerpo se devuelve tal cual, sin json.loads, sin
+model_validate y sin que FastAPI vuelva a serializar. Con If-None-Match el
+dashboard de React recibe 304 sin cuerpo.
+
+🆕 Los misses concurrentes de una misma clave se coalescen (SingleFlight): una
+sola construcción por clave, también entre workers.
+
+🆕 Stale-while-revalidate (stale_ttl): vencido el TTL blando se sirve el cuerpo
+guardado y se reconstruye en segundo plano.
+
+🆕 Etiquetas (tags): cada cuerpo se registra en los sets de sus etiquetas
+(app.core.cache_tags); CacheService.invalidate_tags() los borra.
+
+Requiere un cliente Redis binario (decode_responses=False): el cuerpo gzip no es texto.
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+import orjson
+import redis.asyncio as redis
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.logging import LoggerMixin
+from app.core.cache_tags import register_tags
+from app.core.middleware import track_cache_hit, track_cache_miss, track_stale_served
+from app.services.cache_namespaces import CacheGenerations
+from app.services.cache_service import SingleFlight
+
+
+def _json_default(value: Any) -> Any:
+    """Tipos que orjson no serializa por sí mismo (modelos Pydantic anidados)"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): ignora el prefijo W/"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").lower().split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+@dataclass
+class CachedResponse:
+    """Cuerpo HTTP codificado, listo para enviar"""
+    body: bytes
+    etag: str
+    content_encoding: Optional[str] = None  # "gzip" o None
+    ttl: Optional[int] = None  # Segundos de vida restantes en Redis (solo lectura)
+
+
+class ResponseCache(LoggerMixin):
+    """
+    Caché de respuestas HTTP completas (cuerpo + ETag) sobre Redis
+    """
+
+    # Por debajo de este tamaño gzip no compensa la CPU
+    GZIP_MIN_BYTES = 1024
+    GZIP_LEVEL = 6
+    CACHE_CONTROL = "private, no-cache"
+
+    def __init__(self, redis_client: redis.Redis, gzip_min_bytes: int = GZIP_MIN_BYTES):
+        """
+        Args:
+            redis_client: Cliente redis.asyncio con decode_responses=False
+            gzip_min_bytes: Tamaño mínimo del JSON para guardarlo comprimido
+        """
+        self.redis = redis_client
+        self.gzip_min_bytes = gzip_min_bytes
+        self.single_flight = SingleFlight(redis_client, namespace="response")
+        self.generations = CacheGenerations(redis_client)
+
+    # ===============================================
+    # CODIFICACIÓN
+    # ===============================================
+
+    @staticmethod
+    def encode_json(payload: Any) -> bytes:
+        """JSON en bytes; los modelos se serializan por alias (camelCase)"""
+        if isinstance(payload, bytes):
+            return payload
+        return orjson.dumps(payload, default=_json_default)
+
+    def build(self, payload: Any) -> CachedResponse:
+        """
+        Codificar una vez: JSON, ETag sobre el JSON sin comprimir y gzip opcional
+
+        El ETag es débil: identifica el contenido, sea cual sea la codificación
+        con la que se envíe.
+        """
+        body = self.encode_json(payload)
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        if len(body) >= self.gzip_min_bytes:
+            return CachedResponse(gzip.compress(body, compresslevel=self.GZIP_LEVEL, mtime=0), etag, "gzip")
+        return CachedResponse(body, etag)
+
+    # ===============================================
+    # REDIS
+    # ===============================================
+
+    async def _fetch(self, key: str) -> Optional[CachedResponse]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.ttl(key)
+            stored, ttl = await pipe.execute()
+        if not stored or b"body" not in stored:
+            return None
+
+        encoding = stored.get(b"encoding") or b""
+        return CachedResponse(
+            body=stored[b"body"],
+            etag=stored[b"etag"].decode("ascii"),
+            content_encoding=encoding.decode("ascii") or None,
+            ttl=ttl if ttl >= 0 else None
+        )
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            cached = await self._fetch(key)
+        except Exception as e:
+            self.logger.error(f"Error al obtener respuesta cacheada {key}: {e}")
+            track_cache_miss("response")
+            return None
+
+        if cached is None:
+            track_cache_miss("response")
+            return None
+
+        track_cache_hit("response")
+        return cached
+
+    async def set(
+        self,
+        key: str,
+        cached: CachedResponse,
+        expire_in: int,
+        tags: Optional[Iterable[str]] = None
+    ) -> bool:
+        if expire_in <= 0:
+            self.logger.warning(f"Intento de cachear la respuesta '{key}' con TTL no positivo. No se guardará.")
+            return False
+
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={
+                    "body": cached.body,
+                    "etag": cached.etag,
+                    "encoding": cached.content_encoding or ""
+                })
+                pipe.expire(key, expire_in)
+                register_tags(pipe, key, tags, expire_in)
+                await pipe.execute()
+            self.logger.debug(f"Respuesta cacheada {key}: {len(cached.body)} bytes, TTL {expire_in}s")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error al cachear la respuesta {key}: {e}")
+            return False
+
+    # ===============================================
+    # HTTP
+    # ===============================================
+
+    def to_response(self, request: Request, cached: CachedResponse) -> Response:
+        """304 si el cliente ya tiene esta versión; si no, el cuerpo guardado"""
+        headers = {"ETag": cached.etag, "Cache-Control": self.CACHE_CONTROL, "Vary": "Accept-Encoding"}
+
+        if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+            return Response(status_code=304, headers=headers)
+
+        body = cached.body
+        if cached.content_encoding == "gzip":
+            if _accepts_gzip(request.headers.get("accept-encoding")):
+                headers["Content-Encoding"] = "gzip"
+            else:
+                body = gzip.decompress(body)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    async def _build_and_store(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        expire_in: int,
+        tags: Optional[Iterable[str]] = None
+    ) -> CachedResponse:
+        built = self.build(await build())
+        await self.set(key, built, expire_in, tags=tags)
+        return built
+
+    async def prewarm(
+        self,
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        expire_in: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None
+    ) -> CachedResponse:
+        """Construir y guardar la respuesta sin request (precalentado post-ETL)"""
+        return await self.single_flight.run(
+            key, lambda: self._build_and_store(key, build, expire_in + stale_ttl, tags), lambda: self._fetch(key)
+        )
+
+    async def get_or_build(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], Awaitable[Any]],
+        expire_in: int,
+        stale_ttl: int = 0,
+        tags: Optional[Iterable[str]] = None
+    ) -> Response:
+        """
+        Respuesta cacheada o construida con build() (modelo, dict/list o bytes JSON)
+
+        Args:
+            request: Request entrante (If-None-Match / Accept-Encoding)
+            key: Clave de caché
+            build: Corrutina que genera el payload en un miss
+            expire_in: TTL blando en segundos
+            stale_ttl: Segundos extra en que el cuerpo vencido se sirve mientras
+                se reconstruye en segundo plano (0 = sin SWR)
+            tags: Etiquetas de invalidación (ej. "endpoint:dashboard", "cartera:TEMPRANA")
+        """
+        async def build_and_store() -> CachedResponse:
+            return await self._build_and_store(key, build, expire_in + stale_ttl, tags)
+
+        cached = await self.get(key)
+        if cached is None:
+            cached = await self.single_flight.run(key, build_and_store, lambda: self._fetch(key))
+        elif stale_ttl and cached.ttl is not None and cached.ttl <= stale_ttl:
+            track_stale_served("response")
+            self.single_flight.refresh_in_background(key, build_and_store)
+        return self.to_response(request, cached)
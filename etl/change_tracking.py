@@ -0,0 +1,257 @@
+"""
+🧭 Change Tracking Module - Particiones (archivo, fecha) modificadas por las cargas RAW
+
+Cada lote cargado registra en etl_changed_partitions las combinaciones
+(archivo, fecha) que tocó, en la misma transacción que las filas. El rebuild
+incremental de aux/mart (etl.pipelines.incremental_rebuild) consume esos
+cambios y reconstruye solo esas particiones.
+
+- archivo NULL: el cambio afecta a todas las campañas (ej. gestiones)
+- fecha NULL: el cambio afecta a todos los días de la campaña (ej. calendario)
+
+Las dimensiones (refresh completo diario) no registran particiones: se
+comparan por huella de contenido (etl_input_fingerprints).
+
+Autor: Ricky para Pulso-Back
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import logging
+
+from etl.config import ETLConfig
+from shared.database.connection import execute_query
+
+ChangedPartition = Tuple[Optional[str], Optional[date]]
+
+
+async def ensure_change_tracking_table() -> None:
+    """
+    Crear tabla de particiones modificadas si no existe
+    """
+    create_table_sql = """
+    CREATE TABLE IF NOT EXISTS etl_changed_partitions (
+        change_id BIGSERIAL PRIMARY KEY,
+        table_name VARCHAR(100) NOT NULL,
+        archivo TEXT,
+        fecha DATE,
+        recorded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE UNIQUE INDEX IF NOT EXISTS uq_etl_changed_partitions_partition
+        ON etl_changed_partitions (table_name, (COALESCE(archivo, '')), (COALESCE(fecha, '-infinity'::date)));
+
+    CREATE TABLE IF NOT EXISTS etl_input_fingerprints (
+        table_name VARCHAR(100) PRIMARY KEY,
+        fingerprint VARCHAR(32) NOT NULL,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    );
+    """
+
+    await execute_query(create_table_sql)
+    logging.info("✅ Change tracking table ready")
+
+
+def campaign_key(archivo: Optional[str]) -> Optional[str]:
+    """
+    Normalizar un archivo de campaña a la clave de calendario
+
+    asignaciones/trandeuda/pagos guardan 'CAMPANA.txt' y calendario 'CAMPANA'.
+    """
+    if archivo is None:
+        return None
+    key = str(archivo).strip()
+    if key.lower().endswith('.txt'):
+        key = key[:-4]
+    return key or None
+
+
+def _as_date(value: Any) -> Optional[date]:
+    """Día (UTC) de un valor date/datetime; None si no es una fecha"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def collect_changed_partitions(
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]],
+    archivo_column: Optional[str],
+    date_column: Optional[str]
+) -> Set[ChangedPartition]:
+    """
+    Particiones (archivo, fecha) distintas de un lote de filas alineadas a columns
+
+    Un valor ausente o no reconocible se registra como NULL (todas las
+    campañas / todos los días): siempre se reconstruye de más, nunca de menos.
+
+    Args:
+        columns: Columnas de las filas
+        rows: Filas (tuplas o listas) alineadas a columns
+        archivo_column: Columna de campaña (None si la tabla no la tiene)
+        date_column: Columna de fecha (None si la tabla no la tiene)
+
+    Returns:
+        Set de tuplas (archivo, fecha)
+    """
+    if not rows or not (archivo_column or date_column):
+        return set()
+
+    index = {column.lower(): i for i, column in enumerate(columns)}
+    archivo_idx = index.get(archivo_column.lower()) if archivo_column else None
+    date_idx = index.get(date_column.lower()) if date_column else None
+
+    if archivo_idx is None and date_idx is None:
+        return {(None, None)}
+    if date_idx is None:
+        return {(row[archivo_idx], None) for row in rows}
+
+    # Muchas filas comparten el mismo valor: convertir cada valor distinto una sola vez
+    if archivo_idx is None:
+        return {(None, _as_date(value)) for value in {row[date_idx] for row in rows}}
+    return {
+        (archivo, _as_date(value))
+        for archivo, value in {(row[archivo_idx], row[date_idx]) for row in rows}
+    }
+
+
+async def record_changed_partitions(
+    conn,
+    table_name: str,
+    partitions: Set[ChangedPartition]
+) -> None:
+    """
+    Registrar particiones modificadas usando la conexión/transacción de la carga
+
+    Una partición ya pendiente renueva su change_id, así un rebuild en curso
+    no la borra sin haber leído el cambio nuevo.
+
+    Args:
+        conn: Conexión asyncpg dentro de la transacción del lote
+        table_name: Nombre base de la tabla cargada
+        partitions: Set de tuplas (archivo, fecha)
+    """
+    if not partitions:
+        return
+
+    # Orden fijo (NULL al final): cargas concurrentes bloquean las filas en el
+    # mismo orden y no se cruzan en un deadlock
+    ordered = sorted(
+        partitions,
+        key=lambda p: (p[0] is None, p[0] or "", p[1] is None, p[1] or date.min)
+    )
+    archivos, fechas = zip(*ordered)
+    await conn.execute(
+        """
+        INSERT INTO etl_changed_partitions (table_name, archivo, fecha)
+        SELECT $1, p.archivo, p.fecha
+        FROM unnest($2::text[], $3::date[]) AS p(archivo, fecha)
+        ON CONFLICT (table_name, (COALESCE(archivo, '')), (COALESCE(fecha, '-infinity'::date)))
+        DO UPDATE SET
+            change_id = nextval(pg_get_serial_sequence('etl_changed_partitions', 'change_id')),
+            recorded_at = CURRENT_TIMESTAMP
+        """,
+        table_name,
+        list(archivos),
+        list(fechas)
+    )
+
+
+async def get_pending_changes(table_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Obtener los cambios pendientes de reconstruir
+
+    Args:
+        table_names: Filtrar por tablas (None = todas)
+
+    Returns:
+        Lista de dicts con change_id, table_name, archivo y fecha
+    """
+    query = """
+    SELECT change_id, table_name, archivo, fecha
+    FROM etl_changed_partitions
+    WHERE $1::text[] IS NULL OR table_name = ANY($1::text[])
+    ORDER BY change_id
+    """
+
+    rows = await execute_query(query, table_names, fetch="all")
+    return [dict(row) for row in rows]
+
+
+async def clear_changes(change_ids: List[int]) -> int:
+    """
+    Eliminar los cambios ya reconstruidos (solo las versiones leídas)
+
+    Args:
+        change_ids: change_id devueltos por get_pending_changes()
+
+    Returns:
+        Número de cambios eliminados
+    """
+    if not change_ids:
+        return 0
+
+    deleted_rows = await execute_query(
+        "DELETE FROM etl_changed_partitions WHERE change_id = ANY($1::bigint[]) RETURNING change_id",
+        change_ids,
+        fetch="all"
+    )
+    logging.debug(f"🧹 Cleared {len(deleted_rows)} rebuilt partition changes")
+    return len(deleted_rows)
+
+
+# ===============================================
+# HUELLAS DE DIMENSIONES
+# ===============================================
+
+async def compute_table_fingerprints(conn, table_names: List[str]) -> Dict[str, str]:
+    """
+    Huella md5 del contenido de tablas pequeñas (dimensiones)
+
+    Ignora extraction_timestamp/created_at/updated_at, que cambian en cada
+    refresh aunque el contenido sea el mismo.
+
+    Args:
+        conn: Conexión asyncpg
+        table_names: Nombres base de las tablas
+
+    Returns:
+        Dict table_name -> md5
+    """
+    fingerprints = {}
+    for table_name in table_names:
+        fingerprints[table_name] = await conn.fetchval(
+            f"""
+            SELECT md5(COALESCE(string_agg(r::text, '|' ORDER BY r::text), ''))
+            FROM (
+                SELECT to_jsonb(t) - 'extraction_timestamp' - 'created_at' - 'updated_at' AS r
+                FROM {ETLConfig.get_fq_table_name(table_name)} t
+            ) s
+            """
+        )
+    return fingerprints
+
+
+async def get_saved_fingerprints(conn) -> Dict[str, str]:
+    """Huellas guardadas en la última ejecución exitosa"""
+    rows = await conn.fetch("SELECT table_name, fingerprint FROM etl_input_fingerprints")
+    return {row["table_name"]: row["fingerprint"] for row in rows}
+
+
+async def save_fingerprints(conn, fingerprints: Dict[str, str]) -> None:
+    """Guardar huellas (después de reconstruir lo que dependía de ellas)"""
+    if not fingerprints:
+        return
+    await conn.executemany(
+        """
+        INSERT INTO etl_input_fingerprints (table_name, fingerprint)
+        VALUES ($1, $2)
+        ON CONFLICT (table_name)
+        DO UPDATE SET fingerprint = EXCLUDED.fingerprint, updated_at = CURRENT_TIMESTAMP
+        """,
+        list(fingerprints.items())
+    )
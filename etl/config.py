@@ -10,7 +10,7 @@ within the `app/etl/sql/` directory, adhering to the Separation of Concerns prin
 🔧 ADDED: Missing constants for BigQuery extractor and other components
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 from typing import Dict, List, Optional
 
@@ -31,6 +31,26 @@ class TableType(str, Enum):
     DIMENSION = "dimension"  # Stored in RAW schema, but logically a dimension.
 
 
+class LoadStrategy(str, Enum):
+    """Defines how extracted batches are written into PostgreSQL."""
+    UPSERT = "upsert"  # executemany() with INSERT ... ON CONFLICT per row
+    COPY_MERGE = "copy_merge"  # COPY into a staging table + single set-based merge
+
+
+class SliceInterval(str, Enum):
+    """Granularity used to split large incremental windows into parallel slices."""
+    HOUR = "hour"
+    DAY = "day"
+
+
+class ChangeSpread(str, Enum):
+    """How a change on (campaign, day) of an input spreads to the partitions of a rebuild stage."""
+    SAME_DAY = "same_day"  # Only the same (campaign, day)
+    FORWARD = "forward"  # The day and every later day of the campaign (cumulative metrics)
+    CAMPAIGN = "campaign"  # Every day of the campaign
+    FECHA_TRANDEUDA = "fecha_trandeuda"  # The campaign's fecha_trandeuda day
+
+
 # --- DATA CLASSES FOR CONFIGURATION ---
 
 @dataclass
@@ -46,6 +66,38 @@ class ExtractionConfig:
     lookback_days: int = 7
     batch_size: int = 10000
     refresh_frequency_hours: int = 6
+    load_strategy: LoadStrategy = LoadStrategy.UPSERT
+    depends_on: List[str] = field(default_factory=list)  # Tables that must load first in the same run
+    slice_interval: Optional[SliceInterval] = None  # Split windows longer than one interval into slices
+    max_concurrent_slices: int = 2  # Slices of this table extracted/loaded at the same time
+    # Columns recorded in etl_changed_partitions on every load (None = all campaigns / all days)
+    change_archivo_column: Optional[str] = None
+    change_date_column: Optional[str] = None
+
+
+@dataclass
+class RebuildStageConfig:
+    """Partition-scoped aux/mart stage rebuilt from the (campaign, day) partitions its inputs changed."""
+    stage_name: str
+    sql_file: str  # Relative to etl/sql, parameterized by partition arrays
+    inputs: Dict[str, ChangeSpread]  # Raw table or earlier stage -> how its changes spread
+    per_partition: bool = False  # SQL takes ($1 archivo, $2 fecha) and runs once per partition
+
+
+@dataclass
+class ContinuousAggregateConfig:
+    """TimescaleDB continuous aggregate refreshed over the days its source stage rebuilt."""
+    view_name: str  # Schema-qualified with {aux_schema} / {mart_schema}
+    source_stage: str  # Rebuild stage that writes the aggregated hypertable
+
+
+@dataclass
+class StorageLifecycleConfig:
+    """Native compression and closed-campaign retention of a raw hypertable (segment-by in migration 023)."""
+    table_name: str
+    time_column: str  # Hypertable partitioning column
+    compress_after_days: int  # Compress chunks whose whole range is older than this
+    retention: bool = True  # Drop chunks that only hold data of retired campaigns
 
 
 # --- MAIN CONFIGURATION CLASS ---
@@ -69,11 +121,23 @@ class ETLConfig:
     QUERY_TIMEOUT_SECONDS = 300
     MAX_BATCH_SIZE = 100000
     DEFAULT_BATCH_SIZE = 10000
+    # Columnar extraction (RowBatch tuples via Arrow) instead of per-row dicts
+    COLUMNAR_EXTRACTION_ENABLED = True
+    # Use the Storage Read API for Arrow downloads when google-cloud-bigquery-storage is installed
+    BIGQUERY_STORAGE_API_ENABLED = True
+    # Thread pool for blocking google-cloud calls (one busy thread per running query stream)
+    BIGQUERY_EXECUTOR_WORKERS = 8
+    # Pages fetched ahead of the consumer per query stream
+    BIGQUERY_PREFETCH_PAGES = 2
+    # Vectorized RawDataTransformer (columnar engine) for tables with a column spec
+    COLUMNAR_TRANSFORM_ENABLED = True
 
     # 🔧 ADDED: Missing constants for PostgreSQL loader
     POSTGRES_BATCH_SIZE = 1000
     POSTGRES_TIMEOUT_SECONDS = 60
     POSTGRES_MAX_CONNECTIONS = 10
+    # Batches smaller than this fall back to executemany() even for COPY_MERGE tables
+    COPY_MERGE_MIN_BATCH_SIZE = 1000
 
     # 🔧 ADDED: Missing constants for watermarks
     WATERMARK_CLEANUP_TIMEOUT_MINUTES = 30
@@ -83,6 +147,11 @@ class ETLConfig:
     DEFAULT_PARALLEL_WORKERS = 3
     MAX_PARALLEL_WORKERS = 10
     PIPELINE_TIMEOUT_MINUTES = 120
+    # Concurrency budgets shared by all tables of a run (pool max_size is 10)
+    MAX_CONCURRENT_BIGQUERY_JOBS = 4
+    MAX_CONCURRENT_POSTGRES_LOADS = 6
+    # Max batches buffered between extract and load (bounds pipeline memory)
+    PIPELINE_QUEUE_MAX_BATCHES = 2
 
     # --- TABLE METADATA CONFIGURATIONS ---
     # Keys are the base names of the tables, used to find the corresponding .sql file.
@@ -94,7 +163,8 @@ class ETLConfig:
             description="Campaign calendar definitions.",
             primary_key=["archivo","periodo_date"],
             incremental_column="fecha_apertura",
-            source_table="bi_P3fV4dWNeMkN5RJMhV8e_dash_calendario_v5"
+            source_table="bi_P3fV4dWNeMkN5RJMhV8e_dash_calendario_v5",
+            change_archivo_column="archivo"
         ),
 
         "asignaciones": ExtractionConfig(
@@ -104,7 +174,12 @@ class ETLConfig:
             primary_key=["cod_luna", "cuenta", "archivo", "fecha_asignacion"],  # 🔧 FIXED: Added fecha_asignacion for hypertable
             incremental_column="creado_el",
             source_table="batch_P3fV4dWNeMkN5RJMhV8e_asignacion",
-            batch_size=50000
+            batch_size=50000,
+            load_strategy=LoadStrategy.COPY_MERGE,
+            slice_interval=SliceInterval.DAY,
+            depends_on=["calendario"],  # Campaign-scoped: load after the calendar
+            change_archivo_column="archivo",
+            change_date_column="fecha_asignacion"
         ),
 
         "trandeuda": ExtractionConfig(
@@ -114,7 +189,12 @@ class ETLConfig:
             primary_key=["cod_cuenta", "nro_documento", "archivo", "fecha_proceso"],
             incremental_column="creado_el",
             source_table="batch_P3fV4dWNeMkN5RJMhV8e_tran_deuda",
-            batch_size=100000
+            batch_size=100000,
+            load_strategy=LoadStrategy.COPY_MERGE,
+            slice_interval=SliceInterval.DAY,
+            depends_on=["calendario"],  # Campaign-scoped: load after the calendar
+            change_archivo_column="archivo",
+            change_date_column="fecha_proceso"
         ),
 
         "pagos": ExtractionConfig(
@@ -124,7 +204,11 @@ class ETLConfig:
             primary_key=["nro_documento", "fecha_pago", "monto_cancelado"],
             incremental_column="creado_el",
             source_table="batch_P3fV4dWNeMkN5RJMhV8e_pagos",
-            batch_size=25000
+            batch_size=25000,
+            load_strategy=LoadStrategy.COPY_MERGE,
+            depends_on=["calendario"],  # Campaign-scoped: load after the calendar
+            change_archivo_column="archivo",
+            change_date_column="fecha_pago"
         ),
 
         "voicebot_gestiones": ExtractionConfig(
@@ -134,7 +218,11 @@ class ETLConfig:
             primary_key=["uid"],
             incremental_column="date",
             source_table="sync_voicebot_batch",
-            batch_size=50000
+            batch_size=50000,
+            load_strategy=LoadStrategy.COPY_MERGE,
+            slice_interval=SliceInterval.DAY,
+            max_concurrent_slices=3,
+            change_date_column="date"  # No archivo: spreads to every campaign open that day
         ),
 
         "mibotair_gestiones": ExtractionConfig(
@@ -144,7 +232,11 @@ class ETLConfig:
             primary_key=["uid"],
             incremental_column="date",
             source_table="sync_mibotair_batch",
-            batch_size=50000
+            batch_size=50000,
+            load_strategy=LoadStrategy.COPY_MERGE,
+            slice_interval=SliceInterval.DAY,
+            max_concurrent_slices=3,
+            change_date_column="date"  # No archivo: spreads to every campaign open that day
         ),
 
         "homologacion_mibotair": ExtractionConfig(
@@ -181,6 +273,109 @@ class ETLConfig:
         )
     }
 
+    # --- AUX/MART SQL STAGES (raw → aux → mart DAG) ---
+    # Each stage declares its inputs (raw tables or other stages); stages whose inputs
+    # are other stages run after them, independent stages run in parallel. A stage only
+    # rebuilds the (campaign, day) partitions its inputs changed since the last run and
+    # is skipped when none changed. Dimension inputs are compared by content fingerprint.
+    REBUILD_STAGES: List[RebuildStageConfig] = [
+        RebuildStageConfig(
+            stage_name="gestiones_unificadas",
+            sql_file="aux/refresh_gestiones_unificadas.sql",
+            inputs={
+                "calendario": ChangeSpread.CAMPAIGN,
+                "asignaciones": ChangeSpread.CAMPAIGN,
+                "voicebot_gestiones": ChangeSpread.SAME_DAY,
+                "mibotair_gestiones": ChangeSpread.SAME_DAY,
+                "trandeuda": ChangeSpread.FECHA_TRANDEUDA,  # monto_compromiso is read on fecha_trandeuda
+                "homologacion_voicebot": ChangeSpread.CAMPAIGN,
+                "homologacion_mibotair": ChangeSpread.CAMPAIGN,
+                "ejecutivos": ChangeSpread.CAMPAIGN,
+            },
+        ),
+        RebuildStageConfig(
+            stage_name="pagos_dedup",
+            sql_file="aux/refresh_pagos_dedup.sql",
+            inputs={
+                "calendario": ChangeSpread.CAMPAIGN,
+                "asignaciones": ChangeSpread.CAMPAIGN,
+                "trandeuda": ChangeSpread.SAME_DAY,
+                "pagos": ChangeSpread.SAME_DAY,
+            },
+        ),
+        RebuildStageConfig(
+            stage_name="cuenta_estado_diario",
+            sql_file="aux/refresh_cuenta_estado_diario.sql",
+            inputs={
+                "calendario": ChangeSpread.CAMPAIGN,
+                "asignaciones": ChangeSpread.FORWARD,  # Accounts appear from fecha_asignacion on
+                "trandeuda": ChangeSpread.SAME_DAY,
+                "pagos_dedup": ChangeSpread.FORWARD,  # Saldo includes every payment up to the day
+            },
+        ),
+        RebuildStageConfig(
+            stage_name="gestion_cuenta_impact",
+            sql_file="aux/refresh_gestion_cuenta_impact.sql",
+            inputs={
+                "gestiones_unificadas": ChangeSpread.SAME_DAY,
+                "cuenta_estado_diario": ChangeSpread.SAME_DAY,  # Debt at the moment of the gestion
+            },
+        ),
+        RebuildStageConfig(
+            stage_name="pagos_diarios",
+            sql_file="aux/build_pagos_diarios.sql",
+            inputs={
+                "pagos_dedup": ChangeSpread.SAME_DAY,
+            },
+            per_partition=True,
+        ),
+        RebuildStageConfig(
+            stage_name="dashboard_data",
+            sql_file="mart/build_dashboard_data.sql",
+            inputs={
+                "calendario": ChangeSpread.CAMPAIGN,
+                "asignaciones": ChangeSpread.CAMPAIGN,
+                "trandeuda": ChangeSpread.FORWARD,  # deuda_asig is read on fecha_apertura
+                "gestion_cuenta_impact": ChangeSpread.FORWARD,  # KPIs are cumulative up to the day
+                "pagos_diarios": ChangeSpread.FORWARD,
+            },
+            per_partition=True,
+        ),
+        RebuildStageConfig(
+            stage_name="productivity_data",
+            sql_file="mart/build_productivity_data.sql",
+            inputs={
+                "gestiones_unificadas": ChangeSpread.SAME_DAY,
+                "mibotair_gestiones": ChangeSpread.SAME_DAY,  # correo_agente identifies the agent
+            },
+            per_partition=True,
+        ),
+    ]
+    # Continuous aggregates (migration 022) refreshed after the DAG over the rebuilt days, so
+    # the API reads them without waiting for the hourly refresh policy
+    CONTINUOUS_AGGREGATES: List[ContinuousAggregateConfig] = [
+        ContinuousAggregateConfig("{mart_schema}.dashboard_daily", source_stage="dashboard_data"),
+        ContinuousAggregateConfig("{aux_schema}.gestion_cuenta_impact_daily", source_stage="gestion_cuenta_impact"),
+    ]
+    # Stages running at the same time, each on its own pool connection (pool max_size is 10)
+    MAX_CONCURRENT_SQL_STAGES = 3
+    # pipeline_name prefix of the per-stage rows written to etl_execution_log
+    SQL_STAGE_LOG_PREFIX = "aux_mart"
+
+    # --- STORAGE LIFECYCLE (raw hypertables) ---
+    # Run by the ETL after loads and rebuild (no background policies: the ETL decompresses
+    # chunks before backfills write into them and must not race a compression job)
+    STORAGE_LIFECYCLE_ENABLED = True
+    STORAGE_LIFECYCLE_TABLES: List[StorageLifecycleConfig] = [
+        StorageLifecycleConfig("asignaciones", time_column="fecha_asignacion", compress_after_days=60),
+        StorageLifecycleConfig("trandeuda", time_column="fecha_proceso", compress_after_days=45),
+        StorageLifecycleConfig("pagos", time_column="fecha_pago", compress_after_days=60),
+    ]
+    # Campaigns closed more than this many days ago are retired: no longer rebuilt, raw may be dropped
+    RAW_RETENTION_DAYS_AFTER_CLOSE = 180
+    # Raw kept before the oldest active campaign's fecha_apertura (rows dated ahead of the opening)
+    RAW_RETENTION_MARGIN_DAYS = 31
+
     # --- HELPER METHODS ---
     @classmethod
     def get_config(cls, table_name: str) -> ExtractionConfig:
@@ -224,6 +419,96 @@ class ETLConfig:
 
         return f"{schema_prefix}_{cls.PROJECT_UID}.{table_base_name}"
 
+    @classmethod
+    def get_table_dependencies(cls, table_names: List[str]) -> Dict[str, List[str]]:
+        """
+        Dependencies of each table restricted to the given selection.
+        Dependencies outside the selection are ignored (they are not part of the run).
+        """
+        selected = set(table_names)
+        return {
+            table_name: [dep for dep in cls.get_config(table_name).depends_on if dep in selected]
+            for table_name in table_names
+        }
+
+    @classmethod
+    def get_rebuild_stage(cls, stage_name: str) -> RebuildStageConfig:
+        """Retrieves an aux/mart SQL stage by name."""
+        for stage in cls.REBUILD_STAGES:
+            if stage.stage_name == stage_name:
+                return stage
+        raise ValueError(f"No rebuild stage found: {stage_name}")
+
+    @classmethod
+    def get_rebuild_stage_dependencies(cls) -> Dict[str, List[str]]:
+        """Upstream stages of each stage (inputs that are stages, not raw tables)."""
+        stage_names = {stage.stage_name for stage in cls.REBUILD_STAGES}
+        return {
+            stage.stage_name: [name for name in stage.inputs if name in stage_names]
+            for stage in cls.REBUILD_STAGES
+        }
+
+    @classmethod
+    def get_rebuild_stage_order(cls) -> List[RebuildStageConfig]:
+        """
+        Stages in topological order (declaration order among independent stages).
+
+        Raises:
+            ValueError: On unknown inputs or dependency cycles
+        """
+        dependencies = cls.get_rebuild_stage_dependencies()
+        for stage in cls.REBUILD_STAGES:
+            unknown = [
+                name for name in stage.inputs
+                if name not in dependencies and name not in cls.EXTRACTION_CONFIGS
+            ]
+            if unknown:
+                raise ValueError(f"Stage '{stage.stage_name}' has unknown inputs: {', '.join(unknown)}")
+
+        ordered: List[str] = []
+        visiting = set()
+
+        def visit(stage_name: str, path: List[str]) -> None:
+            if stage_name in ordered:
+                return
+            if stage_name in visiting:
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [stage_name])}")
+            visiting.add(stage_name)
+            for dep in dependencies[stage_name]:
+                visit(dep, path + [stage_name])
+            visiting.discard(stage_name)
+            ordered.append(stage_name)
+
+        for stage in cls.REBUILD_STAGES:
+            visit(stage.stage_name, [])
+        return [cls.get_rebuild_stage(stage_name) for stage_name in ordered]
+
+    @classmethod
+    def get_fingerprinted_inputs(cls) -> List[str]:
+        """Raw stage inputs without change tracking (dimensions): detected by content fingerprint."""
+        tracked = set(cls.get_change_tracked_tables())
+        inputs = {name for stage in cls.REBUILD_STAGES for name in stage.inputs}
+        return sorted(
+            name for name in inputs
+            if name in cls.EXTRACTION_CONFIGS and name not in tracked
+        )
+
+    @classmethod
+    def get_storage_lifecycle(cls, table_name: str) -> Optional[StorageLifecycleConfig]:
+        """Lifecycle config of a raw hypertable (None if it is not compressed/retained)."""
+        for lifecycle in cls.STORAGE_LIFECYCLE_TABLES:
+            if lifecycle.table_name == table_name:
+                return lifecycle
+        return None
+
+    @classmethod
+    def get_change_tracked_tables(cls) -> List[str]:
+        """Tables whose loads record the (archivo, fecha) partitions they touched."""
+        return [
+            table_name for table_name, config in cls.EXTRACTION_CONFIGS.items()
+            if config.change_archivo_column or config.change_date_column
+        ]
+
     @classmethod
     def list_extractable_tables(cls) -> List[str]:
         """Lists all tables that are directly extracted from a source."""
@@ -240,7 +525,11 @@ class ETLConfig:
             "retry_delay_seconds": cls.RETRY_DELAY_SECONDS,
             "query_timeout_seconds": cls.QUERY_TIMEOUT_SECONDS,
             "max_batch_size": cls.MAX_BATCH_SIZE,
-            "default_batch_size": cls.DEFAULT_BATCH_SIZE
+            "default_batch_size": cls.DEFAULT_BATCH_SIZE,
+            "columnar_extraction_enabled": cls.COLUMNAR_EXTRACTION_ENABLED,
+            "storage_api_enabled": cls.BIGQUERY_STORAGE_API_ENABLED,
+            "executor_workers": cls.BIGQUERY_EXECUTOR_WORKERS,
+            "prefetch_pages": cls.BIGQUERY_PREFETCH_PAGES
         }
 
     @classmethod
@@ -249,7 +538,8 @@ class ETLConfig:
         return {
             "batch_size": cls.POSTGRES_BATCH_SIZE,
             "timeout_seconds": cls.POSTGRES_TIMEOUT_SECONDS,
-            "max_connections": cls.POSTGRES_MAX_CONNECTIONS
+            "max_connections": cls.POSTGRES_MAX_CONNECTIONS,
+            "copy_merge_min_batch_size": cls.COPY_MERGE_MIN_BATCH_SIZE
         }
 
     @classmethod
@@ -266,5 +556,8 @@ class ETLConfig:
         return {
             "default_parallel_workers": cls.DEFAULT_PARALLEL_WORKERS,
             "max_parallel_workers": cls.MAX_PARALLEL_WORKERS,
-            "timeout_minutes": cls.PIPELINE_TIMEOUT_MINUTES
+            "timeout_minutes": cls.PIPELINE_TIMEOUT_MINUTES,
+            "queue_max_batches": cls.PIPELINE_QUEUE_MAX_BATCHES,
+            "max_concurrent_bigquery_jobs": cls.MAX_CONCURRENT_BIGQUERY_JOBS,
+            "max_concurrent_postgres_loads": cls.MAX_CONCURRENT_POSTGRES_LOADS
         }
\ No newline at end of file
@@ -4,22 +4,63 @@ Intelligent incremental extraction with robust BigQuery row handling
 
 FIXED: QueryJob.num_rows AttributeError - use query_job.result().total_rows instead
 ADDED: Better error handling and row processing
+ADDED: Columnar (Arrow) extraction yielding RowBatch tuples - no ISO string round-trip
+ADDED: Blocking google-cloud calls run on a dedicated thread pool with page prefetch
 """
 
 import asyncio
+import functools
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Optional, AsyncGenerator, Iterator, Iterable
 
 import pandas as pd
 from google.auth import default
 from google.cloud import bigquery
 from google.cloud.exceptions import GoogleCloudError
 
+try:
+    import pyarrow  # noqa: F401 - enables RowIterator.to_arrow_iterable()
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+try:
+    from google.cloud import bigquery_storage
+except ImportError:
+    bigquery_storage = None
+
 from shared.core.logging import LoggerMixin
 from etl.config import ETLConfig, ExtractionMode
-from etl.watermarks import get_watermark_manager, WatermarkManager
+from etl.watermarks import get_watermark_manager, SimpleWatermarkManager as WatermarkManager
+
+
+@dataclass
+class RowBatch:
+    """
+    Columnar-friendly batch: column names + row tuples in that same order.
+
+    Values keep their native Python types (datetime, date, Decimal...), so the
+    loader can COPY them without re-parsing.
+    """
+    columns: List[str]
+    rows: List[tuple]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# Hand-over markers between the page-fetching thread and the event loop
+_ITERATION_DONE = object()
+
+
+@dataclass
+class _IterationFailed:
+    error: BaseException
 
 
 class BigQueryExtractor(LoggerMixin):
@@ -29,29 +70,45 @@ class BigQueryExtractor(LoggerMixin):
     FIXED: QueryJob.num_rows AttributeError
     """
     
-    def __init__(self, project_id: str = None):
+    def __init__(self, project_id: str = None, max_workers: Optional[int] = None):
         super().__init__()
         self.project_id = project_id or ETLConfig.PROJECT_ID
         self.client: Optional[bigquery.Client] = None
+        self.credentials = None
+        self.bqstorage_client = None
         self.watermark_manager: Optional[WatermarkManager] = None
         
         # Performance settings
         self.max_retries = ETLConfig.MAX_RETRY_ATTEMPTS
         self.retry_delay = ETLConfig.RETRY_DELAY_SECONDS
         self.default_timeout = 300  # 5 minutes default query timeout
+
+        # Every google-cloud call and page fetch runs here, never on the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or ETLConfig.BIGQUERY_EXECUTOR_WORKERS,
+            thread_name_prefix="bq-extractor"
+        )
         
     async def _ensure_client(self) -> bigquery.Client:
-        """Ensure BigQuery client is initialized"""
+        """Ensure BigQuery client is initialized (credential lookup runs off the event loop)"""
         if self.client is None:
             # Initialize with default credentials
-            credentials, _ = default()
-            self.client = bigquery.Client(
+            self.credentials, _ = await self._run_blocking(default)
+            self.client = await self._run_blocking(
+                bigquery.Client,
                 project=self.project_id,
-                credentials=credentials
+                credentials=self.credentials
             )
             self.logger.info(f"BigQuery client initialized for project: {self.project_id}")
         
         return self.client
+
+    async def close(self) -> None:
+        """Release the BigQuery client and the thread pool"""
+        if self.client is not None:
+            await self._run_blocking(self.client.close)
+            self.client = None
+        self.executor.shutdown(wait=False)
     
     async def _ensure_watermark_manager(self) -> WatermarkManager:
         """Ensure watermark manager is initialized"""
@@ -101,6 +158,99 @@ class BigQueryExtractor(LoggerMixin):
             self.logger.debug(f"Row type: {type(row)}, Row attributes: {dir(row)}")
             raise ValueError(f"Cannot serialize BigQuery row: {str(e)}")
     
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking google-cloud call on the extractor's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def _iterate_in_executor(self, iterable: Iterable[Any]) -> AsyncGenerator[Any, None]:
+        """
+        Consume a blocking iterator on the thread pool with async prefetch.
+
+        A worker thread walks the iterator (page downloads, row conversion) and
+        hands items over through an asyncio.Queue of BIGQUERY_PREFETCH_PAGES
+        slots: the next pages are fetched while the caller processes the current
+        one, and a slow caller blocks the thread (back-pressure). If the caller
+        stops early, the thread is told to stop and the queue is drained.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, ETLConfig.BIGQUERY_PREFETCH_PAGES))
+        stop = threading.Event()
+
+        def hand_over(item) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def produce() -> None:
+            try:
+                for item in iterable:
+                    if stop.is_set():
+                        return
+                    hand_over(item)
+                    if stop.is_set():
+                        return
+                hand_over(_ITERATION_DONE)
+            except BaseException as e:  # forwarded to the event loop side
+                if not stop.is_set():
+                    hand_over(_IterationFailed(e))
+
+        producer = loop.run_in_executor(self.executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is _ITERATION_DONE:
+                    break
+                if isinstance(item, _IterationFailed):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+            while not queue.empty():
+                queue.get_nowait()
+            if producer.done():
+                producer.result()
+
+    def _iter_serialized_pages(self, query_result) -> Iterator[List[Dict[str, Any]]]:
+        """Page iterator producing serialized dict batches (runs on the thread pool)"""
+        for page in query_result.pages:
+            batch_data = []
+            for row in page:
+                try:
+                    # Use improved row serialization
+                    row_dict = self._serialize_bigquery_row(row)
+                    batch_data.append(row_dict)
+
+                except Exception as e:
+                    self.logger.error(f"Failed to process row: {str(e)}")
+                    # Log row details for debugging
+                    self.logger.debug(f"Problematic row type: {type(row)}")
+                    # Skip this row and continue
+                    continue
+
+            if batch_data:
+                yield batch_data
+
+    async def _start_query(self, query: str, batch_size: int):
+        """Submit the job and wait for it off the event loop; returns the RowIterator"""
+        client = await self._ensure_client()
+
+        job_config = bigquery.QueryJobConfig(
+            use_query_cache=True,
+            maximum_bytes_billed=10**10,  # 10GB limit for safety
+        )
+
+        query_job = await self._run_blocking(client.query, query, job_config=job_config)
+
+        # Wait for job to complete with timeout; one page == one batch
+        query_result = await self._run_blocking(
+            query_job.result, timeout=self.default_timeout, page_size=batch_size
+        )
+
+        # FIXED: Get total rows from query result, not query job
+        total_rows = getattr(query_result, 'total_rows', 'unknown')
+        self.logger.debug(f"Query job completed. Total rows: {total_rows}")
+
+        return query_result
+
     async def _execute_query_streaming(
         self, 
         query: str, 
@@ -110,60 +260,22 @@ class BigQueryExtractor(LoggerMixin):
         Execute BigQuery query and yield results in batches
         
         FIXED: QueryJob.num_rows AttributeError and error handling
+        NON-BLOCKING: job, wait and page fetches run on the thread pool
         """
-        client = await self._ensure_client()
-        
         try:
-            # Configure query job
-            job_config = bigquery.QueryJobConfig(
-                use_query_cache=True,
-                maximum_bytes_billed=10**10,  # 10GB limit for safety
-            )
-            
-            # Start query job
             self.logger.info(f"Starting BigQuery job for batch size {batch_size}")
-            query_job = client.query(query, job_config=job_config)
-            
-            # Wait for job to complete with timeout
-            query_result = query_job.result(timeout=self.default_timeout)
-            
-            # FIXED: Get total rows from query result, not query job
-            try:
-                total_rows = query_result.total_rows if hasattr(query_result, 'total_rows') else 'unknown'
-                self.logger.debug(f"Query job completed. Total rows: {total_rows}")
-            except Exception as e:
-                self.logger.debug(f"Could not get total rows count: {str(e)}")
+            query_result = await self._start_query(query, batch_size)
             
             # Stream results in batches
             total_processed = 0
             batch_count = 0
             
-            # Process results in pages/batches
-            for page in query_result.pages:
-                batch_data = []
-                for row in page:
-                    try:
-                        # Use improved row serialization
-                        row_dict = self._serialize_bigquery_row(row)
-                        batch_data.append(row_dict)
-                        
-                    except Exception as e:
-                        self.logger.error(f"Failed to process row: {str(e)}")
-                        # Log row details for debugging
-                        self.logger.debug(f"Problematic row type: {type(row)}")
-                        # Skip this row and continue
-                        continue
-                
-                if batch_data:
-                    total_processed += len(batch_data)
-                    batch_count += 1
-                    
-                    self.logger.debug(f"Yielding batch {batch_count} with {len(batch_data)} rows")
-                    yield batch_data
-                    
-                    # Respect batch size limits
-                    if len(batch_data) >= batch_size:
-                        break
+            async for batch_data in self._iterate_in_executor(self._iter_serialized_pages(query_result)):
+                total_processed += len(batch_data)
+                batch_count += 1
+
+                self.logger.debug(f"Yielding batch {batch_count} with {len(batch_data)} rows")
+                yield batch_data
             
             self.logger.info(f"Query completed: {total_processed} rows processed in {batch_count} batches")
             
@@ -174,6 +286,92 @@ class BigQueryExtractor(LoggerMixin):
             self.logger.error(f"Unexpected error in query execution: {str(e)}")
             raise
     
+    def _get_bqstorage_client(self):
+        """Storage Read API client, only if the library is installed and enabled"""
+        if bigquery_storage is None or not ETLConfig.BIGQUERY_STORAGE_API_ENABLED:
+            return None
+        if self.bqstorage_client is None:
+            self.bqstorage_client = bigquery_storage.BigQueryReadClient(credentials=self.credentials)
+        return self.bqstorage_client
+
+    @staticmethod
+    def _record_batch_to_rows(record_batch) -> RowBatch:
+        """Arrow RecordBatch -> RowBatch, converting column by column"""
+        column_values = [column.to_pylist() for column in record_batch.columns]
+        return RowBatch(columns=list(record_batch.schema.names), rows=list(zip(*column_values)))
+
+    def _iter_row_batches(self, query_result) -> Iterator[RowBatch]:
+        """
+        Source batches from a finished query: Arrow record batches when pyarrow
+        is installed (Storage Read API if available), plain pages otherwise.
+        """
+        if ARROW_AVAILABLE:
+            for record_batch in query_result.to_arrow_iterable(
+                bqstorage_client=self._get_bqstorage_client()
+            ):
+                yield self._record_batch_to_rows(record_batch)
+        else:
+            columns = [field.name for field in query_result.schema]
+            for page in query_result.pages:
+                yield RowBatch(columns=columns, rows=[tuple(row.values()) for row in page])
+
+    @staticmethod
+    def _rechunk(source: Iterable[RowBatch], batch_size: int) -> Iterator[RowBatch]:
+        """
+        Re-chunk RowBatches to at most batch_size rows.
+
+        Storage API record batches have server-defined sizes; this keeps the
+        loader's batch size (and memory) predictable.
+        """
+        columns: List[str] = []
+        buffer: List[tuple] = []
+
+        for row_batch in source:
+            columns = row_batch.columns
+            buffer.extend(row_batch.rows)
+
+            while len(buffer) >= batch_size:
+                chunk, buffer = buffer[:batch_size], buffer[batch_size:]
+                yield RowBatch(columns=columns, rows=chunk)
+
+        if buffer:
+            yield RowBatch(columns=columns, rows=buffer)
+
+    async def _execute_query_columnar(
+        self,
+        query: str,
+        batch_size: int = 10000
+    ) -> AsyncGenerator[RowBatch, None]:
+        """
+        Execute BigQuery query and yield RowBatch objects of at most batch_size rows
+
+        NON-BLOCKING: downloads, Arrow conversion and re-chunking run on the thread pool
+        """
+        try:
+            self.logger.info(
+                f"Starting columnar BigQuery job for batch size {batch_size} "
+                f"(arrow: {ARROW_AVAILABLE}, storage api: {bigquery_storage is not None})"
+            )
+            query_result = await self._start_query(query, batch_size)
+
+            total_processed = 0
+            batch_count = 0
+
+            row_batches = self._rechunk(self._iter_row_batches(query_result), batch_size)
+            async for row_batch in self._iterate_in_executor(row_batches):
+                total_processed += len(row_batch)
+                batch_count += 1
+                yield row_batch
+
+            self.logger.info(f"Columnar query completed: {total_processed} rows in {batch_count} batches")
+
+        except GoogleCloudError as e:
+            self.logger.error(f"BigQuery error: {str(e)}")
+            raise
+        except Exception as e:
+            self.logger.error(f"Unexpected error in columnar query execution: {str(e)}")
+            raise
+
     async def extract_table_incremental(
         self, 
         table_name: str,
@@ -389,6 +587,27 @@ class BigQueryExtractor(LoggerMixin):
         async for batch in self._execute_query_streaming(query, batch_size):
             yield batch
     
+    async def stream_custom_query_rows(
+            self,
+            query: str,
+            batch_size: int = 10000
+    ) -> AsyncGenerator[RowBatch, None]:
+        """
+        Columnar counterpart of stream_custom_query().
+
+        Yields RowBatch objects (column names + tuples) with native Python
+        values instead of dicts with ISO-serialized datetimes.
+
+        Args:
+            query: The SQL query string to execute.
+            batch_size: Maximum number of rows per batch.
+        """
+        self.logger.info(f"Streaming columnar query results with batch size {batch_size}...")
+        self.logger.debug(f"Query Snippet: {query[:500]}...")
+
+        async for batch in self._execute_query_columnar(query, batch_size):
+            yield batch
+
     async def test_query(self, query: str) -> Dict[str, Any]:
         """
         Test a query without full execution (for validation)
@@ -407,8 +626,8 @@ class BigQueryExtractor(LoggerMixin):
             )
             
             start_time = time.time()
-            query_job = client.query(test_query, job_config=job_config)
-            results = query_job.result(timeout=30)  # Short timeout for test
+            query_job = await self._run_blocking(client.query, test_query, job_config=job_config)
+            results = await self._run_blocking(query_job.result, timeout=30)  # Short timeout for test
             
             # Get sample data using improved serialization
             sample_data = []
@@ -5,6 +5,11 @@ Efficient, asynchronous data loading for ETL pipelines.
 Features:
 - Pure asyncpg for maximum performance and low overhead
 - Dynamic UPSERT statements with `ON CONFLICT DO UPDATE`
+- COPY into a temp staging table + set-based merge (ExtractionConfig.load_strategy)
+- Columnar loads of row tuples aligned to the target columns (load_rows_batch)
+- Optional batch checkpoint committed in the same transaction as the rows
+- Changed (archivo, fecha) partitions recorded with the rows for the incremental rebuild
+- Compressed chunks covered by a batch decompressed first (backfills into old raw data)
 - Asynchronous streaming and batch processing
 - Data validation and sanitization
 - Detailed load statistics and error reporting
@@ -15,14 +20,17 @@ with true batch processing using executemany() for efficient streaming loads
 
 import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional, AsyncGenerator
+from typing import List, Dict, Any, Optional, AsyncGenerator, Tuple
 from dataclasses import dataclass
 import logging
 
 from shared.database.connection import get_database_manager, DatabaseManager
 from shared.core.logging import LoggerMixin
 # Added imports for ETLConfig and TableType
-from etl.config import ETLConfig, TableType
+from etl.config import ETLConfig, TableType, LoadStrategy
+from etl.watermarks import BatchCheckpoint, save_checkpoint
+from etl.change_tracking import collect_changed_partitions, record_changed_partitions
+from etl.storage_lifecycle import decompress_for_batch
 
 logger = logging.getLogger(__name__)
 
@@ -51,6 +59,8 @@ class PostgresLoader(LoggerMixin):
         self.db_manager = db_manager
         self.max_batch_size = 1000
         self.connection_timeout = 30
+        # fq_table_name -> target column names, for load_rows_batch()
+        self._target_columns: Dict[str, List[str]] = {}
 
     async def _get_db_manager(self) -> DatabaseManager:
         if self.db_manager is None:
@@ -91,6 +101,125 @@ class PostgresLoader(LoggerMixin):
 
         return validated_data
 
+    def _resolve_load_strategy(
+        self,
+        table_name: str,
+        load_strategy: Optional[LoadStrategy]
+    ) -> LoadStrategy:
+        """Explicit strategy wins; otherwise use the per-table setting from ETLConfig."""
+        if load_strategy is not None:
+            return load_strategy
+        config = ETLConfig.EXTRACTION_CONFIGS.get(table_name)
+        return config.load_strategy if config else LoadStrategy.UPSERT
+
+    @staticmethod
+    def _dedupe_rows_by_pk(
+        columns: List[str],
+        rows: List[List[Any]],
+        primary_key: List[str]
+    ) -> List[List[Any]]:
+        """
+        Keeps the last row per primary key.
+
+        A set-based ON CONFLICT cannot touch the same target row twice in one
+        statement, while executemany() simply applied duplicates in order.
+        Keeping the last occurrence preserves that behaviour.
+        """
+        pk_idx = [columns.index(pk) for pk in primary_key if pk in columns]
+        if not pk_idx:
+            return rows
+        deduped: Dict[tuple, List[Any]] = {}
+        for row in rows:
+            deduped[tuple(row[i] for i in pk_idx)] = row
+        return list(deduped.values())
+
+    async def _executemany_rows(
+        self,
+        conn,
+        fq_table_name: str,
+        columns: List[str],
+        rows: List[List[Any]],
+        primary_key: List[str],
+        upsert: bool
+    ) -> Tuple[int, int]:
+        """Row-by-row UPSERT through executemany(). Returns (inserted, updated)."""
+        columns_str = ", ".join(f'"{c}"' for c in columns)
+        placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
+        pk_str = ", ".join(f'"{pk}"' for pk in primary_key)
+
+        update_columns = [col for col in columns if col not in primary_key]
+        update_str = ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
+
+        if upsert and update_columns:
+            query = f"""
+                INSERT INTO {fq_table_name} ({columns_str})
+                VALUES ({placeholders})
+                ON CONFLICT ({pk_str}) DO UPDATE SET {update_str}
+            """
+        else:
+            query = f"""
+                INSERT INTO {fq_table_name} ({columns_str})
+                VALUES ({placeholders})
+            """
+
+        # 🚀 STREAMING FIX: Single executemany() call instead of 23k individual queries
+        await conn.executemany(query, rows)
+        # executemany() cannot tell inserts from updates
+        return len(rows), 0
+
+    async def _copy_merge_rows(
+        self,
+        conn,
+        fq_table_name: str,
+        columns: List[str],
+        rows: List[List[Any]],
+        primary_key: List[str],
+        upsert: bool
+    ) -> Tuple[int, int]:
+        """
+        🚀 COPY MERGE: Binary COPY into a temp staging table, then one set-based merge.
+
+        The staging table is created with ON COMMIT DROP inside the transaction, so
+        it never outlives the batch and is safe on pooled connections.
+        Returns (inserted, updated) using the xmax = 0 trick on RETURNING.
+        """
+        staging_table = f"_stg_{fq_table_name.split('.')[-1]}"
+        columns_str = ", ".join(f'"{c}"' for c in columns)
+        pk_str = ", ".join(f'"{pk}"' for pk in primary_key)
+
+        update_columns = [col for col in columns if col not in primary_key]
+        update_str = ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
+
+        if upsert:
+            conflict_clause = (
+                f"ON CONFLICT ({pk_str}) DO UPDATE SET {update_str}"
+                if update_columns else f"ON CONFLICT ({pk_str}) DO NOTHING"
+            )
+        else:
+            conflict_clause = ""
+
+        merge_query = f"""
+            WITH merged AS (
+                INSERT INTO {fq_table_name} ({columns_str})
+                SELECT {columns_str} FROM {staging_table}
+                {conflict_clause}
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted) AS inserted_count,
+                COUNT(*) FILTER (WHERE NOT inserted) AS updated_count
+            FROM merged
+        """
+
+        async with conn.transaction():
+            await conn.execute(
+                f"CREATE TEMP TABLE {staging_table} (LIKE {fq_table_name}) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(staging_table, records=rows, columns=columns)
+            counts = await conn.fetchrow(merge_query)
+
+        return counts["inserted_count"], counts["updated_count"]
+
     async def load_data_batch(
         self,
         table_name: str, # This will now be the base table name, e.g., "calendario"
@@ -101,13 +230,17 @@ class PostgresLoader(LoggerMixin):
         validate: bool = True,
         # Optional parameter for special cases like test tables not in ETLConfig
         # If fq_table_name is provided, table_type is ignored for FQN construction.
-        fq_table_name_override: Optional[str] = None
+        fq_table_name_override: Optional[str] = None,
+        # None -> use ExtractionConfig.load_strategy of the table
+        load_strategy: Optional[LoadStrategy] = None,
+        # Saved in the same transaction as the batch (resumable loads)
+        checkpoint: Optional[BatchCheckpoint] = None
     ) -> LoadResult:
         """
-        🚀 STREAMING FIX: Loads a batch using TRUE batch processing with executemany()
-        
-        BEFORE: 23,333 individual queries causing timeout/hanging
-        AFTER: Single executemany() operation for maximum streaming efficiency
+        🚀 Loads a batch using either executemany() UPSERT or COPY + set-based merge.
+
+        The strategy comes from ExtractionConfig.load_strategy unless given explicitly.
+        Small batches (< COPY_MERGE_MIN_BATCH_SIZE) always use executemany().
         """
         start_time = time.time()
 
@@ -122,6 +255,8 @@ class PostgresLoader(LoggerMixin):
                 status="success"
             )
 
+        received_count = len(data)
+
         if validate:
             validated_data = self._validate_and_sanitize_batch(data, primary_key)
             skipped_count = len(data) - len(validated_data)
@@ -148,77 +283,256 @@ class PostgresLoader(LoggerMixin):
                 error_message="No valid records to load after validation."
             )
 
+        columns = list(data[0].keys())
+        rows = [[record.get(col) for col in columns] for record in data]
+
+        return await self._load_rows(
+            table_name=table_name,
+            fq_table_name=fq_table_name,
+            columns=columns,
+            rows=rows,
+            primary_key=primary_key,
+            upsert=upsert,
+            load_strategy=load_strategy,
+            received_count=received_count,
+            skipped_count=skipped_count,
+            start_time=start_time,
+            checkpoint=checkpoint
+        )
+
+    async def _get_target_columns(self, conn, fq_table_name: str) -> List[str]:
+        """Column names of the target table in ordinal order (cached per table)"""
+        if fq_table_name not in self._target_columns:
+            schema_name, _, bare_table = fq_table_name.rpartition(".")
+            records = await conn.fetch(
+                """
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_schema = $1 AND table_name = $2
+                ORDER BY ordinal_position
+                """,
+                (schema_name or "public").lower(),
+                bare_table.lower()
+            )
+            self._target_columns[fq_table_name] = [r["column_name"] for r in records]
+        return self._target_columns[fq_table_name]
+
+    def _align_rows_to_target(
+        self,
+        fq_table_name: str,
+        target_columns: List[str],
+        columns: List[str],
+        rows: List[tuple]
+    ) -> Tuple[List[str], List[tuple]]:
+        """
+        Reorders row tuples to the target table's column order.
+
+        Source columns are matched case-insensitively (BigQuery keeps
+        `ARCHIVO`, PostgreSQL folds it to `archivo`); source columns without
+        a target column are dropped.
+        """
+        if not target_columns:
+            return columns, rows
+
+        source_index = {col.lower(): i for i, col in enumerate(columns)}
+        target_set = set(target_columns)
+        aligned_columns = [col for col in target_columns if col in source_index]
+        dropped = [col for col in columns if col.lower() not in target_set]
+        if dropped:
+            self.logger.debug(f"Ignoring source columns not present in {fq_table_name}: {dropped}")
+
+        indexes = [source_index[col] for col in aligned_columns]
+        if indexes == list(range(len(columns))):
+            return aligned_columns, rows
+        return aligned_columns, [tuple(row[i] for i in indexes) for row in rows]
+
+    async def _record_changed_partitions(
+        self,
+        conn,
+        table_name: str,
+        columns: List[str],
+        rows: List[Any]
+    ) -> None:
+        """Records the (archivo, fecha) partitions of the batch for change-tracked tables."""
+        config = ETLConfig.EXTRACTION_CONFIGS.get(table_name)
+        if not config or not (config.change_archivo_column or config.change_date_column):
+            return
+
+        partitions = collect_changed_partitions(
+            columns, rows, config.change_archivo_column, config.change_date_column
+        )
+        await record_changed_partitions(conn, table_name, partitions)
+
+    async def _load_rows(
+        self,
+        table_name: str,
+        fq_table_name: str,
+        columns: List[str],
+        rows: List[Any],
+        primary_key: List[str],
+        upsert: bool,
+        load_strategy: Optional[LoadStrategy],
+        received_count: int,
+        skipped_count: int,
+        start_time: float,
+        conn=None,
+        checkpoint: Optional[BatchCheckpoint] = None
+    ) -> LoadResult:
+        """
+        Writes already-validated rows with the resolved strategy and builds the LoadResult.
+        The rows and the optional checkpoint commit (or roll back) together.
+        """
+        strategy = self._resolve_load_strategy(table_name, load_strategy)
+        use_copy = (
+            strategy == LoadStrategy.COPY_MERGE
+            and len(rows) >= ETLConfig.COPY_MERGE_MIN_BATCH_SIZE
+        )
+
+        if conn is None:
+            db = await self._get_db_manager()
+            pool = await db.get_pool()
+            async with pool.acquire() as conn:
+                return await self._load_rows(
+                    table_name, fq_table_name, columns, rows, primary_key, upsert,
+                    load_strategy, received_count, skipped_count, start_time,
+                    conn=conn, checkpoint=checkpoint
+                )
+
+        try:
+            async with conn.transaction():
+                await decompress_for_batch(conn, table_name, columns, rows)
+
+                if use_copy:
+                    deduped_rows = self._dedupe_rows_by_pk(columns, rows, primary_key)
+                    skipped_count += len(rows) - len(deduped_rows)
+                    self.logger.debug(f"COPY merge of {len(deduped_rows)} records into {fq_table_name}")
+                    inserted_count, updated_count = await self._copy_merge_rows(
+                        conn, fq_table_name, columns, deduped_rows, primary_key, upsert
+                    )
+                else:
+                    self.logger.debug(f"Executing batch INSERT for {len(rows)} records into {table_name}")
+                    inserted_count, updated_count = await self._executemany_rows(
+                        conn, fq_table_name, columns, rows, primary_key, upsert
+                    )
+
+                await self._record_changed_partitions(conn, table_name, columns, rows)
+
+                if checkpoint is not None:
+                    await save_checkpoint(conn, checkpoint)
+
+            duration = time.time() - start_time
+
+            self.logger.info(
+                f"✅ Loaded {inserted_count + updated_count} records for {fq_table_name} "
+                f"({strategy.value if use_copy else LoadStrategy.UPSERT.value}: "
+                f"{inserted_count} inserted, {updated_count} updated)"
+            )
+
+            return LoadResult(
+                table_name=fq_table_name, # Use FQN in result
+                total_records=received_count,
+                inserted_records=inserted_count,
+                updated_records=updated_count,
+                skipped_records=skipped_count,
+                load_duration_seconds=duration,
+                status="success"
+            )
+
+        except Exception as e:
+            duration = time.time() - start_time
+            error_msg = f"Failed to load batch into {fq_table_name}: {e}" # Log FQN
+            self.logger.error(error_msg)
+            self.logger.debug(f"Failed batch size: {len(rows)} records")
+
+            return LoadResult(
+                table_name=fq_table_name, # Use FQN in result
+                total_records=received_count,
+                inserted_records=0,
+                updated_records=0,
+                skipped_records=received_count,
+                load_duration_seconds=duration,
+                status="failed",
+                error_message=error_msg
+            )
+
+    async def load_rows_batch(
+        self,
+        table_name: str,
+        table_type: TableType,
+        columns: List[str],
+        rows: List[tuple],
+        primary_key: List[str],
+        upsert: bool = True,
+        fq_table_name_override: Optional[str] = None,
+        load_strategy: Optional[LoadStrategy] = None,
+        checkpoint: Optional[BatchCheckpoint] = None
+    ) -> LoadResult:
+        """
+        🚀 COLUMNAR: Loads row tuples (e.g. RowBatch from the extractor) directly.
+
+        Skips the per-record dict sanitizing of load_data_batch(): values are
+        expected to carry native Python types already. Tuples are reordered to
+        the target table's columns, and rows with a NULL primary key are skipped.
+        """
+        start_time = time.time()
+        received_count = len(rows)
+        fq_table_name = fq_table_name_override or ETLConfig.get_fq_table_name(table_name)
+
+        if not rows:
+            return LoadResult(
+                table_name=fq_table_name,
+                total_records=0,
+                inserted_records=0,
+                updated_records=0,
+                skipped_records=0,
+                load_duration_seconds=0.0,
+                status="success"
+            )
+
         db = await self._get_db_manager()
         pool = await db.get_pool()
 
         async with pool.acquire() as conn:
             try:
-                # 🚀 STREAMING FIX: Build query once for batch processing
-                columns = list(data[0].keys())
-                columns_str = ", ".join(f'"{c}"' for c in columns)
-                placeholders = ", ".join(f"${i+1}" for i in range(len(columns)))
-                pk_str = ", ".join(f'"{pk}"' for pk in primary_key)
-                
-                update_columns = [col for col in columns if col not in primary_key]
-                update_str = ", ".join(f'"{col}" = EXCLUDED."{col}"' for col in update_columns)
-
-                if upsert and update_columns:
-                    # Use fq_table_name in the query
-                    query = f"""
-                        INSERT INTO {fq_table_name} ({columns_str})
-                        VALUES ({placeholders})
-                        ON CONFLICT ({pk_str}) DO UPDATE SET {update_str}
-                    """
-                else:
-                    # Use fq_table_name in the query
-                    query = f"""
-                        INSERT INTO {fq_table_name} ({columns_str})
-                        VALUES ({placeholders})
-                    """
-
-                # 🚀 STREAMING FIX: Prepare all values for executemany()
-                batch_values = []
-                for record in data:
-                    values = [record.get(col) for col in columns]
-                    batch_values.append(values)
-
-                # 🚀 STREAMING FIX: Single executemany() call instead of 23k individual queries
-                self.logger.debug(f"Executing batch INSERT for {len(batch_values)} records into {table_name}")
-                
-                await conn.executemany(query, batch_values)
-                
-                inserted_count = len(batch_values)
-                duration = time.time() - start_time
-                
-                self.logger.info(f"✅ Loaded {inserted_count} records for {fq_table_name}") # Log FQN
+                target_columns = await self._get_target_columns(conn, fq_table_name)
+            except Exception as e:
+                self.logger.warning(f"Could not read columns of {fq_table_name}, loading as-is: {e}")
+                target_columns = []
+            columns, rows = self._align_rows_to_target(fq_table_name, target_columns, columns, rows)
 
-                return LoadResult(
-                    table_name=fq_table_name, # Use FQN in result
-                    total_records=len(data) + skipped_count,
-                    inserted_records=inserted_count,
-                    updated_records=0,  # Simplified for performance
-                    skipped_records=skipped_count,
-                    load_duration_seconds=duration,
-                    status="success"
-                )
+            pk_idx = [columns.index(pk) for pk in primary_key if pk in columns]
+            valid_rows = [row for row in rows if all(row[i] is not None for i in pk_idx)]
+            skipped_count = len(rows) - len(valid_rows)
+            if skipped_count:
+                self.logger.warning(f"{skipped_count} rows with a null primary key value skipped for {fq_table_name}")
 
-            except Exception as e:
-                duration = time.time() - start_time
-                error_msg = f"Failed to load batch into {fq_table_name}: {e}" # Log FQN
-                self.logger.error(error_msg)
-                self.logger.debug(f"Failed batch size: {len(data)} records")
-                
+            if not valid_rows:
                 return LoadResult(
-                    table_name=fq_table_name, # Use FQN in result
-                    total_records=len(data) + skipped_count,
+                    table_name=fq_table_name,
+                    total_records=received_count,
                     inserted_records=0,
                     updated_records=0,
-                    skipped_records=len(data) + skipped_count,
-                    load_duration_seconds=duration,
-                    status="failed",
-                    error_message=error_msg
+                    skipped_records=skipped_count,
+                    load_duration_seconds=time.time() - start_time,
+                    status="success",
+                    error_message="No valid records to load after validation."
                 )
 
+            return await self._load_rows(
+                table_name=table_name,
+                fq_table_name=fq_table_name,
+                columns=columns,
+                rows=valid_rows,
+                primary_key=primary_key,
+                upsert=upsert,
+                load_strategy=load_strategy,
+                received_count=received_count,
+                skipped_count=skipped_count,
+                start_time=start_time,
+                conn=conn,
+                checkpoint=checkpoint
+            )
+
     async def load_data_streaming(
         self,
         table_name: str, # This will now be the base table name
@@ -235,7 +549,7 @@ class PostgresLoader(LoggerMixin):
         This is the method called by CalendarDrivenCoordinator._load_campaign_table()
         """
         start_time = time.time()
-        total_records, total_inserted, total_skipped = 0, 0, 0
+        total_records, total_inserted, total_updated, total_skipped = 0, 0, 0, 0
         errors = []
 
         # Determine the fully qualified table name once
@@ -264,6 +578,7 @@ class PostgresLoader(LoggerMixin):
 
                 total_records += batch_result.total_records
                 total_inserted += batch_result.inserted_records
+                total_updated += batch_result.updated_records
                 total_skipped += batch_result.skipped_records
 
                 if batch_result.status == "failed":
@@ -271,7 +586,9 @@ class PostgresLoader(LoggerMixin):
                     self.logger.warning(f"Batch failed for {table_name}: {batch_result.error_message}")
 
             duration = time.time() - start_time
-            status = "success" if not errors else ("partial_success" if total_inserted > 0 else "failed")
+            status = "success" if not errors else (
+                "partial_success" if total_inserted + total_updated > 0 else "failed"
+            )
             error_message = "; ".join(errors) if errors else None
 
             # 🎯 This is what gets returned to _load_campaign_table()
@@ -279,7 +596,7 @@ class PostgresLoader(LoggerMixin):
                 table_name=fq_table_name, # Use FQN in result
                 total_records=total_records,
                 inserted_records=total_inserted,
-                updated_records=0,
+                updated_records=total_updated,
                 skipped_records=total_skipped,
                 load_duration_seconds=duration,
                 status=status,
@@ -287,7 +604,10 @@ class PostgresLoader(LoggerMixin):
             )
 
             if status == "success":
-                self.logger.info(f"🎯 Streaming load completed for {table_name}: {total_inserted} records loaded")
+                self.logger.info(
+                    f"🎯 Streaming load completed for {table_name}: "
+                    f"{total_inserted} inserted, {total_updated} updated"
+                )
             else:
                 self.logger.error(f"❌ Streaming load failed for {table_name}: {error_message}")
 
@@ -302,8 +622,8 @@ class PostgresLoader(LoggerMixin):
                 table_name=fq_table_name, # Use FQN in result
                 total_records=total_records,
                 inserted_records=total_inserted,
-                updated_records=0,
-                skipped_records=total_records - total_inserted,
+                updated_records=total_updated,
+                skipped_records=total_records - total_inserted - total_updated,
                 load_duration_seconds=duration,
                 status="failed",
                 error_message=error_msg
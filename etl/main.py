@@ -10,6 +10,11 @@ Usage:
     python etl/main.py --tables asignaciones pagos  # Tablas específicas
     python etl/main.py --log-level DEBUG            # Con debug
     python etl/main.py --dry-run                    # Solo mostrar qué se haría
+    python etl/main.py --workers 5                  # 5 tablas en paralelo
+    python etl/main.py --rebuild                    # + rebuild incremental de aux/mart
+
+Al final de cada corrida se aplica el ciclo de vida de almacenamiento de las
+hypertables RAW (compresión y retención, ETLConfig.STORAGE_LIFECYCLE_ENABLED).
 
 Autor: Ricky para Pulso-Back
 """
@@ -21,6 +26,9 @@ import logging
 from typing import List, Optional
 
 from etl.pipelines.simple_incremental_pipeline import SimpleIncrementalPipeline
+from etl.pipelines.incremental_rebuild import IncrementalRebuildEngine
+from etl.storage_lifecycle import StorageLifecycleManager
+from shared.core.cache_generations import notify_marts_rebuilt
 from etl.config import ETLConfig
 
 
@@ -60,6 +68,9 @@ Examples:
   %(prog)s --tables asignaciones trandeuda   # Tablas específicas
   %(prog)s --log-level DEBUG                 # Con logging detallado
   %(prog)s --dry-run                         # Solo mostrar plan de ejecución
+  %(prog)s --workers 5                       # Procesar hasta 5 tablas en paralelo
+  %(prog)s --rebuild                         # Cargar y reconstruir particiones aux/mart modificadas
+  %(prog)s --rebuild full                    # Cargar y reconstruir aux/mart completo
   %(prog)s --list-tables                     # Listar tablas disponibles
         """
     )
@@ -77,6 +88,24 @@ Examples:
         help='Nivel de logging (default: INFO)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=ETLConfig.DEFAULT_PARALLEL_WORKERS,
+        help=(
+            f'Tablas procesadas en paralelo (default: {ETLConfig.DEFAULT_PARALLEL_WORKERS}, '
+            f'máximo: {ETLConfig.MAX_PARALLEL_WORKERS})'
+        )
+    )
+    
+    parser.add_argument(
+        '--rebuild',
+        nargs='?',
+        const='incremental',
+        choices=['incremental', 'full'],
+        help='Reconstruir aux/mart después de la carga: solo particiones modificadas (default) o completo'
+    )
+    
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -95,7 +124,12 @@ Examples:
         version='ETL Pipeline 1.0.0'
     )
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    
+    if not 1 <= args.workers <= ETLConfig.MAX_PARALLEL_WORKERS:
+        parser.error(f"--workers debe estar entre 1 y {ETLConfig.MAX_PARALLEL_WORKERS}")
+    
+    return args
 
 
 def validate_tables(table_names: Optional[List[str]]) -> List[str]:
@@ -149,16 +183,20 @@ def list_available_tables() -> None:
     print(f"📊 Total: {len(tables)} tablas configuradas")
 
 
-async def run_dry_run(tables: List[str]) -> None:
+async def run_dry_run(tables: List[str], workers: int, rebuild: Optional[str] = None) -> None:
     """
     Ejecutar modo dry-run (solo mostrar plan)
     
     Args:
         tables: Lista de tablas a procesar
+        workers: Tablas procesadas en paralelo
+        rebuild: Modo de rebuild aux/mart (None, 'incremental' o 'full')
     """
+    dependencies = ETLConfig.get_table_dependencies(tables)
+
     print("🔍 DRY RUN MODE - Plan de Ejecución")
     print("=" * 50)
-    print(f"📊 Tablas a procesar: {len(tables)}")
+    print(f"📊 Tablas a procesar: {len(tables)} (workers: {workers})")
     print(f"📋 Lista de tablas:")
     
     for i, table_name in enumerate(tables, 1):
@@ -167,9 +205,28 @@ async def run_dry_run(tables: List[str]) -> None:
             print(f"  {i}. {table_name}")
             print(f"     Source: {config.source_table}")
             print(f"     Incremental: {config.incremental_column or 'Full refresh'}")
+            if dependencies[table_name]:
+                print(f"     Depende de: {', '.join(dependencies[table_name])}")
         except Exception as e:
             print(f"  {i}. {table_name} - ❌ Error: {e}")
     
+    if rebuild:
+        stage_dependencies = ETLConfig.get_rebuild_stage_dependencies()
+        print(f"🔁 Rebuild aux/mart ({rebuild}, {ETLConfig.MAX_CONCURRENT_SQL_STAGES} etapas en paralelo):")
+        for stage in ETLConfig.get_rebuild_stage_order():
+            upstream = stage_dependencies[stage.stage_name]
+            print(f"  - {stage.stage_name} ({stage.sql_file})")
+            if upstream:
+                print(f"     Depende de: {', '.join(upstream)}")
+    
+    if ETLConfig.STORAGE_LIFECYCLE_ENABLED:
+        print(
+            f"🗜️ Ciclo de vida RAW (retención: campañas cerradas hace más de "
+            f"{ETLConfig.RAW_RETENTION_DAYS_AFTER_CLOSE} días):"
+        )
+        for lifecycle in ETLConfig.STORAGE_LIFECYCLE_TABLES:
+            print(f"  - {lifecycle.table_name}: comprimir chunks de más de {lifecycle.compress_after_days} días")
+    
     print("\n✅ Dry run completado. Use sin --dry-run para ejecutar.")
 
 
@@ -195,7 +252,7 @@ async def main() -> None:
         
         # Comando especial: dry run
         if args.dry_run:
-            await run_dry_run(tables_to_process)
+            await run_dry_run(tables_to_process, args.workers, args.rebuild)
             return
         
         # Ejecutar pipeline ETL
@@ -207,7 +264,7 @@ async def main() -> None:
         pipeline = SimpleIncrementalPipeline()
         
         try:
-            result = await pipeline.process_tables(tables_to_process)
+            result = await pipeline.process_tables(tables_to_process, max_workers=args.workers)
             
             # Determinar exit code basado en resultado
             if result["status"] == "success":
@@ -220,6 +277,25 @@ async def main() -> None:
                 )
                 exit_code = 1
             
+            if args.rebuild:
+                # Los cambios se registran aunque alguna tabla falle: reconstruir lo cargado
+                rebuild_result = await IncrementalRebuildEngine().rebuild(full=args.rebuild == 'full')
+                if rebuild_result["status"] == "failed":
+                    logger.error("❌ aux/mart rebuild failed - changes kept for the next run")
+                    exit_code = 1
+
+                # Invalidar (y precalentar) la caché de la API de los marts reconstruidos
+                await notify_marts_rebuilt(
+                    stage["stage_name"] for stage in rebuild_result["stage_results"]
+                    if stage["status"] == "success"
+                )
+
+            if ETLConfig.STORAGE_LIFECYCLE_ENABLED:
+                # Después del rebuild: no comprimir ni eliminar lo que el rebuild todavía lee
+                lifecycle_result = await StorageLifecycleManager().run()
+                if lifecycle_result["status"] == "failed":
+                    logger.warning("⚠️ Storage lifecycle completed with errors - retried on the next run")
+            
         finally:
             # Cleanup resources
             await pipeline.cleanup()
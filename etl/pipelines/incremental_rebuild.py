@@ -0,0 +1,492 @@
+"""
+🔁 Incremental Rebuild - DAG raw → aux → mart por particiones (campaña, día)
+
+Las cargas RAW registran en etl_changed_partitions qué (archivo, fecha)
+tocaron. Este motor traduce esos cambios a particiones (campaña, día) de cada
+etapa SQL declarada en ETLConfig.REBUILD_STAGES y solo reconstruye esas
+particiones, respetando el grafo de dependencias:
+
+    gestiones_unificadas ─┐           ┌─ gestion_cuenta_impact ─┐
+    pagos_dedup ──────────┼─ cuenta_estado_diario ┘             ├─ dashboard_data
+                          └─ pagos_diarios ─────────────────────┘
+    gestiones_unificadas ──── productivity_data (+ productivity_hourly)
+    dashboard_data / gestion_cuenta_impact ──── continuous aggregates diarios
+
+- Etapas independientes corren en paralelo, cada una en su conexión del pool
+- Etapas sin entradas modificadas se omiten ("unchanged")
+- Dimensiones (sin particiones) se detectan por huella de contenido
+- Tiempos por etapa en public.etl_execution_log (un execution_id por corrida)
+- Campañas retiradas (cerradas hace más de RAW_RETENTION_DAYS_AFTER_CLOSE
+  días) no se reconstruyen: su RAW lo elimina la retención de storage_lifecycle
+- Al final se refrescan los continuous aggregates (ETLConfig.CONTINUOUS_AGGREGATES)
+  solo sobre los días reconstruidos
+
+Cómo se propaga un cambio lo define ChangeSpread por entrada (ej. un pago del
+día d cambia el saldo de cuenta_estado_diario de d en adelante). El tiempo del
+refresh nocturno queda proporcional al cambio, no a la historia.
+
+Autor: Ricky para Pulso-Back
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import json
+import re
+import time
+import uuid
+
+from etl.change_tracking import (
+    campaign_key,
+    clear_changes,
+    compute_table_fingerprints,
+    get_pending_changes,
+    get_saved_fingerprints,
+    save_fingerprints
+)
+from etl.config import ChangeSpread, ETLConfig, RebuildStageConfig
+from shared.core.logging import LoggerMixin
+from shared.database.connection import get_database_manager, DatabaseManager
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+# campaña (archivo de calendario) -> días a reconstruir
+PartitionScope = Dict[str, Set[date]]
+
+
+@dataclass
+class CampaignWindow:
+    """Ventana de una campaña según calendario"""
+    archivo: str
+    fecha_apertura: date
+    fecha_cierre: Optional[date]
+    fecha_trandeuda: Optional[date]
+
+    def last_day(self, today: date) -> date:
+        """Último día de la campaña (hoy si sigue abierta), como COALESCE(fecha_cierre, CURRENT_DATE)"""
+        return self.fecha_cierre or today
+
+    def is_retired(self, today: date) -> bool:
+        """Cerrada hace más de RAW_RETENTION_DAYS_AFTER_CLOSE días: su RAW puede estar eliminado"""
+        return (
+            self.fecha_cierre is not None
+            and (today - self.fecha_cierre).days > ETLConfig.RAW_RETENTION_DAYS_AFTER_CLOSE
+        )
+
+    def contains(self, day: date, today: date) -> bool:
+        return self.fecha_apertura <= day <= self.last_day(today)
+
+    def days(self, today: date, start: Optional[date] = None) -> Set[date]:
+        """Días de la ventana desde start (inclusive)"""
+        first = max(start, self.fecha_apertura) if start else self.fecha_apertura
+        last = self.last_day(today)
+        return {first + timedelta(days=i) for i in range((last - first).days + 1)}
+
+
+def _split_statements(sql: str) -> List[str]:
+    """Separar un archivo .sql en sentencias (asyncpg no acepta varias con parámetros)"""
+    statements = []
+    for chunk in re.split(r";[ \t]*(?:\n|$)", sql):
+        code = "\n".join(line for line in chunk.splitlines() if not line.strip().startswith("--"))
+        if code.strip():
+            statements.append(chunk.strip())
+    return statements
+
+
+class IncrementalRebuildEngine(LoggerMixin):
+    """
+    Runner del DAG aux/mart: reconstruye solo las particiones (campaña, día)
+    modificadas, con las etapas independientes en paralelo
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        super().__init__()
+        self.db_manager = db_manager
+        # Orden topológico: plan_scopes() necesita las etapas previas ya planificadas
+        self.stages: List[RebuildStageConfig] = ETLConfig.get_rebuild_stage_order()
+        self.dependencies: Dict[str, List[str]] = ETLConfig.get_rebuild_stage_dependencies()
+        self._sql_cache: Dict[str, List[str]] = {}
+
+    async def _get_db_manager(self) -> DatabaseManager:
+        if self.db_manager is None:
+            self.db_manager = await get_database_manager()
+        return self.db_manager
+
+    # ===============================================
+    # PLANIFICACIÓN (pura, sin base de datos)
+    # ===============================================
+
+    @staticmethod
+    def _raw_change_points(
+        changes: Iterable[Dict[str, Any]],
+        windows: Dict[str, CampaignWindow],
+        today: date
+    ) -> Dict[str, Dict[str, Set[Optional[date]]]]:
+        """
+        Cambios pendientes por tabla → campaña → días (None = toda la campaña)
+
+        Un cambio sin archivo se asigna a cada campaña abierta ese día
+        (o a todas si tampoco tiene fecha).
+        """
+        points: Dict[str, Dict[str, Set[Optional[date]]]] = {}
+        for change in changes:
+            table_points = points.setdefault(change["table_name"], {})
+            archivo, fecha = campaign_key(change["archivo"]), change["fecha"]
+
+            if archivo is not None:
+                if archivo in windows:
+                    table_points.setdefault(archivo, set()).add(fecha)
+                continue
+
+            for window in windows.values():
+                if fecha is None or window.contains(fecha, today):
+                    table_points.setdefault(window.archivo, set()).add(fecha)
+        return points
+
+    @staticmethod
+    def _spread(
+        points: Dict[str, Set[Optional[date]]],
+        spread: ChangeSpread,
+        windows: Dict[str, CampaignWindow],
+        today: date
+    ) -> PartitionScope:
+        """Particiones de una etapa afectadas por los cambios de una entrada"""
+        scope: PartitionScope = {}
+        for archivo, days in points.items():
+            window = windows[archivo]
+            affected: Set[date] = set()
+
+            if spread == ChangeSpread.FECHA_TRANDEUDA:
+                if window.fecha_trandeuda and window.contains(window.fecha_trandeuda, today):
+                    affected.add(window.fecha_trandeuda)
+            elif spread == ChangeSpread.CAMPAIGN or None in days:
+                affected = window.days(today)
+            elif spread == ChangeSpread.FORWARD:
+                affected = window.days(today, start=min(days))
+            else:
+                affected = {day for day in days if window.contains(day, today)}
+
+            if affected:
+                scope.setdefault(archivo, set()).update(affected)
+        return scope
+
+    def plan_scopes(
+        self,
+        changes: Iterable[Dict[str, Any]],
+        windows: Dict[str, CampaignWindow],
+        today: date,
+        full: bool = False
+    ) -> Dict[str, PartitionScope]:
+        """
+        Particiones a reconstruir por etapa
+
+        Args:
+            changes: Cambios pendientes (table_name, archivo, fecha)
+            windows: Ventanas de campaña por archivo de calendario
+            today: Fecha actual de la base de datos
+            full: Reconstruir todas las particiones de todas las campañas
+
+        Returns:
+            Dict stage_name -> {campaña: días}
+        """
+        if full:
+            all_partitions = {archivo: window.days(today) for archivo, window in windows.items()}
+            return {stage.stage_name: all_partitions for stage in self.stages}
+
+        points = self._raw_change_points(changes, windows, today)
+        scopes: Dict[str, PartitionScope] = {}
+
+        for stage in self.stages:
+            stage_scope: PartitionScope = {}
+            for input_name, spread in stage.inputs.items():
+                input_points = points.get(input_name)
+                if input_points is None and input_name in scopes:
+                    input_points = scopes[input_name]
+                if not input_points:
+                    continue
+                for archivo, days in self._spread(input_points, spread, windows, today).items():
+                    stage_scope.setdefault(archivo, set()).update(days)
+            scopes[stage.stage_name] = stage_scope
+
+        return scopes
+
+    # ===============================================
+    # EJECUCIÓN
+    # ===============================================
+
+    def _load_stage_sql(self, stage: RebuildStageConfig) -> List[str]:
+        """Sentencias de la etapa con los esquemas del proyecto"""
+        if stage.sql_file not in self._sql_cache:
+            uid = ETLConfig.PROJECT_UID
+            sql = (SQL_DIR / stage.sql_file).read_text(encoding="utf-8").format(
+                raw_schema=f"raw_{uid}", aux_schema=f"aux_{uid}", mart_schema=f"mart_{uid}"
+            )
+            self._sql_cache[stage.sql_file] = _split_statements(sql)
+        return self._sql_cache[stage.sql_file]
+
+    async def _get_campaign_windows(self, conn) -> Dict[str, CampaignWindow]:
+        """Ventanas de campaña (una fila por archivo aunque calendario tenga varios periodos)"""
+        rows = await conn.fetch(
+            f"""
+            SELECT archivo,
+                   MIN(fecha_apertura) AS fecha_apertura,
+                   CASE WHEN bool_or(fecha_cierre IS NULL) THEN NULL ELSE MAX(fecha_cierre) END AS fecha_cierre,
+                   MIN(fecha_trandeuda) AS fecha_trandeuda
+            FROM raw_{ETLConfig.PROJECT_UID}.calendario
+            GROUP BY archivo
+            """
+        )
+        return {
+            row["archivo"]: CampaignWindow(
+                archivo=row["archivo"],
+                fecha_apertura=row["fecha_apertura"],
+                fecha_cierre=row["fecha_cierre"],
+                fecha_trandeuda=row["fecha_trandeuda"]
+            )
+            for row in rows
+        }
+
+    async def _run_stage(self, conn, stage: RebuildStageConfig, scope: PartitionScope) -> None:
+        """Ejecutar la etapa para sus particiones (una transacción por etapa o por campaña)"""
+        statements = self._load_stage_sql(stage)
+
+        if not stage.per_partition:
+            partitions = [(archivo, day) for archivo, days in sorted(scope.items()) for day in sorted(days)]
+            archivos, fechas = (list(values) for values in zip(*partitions))
+            async with conn.transaction():
+                for statement in statements:
+                    await conn.execute(statement, archivos, fechas)
+            return
+
+        for archivo, days in sorted(scope.items()):
+            # Las tablas aux/mart guardan el archivo como asignaciones ('CAMPANA.txt')
+            aux_archivo = f"{archivo}.txt"
+            async with conn.transaction():
+                for day in sorted(days):
+                    for statement in statements:
+                        await conn.execute(statement, aux_archivo, day)
+
+    async def _run_dag(self, pool, scopes: Dict[str, PartitionScope]) -> List[Dict[str, Any]]:
+        """
+        Ejecutar las etapas respetando dependencias
+
+        Cada etapa arranca cuando terminan sus dependencias y hay un slot libre
+        (MAX_CONCURRENT_SQL_STAGES), en su propia conexión del pool. Si una
+        dependencia falla, la etapa y sus dependientes quedan "skipped".
+        """
+        stage_slots = asyncio.Semaphore(ETLConfig.MAX_CONCURRENT_SQL_STAGES)
+        finished = {stage.stage_name: asyncio.Event() for stage in self.stages}
+        results_by_stage: Dict[str, Dict[str, Any]] = {}
+
+        async def run_stage(stage: RebuildStageConfig) -> None:
+            stage_name = stage.stage_name
+            scope = scopes.get(stage_name, {})
+            result = {
+                "stage_name": stage_name,
+                "campaigns": len(scope),
+                "partitions": sum(len(days) for days in scope.values()),
+                "duration_seconds": 0.0
+            }
+            try:
+                for dep in self.dependencies[stage_name]:
+                    await finished[dep].wait()
+
+                failed_deps = [
+                    dep for dep in self.dependencies[stage_name]
+                    if results_by_stage[dep]["status"] in ("failed", "skipped")
+                ]
+                result["started_at"] = datetime.now(timezone.utc)
+
+                if failed_deps:
+                    result["status"] = "skipped"
+                    result["error"] = f"dependencies failed: {', '.join(failed_deps)}"
+                    self.logger.warning(f"⏭️ {stage_name}: skipped, {result['error']}")
+                elif not result["partitions"]:
+                    result["status"] = "unchanged"
+                    self.logger.info(f"⏭️ {stage_name}: inputs unchanged, skipped")
+                else:
+                    async with stage_slots:
+                        result["started_at"] = datetime.now(timezone.utc)
+                        stage_start = time.time()
+                        try:
+                            async with pool.acquire() as conn:
+                                await self._run_stage(conn, stage, scope)
+                            result["status"] = "success"
+                            self.logger.info(
+                                f"✅ {stage_name}: rebuilt {result['partitions']} partitions "
+                                f"of {result['campaigns']} campaigns in {time.time() - stage_start:.1f}s"
+                            )
+                        except Exception as e:
+                            result["status"] = "failed"
+                            result["error"] = str(e)
+                            self.logger.error(f"❌ {stage_name}: rebuild failed: {e}")
+                        result["duration_seconds"] = round(time.time() - stage_start, 3)
+
+                result["completed_at"] = datetime.now(timezone.utc)
+                results_by_stage[stage_name] = result
+            finally:
+                # Nunca dejar a los dependientes esperando
+                if stage_name not in results_by_stage:
+                    result.setdefault("started_at", datetime.now(timezone.utc))
+                    result.update(status="failed", error="scheduler error", completed_at=datetime.now(timezone.utc))
+                    results_by_stage[stage_name] = result
+                finished[stage_name].set()
+
+        await asyncio.gather(*(run_stage(stage) for stage in self.stages))
+        return [results_by_stage[stage.stage_name] for stage in self.stages]
+
+    async def _refresh_continuous_aggregates(
+        self,
+        pool,
+        scopes: Dict[str, PartitionScope],
+        stage_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Refrescar cada continuous aggregate sobre los días que reconstruyó su etapa
+
+        La ventana se amplía un día por lado: TimescaleDB solo materializa los
+        buckets completos dentro de la ventana y los de gestion_cuenta_impact
+        son días de Lima. Un refresh fallido no falla la corrida (la política
+        horaria lo reintenta dentro de su ventana).
+        """
+        succeeded = {result["stage_name"] for result in stage_results if result["status"] == "success"}
+        uid = ETLConfig.PROJECT_UID
+        results = []
+
+        for cagg in ETLConfig.CONTINUOUS_AGGREGATES:
+            days = [day for stage_days in scopes.get(cagg.source_stage, {}).values() for day in stage_days]
+            if cagg.source_stage not in succeeded or not days:
+                continue
+
+            view_name = cagg.view_name.format(aux_schema=f"aux_{uid}", mart_schema=f"mart_{uid}")
+            window_start = min(days) - timedelta(days=1)
+            window_end = max(days) + timedelta(days=2)
+            result = {"view_name": view_name, "window_start": window_start, "window_end": window_end}
+            refresh_start = time.time()
+            try:
+                # CALL no admite transacción: cada refresh se confirma por sí solo
+                async with pool.acquire() as conn:
+                    await conn.execute(
+                        f"CALL refresh_continuous_aggregate('{view_name}', "
+                        f"'{window_start.isoformat()}', '{window_end.isoformat()}')"
+                    )
+                result["status"] = "success"
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+                self.logger.warning(f"⚠️ Could not refresh continuous aggregate {view_name}: {e}")
+            result["duration_seconds"] = round(time.time() - refresh_start, 3)
+            results.append(result)
+
+        return results
+
+    async def _log_stage_results(
+        self,
+        pool,
+        execution_id: uuid.UUID,
+        stage_results: List[Dict[str, Any]],
+        full: bool
+    ) -> None:
+        """Registrar una fila por etapa en public.etl_execution_log (no bloquea la corrida)"""
+        rows = [
+            (
+                execution_id,
+                f"{ETLConfig.SQL_STAGE_LOG_PREFIX}.{result['stage_name']}",
+                result["status"],
+                result["started_at"],
+                result["completed_at"],
+                result.get("error"),
+                json.dumps({
+                    "mode": "full" if full else "incremental",
+                    "campaigns": result["campaigns"],
+                    "partitions": result["partitions"],
+                    "duration_seconds": result["duration_seconds"],
+                    "depends_on": self.dependencies[result["stage_name"]]
+                })
+            )
+            for result in stage_results
+        ]
+        try:
+            async with pool.acquire() as conn:
+                await conn.executemany(
+                    f"""
+                    INSERT INTO {ETLConfig.get_fq_table_name("etl_execution_log")}
+                        (execution_id, pipeline_name, status, started_at, completed_at, error_message, metadata)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7::jsonb)
+                    """,
+                    rows
+                )
+        except Exception as e:
+            self.logger.warning(f"⚠️ Could not write stage timings to etl_execution_log: {e}")
+
+    async def rebuild(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Reconstruir las particiones pendientes de aux/mart
+
+        Si una etapa falla se omiten sus dependientes y los cambios quedan
+        pendientes para la próxima ejecución (las etapas son idempotentes).
+
+        Args:
+            full: Reconstruir todas las campañas (ignora y consume los cambios pendientes)
+
+        Returns:
+            Dict con resultado por etapa
+        """
+        start_time = time.time()
+        execution_id = uuid.uuid4()
+        db = await self._get_db_manager()
+        pool = await db.get_pool()
+
+        async with pool.acquire() as conn:
+            today = await conn.fetchval("SELECT CURRENT_DATE")
+            # Campañas retiradas: su aux/mart es final y el RAW puede haberse eliminado (storage_lifecycle)
+            windows = {
+                archivo: window for archivo, window in (await self._get_campaign_windows(conn)).items()
+                if not window.is_retired(today)
+            }
+            fingerprints = await compute_table_fingerprints(conn, ETLConfig.get_fingerprinted_inputs())
+            saved_fingerprints = await get_saved_fingerprints(conn)
+
+        changes = await get_pending_changes()
+        # Dimensión sin huella previa = línea base (aux/mart ya se construyeron con ella)
+        changed_dimensions = [
+            table_name for table_name, fingerprint in fingerprints.items()
+            if table_name in saved_fingerprints and saved_fingerprints[table_name] != fingerprint
+        ]
+        all_changes = changes + [
+            {"change_id": None, "table_name": table_name, "archivo": None, "fecha": None}
+            for table_name in changed_dimensions
+        ]
+
+        if not all_changes and not full:
+            async with pool.acquire() as conn:
+                await save_fingerprints(conn, fingerprints)
+            self.logger.info("✅ No changed partitions - aux/mart already up to date")
+            return {"status": "up_to_date", "changes_consumed": 0, "stage_results": []}
+
+        if changed_dimensions:
+            self.logger.info(f"🔄 Dimensions changed since last run: {', '.join(changed_dimensions)}")
+
+        scopes = self.plan_scopes(all_changes, windows, today, full=full)
+        stage_results = await self._run_dag(pool, scopes)
+        await self._log_stage_results(pool, execution_id, stage_results, full)
+        cagg_results = await self._refresh_continuous_aggregates(pool, scopes, stage_results)
+
+        failed = any(result["status"] in ("failed", "skipped") for result in stage_results)
+        consumed = 0
+        if not failed:
+            consumed = await clear_changes([change["change_id"] for change in changes])
+            async with pool.acquire() as conn:
+                await save_fingerprints(conn, fingerprints)
+
+        return {
+            "status": "failed" if failed else "success",
+            "execution_id": str(execution_id),
+            "full": full,
+            "changes_consumed": consumed,
+            "stage_results": stage_results,
+            "continuous_aggregates": cagg_results,
+            "duration_seconds": round(time.time() - start_time, 3)
+        }
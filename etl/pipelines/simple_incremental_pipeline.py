@@ -6,27 +6,51 @@ Contiene toda la lógica de negocio para extracción incremental.
 
 Características:
 - Extract incremental basado en watermarks
-- Load con UPSERT a PostgreSQL  
+- Load con UPSERT a PostgreSQL, solapado con la extracción (cola acotada)
 - Update de watermarks atómico
+- Checkpoints por lote (misma transacción que la carga) para reanudar rangos interrumpidos
 - Sin lógicas de negocio complejas
 
 Autor: Ricky para Pulso-Back
 """
 
-from datetime import datetime, timezone, timedelta
-from typing import Optional, Dict, Any, List
+from datetime import date, datetime, timezone, timedelta
+from typing import Optional, Dict, Any, List, Tuple
+import asyncio
 import logging
 
-from etl.extractors.bigquery_extractor import BigQueryExtractor
+from etl.extractors.bigquery_extractor import BigQueryExtractor, RowBatch
 from etl.loaders.postgres_loader import PostgresLoader
-from etl.config import ETLConfig
+from etl.config import ETLConfig, SliceInterval
 from etl.watermarks import (
     ensure_watermark_table,
     get_last_extracted_date,
-    update_watermark
+    update_watermark,
+    BatchCheckpoint,
+    start_checkpoint_range,
+    complete_checkpoint_range,
+    prune_checkpoints
 )
+from etl.change_tracking import ensure_change_tracking_table
 from shared.database.connection import get_database_manager
 
+# Marca de fin de stream entre extract_incremental_data() y load_data()
+_END_OF_STREAM = object()
+
+
+def _as_utc_datetime(value: Any) -> Optional[datetime]:
+    """Normalizar un valor de la columna incremental a datetime UTC (None si no aplica)"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+    return None
+
 
 class SimpleIncrementalPipeline:
     """
@@ -43,6 +67,10 @@ class SimpleIncrementalPipeline:
         self.loader = None
         self.logger = logging.getLogger(__name__)
         self._initialized = False
+
+        # Presupuestos compartidos entre tablas concurrentes
+        self._bigquery_slots = asyncio.Semaphore(ETLConfig.MAX_CONCURRENT_BIGQUERY_JOBS)
+        self._postgres_slots = asyncio.Semaphore(ETLConfig.MAX_CONCURRENT_POSTGRES_LOADS)
     
     async def initialize(self) -> None:
         """
@@ -55,6 +83,7 @@ class SimpleIncrementalPipeline:
         
         # Asegurar tabla de watermarks
         await ensure_watermark_table()
+        await ensure_change_tracking_table()
         
         # Inicializar loader con database manager
         db_manager = await get_database_manager()
@@ -63,19 +92,92 @@ class SimpleIncrementalPipeline:
         self._initialized = True
         self.logger.info("✅ Pipeline initialized successfully")
     
-    async def extract_incremental_data(self, table_name: str) -> Dict[str, Any]:
+    @staticmethod
+    def _build_extraction_query(
+        table_name: str,
+        start_date: datetime,
+        end_date: datetime,
+        inclusive_start: bool = False
+    ) -> str:
         """
-        Extraer datos incrementales para una tabla
-        
+        Construir query incremental para el rango (start_date, end_date]
+
         Args:
             table_name: Nombre de la tabla a procesar
-            
+            start_date: Inicio exclusivo del rango
+            end_date: Fin inclusivo del rango
+            inclusive_start: Usar >= en el inicio (reanudación desde un checkpoint:
+                las filas con el mismo valor pueden no haberse cargado; el UPSERT
+                hace idempotente la recarga)
+
         Returns:
-            Dict con datos extraídos y metadatos
+            SQL de BigQuery
+        """
+        config = ETLConfig.get_config(table_name)
+        source_table = f"{ETLConfig.PROJECT_ID}.{ETLConfig.BQ_DATASET}.{config.source_table}"
+
+        if not config.incremental_column:
+            # Tabla sin fecha (dimensiones) - extracción completa
+            return f"SELECT * FROM `{source_table}`"
+
+        # Tabla con columna de fecha para filtrado incremental
+        start_operator = ">=" if inclusive_start else ">"
+        return f"""
+            SELECT * FROM `{source_table}`
+            WHERE {config.incremental_column} {start_operator} TIMESTAMP('{start_date.isoformat()}')
+              AND {config.incremental_column} <= TIMESTAMP('{end_date.isoformat()}')
+            ORDER BY {config.incremental_column}
+            """
+
+    @staticmethod
+    def _plan_slices(
+        start_date: datetime,
+        end_date: datetime,
+        interval: Optional[SliceInterval]
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Dividir (start_date, end_date] en tramos alineados a la hora/día UTC
+
+        Los límites alineados son estables entre ejecuciones: tras un fallo,
+        la siguiente corrida vuelve a generar los mismos tramos desde el watermark.
+
+        Args:
+            start_date: Inicio exclusivo de la ventana
+            end_date: Fin inclusivo de la ventana
+            interval: Granularidad de ExtractionConfig.slice_interval (None = sin tramos)
+
+        Returns:
+            Lista ordenada de tramos (inicio, fin]
+        """
+        if interval is None:
+            return [(start_date, end_date)]
+
+        step = timedelta(hours=1) if interval == SliceInterval.HOUR else timedelta(days=1)
+        if end_date - start_date <= step:
+            return [(start_date, end_date)]
+
+        aligned = start_date.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        if interval == SliceInterval.DAY:
+            aligned = aligned.replace(hour=0)
+
+        slices = []
+        slice_start, boundary = start_date, aligned + step
+        while boundary < end_date:
+            slices.append((slice_start, boundary))
+            slice_start, boundary = boundary, boundary + step
+        slices.append((slice_start, end_date))
+        return slices
+
+    async def _plan_extraction(self, table_name: str) -> Dict[str, Any]:
+        """
+        Determinar rango y query de extracción a partir del watermark
+
+        Args:
+            table_name: Nombre de la tabla a procesar
+
+        Returns:
+            Dict con query, start_date, end_date y extraction_type
         """
-        if not self._initialized:
-            await self.initialize()
-            
         config = ETLConfig.get_config(table_name)
         
         # Obtener último watermark
@@ -91,111 +193,197 @@ class SimpleIncrementalPipeline:
         else:
             # Primera extracción: últimos 30 días por defecto
             end_date = datetime.now(timezone.utc)
-            start_date = end_date - timedelta(days=30)
+            # Alineado a medianoche UTC: el rango (y su checkpoint) es estable entre reintentos
+            start_date = (end_date - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)
             extraction_type = "initial"
             self.logger.info(f"🆕 {table_name}: primera extracción (últimos 30 días)")
         
-        # Construir query incremental
-        source_table = f"{ETLConfig.PROJECT_ID}.{ETLConfig.BQ_DATASET}.{config.source_table}"
-        
-        if config.incremental_column:
-            # Tabla con columna de fecha para filtrado incremental
-            query = f"""
-            SELECT * FROM `{source_table}`
-            WHERE {config.incremental_column} > TIMESTAMP('{start_date.isoformat()}')
-              AND {config.incremental_column} <= TIMESTAMP('{end_date.isoformat()}')
-            ORDER BY {config.incremental_column}
-            """
-        else:
+        if not config.incremental_column:
             # Tabla sin fecha (dimensiones) - extracción completa
-            query = f"SELECT * FROM `{source_table}`"
             extraction_type = "full"
+
+        query = self._build_extraction_query(table_name, start_date, end_date)
+
+        return {
+            "query": query,
+            "start_date": start_date,
+            "end_date": end_date,
+            "extraction_type": extraction_type
+        }
+
+    async def extract_incremental_data(
+        self,
+        table_name: str,
+        plan: Dict[str, Any],
+        queue: asyncio.Queue
+    ) -> Dict[str, Any]:
+        """
+        Extraer datos incrementales y publicarlos lote a lote en una cola acotada
+
+        La cola tiene tamaño máximo PIPELINE_QUEUE_MAX_BATCHES: si el loader va
+        más lento, queue.put() bloquea y BigQuery deja de paginar (back-pressure).
+        Se publica _END_OF_STREAM al terminar, haya error o no (salvo cancelación).
+        
+        Args:
+            table_name: Nombre de la tabla a procesar
+            plan: Resultado de _plan_extraction()
+            queue: Cola compartida con load_data()
+            
+        Returns:
+            Dict con metadatos de la extracción (sin los registros)
+        """
+        config = ETLConfig.get_config(table_name)
         
         # Extraer datos
         self.logger.info(f"🔍 Extracting {table_name}...")
         
-        records = []
         record_count = 0
+
+        # Columnar: RowBatch con tipos nativos; si no, dicts serializados
+        if ETLConfig.COLUMNAR_EXTRACTION_ENABLED:
+            stream = self.extractor.stream_custom_query_rows(plan["query"], batch_size=config.batch_size)
+        else:
+            stream = self.extractor.stream_custom_query(plan["query"], batch_size=config.batch_size)
         
         try:
-            async for batch in self.extractor.stream_custom_query(query, batch_size=config.batch_size):
-                records.extend(batch)
-                record_count += len(batch)
-                
-                # Log progreso cada 50k registros
-                if record_count % 50000 == 0:
-                    self.logger.info(f"⏳ {table_name}: extracted {record_count:,} records...")
+            # Un slot de BigQuery por stream activo
+            async with self._bigquery_slots:
+                async for batch in stream:
+                    await queue.put(batch)
+                    record_count += len(batch)
+                    self.logger.debug(f"⏳ {table_name}: extracted {record_count:,} records...")
             
             self.logger.info(f"✅ {table_name}: extracted {record_count:,} records total")
+            await queue.put(_END_OF_STREAM)
             
             return {
                 "table_name": table_name,
-                "records": records,
                 "record_count": record_count,
-                "start_date": start_date,
-                "end_date": end_date,
-                "extraction_type": extraction_type,
+                "start_date": plan["start_date"],
+                "end_date": plan["end_date"],
+                "extraction_type": plan["extraction_type"],
                 "status": "success"
             }
             
         except Exception as e:
             self.logger.error(f"❌ {table_name}: extraction failed - {e}")
+            await queue.put(_END_OF_STREAM)
             return {
                 "table_name": table_name,
-                "records": [],
-                "record_count": 0,
+                "record_count": record_count,
+                "extraction_type": plan["extraction_type"],
                 "status": "failed",
                 "error": str(e)
             }
     
-    async def load_data(self, extraction_result: Dict[str, Any]) -> Dict[str, Any]:
+    @staticmethod
+    def _batch_checkpoint_value(batch: Any, incremental_column: str) -> Optional[datetime]:
         """
-        Cargar datos extraídos a PostgreSQL
+        Valor máximo de la columna incremental dentro de un lote (RowBatch o dicts)
+
+        Args:
+            batch: Lote publicado por extract_incremental_data()
+            incremental_column: ExtractionConfig.incremental_column
+
+        Returns:
+            Máximo como datetime UTC, o None si el lote no trae la columna
+        """
+        if isinstance(batch, RowBatch):
+            column = incremental_column.lower()
+            index = next((i for i, name in enumerate(batch.columns) if name.lower() == column), None)
+            if index is None:
+                return None
+            values = (row[index] for row in batch.rows)
+        else:
+            values = (record.get(incremental_column) for record in batch)
+
+        return max(
+            (value for value in map(_as_utc_datetime, values) if value is not None),
+            default=None
+        )
+
+    async def load_data(
+        self,
+        table_name: str,
+        queue: asyncio.Queue,
+        checkpoint_start: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Cargar a PostgreSQL los lotes que llegan por la cola, en paralelo a la extracción
         
         Args:
-            extraction_result: Resultado de extract_incremental_data()
+            table_name: Nombre de la tabla a procesar
+            queue: Cola alimentada por extract_incremental_data()
+            checkpoint_start: Rango de checkpoint a avanzar con cada lote (None = sin checkpoints)
             
         Returns:
             Dict con resultado de la carga
         """
-        table_name = extraction_result["table_name"]
-        records = extraction_result["records"]
-        
-        if extraction_result["status"] != "success":
-            return {
-                "table_name": table_name,
-                "status": "skipped",
-                "reason": "extraction_failed",
-                "records_loaded": 0
-            }
-        
-        if not records:
-            self.logger.info(f"ℹ️ {table_name}: no new data to load")
-            return {
-                "table_name": table_name,
-                "status": "no_data",
-                "records_loaded": 0
-            }
-        
+        config = ETLConfig.get_config(table_name)
+        records_inserted = 0
+        records_updated = 0
+
         try:
-            config = ETLConfig.get_config(table_name)
-            target_table = ETLConfig.get_fq_table_name(table_name)
-            
-            # Cargar datos usando UPSERT
-            load_result = await self.loader.upsert_records(
-                table_name=target_table,
-                records=records,
-                primary_key=config.primary_key,
-                batch_size=config.batch_size
+            while True:
+                batch = await queue.get()
+                if batch is _END_OF_STREAM:
+                    break
+
+                checkpoint = None
+                if checkpoint_start is not None:
+                    checkpoint = BatchCheckpoint(
+                        table_name=table_name,
+                        range_start=checkpoint_start,
+                        checkpoint_value=self._batch_checkpoint_value(batch, config.incremental_column),
+                        rows=len(batch)
+                    )
+
+                # El loader elige UPSERT o COPY merge según config.load_strategy.
+                # Cada carga ocupa una conexión del pool: se limita con _postgres_slots
+                async with self._postgres_slots:
+                    if isinstance(batch, RowBatch):
+                        batch_result = await self.loader.load_rows_batch(
+                            table_name=table_name,
+                            table_type=config.table_type,
+                            columns=batch.columns,
+                            rows=batch.rows,
+                            primary_key=config.primary_key,
+                            checkpoint=checkpoint
+                        )
+                    else:
+                        batch_result = await self.loader.load_data_batch(
+                            table_name=table_name,
+                            table_type=config.table_type,
+                            data=batch,
+                            primary_key=config.primary_key,
+                            checkpoint=checkpoint
+                        )
+                if batch_result.status == "failed":
+                    raise RuntimeError(batch_result.error_message)
+
+                records_inserted += batch_result.inserted_records
+                records_updated += batch_result.updated_records
+
+            records_loaded = records_inserted + records_updated
+            if not records_loaded:
+                self.logger.info(f"ℹ️ {table_name}: no new data to load")
+                return {
+                    "table_name": table_name,
+                    "status": "no_data",
+                    "records_loaded": 0
+                }
+
+            self.logger.info(
+                f"✅ {table_name}: loaded {records_loaded:,} records "
+                f"({records_inserted:,} inserted, {records_updated:,} updated)"
             )
-            
-            records_loaded = load_result.get("records_loaded", 0)
-            self.logger.info(f"✅ {table_name}: loaded {records_loaded:,} records")
-            
+
             return {
                 "table_name": table_name,
                 "status": "success",
-                "records_loaded": records_loaded
+                "records_loaded": records_loaded,
+                "records_inserted": records_inserted,
+                "records_updated": records_updated
             }
             
         except Exception as e:
@@ -204,9 +392,215 @@ class SimpleIncrementalPipeline:
                 "table_name": table_name,
                 "status": "failed",
                 "error": str(e),
-                "records_loaded": 0
+                "records_loaded": records_inserted + records_updated
             }
+
+    async def extract_and_load(
+        self,
+        table_name: str,
+        plan: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Ejecutar extracción y carga solapadas con memoria acotada
+
+        El pico de memoria queda en ~PIPELINE_QUEUE_MAX_BATCHES + 2 lotes
+        (cola + lote en extracción + lote en carga), sin importar el rango.
+
+        En tablas incrementales cada lote guarda su checkpoint en la misma
+        transacción: si la corrida se interrumpe, la siguiente reanuda el rango
+        desde el último lote confirmado y omite los rangos ya completados.
+
+        Args:
+            table_name: Nombre de la tabla a procesar
+            plan: Rango/query a extraer; None para planificar desde el watermark
+
+        Returns:
+            Tupla (extraction_result, load_result)
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        if plan is None:
+            plan = await self._plan_extraction(table_name)
+
+        checkpoint_start = None
+        if ETLConfig.get_config(table_name).incremental_column:
+            checkpoint_start = plan["start_date"]
+            resume = await start_checkpoint_range(table_name, plan["start_date"], plan["end_date"])
+
+            if resume["status"] == "completed":
+                self.logger.info(
+                    f"⏭️ {table_name}: range {plan['start_date']} → {plan['end_date']} already loaded"
+                )
+                extraction_result = {
+                    "table_name": table_name,
+                    "record_count": 0,
+                    "start_date": plan["start_date"],
+                    "end_date": plan["end_date"],
+                    "extraction_type": plan["extraction_type"],
+                    "status": "success"
+                }
+                load_result = {
+                    "table_name": table_name,
+                    "status": "success",
+                    "records_loaded": 0,
+                    "already_loaded": resume["rows_loaded"]
+                }
+                return extraction_result, load_result
+
+            if resume["checkpoint_value"]:
+                # Reanudar desde el último lote confirmado del rango
+                plan = {
+                    **plan,
+                    "query": self._build_extraction_query(
+                        table_name, resume["checkpoint_value"], plan["end_date"], inclusive_start=True
+                    )
+                }
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=ETLConfig.PIPELINE_QUEUE_MAX_BATCHES)
+
+        producer = asyncio.create_task(self.extract_incremental_data(table_name, plan, queue))
+        try:
+            load_result = await self.load_data(table_name, queue, checkpoint_start)
+        finally:
+            if not producer.done():
+                # El loader terminó antes (fallo): nadie más consume la cola
+                producer.cancel()
+            try:
+                extraction_result = await producer
+            except asyncio.CancelledError:
+                extraction_result = {
+                    "table_name": table_name,
+                    "record_count": 0,
+                    "extraction_type": plan["extraction_type"],
+                    "status": "cancelled",
+                    "error": "extraction cancelled after load failure"
+                }
+
+        if (checkpoint_start is not None and extraction_result["status"] == "success" and
+                load_result["status"] in ("success", "no_data")):
+            await complete_checkpoint_range(table_name, checkpoint_start)
+
+        return extraction_result, load_result
+
+    async def _prune_checkpoints(self, table_name: str, watermark: datetime) -> None:
+        """Eliminar checkpoints ya cubiertos por el watermark (no bloqueante si falla)"""
+        try:
+            await prune_checkpoints(table_name, watermark)
+        except Exception as e:
+            self.logger.warning(f"⚠️ {table_name}: checkpoint cleanup failed - {e}")
     
+    async def extract_and_load_slices(
+        self,
+        table_name: str,
+        plan: Dict[str, Any],
+        slices: List[Tuple[datetime, datetime]]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], bool]:
+        """
+        Extraer y cargar una ventana grande en tramos concurrentes
+
+        Cada tramo es una query de BigQuery y una carga independientes
+        (hasta config.max_concurrent_slices a la vez). El watermark avanza
+        hasta el final del último tramo del prefijo contiguo ya cargado: si un
+        tramo falla, la siguiente corrida retoma desde ahí y no desde el inicio.
+
+        Args:
+            table_name: Nombre de la tabla a procesar
+            plan: Resultado de _plan_extraction() para la ventana completa
+            slices: Tramos (inicio, fin] de _plan_slices()
+
+        Returns:
+            Tupla (extraction_result, load_result, watermark_updated) agregados
+        """
+        config = ETLConfig.get_config(table_name)
+        slice_slots = asyncio.Semaphore(max(1, config.max_concurrent_slices))
+        watermark_lock = asyncio.Lock()
+        slice_results: List[Optional[Tuple[Dict[str, Any], Dict[str, Any]]]] = [None] * len(slices)
+        committed = [False] * len(slices)
+        committed_prefix = 0
+        watermark_updated = False
+
+        self.logger.info(
+            f"🧩 {table_name}: {len(slices)} slices ({config.slice_interval.value}) "
+            f"from {slices[0][0]} to {slices[-1][1]}"
+        )
+
+        async def run_slice(index: int, slice_start: datetime, slice_end: datetime) -> None:
+            nonlocal committed_prefix, watermark_updated
+
+            async with slice_slots:
+                slice_plan = {
+                    **plan,
+                    "query": self._build_extraction_query(table_name, slice_start, slice_end),
+                    "start_date": slice_start,
+                    "end_date": slice_end
+                }
+                extraction_result, load_result = await self.extract_and_load(table_name, slice_plan)
+
+            slice_results[index] = (extraction_result, load_result)
+            if not (extraction_result["status"] == "success" and
+                    load_result["status"] in ("success", "no_data")):
+                self.logger.warning(f"⚠️ {table_name}: slice {slice_start} → {slice_end} failed")
+                return
+            committed[index] = True
+
+            # Checkpoint por tramo: avanzar sobre el prefijo contiguo ya cargado
+            async with watermark_lock:
+                new_prefix = committed_prefix
+                while new_prefix < len(slices) and committed[new_prefix]:
+                    new_prefix += 1
+                if new_prefix == committed_prefix:
+                    return
+
+                advance_to = slices[new_prefix - 1][1]
+                last_slice_empty = slice_results[-1] and slice_results[-1][1]["records_loaded"] == 0
+                if new_prefix == len(slices) and last_slice_empty:
+                    # Igual que sin tramos: un tramo final vacío no mueve el watermark
+                    advance_to = slices[-1][0]
+
+                if advance_to > plan["start_date"]:
+                    try:
+                        await update_watermark(table_name, advance_to)
+                        watermark_updated = True
+                    except Exception as e:
+                        self.logger.error(f"❌ {table_name}: slice watermark update failed - {e}")
+                        return
+                    await self._prune_checkpoints(table_name, advance_to)
+                committed_prefix = new_prefix
+
+        await asyncio.gather(*(
+            run_slice(i, slice_start, slice_end) for i, (slice_start, slice_end) in enumerate(slices)
+        ))
+
+        finished = [result for result in slice_results if result is not None]
+        failed_slices = len(slices) - sum(committed)
+        errors = [
+            result.get("error") for pair in finished for result in pair if result.get("error")
+        ]
+        records_loaded = sum(load.get("records_loaded", 0) for _, load in finished)
+
+        extraction_result = {
+            "table_name": table_name,
+            "record_count": sum(extraction.get("record_count", 0) for extraction, _ in finished),
+            "start_date": plan["start_date"],
+            "end_date": plan["end_date"],
+            "extraction_type": plan["extraction_type"],
+            "slices": len(slices),
+            "failed_slices": failed_slices,
+            "status": "success" if not failed_slices else "failed"
+        }
+        load_result = {
+            "table_name": table_name,
+            "status": "failed" if failed_slices else ("success" if records_loaded else "no_data"),
+            "records_loaded": records_loaded,
+            "records_inserted": sum(load.get("records_inserted", 0) for _, load in finished),
+            "records_updated": sum(load.get("records_updated", 0) for _, load in finished)
+        }
+        if errors:
+            extraction_result["error"] = "; ".join(errors)
+
+        return extraction_result, load_result, watermark_updated
+
     async def update_watermark_after_success(
         self, 
         extraction_result: Dict[str, Any], 
@@ -232,11 +626,12 @@ class SimpleIncrementalPipeline:
             try:
                 await update_watermark(table_name, extraction_result["end_date"])
                 self.logger.debug(f"✅ {table_name}: watermark updated")
-                return True
-                
             except Exception as e:
                 self.logger.error(f"❌ {table_name}: watermark update failed - {e}")
                 return False
+
+            await self._prune_checkpoints(table_name, extraction_result["end_date"])
+            return True
         else:
             self.logger.debug(f"⏭️ {table_name}: watermark not updated (no successful load)")
             return False
@@ -256,16 +651,30 @@ class SimpleIncrementalPipeline:
         try:
             self.logger.info(f"🚀 Processing table: {table_name}")
             
-            # 1. Extract
-            extraction_result = await self.extract_incremental_data(table_name)
-            
-            # 2. Load
-            load_result = await self.load_data(extraction_result)
-            
-            # 3. Update watermark (solo si todo fue exitoso)
-            watermark_updated = await self.update_watermark_after_success(
-                extraction_result, load_result
+            if not self._initialized:
+                await self.initialize()
+
+            config = ETLConfig.get_config(table_name)
+            plan = await self._plan_extraction(table_name)
+            slices = self._plan_slices(
+                plan["start_date"],
+                plan["end_date"],
+                config.slice_interval if config.incremental_column else None
             )
+
+            if len(slices) > 1:
+                # 1 + 2 + 3. Tramos concurrentes con watermark por tramo
+                extraction_result, load_result, watermark_updated = await self.extract_and_load_slices(
+                    table_name, plan, slices
+                )
+            else:
+                # 1 + 2. Extract y Load solapados (cola acotada con back-pressure)
+                extraction_result, load_result = await self.extract_and_load(table_name, plan)
+
+                # 3. Update watermark (solo si todo el rango fue cargado)
+                watermark_updated = await self.update_watermark_after_success(
+                    extraction_result, load_result
+                )
             
             duration = (datetime.now() - start_time).total_seconds()
             
@@ -281,8 +690,11 @@ class SimpleIncrementalPipeline:
                 "status": overall_status,
                 "records_extracted": extraction_result["record_count"],
                 "records_loaded": load_result.get("records_loaded", 0),
+                "records_inserted": load_result.get("records_inserted", 0),
+                "records_updated": load_result.get("records_updated", 0),
                 "watermark_updated": watermark_updated,
                 "extraction_type": extraction_result.get("extraction_type", "unknown"),
+                "slices": extraction_result.get("slices", 1),
                 "duration_seconds": duration
             }
             
@@ -314,12 +726,46 @@ class SimpleIncrementalPipeline:
                 "watermark_updated": False
             }
     
-    async def process_tables(self, table_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    @staticmethod
+    def _check_acyclic(dependencies: Dict[str, List[str]]) -> None:
+        """
+        Validar que las dependencias no formen ciclos
+
+        Raises:
+            ValueError: Si hay un ciclo de dependencias
         """
-        Procesar múltiples tablas
+        visiting, visited = set(), set()
+
+        def visit(table_name: str, path: List[str]) -> None:
+            if table_name in visited:
+                return
+            if table_name in visiting:
+                raise ValueError(f"Dependency cycle: {' -> '.join(path + [table_name])}")
+            visiting.add(table_name)
+            for dep in dependencies[table_name]:
+                visit(dep, path + [table_name])
+            visiting.discard(table_name)
+            visited.add(table_name)
+
+        for table_name in dependencies:
+            visit(table_name, [])
+
+    async def process_tables(
+        self,
+        table_names: Optional[List[str]] = None,
+        max_workers: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Procesar múltiples tablas en paralelo respetando dependencias
+
+        Cada tabla arranca cuando terminan sus depends_on (dentro de la misma
+        ejecución) y hay un worker libre. Si una dependencia falla, la tabla
+        se marca como "skipped" para no cargar datos huérfanos.
         
         Args:
             table_names: Lista de tablas a procesar, None para todas las configuradas
+            max_workers: Tablas simultáneas (default DEFAULT_PARALLEL_WORKERS,
+                máximo MAX_PARALLEL_WORKERS)
             
         Returns:
             Dict con resultados de todas las tablas
@@ -329,31 +775,69 @@ class SimpleIncrementalPipeline:
             
         # Usar todas las tablas configuradas si no se especifica
         tables_to_process = table_names or ETLConfig.get_raw_source_tables()
+        workers = max(1, min(max_workers or ETLConfig.DEFAULT_PARALLEL_WORKERS, ETLConfig.MAX_PARALLEL_WORKERS))
+
+        dependencies = ETLConfig.get_table_dependencies(tables_to_process)
+        self._check_acyclic(dependencies)
         
         total_start = datetime.now()
         
         self.logger.info("="*80)
         self.logger.info("🚀 SIMPLE INCREMENTAL PIPELINE")
         self.logger.info("="*80)
-        self.logger.info(f"📊 Tables to process: {len(tables_to_process)}")
+        self.logger.info(f"📊 Tables to process: {len(tables_to_process)} (workers: {workers})")
         self.logger.info(f"📋 Tables: {', '.join(tables_to_process)}")
         
-        results = []
-        successful_tables = 0
-        total_extracted = 0
-        total_loaded = 0
-        
-        # Procesar cada tabla
-        for i, table_name in enumerate(tables_to_process, 1):
-            self.logger.info(f"\n📋 [{i}/{len(tables_to_process)}] Processing: {table_name}")
-            
-            result = await self.process_table(table_name)
-            results.append(result)
-            
-            if result["status"] == "success":
-                successful_tables += 1
-                total_extracted += result["records_extracted"]
-                total_loaded += result["records_loaded"]
+        worker_slots = asyncio.Semaphore(workers)
+        finished = {table_name: asyncio.Event() for table_name in tables_to_process}
+        results_by_table: Dict[str, Dict[str, Any]] = {}
+
+        async def run_table(position: int, table_name: str) -> None:
+            try:
+                for dep in dependencies[table_name]:
+                    await finished[dep].wait()
+
+                failed_deps = [
+                    dep for dep in dependencies[table_name]
+                    if results_by_table[dep]["status"] != "success"
+                ]
+                if failed_deps:
+                    self.logger.warning(f"⏭️ {table_name}: skipped, dependencies failed: {', '.join(failed_deps)}")
+                    results_by_table[table_name] = {
+                        "table_name": table_name,
+                        "status": "skipped",
+                        "error": f"dependencies failed: {', '.join(failed_deps)}",
+                        "records_extracted": 0,
+                        "records_loaded": 0,
+                        "watermark_updated": False
+                    }
+                else:
+                    async with worker_slots:
+                        self.logger.info(f"📋 [{position}/{len(tables_to_process)}] Processing: {table_name}")
+                        results_by_table[table_name] = await self.process_table(table_name)
+            finally:
+                # Nunca dejar a los dependientes esperando
+                results_by_table.setdefault(table_name, {
+                    "table_name": table_name,
+                    "status": "failed",
+                    "error": "scheduler error",
+                    "records_extracted": 0,
+                    "records_loaded": 0,
+                    "watermark_updated": False
+                })
+                finished[table_name].set()
+
+        await asyncio.gather(*(
+            run_table(i, table_name) for i, table_name in enumerate(tables_to_process, 1)
+        ))
+
+        # Resultados en el orden solicitado
+        results = [results_by_table[table_name] for table_name in tables_to_process]
+        successful = [r for r in results if r["status"] == "success"]
+        successful_tables = len(successful)
+        skipped_tables = sum(1 for r in results if r["status"] == "skipped")
+        total_extracted = sum(r["records_extracted"] for r in successful)
+        total_loaded = sum(r["records_loaded"] for r in successful)
         
         total_duration = (datetime.now() - total_start).total_seconds()
         
@@ -362,13 +846,14 @@ class SimpleIncrementalPipeline:
         self.logger.info("📊 PIPELINE EXECUTION RESULTS")
         self.logger.info("="*80)
         self.logger.info(f"✅ Successful tables: {successful_tables}/{len(tables_to_process)}")
-        self.logger.info(f"❌ Failed tables: {len(tables_to_process) - successful_tables}")
+        self.logger.info(f"❌ Failed tables: {len(tables_to_process) - successful_tables - skipped_tables}")
+        self.logger.info(f"⏭️ Skipped tables: {skipped_tables}")
         self.logger.info(f"📊 Total extracted: {total_extracted:,}")
         self.logger.info(f"📊 Total loaded: {total_loaded:,}")
         self.logger.info(f"⏱️ Total duration: {total_duration:.2f}s")
         
         # Mostrar tablas fallidas si las hay
-        failed_tables = [r for r in results if r["status"] == "failed"]
+        failed_tables = [r for r in results if r["status"] in ("failed", "skipped")]
         if failed_tables:
             self.logger.error("❌ Failed tables:")
             for result in failed_tables:
@@ -378,9 +863,11 @@ class SimpleIncrementalPipeline:
         return {
             "status": "success" if successful_tables == len(tables_to_process) else "partial",
             "successful_tables": successful_tables,
+            "skipped_tables": skipped_tables,
             "total_tables": len(tables_to_process),
             "total_extracted": total_extracted,
             "total_loaded": total_loaded,
+            "workers": workers,
             "duration_seconds": total_duration,
             "table_results": results
         }
@@ -391,5 +878,7 @@ class SimpleIncrementalPipeline:
         """
         if self.loader and hasattr(self.loader, 'cleanup'):
             await self.loader.cleanup()
+
+        await self.extractor.close()
         
         self.logger.info("🧹 Pipeline resources cleaned up")
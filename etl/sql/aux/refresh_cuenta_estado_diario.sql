@@ -0,0 +1,124 @@
+-- =====================================================
+-- UPSERT INCREMENTAL: cuenta_estado_diario
+-- Misma lógica que build_cuenta_estado_diario.sql, pero solo para las
+-- particiones (campaña, día) indicadas en lugar de todo el calendario.
+-- Parameters:
+-- {raw_schema}, {aux_schema}
+-- $1: archivos de campaña tal como están en calendario (TEXT[])
+-- $2: fecha_proceso de cada partición, alineada con $1 (DATE[])
+-- =====================================================
+
+WITH particiones AS (
+    SELECT DISTINCT archivo, fecha
+    FROM unnest($1::text[], $2::date[]) AS p(archivo, fecha)
+),
+
+     fechas_campana AS (
+         -- Solo los días pedidos que caen dentro de la ventana de la campaña
+         SELECT c.archivo,
+                c.fecha_apertura,
+                c.fecha_cierre,
+                p.fecha AS fecha_proceso
+         FROM particiones p
+                  INNER JOIN {raw_schema}.calendario c
+                             ON c.archivo = p.archivo
+                                 AND p.fecha BETWEEN c.fecha_apertura AND COALESCE(c.fecha_cierre, CURRENT_DATE)),
+
+     cuentas_por_fecha AS (
+         -- Combinar cada cuenta con cada fecha de su campaña
+         SELECT fc.fecha_proceso,
+                a.archivo AS                                                    archivo_campana,
+                a.cod_luna,
+                a.cuenta,
+                a.fecha_asignacion,
+                a.min_vto,
+                CASE UPPER(a.negocio) WHEN 'MOVIL' THEN 'MOVIL' ELSE 'FIJA' END servicio
+         FROM {raw_schema}.asignaciones a
+                  INNER JOIN fechas_campana fc
+                             ON a.archivo = CONCAT(fc.archivo, '.txt')
+                                 AND fc.fecha_proceso >= a.fecha_asignacion -- Solo desde que se asignó
+     ),
+
+     estado_cuentas_dia AS (SELECT cpf.fecha_proceso,
+                                   cpf.archivo_campana,
+                                   cpf.cod_luna,
+                                   cpf.cuenta,
+                                   cpf.fecha_asignacion,
+                                   cpf.servicio,
+
+                                   -- Datos de trandeuda del día (puede ser NULL)
+                                   COALESCE(t.monto_exigible, 0)       AS monto_exigible,
+                                   cpf.min_vto,
+
+                                   -- Lógica de gestionabilidad
+                                   CASE
+                                       WHEN t.cod_cuenta IS NULL THEN 'No está en trandeuda'
+                                       WHEN t.monto_exigible < 1 THEN 'Deuda menor a 1 sol'
+                                       ELSE 'Gestionable' -- Es gestionable
+                                       END                             AS motivo_no_gestionable,
+
+                                   -- Cálculo de saldo actual (deuda - pagos hasta la fecha)
+                                   COALESCE(t.monto_exigible, 0) -
+                                   COALESCE(SUM(p.monto_cancelado), 0) AS monto_saldo_actual,
+
+                                   -- Estado de deuda
+                                   CASE
+                                       WHEN t.cod_cuenta IS NULL THEN 'SIN_TRANDEUDA'
+                                       WHEN t.monto_exigible < 1 THEN 'DEUDA_MINIMA'
+                                       WHEN t.monto_exigible >= 1 THEN 'CON_DEUDA'
+                                       END                             AS estado_deuda
+
+                            FROM cuentas_por_fecha cpf
+                                     LEFT JOIN {raw_schema}.trandeuda t
+                                               ON cpf.cuenta = t.cod_cuenta
+                                                   AND t.fecha_proceso = cpf.fecha_proceso
+                                     LEFT JOIN {aux_schema}.pago_deduplication p
+                                               ON cpf.cuenta = p.cuenta
+                                                   AND cpf.archivo_campana = p.archivo_campana
+                                                   AND p.fecha_pago <= cpf.fecha_proceso
+                                                   AND p.es_pago_valido = TRUE
+
+                            GROUP BY cpf.fecha_proceso, cpf.archivo_campana, cpf.cod_luna, cpf.cuenta,
+                                     cpf.fecha_asignacion, cpf.servicio, cpf.min_vto,
+                                     t.cod_cuenta, t.monto_exigible)
+
+-- UPSERT simplificado - Eliminando duplicados
+INSERT
+INTO {aux_schema}.cuenta_estado_diario (fecha_proceso,
+                                        archivo_campana,
+                                        cod_luna,
+                                        cuenta,
+                                        fecha_asignacion,
+                                        monto_exigible,
+                                        servicio,
+                                        fecha_vencimiento,
+                                        motivo_no_gestionable,
+                                        monto_saldo_actual,
+                                        estado_deuda,
+                                        created_at,
+                                        updated_at)
+SELECT DISTINCT ON (fecha_proceso, archivo_campana, cod_luna, cuenta) fecha_proceso,
+                                                                      archivo_campana,
+                                                                      cod_luna,
+                                                                      cuenta,
+                                                                      fecha_asignacion,
+                                                                      monto_exigible,
+                                                                      servicio,
+                                                                      min_vto,
+                                                                      motivo_no_gestionable,
+                                                                      monto_saldo_actual,
+                                                                      estado_deuda,
+                                                                      NOW(),
+                                                                      NOW()
+FROM estado_cuentas_dia
+ORDER BY fecha_proceso, archivo_campana, cod_luna, cuenta, monto_exigible
+    DESC -- Prioriza el mayor monto si hay duplicados
+
+-- Si existe, actualizar
+ON CONFLICT (fecha_proceso, archivo_campana, cod_luna, cuenta, servicio)
+    DO UPDATE SET monto_exigible        = EXCLUDED.monto_exigible,
+                  fecha_vencimiento     = EXCLUDED.fecha_vencimiento,
+                  motivo_no_gestionable = EXCLUDED.motivo_no_gestionable,
+                  monto_saldo_actual    = EXCLUDED.monto_saldo_actual,
+                  estado_deuda          = EXCLUDED.estado_deuda,
+                  updated_at            = NOW();
@@ -0,0 +1,47 @@
+-- Rebuilds gestion_cuenta_impact for the given (campaign, day) partitions.
+-- One row per gestion of gestiones_unificadas with the account debt of that day
+-- (cuenta_estado_diario), read by build_dashboard_data.sql.
+-- Parameters:
+-- {aux_schema}
+-- $1: campaign archivos as stored in calendario (TEXT[])
+-- $2: fecha_gestion of each partition, aligned with $1 (DATE[])
+
+DELETE FROM {aux_schema}.gestion_cuenta_impact gci
+USING unnest($1::text[], $2::date[]) AS p(archivo, fecha)
+WHERE gci.archivo = CONCAT(p.archivo, '.txt')
+  AND gci.timestamp_gestion >= p.fecha
+  AND gci.timestamp_gestion < p.fecha + 1;
+
+INSERT INTO {aux_schema}.gestion_cuenta_impact (
+    archivo, cod_luna, timestamp_gestion, cuenta, canal_origen,
+    contactabilidad, es_contacto_efectivo, es_compromiso, peso_gestion,
+    monto_deuda_momento, es_cuenta_con_deuda
+)
+WITH particiones AS (
+    SELECT DISTINCT CONCAT(archivo, '.txt') AS archivo_campana, fecha
+    FROM unnest($1::text[], $2::date[]) AS p(archivo, fecha)
+)
+SELECT
+    gu.archivo_campana,
+    gu.cod_luna,
+    gu.timestamp_gestion,
+    gu.cuenta,
+    gu.canal_origen,
+    gu.contactabilidad,
+    COALESCE(gu.es_contacto_efectivo, FALSE),
+    COALESCE(gu.es_compromiso, FALSE),
+    COALESCE(gu.peso, 0),
+    COALESCE(ced.monto_saldo_actual, 0),
+    COALESCE(ced.monto_saldo_actual, 0) > 0
+FROM particiones p
+INNER JOIN {aux_schema}.gestiones_unificadas gu
+    ON gu.archivo_campana = p.archivo_campana
+    AND gu.fecha_gestion = p.fecha
+LEFT JOIN {aux_schema}.cuenta_estado_diario ced
+    ON ced.archivo_campana = gu.archivo_campana
+    AND ced.cuenta = gu.cuenta
+    AND ced.cod_luna = gu.cod_luna
+    AND ced.fecha_proceso = gu.fecha_gestion
+
+ON CONFLICT (archivo, cod_luna, timestamp_gestion, cuenta)
+DO NOTHING;
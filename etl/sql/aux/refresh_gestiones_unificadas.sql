@@ -0,0 +1,110 @@
+-- Rebuilds gestiones_unificadas only for the given (campaign, day) partitions.
+-- Same logic as build_gestiones_unificadas.sql, restricted to the partitions.
+-- Parameters:
+-- {raw_schema}, {aux_schema}
+-- $1: campaign archivos as stored in calendario (TEXT[])
+-- $2: fecha_gestion of each partition, aligned with $1 (DATE[])
+
+DELETE FROM {aux_schema}.gestiones_unificadas gu
+USING unnest($1::text[], $2::date[]) AS p(archivo, fecha)
+WHERE gu.archivo_campana = CONCAT(p.archivo, '.txt')
+  AND gu.fecha_gestion = p.fecha;
+
+INSERT INTO {aux_schema}.gestiones_unificadas (
+    gestion_uid, cod_luna, cuenta, timestamp_gestion, fecha_gestion,
+    canal_origen, nombre_agente, documento_agente,
+    nivel_1, nivel_2, nivel_3, contactabilidad,
+    es_contacto_efectivo, es_compromiso, monto_compromiso,
+    fecha_compromiso, archivo_campana, peso
+)
+WITH particiones AS (
+    SELECT DISTINCT archivo, fecha
+    FROM unnest($1::text[], $2::date[]) AS p(archivo, fecha)
+)
+-- Voicebot Gestiones
+SELECT DISTINCT
+    g.uid,
+    a.cod_luna,
+    a.cuenta,
+    g."date",
+    DATE(g."date"),
+    'BOT',
+    'VOICEBOT',
+    '999',
+    h.n1_homologado,
+    h.n2_homologado,
+    h.n3_homologado,
+    COALESCE(h.contactabilidad_homologada, 'Sin Homologar'),
+    (h.contactabilidad_homologada = 'Contacto Efectivo'),
+    COALESCE(h.es_pdp_homologado, FALSE),
+    CASE
+        WHEN h.es_pdp_homologado THEN td.monto_exigible
+        ELSE 0
+    END,
+    g.fecha_compromiso,
+    a.archivo,
+    h.peso_homologado
+FROM particiones p
+INNER JOIN {raw_schema}.calendario c
+    ON c.archivo = p.archivo
+INNER JOIN {raw_schema}.asignaciones a
+    ON a.archivo = CONCAT(c.archivo, '.txt')
+INNER JOIN {raw_schema}.voicebot_gestiones g
+    ON g.document = a.cod_luna
+    AND g."date" >= p.fecha AND g."date" < p.fecha + 1
+    AND g."date" BETWEEN c.fecha_apertura
+    AND COALESCE(c.fecha_cierre, (CURRENT_DATE AT TIME ZONE 'America/Lima'))
+LEFT JOIN {raw_schema}.trandeuda td
+    ON td.cod_cuenta = a.cuenta
+    AND DATE(td.creado_el) > DATE(c.fecha_trandeuda)
+    AND DATE(g."date") = c.fecha_trandeuda
+LEFT JOIN {raw_schema}.homologacion_voicebot h
+    ON g.management = h.bot_management
+    AND COALESCE(g.compromiso, '') = h.bot_compromiso
+
+UNION ALL
+
+-- MibotAir Gestiones
+SELECT DISTINCT
+    g.uid,
+    a.cod_luna,
+    a.cuenta,
+    g."date",
+    DATE(g."date"),
+    'CALL',
+    e.nombre,
+    e.document,
+    h.n_1,
+    h.n_2,
+    h.n_3,
+    COALESCE(h.contactabilidad, 'Sin Homologar'),
+    (h.contactabilidad = 'Contacto Efectivo'),
+    (UPPER(h.pdp) = 'SI'),
+    CASE
+        WHEN UPPER(h.pdp) = 'SI' THEN td.monto_exigible
+        ELSE 0
+    END,
+    g.fecha_compromiso,
+    a.archivo,
+    h.peso
+FROM particiones p
+INNER JOIN {raw_schema}.calendario c
+    ON c.archivo = p.archivo
+INNER JOIN {raw_schema}.asignaciones a
+    ON a.archivo = CONCAT(c.archivo, '.txt')
+INNER JOIN {raw_schema}.mibotair_gestiones g
+    ON g.document = a.cod_luna
+    AND g."date" >= p.fecha AND g."date" < p.fecha + 1
+    AND g."date" BETWEEN c.fecha_apertura
+    AND COALESCE(c.fecha_cierre, (CURRENT_DATE AT TIME ZONE 'America/Lima'))
+LEFT JOIN {raw_schema}.trandeuda td
+    ON td.cod_cuenta = a.cuenta
+    AND DATE(td.creado_el) > DATE(c.fecha_trandeuda)
+    AND DATE(g."date") = c.fecha_trandeuda
+LEFT JOIN {raw_schema}.homologacion_mibotair h
+    ON g.n1 = h.n_1 AND g.n2 = h.n_2 AND g.n3 = h.n_3
+LEFT JOIN {raw_schema}.ejecutivos e
+    ON e.correo_name = g.correo_agente
+
+ON CONFLICT (gestion_uid, timestamp_gestion, cuenta)
+DO NOTHING;
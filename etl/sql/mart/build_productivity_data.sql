@@ -0,0 +1,102 @@
+-- Builds the productivity rollups for a specific day and campaign:
+-- productivity_data (agent × day) and productivity_hourly (agent × hour).
+-- Only human gestiones (canal CALL); the agent is identified by the e-mail of mibotair_gestiones.
+-- A gestion has one gestiones_unificadas row per account: counts are of distinct gestiones,
+-- monto_compromiso is summed over the accounts.
+-- Parameters:
+-- {mart_schema}, {raw_schema}, {aux_schema}
+-- $1: campaign_archivo as stored in aux (TEXT, e.g. 'CAMPANA.txt')
+-- $2: fecha_proceso (DATE)
+
+DELETE FROM {mart_schema}.productivity_data WHERE archivo = $1 AND fecha_foto = $2;
+
+INSERT INTO {mart_schema}.productivity_data (
+    fecha_foto, correo_agente, archivo, total_gestiones, contactos_efectivos, total_pdp,
+    peso_total, monto_compromiso, tasa_contacto, tasa_conversion, nombre_agente, dni_agente
+)
+WITH gestiones AS (
+    SELECT
+        g.correo_agente,
+        gu.gestion_uid,
+        gu.nombre_agente,
+        gu.documento_agente,
+        COALESCE(gu.es_contacto_efectivo, FALSE) AS es_contacto_efectivo,
+        COALESCE(gu.es_compromiso, FALSE) AS es_compromiso,
+        COALESCE(gu.peso, 0) AS peso,
+        COALESCE(gu.monto_compromiso, 0) AS monto_compromiso
+    FROM {aux_schema}.gestiones_unificadas gu
+    INNER JOIN {raw_schema}.mibotair_gestiones g
+        ON g.uid = gu.gestion_uid
+    WHERE gu.archivo_campana = $1
+      AND gu.fecha_gestion = $2
+      AND gu.canal_origen = 'CALL'
+      AND g.correo_agente IS NOT NULL
+      AND g.correo_agente <> ''
+),
+por_gestion AS (
+    -- One row per gestion (peso and flags are the same on every account)
+    SELECT
+        correo_agente,
+        gestion_uid,
+        MAX(nombre_agente) AS nombre_agente,
+        MAX(documento_agente) AS documento_agente,
+        bool_or(es_contacto_efectivo) AS es_contacto_efectivo,
+        bool_or(es_compromiso) AS es_compromiso,
+        MAX(peso) AS peso,
+        SUM(monto_compromiso) AS monto_compromiso
+    FROM gestiones
+    GROUP BY correo_agente, gestion_uid
+)
+SELECT
+    $2,
+    correo_agente,
+    $1,
+    COUNT(*) AS total_gestiones,
+    COUNT(*) FILTER (WHERE es_contacto_efectivo) AS contactos_efectivos,
+    COUNT(*) FILTER (WHERE es_compromiso) AS total_pdp,
+    SUM(peso) AS peso_total,
+    SUM(monto_compromiso) AS monto_compromiso,
+    ROUND(COUNT(*) FILTER (WHERE es_contacto_efectivo) * 100.0 / COUNT(*), 2) AS tasa_contacto,
+    COALESCE(ROUND(
+        COUNT(*) FILTER (WHERE es_compromiso) * 100.0
+        / NULLIF(COUNT(*) FILTER (WHERE es_contacto_efectivo), 0), 2
+    ), 0) AS tasa_conversion,
+    MAX(nombre_agente),
+    MAX(documento_agente)
+FROM por_gestion
+GROUP BY correo_agente;
+
+DELETE FROM {mart_schema}.productivity_hourly WHERE archivo = $1 AND fecha_foto = $2;
+
+INSERT INTO {mart_schema}.productivity_hourly (
+    fecha_foto, hora, correo_agente, archivo, total_gestiones, contactos_efectivos, total_pdp, monto_compromiso
+)
+WITH por_gestion AS (
+    SELECT
+        g.correo_agente,
+        gu.gestion_uid,
+        EXTRACT(HOUR FROM gu.timestamp_gestion)::smallint AS hora,
+        bool_or(COALESCE(gu.es_contacto_efectivo, FALSE)) AS es_contacto_efectivo,
+        bool_or(COALESCE(gu.es_compromiso, FALSE)) AS es_compromiso,
+        SUM(COALESCE(gu.monto_compromiso, 0)) AS monto_compromiso
+    FROM {aux_schema}.gestiones_unificadas gu
+    INNER JOIN {raw_schema}.mibotair_gestiones g
+        ON g.uid = gu.gestion_uid
+    WHERE gu.archivo_campana = $1
+      AND gu.fecha_gestion = $2
+      AND gu.canal_origen = 'CALL'
+      AND g.correo_agente IS NOT NULL
+      AND g.correo_agente <> ''
+    GROUP BY g.correo_agente, gu.gestion_uid, EXTRACT(HOUR FROM gu.timestamp_gestion)
+)
+SELECT
+    $2,
+    hora,
+    correo_agente,
+    $1,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE es_contacto_efectivo),
+    COUNT(*) FILTER (WHERE es_compromiso),
+    SUM(monto_compromiso)
+FROM por_gestion
+GROUP BY hora, correo_agente;
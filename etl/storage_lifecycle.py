@@ -0,0 +1,178 @@
+"""
+🗜️ Storage Lifecycle - Compresión y retención de las hypertables RAW
+
+asignaciones, trandeuda y pagos crecen sin límite (trandeuda guarda una foto
+de deuda por día). La compresión nativa se habilita en la migración 023
+(segment by archivo) y el ETL administra el ciclo de vida, sin políticas en
+segundo plano que compitan con las cargas:
+
+- Compresión: chunks cuyo rango completo es más antiguo que
+  compress_after_days de la tabla, un chunk por transacción
+- Retención: una campaña cerrada hace más de RAW_RETENTION_DAYS_AFTER_CLOSE
+  días queda retirada (el rebuild ya no la reconstruye) y se eliminan los
+  chunks anteriores a la apertura de la campaña activa más antigua
+  (menos RAW_RETENTION_MARGIN_DAYS). drop_chunks no reescribe filas.
+- Backfills: antes de escribir un lote, el loader descomprime los chunks
+  comprimidos que cubren sus fechas (decompress_for_batch); la próxima
+  corrida del ciclo de vida los vuelve a comprimir
+
+Autor: Ricky para Pulso-Back
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from etl.change_tracking import collect_changed_partitions
+from etl.config import ETLConfig, StorageLifecycleConfig
+from shared.core.logging import LoggerMixin
+from shared.database.connection import get_database_manager, DatabaseManager
+
+# Chunks de una hypertable (por regclass, sin depender de mayúsculas del esquema)
+_CHUNKS_SQL = """
+    SELECT format('%I.%I', ch.chunk_schema, ch.chunk_name) AS chunk
+    FROM timescaledb_information.chunks ch
+    JOIN pg_class c ON c.relname = ch.hypertable_name
+    JOIN pg_namespace n ON n.oid = c.relnamespace AND n.nspname = ch.hypertable_schema
+    WHERE c.oid = $1::regclass
+"""
+
+
+async def decompress_for_batch(
+    conn,
+    table_name: str,
+    columns: Sequence[str],
+    rows: Sequence[Sequence[Any]]
+) -> None:
+    """
+    Descomprimir los chunks comprimidos que cubren las fechas de un lote
+
+    Se ejecuta en la transacción del lote (un solo round trip): si la carga
+    falla, los chunks quedan comprimidos como estaban. Sin fechas
+    reconocibles no descomprime nada.
+    """
+    lifecycle = ETLConfig.get_storage_lifecycle(table_name)
+    if lifecycle is None or not rows:
+        return
+
+    days = {day for _, day in collect_changed_partitions(columns, rows, None, lifecycle.time_column) if day}
+    if not days:
+        return
+
+    await conn.execute(
+        f"""
+        SELECT decompress_chunk(chunk::regclass, if_compressed => true)
+        FROM ({_CHUNKS_SQL}
+              AND ch.is_compressed
+              AND ch.range_start <= $2::date
+              AND ch.range_end > $3::date) chunks
+        """,
+        ETLConfig.get_fq_table_name(table_name),
+        max(days),
+        min(days)
+    )
+
+
+class StorageLifecycleManager(LoggerMixin):
+    """
+    Compresión de chunks antiguos y retención de campañas retiradas
+    """
+
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        super().__init__()
+        self.db_manager = db_manager
+
+    async def _get_db_manager(self) -> DatabaseManager:
+        if self.db_manager is None:
+            self.db_manager = await get_database_manager()
+        return self.db_manager
+
+    async def retention_cutoff(self, conn, today: date) -> Optional[date]:
+        """
+        Fecha antes de la cual el RAW solo tiene datos de campañas retiradas
+
+        None si no hay campañas activas (no se elimina nada).
+        """
+        oldest_apertura = await conn.fetchval(
+            f"""
+            SELECT MIN(fecha_apertura)
+            FROM (
+                SELECT MIN(fecha_apertura) AS fecha_apertura,
+                       CASE WHEN bool_or(fecha_cierre IS NULL) THEN NULL ELSE MAX(fecha_cierre) END AS fecha_cierre
+                FROM raw_{ETLConfig.PROJECT_UID}.calendario
+                GROUP BY archivo
+            ) campanas
+            WHERE fecha_cierre IS NULL OR fecha_cierre >= $1::date
+            """,
+            today - timedelta(days=ETLConfig.RAW_RETENTION_DAYS_AFTER_CLOSE)
+        )
+        if oldest_apertura is None:
+            return None
+        return oldest_apertura - timedelta(days=ETLConfig.RAW_RETENTION_MARGIN_DAYS)
+
+    async def drop_retired_chunks(self, conn, lifecycle: StorageLifecycleConfig, cutoff: date) -> int:
+        """Eliminar los chunks completamente anteriores a cutoff"""
+        dropped = await conn.fetch(
+            "SELECT drop_chunks($1::regclass, older_than => $2::date) AS chunk",
+            ETLConfig.get_fq_table_name(lifecycle.table_name),
+            cutoff
+        )
+        return len(dropped)
+
+    async def compress_old_chunks(self, conn, lifecycle: StorageLifecycleConfig, today: date) -> int:
+        """Comprimir los chunks sin comprimir cuyo rango termina antes de compress_after_days"""
+        chunks = await conn.fetch(
+            f"""
+            {_CHUNKS_SQL}
+              AND NOT ch.is_compressed
+              AND ch.range_end <= $2::date
+            ORDER BY ch.range_start
+            """,
+            ETLConfig.get_fq_table_name(lifecycle.table_name),
+            today - timedelta(days=lifecycle.compress_after_days)
+        )
+        for row in chunks:
+            # Un chunk por transacción: el bloqueo de cada uno dura lo mínimo
+            await conn.execute("SELECT compress_chunk($1::regclass, if_not_compressed => true)", row["chunk"])
+        return len(chunks)
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Aplicar retención y compresión a cada tabla de STORAGE_LIFECYCLE_TABLES
+
+        Primero la retención (no se comprimen chunks que se van a eliminar).
+        Un error en una tabla no detiene las demás.
+
+        Returns:
+            Dict con chunks eliminados/comprimidos por tabla
+        """
+        db = await self._get_db_manager()
+        pool = await db.get_pool()
+        results: List[Dict[str, Any]] = []
+
+        async with pool.acquire() as conn:
+            today = await conn.fetchval("SELECT CURRENT_DATE")
+            cutoff = await self.retention_cutoff(conn, today)
+
+            for lifecycle in ETLConfig.STORAGE_LIFECYCLE_TABLES:
+                result = {"table_name": lifecycle.table_name, "dropped_chunks": 0, "compressed_chunks": 0}
+                try:
+                    if lifecycle.retention and cutoff is not None:
+                        result["dropped_chunks"] = await self.drop_retired_chunks(conn, lifecycle, cutoff)
+                    result["compressed_chunks"] = await self.compress_old_chunks(conn, lifecycle, today)
+                    result["status"] = "success"
+                    self.logger.info(
+                        f"🗜️ {lifecycle.table_name}: {result['dropped_chunks']} chunks dropped, "
+                        f"{result['compressed_chunks']} compressed"
+                    )
+                except Exception as e:
+                    result["status"] = "failed"
+                    result["error"] = str(e)
+                    self.logger.error(f"❌ {lifecycle.table_name}: storage lifecycle failed: {e}")
+                results.append(result)
+
+        failed = any(result["status"] == "failed" for result in results)
+        return {
+            "status": "failed" if failed else "success",
+            "retention_cutoff": cutoff,
+            "table_results": results
+        }
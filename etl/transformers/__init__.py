@@ -8,10 +8,16 @@ MART transformers: RAW/AUX -> MART tables (complex business logic)
 
 # Raw transformers (existing)
 from .raw_data_transformer import RawDataTransformer, get_raw_transformer_registry
+from .columnar_transformer import ColumnarTransformEngine, ColumnSpec, TableSpec, TABLE_SPECS
 
 
 __all__ = [
     # Raw transformers
     'RawDataTransformer',
-    'get_raw_transformer_registry'
+    'get_raw_transformer_registry',
+    # Columnar engine
+    'ColumnarTransformEngine',
+    'ColumnSpec',
+    'TableSpec',
+    'TABLE_SPECS'
 ]
@@ -0,0 +1,476 @@
+"""
+🚀 Columnar Transformer Engine - vectorized cleaning for raw tables
+
+Applies the same cleaning rules as RawDataTransformer (_safe_string, _safe_int,
+_safe_date, ...) column by column over a whole batch, instead of calling the
+helpers field by field: the value type is decided once per column (pandas
+infer_dtype), numeric columns are converted with NumPy and the rest with a
+single tight pass per column.
+
+- Each table's mapping is declared once as a TableSpec (TABLE_SPECS)
+- Homogeneous columns take the fast path; unusual values fall back to the
+  scalar helper, so the output is identical to the per-row path
+- transform_batch() works on RowBatch tuples end to end (no per-record dicts)
+- Tables without a spec keep using the per-row RawDataTransformer methods
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+from pandas.api.types import infer_dtype
+
+from shared.core.logging import LoggerMixin
+from etl.extractors.bigquery_extractor import RowBatch
+from etl.transformers.raw_data_transformer import RawDataTransformer
+
+
+class ColumnRule(str, Enum):
+    """Cleaning rule of a column (one per RawDataTransformer._safe_* helper)"""
+    STRING = "string"
+    INT = "int"
+    DECIMAL = "decimal"
+    BOOL = "bool"
+    DATE = "date"
+    DATETIME = "datetime"
+
+
+@dataclass
+class ColumnSpec:
+    """Output column: target name, cleaning rule and BigQuery source field"""
+    target: str
+    rule: ColumnRule
+    source: Optional[str] = None  # None -> same as target
+    default: Any = None  # Only INT/DECIMAL (default_value of the helper)
+    default_now: bool = False  # Null -> batch timestamp (extraction_timestamp)
+
+    @property
+    def source_field(self) -> str:
+        return self.source or self.target
+
+
+@dataclass
+class TableSpec:
+    """Column mapping and row filters of a raw table"""
+    table_name: str
+    columns: List[ColumnSpec]
+    required: List[str] = field(default_factory=list)  # Targets that cannot be null
+    positive: List[str] = field(default_factory=list)  # Targets that must be > 0
+
+
+def _extraction_timestamp() -> ColumnSpec:
+    return ColumnSpec("extraction_timestamp", ColumnRule.DATETIME, default_now=True)
+
+
+def _gestiones_columns(*extra: ColumnSpec) -> List[ColumnSpec]:
+    """Columns shared by voicebot_gestiones and mibotair_gestiones"""
+    return [
+        ColumnSpec("uid", ColumnRule.STRING),
+        ColumnSpec("campaign_id", ColumnRule.STRING),
+        ColumnSpec("campaign_name", ColumnRule.STRING),
+        ColumnSpec("document", ColumnRule.STRING),
+        ColumnSpec("phone", ColumnRule.DECIMAL),
+        ColumnSpec("date", ColumnRule.DATETIME),
+        ColumnSpec("management", ColumnRule.STRING),
+        ColumnSpec("sub_management", ColumnRule.STRING),
+        ColumnSpec("weight", ColumnRule.INT),
+        ColumnSpec("origin", ColumnRule.STRING),
+        *extra,
+        _extraction_timestamp(),
+    ]
+
+
+# 🎯 Column specs per raw table (same output as the transform_raw_* methods)
+TABLE_SPECS: Dict[str, TableSpec] = {
+    "calendario": TableSpec(
+        table_name="calendario",
+        columns=[
+            ColumnSpec("archivo", ColumnRule.STRING, source="ARCHIVO"),
+            ColumnSpec("tipo_cartera", ColumnRule.STRING, source="TIPO_CARTERA"),
+            ColumnSpec("fecha_apertura", ColumnRule.DATE),
+            ColumnSpec("fecha_trandeuda", ColumnRule.DATE),
+            ColumnSpec("fecha_cierre", ColumnRule.DATE),
+            ColumnSpec("fecha_cierre_planificada", ColumnRule.DATE, source="FECHA_CIERRE_PLANIFICADA"),
+            ColumnSpec("duracion_campana_dias_habiles", ColumnRule.INT, source="DURACION_CAMPANA_DIAS_HABILES"),
+            ColumnSpec("anno_asignacion", ColumnRule.INT, source="ANNO_ASIGNACION"),
+            ColumnSpec("periodo_asignacion", ColumnRule.STRING, source="PERIODO_ASIGNACION"),
+            ColumnSpec("es_cartera_abierta", ColumnRule.BOOL, source="ES_CARTERA_ABIERTA"),
+            ColumnSpec("rango_vencimiento", ColumnRule.STRING, source="RANGO_VENCIMIENTO"),
+            ColumnSpec("estado_cartera", ColumnRule.STRING, source="ESTADO_CARTERA"),
+            ColumnSpec("periodo_mes", ColumnRule.STRING),
+            ColumnSpec("periodo_date", ColumnRule.DATE),
+            ColumnSpec("tipo_ciclo_campana", ColumnRule.STRING),
+            ColumnSpec("categoria_duracion", ColumnRule.STRING),
+            _extraction_timestamp(),
+        ],
+        required=["archivo", "periodo_date", "fecha_apertura"],
+    ),
+    "asignaciones": TableSpec(
+        table_name="asignaciones",
+        columns=[
+            ColumnSpec("cod_luna", ColumnRule.STRING),
+            ColumnSpec("cuenta", ColumnRule.STRING),
+            ColumnSpec("archivo", ColumnRule.STRING),
+            ColumnSpec("cliente", ColumnRule.STRING),
+            ColumnSpec("telefono", ColumnRule.STRING),
+            ColumnSpec("tramo_gestion", ColumnRule.STRING),
+            ColumnSpec("negocio", ColumnRule.STRING),
+            ColumnSpec("dias_sin_trafico", ColumnRule.STRING),
+            ColumnSpec("decil_contacto", ColumnRule.INT),
+            ColumnSpec("decil_pago", ColumnRule.INT),
+            ColumnSpec("min_vto", ColumnRule.DATE),
+            ColumnSpec("zona", ColumnRule.STRING),
+            ColumnSpec("rango_renta", ColumnRule.INT),
+            ColumnSpec("campania_act", ColumnRule.STRING),
+            ColumnSpec("fraccionamiento", ColumnRule.STRING),
+            ColumnSpec("cuota_fracc_act", ColumnRule.STRING),
+            ColumnSpec("fecha_corte", ColumnRule.DATE),
+            ColumnSpec("priorizado", ColumnRule.STRING),
+            ColumnSpec("inscripcion", ColumnRule.STRING),
+            ColumnSpec("incrementa_velocidad", ColumnRule.STRING),
+            ColumnSpec("detalle_dscto_futuro", ColumnRule.STRING),
+            ColumnSpec("cargo_fijo", ColumnRule.STRING),
+            ColumnSpec("dni", ColumnRule.STRING),
+            ColumnSpec("estado_pc", ColumnRule.STRING),
+            ColumnSpec("tipo_linea", ColumnRule.STRING),
+            ColumnSpec("cod_sistema", ColumnRule.INT),
+            ColumnSpec("tipo_alta", ColumnRule.STRING),
+            ColumnSpec("creado_el", ColumnRule.DATETIME),
+            ColumnSpec("fecha_asignacion", ColumnRule.DATE),
+            ColumnSpec("motivo_rechazo", ColumnRule.STRING),
+            _extraction_timestamp(),
+        ],
+        required=["cod_luna", "cuenta", "archivo"],
+    ),
+    "trandeuda": TableSpec(
+        table_name="trandeuda",
+        columns=[
+            ColumnSpec("cod_cuenta", ColumnRule.STRING),
+            ColumnSpec("nro_documento", ColumnRule.STRING),
+            ColumnSpec("archivo", ColumnRule.STRING),
+            ColumnSpec("fecha_vencimiento", ColumnRule.DATE),
+            ColumnSpec("monto_exigible", ColumnRule.DECIMAL),
+            ColumnSpec("creado_el", ColumnRule.DATETIME),
+            ColumnSpec("fecha_proceso", ColumnRule.DATE),
+            ColumnSpec("motivo_rechazo", ColumnRule.STRING),
+            _extraction_timestamp(),
+        ],
+        required=["cod_cuenta", "nro_documento", "archivo"],
+        positive=["monto_exigible"],
+    ),
+    "pagos": TableSpec(
+        table_name="pagos",
+        columns=[
+            ColumnSpec("nro_documento", ColumnRule.STRING),
+            ColumnSpec("fecha_pago", ColumnRule.DATE),
+            ColumnSpec("monto_cancelado", ColumnRule.DECIMAL),
+            ColumnSpec("cod_sistema", ColumnRule.STRING),
+            ColumnSpec("archivo", ColumnRule.STRING),
+            ColumnSpec("creado_el", ColumnRule.DATETIME),
+            ColumnSpec("motivo_rechazo", ColumnRule.STRING),
+            _extraction_timestamp(),
+        ],
+        required=["nro_documento", "fecha_pago"],
+        positive=["monto_cancelado"],
+    ),
+    "voicebot_gestiones": TableSpec(
+        table_name="voicebot_gestiones",
+        columns=_gestiones_columns(
+            ColumnSpec("fecha_compromiso", ColumnRule.DATETIME),
+            ColumnSpec("compromiso", ColumnRule.STRING),
+            ColumnSpec("observacion", ColumnRule.STRING),
+            ColumnSpec("project", ColumnRule.STRING),
+            ColumnSpec("client", ColumnRule.STRING),
+            ColumnSpec("duracion", ColumnRule.INT),
+            ColumnSpec("id_telephony", ColumnRule.STRING),
+            ColumnSpec("url_record_bot", ColumnRule.STRING),
+        ),
+        required=["uid"],
+    ),
+    "mibotair_gestiones": TableSpec(
+        table_name="mibotair_gestiones",
+        columns=_gestiones_columns(
+            ColumnSpec("n1", ColumnRule.STRING),
+            ColumnSpec("n2", ColumnRule.STRING),
+            ColumnSpec("n3", ColumnRule.STRING),
+            ColumnSpec("observacion", ColumnRule.STRING),
+            ColumnSpec("extra", ColumnRule.STRING),
+            ColumnSpec("project", ColumnRule.STRING),
+            ColumnSpec("client", ColumnRule.STRING),
+            ColumnSpec("nombre_agente", ColumnRule.STRING),
+            ColumnSpec("correo_agente", ColumnRule.STRING),
+            ColumnSpec("duracion", ColumnRule.INT),
+            ColumnSpec("monto_compromiso", ColumnRule.DECIMAL),
+            ColumnSpec("fecha_compromiso", ColumnRule.DATE),
+            ColumnSpec("url", ColumnRule.STRING),
+        ),
+        required=["uid"],
+    ),
+}
+
+_NUMERIC_KINDS = ("integer", "floating", "mixed-integer-float")
+_TRUE_STRINGS = frozenset(("true", "1", "yes", "si", "sí"))
+_NON_INT_CHARS = re.compile(r"[^\d\-]")
+_INT_STRING = re.compile(r"-?\d+")
+_INT64_LIMIT = 2 ** 63
+
+
+class ColumnarTransformEngine(LoggerMixin):
+    """
+    Vectorized RawDataTransformer for tables declared in TABLE_SPECS
+
+    Shares transformation_stats with the RawDataTransformer it wraps so the
+    registry reports the same counters whichever path ran.
+    """
+
+    def __init__(self, transformer: Optional[RawDataTransformer] = None):
+        super().__init__()
+        self.transformer = transformer or RawDataTransformer()
+        self._converters: Dict[ColumnRule, Callable[[Sequence[Any], str, Any], List[Any]]] = {
+            ColumnRule.STRING: self._string_column,
+            ColumnRule.INT: self._int_column,
+            ColumnRule.DECIMAL: self._decimal_column,
+            ColumnRule.BOOL: self._bool_column,
+            ColumnRule.DATE: self._date_column,
+            ColumnRule.DATETIME: self._datetime_column,
+        }
+
+    @staticmethod
+    def supports(table_name: str) -> bool:
+        return table_name in TABLE_SPECS
+
+    def transform(self, table_name: str, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Transform a batch of records column by column
+
+        Args:
+            table_name: Base raw table name (key of TABLE_SPECS)
+            raw_data: BigQuery records
+
+        Returns:
+            Records identical to the per-row transform_raw_* output
+        """
+        spec = TABLE_SPECS[table_name]
+        if not raw_data:
+            return []
+
+        source_columns = [[record.get(column.source_field) for record in raw_data] for column in spec.columns]
+        names, rows = self._transform_columns(spec, source_columns, len(raw_data))
+        return [dict(zip(names, row)) for row in rows]
+
+    def transform_batch(self, table_name: str, batch: RowBatch) -> RowBatch:
+        """
+        🚀 Transform a columnar RowBatch without building per-record dicts
+
+        Source fields are matched case-insensitively; missing fields are NULL.
+        The result feeds PostgresLoader.load_rows_batch() directly.
+
+        Args:
+            table_name: Base raw table name (key of TABLE_SPECS)
+            batch: RowBatch from BigQueryExtractor.stream_custom_query_rows()
+
+        Returns:
+            RowBatch with the spec's target columns
+        """
+        spec = TABLE_SPECS[table_name]
+        names = [column.target for column in spec.columns]
+        if not batch.rows:
+            return RowBatch(columns=names, rows=[])
+
+        positions = {name.lower(): index for index, name in enumerate(batch.columns)}
+        transposed = list(zip(*batch.rows))
+        missing = (None,) * len(batch.rows)
+        source_columns = [
+            transposed[positions[column.source_field.lower()]]
+            if column.source_field.lower() in positions else missing
+            for column in spec.columns
+        ]
+        names, rows = self._transform_columns(spec, source_columns, len(batch.rows))
+        return RowBatch(columns=names, rows=rows)
+
+    def _transform_columns(
+        self,
+        spec: TableSpec,
+        source_columns: List[Sequence[Any]],
+        record_count: int
+    ) -> Tuple[List[str], List[tuple]]:
+        """Convert each source column, drop rows failing required/positive and return row tuples"""
+        batch_now = datetime.now(timezone.utc)
+        names = [column.target for column in spec.columns]
+        columns = {
+            column.target: self._convert_column(column, values, batch_now)
+            for column, values in zip(spec.columns, source_columns)
+        }
+
+        keep = np.ones(record_count, dtype=bool)
+        for target in spec.required:
+            keep &= self._not_null(columns[target])
+        for target in spec.positive:
+            # Same as "value is None or value <= 0" -> skip (NaN is kept)
+            numbers = np.array(columns[target], dtype=float)
+            keep &= self._not_null(columns[target]) & ~(numbers <= 0)
+
+        rows = list(zip(*(columns[name] for name in names)))
+        if not keep.all():
+            rows = [row for row, kept in zip(rows, keep) if kept]
+
+        # Counters only move once the whole batch succeeded
+        skipped = record_count - len(rows)
+        stats = self.transformer.transformation_stats
+        stats['records_processed'] += record_count
+        stats['records_transformed'] += len(rows)
+        stats['records_skipped'] += skipped
+        if skipped:
+            self.logger.warning(
+                f"⚠️ {spec.table_name}: skipped {skipped} records failing {spec.required + spec.positive}"
+            )
+        return names, rows
+
+    # =============================================================================
+    # COLUMN CONVERTERS - one type decision per column + scalar fallback
+    # =============================================================================
+
+    def _convert_column(self, column: ColumnSpec, values: Sequence[Any], batch_now: datetime) -> List[Any]:
+        kind = infer_dtype(values, skipna=True)
+        try:
+            result = self._converters[column.rule](values, kind, column.default)
+        except (ValueError, TypeError, OverflowError) as e:
+            self.logger.debug(f"Columnar fast path failed for {column.target} ({kind}): {e}")
+            result = self._scalar_column(values, column.rule, column.default)
+
+        if column.default_now:
+            result = [batch_now if value is None else value for value in result]
+        return result
+
+    @staticmethod
+    def _scalar_column(values: Sequence[Any], rule: ColumnRule, default: Any = None) -> List[Any]:
+        """Per-value fallback with the RawDataTransformer helpers"""
+        if rule == ColumnRule.STRING:
+            return [RawDataTransformer._safe_string(value) for value in values]
+        if rule == ColumnRule.INT:
+            return [RawDataTransformer._safe_int(value, default) for value in values]
+        if rule == ColumnRule.DECIMAL:
+            return [RawDataTransformer._safe_decimal(value, default) for value in values]
+        if rule == ColumnRule.BOOL:
+            return [RawDataTransformer._safe_bool(value) for value in values]
+        if rule == ColumnRule.DATE:
+            return [RawDataTransformer._safe_date(value) for value in values]
+        return [RawDataTransformer._safe_datetime(value) for value in values]
+
+    @staticmethod
+    def _null_mask(values: Sequence[Any]) -> np.ndarray:
+        """True where the value is None (NaN is a value, as in the scalar helpers)"""
+        return np.array(values, dtype=object) == None  # noqa: E711 - elementwise
+
+    @classmethod
+    def _not_null(cls, values: Sequence[Any]) -> np.ndarray:
+        return ~cls._null_mask(values)
+
+    @staticmethod
+    def _fill(values: np.ndarray, mask: np.ndarray, fill: Any) -> List[Any]:
+        """tolist() of a numpy column with fill where mask (native Python values)"""
+        result = values.astype(object)
+        result[mask] = fill
+        return result.tolist()
+
+    def _string_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [None] * len(values)
+        if kind != "string":
+            return self._scalar_column(values, ColumnRule.STRING)
+
+        # str(value).strip(); "" -> None
+        if None in values:
+            # Columns with NULLs are usually low-cardinality: clean each distinct value once
+            cleaned = dict.fromkeys(values)
+            for value in cleaned:
+                cleaned[value] = None if value is None else (value.strip() or None)
+            return list(map(cleaned.__getitem__, values))
+
+        stripped = list(map(str.strip, values))
+        if "" in stripped:
+            stripped = [value or None for value in stripped]
+        return stripped
+
+    def _int_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [default] * len(values)
+
+        if kind in _NUMERIC_KINDS:
+            # int(float(value)); None/NaN/inf -> default
+            numbers = np.array(values, dtype=float)
+            invalid = ~np.isfinite(numbers)
+            if (np.abs(numbers[~invalid]) >= _INT64_LIMIT).any():
+                return self._scalar_column(values, ColumnRule.INT, default)
+            numbers[invalid] = 0
+            return self._fill(np.trunc(numbers).astype(np.int64), invalid, default)
+
+        if kind == "string":
+            # re.sub(r'[^\d\-]', '', value) then int(); invalid -> default
+            sub, is_int = _NON_INT_CHARS.sub, _INT_STRING.fullmatch
+            cleaned = [None if value is None else sub("", value) for value in values]
+            return [int(value) if value and is_int(value) else default for value in cleaned]
+
+        return self._scalar_column(values, ColumnRule.INT, default)
+
+    def _decimal_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [default] * len(values)
+        if kind not in _NUMERIC_KINDS + ("decimal",):
+            return self._scalar_column(values, ColumnRule.DECIMAL, default)
+
+        # float(value); only None takes the default (NaN stays NaN)
+        nulls = self._null_mask(values)
+        numbers = np.array([0 if null else value for value, null in zip(values, nulls)], dtype=float)
+        return self._fill(numbers, nulls, default)
+
+    def _bool_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [False] * len(values)
+        if kind == "boolean":
+            return [value is True for value in values]
+        if kind == "string":
+            return [value is not None and value.lower() in _TRUE_STRINGS for value in values]
+        if kind in _NUMERIC_KINDS:
+            # bool(int(value)); None/NaN -> False
+            numbers = np.array(values, dtype=float)
+            finite = np.isfinite(numbers)
+            numbers[~finite] = 0
+            return (finite & (np.trunc(numbers) != 0)).tolist()
+
+        return self._scalar_column(values, ColumnRule.BOOL)
+
+    def _date_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [None] * len(values)
+        if kind in ("date", "datetime"):
+            # date/datetime values pass through unchanged
+            return list(values)
+        if kind != "string":
+            return self._scalar_column(values, ColumnRule.DATE)
+
+        result = [None] * len(values)
+        for index, value in enumerate(values):
+            if value is None:
+                continue
+            try:
+                result[index] = date.fromisoformat(value.strip())
+            except ValueError:
+                # Datetime strings, "Z" suffix, blanks... -> scalar rules
+                result[index] = RawDataTransformer._safe_date(value)
+        return result
+
+    def _datetime_column(self, values: Sequence[Any], kind: str, default: Any) -> List[Any]:
+        if kind == "empty":
+            return [None] * len(values)
+        if kind != "datetime":
+            return self._scalar_column(values, ColumnRule.DATETIME)
+
+        # Naive -> UTC; aware values unchanged
+        return [
+            value if value is None or value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+            for value in values
+        ]
@@ -29,6 +29,7 @@ from typing import List, Dict, Any, Optional, Union
 import re
 
 from shared.core.logging import LoggerMixin
+from etl.config import ETLConfig
 
 
 class RawDataTransformer(LoggerMixin):
@@ -883,6 +884,9 @@ class RawTransformerRegistry:
 
     def __init__(self):
         self.transformer = RawDataTransformer()
+        # 🚀 Vectorized engine for tables with a column spec (shares stats with transformer)
+        from etl.transformers.columnar_transformer import ColumnarTransformEngine
+        self.columnar_engine = ColumnarTransformEngine(self.transformer)
 
         # Map raw table names to transformation methods
         self.raw_transformer_mapping = {
@@ -902,6 +906,13 @@ class RawTransformerRegistry:
 
     def transform_raw_table_data(self, table_name: str, raw_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Transform data for a specific raw table (expects base table name)"""
+        if ETLConfig.COLUMNAR_TRANSFORM_ENABLED and self.columnar_engine.supports(table_name):
+            try:
+                return self.columnar_engine.transform(table_name, raw_data)
+            except Exception as e:
+                # Per-row path stays as fallback (stats are untouched by the failed attempt)
+                self.transformer.logger.warning(f"⚠️ Columnar transform failed for {table_name}, using per-row path: {e}")
+
         if table_name not in self.raw_transformer_mapping:
             # Attempt to match with "raw_" prefix for backward compatibility or direct calls
             # This might occur if some part of the system still uses "raw_tablename"
@@ -917,6 +928,21 @@ class RawTransformerRegistry:
         transformer_func = self.raw_transformer_mapping[table_name]
         return transformer_func(raw_data)
 
+    def transform_raw_table_batch(self, table_name: str, batch: Any) -> Any:
+        """
+        🚀 Transform a columnar RowBatch (expects base table name)
+
+        Tables with a column spec stay columnar end to end; the rest go through
+        the per-row transformer and are packed back into a RowBatch.
+        """
+        if ETLConfig.COLUMNAR_TRANSFORM_ENABLED and self.columnar_engine.supports(table_name):
+            return self.columnar_engine.transform_batch(table_name, batch)
+
+        records = [dict(zip(batch.columns, row)) for row in batch.rows]
+        transformed = self.transform_raw_table_data(table_name, records)
+        columns = list(transformed[0]) if transformed else []
+        return type(batch)(columns=columns, rows=[tuple(record.values()) for record in transformed])
+
     def get_supported_raw_tables(self) -> List[str]:
         """Get list of supported raw table transformations  """
         return list(self.raw_transformer_mapping.keys())
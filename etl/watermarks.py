@@ -9,12 +9,15 @@ Optimizaciones añadidas:
 - Validación de fechas (evita retrocesos accidentales) 
 - Mejor logging y debugging
 - Función de status para health checks
+- Checkpoints por lote (etl_watermark_checkpoints) guardados en la misma
+  transacción que la carga, para reanudar cargas largas y medir progreso
 
 Autor: Ricky para Pulso-Back
 """
 
+from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Any
 import logging
 
 from shared.database.connection import execute_query
@@ -33,6 +36,19 @@ async def ensure_watermark_table() -> None:
     
     CREATE INDEX IF NOT EXISTS idx_etl_watermarks_simple_updated 
         ON etl_watermarks_simple(updated_at);
+
+    CREATE TABLE IF NOT EXISTS etl_watermark_checkpoints (
+        table_name VARCHAR(100) NOT NULL,
+        range_start TIMESTAMP WITH TIME ZONE NOT NULL,
+        range_end TIMESTAMP WITH TIME ZONE NOT NULL,
+        checkpoint_value TIMESTAMP WITH TIME ZONE,
+        rows_loaded BIGINT NOT NULL DEFAULT 0,
+        run_rows BIGINT NOT NULL DEFAULT 0,
+        status VARCHAR(20) NOT NULL DEFAULT 'running',
+        run_started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (table_name, range_start)
+    );
     """
     
     await execute_query(create_table_sql)
@@ -261,6 +277,205 @@ async def cleanup_orphaned_watermarks(valid_table_names: List[str]) -> int:
     return deleted_count
 
 
+# ===============================================
+# CHECKPOINTS POR LOTE (REANUDACIÓN + PROGRESO)
+# ===============================================
+
+@dataclass
+class BatchCheckpoint:
+    """
+    Checkpoint de un lote: valor máximo de la columna incremental ya cargado
+    dentro del rango (table_name, range_start). Se guarda con save_checkpoint()
+    en la misma transacción que el lote.
+    """
+    table_name: str
+    range_start: datetime
+    checkpoint_value: Optional[datetime]
+    rows: int
+
+
+async def start_checkpoint_range(
+    table_name: str,
+    range_start: datetime,
+    range_end: datetime
+) -> Dict[str, Any]:
+    """
+    Registrar el inicio (o la reanudación) de un rango de extracción
+
+    Si el rango ya existe conserva checkpoint_value y rows_loaded, y reinicia
+    los contadores de la corrida actual (run_rows, run_started_at).
+    
+    Args:
+        table_name: Nombre de la tabla
+        range_start: Inicio exclusivo del rango (clave estable entre corridas)
+        range_end: Fin inclusivo del rango
+        
+    Returns:
+        Dict con status ('running'|'completed') y checkpoint_value previo (o None)
+    """
+    upsert_sql = """
+    INSERT INTO etl_watermark_checkpoints (table_name, range_start, range_end)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (table_name, range_start)
+    DO UPDATE SET
+        range_end = GREATEST(etl_watermark_checkpoints.range_end, EXCLUDED.range_end),
+        status = CASE
+            WHEN etl_watermark_checkpoints.status = 'completed'
+             AND etl_watermark_checkpoints.range_end >= EXCLUDED.range_end THEN 'completed'
+            ELSE 'running'
+        END,
+        run_rows = 0,
+        run_started_at = CURRENT_TIMESTAMP,
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING status, checkpoint_value, rows_loaded
+    """
+    
+    row = await execute_query(upsert_sql, table_name, range_start, range_end, fetch="one")
+    
+    if row['checkpoint_value'] and row['status'] == 'running':
+        logging.info(
+            f"⏯️ {table_name}: resuming range {range_start} from checkpoint "
+            f"{row['checkpoint_value']} ({row['rows_loaded']:,} rows already loaded)"
+        )
+    
+    return {
+        "status": row['status'],
+        "checkpoint_value": row['checkpoint_value'],
+        "rows_loaded": row['rows_loaded']
+    }
+
+
+async def save_checkpoint(conn, checkpoint: BatchCheckpoint) -> None:
+    """
+    Guardar el checkpoint de un lote usando la conexión/transacción de la carga
+
+    Args:
+        conn: Conexión asyncpg dentro de la transacción del lote
+        checkpoint: Checkpoint del lote recién cargado
+    """
+    await conn.execute(
+        """
+        UPDATE etl_watermark_checkpoints
+        SET checkpoint_value = GREATEST(checkpoint_value, $3),
+            rows_loaded = rows_loaded + $4,
+            run_rows = run_rows + $4,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE table_name = $1 AND range_start = $2
+        """,
+        checkpoint.table_name,
+        checkpoint.range_start,
+        checkpoint.checkpoint_value,
+        checkpoint.rows
+    )
+
+
+async def complete_checkpoint_range(table_name: str, range_start: datetime) -> None:
+    """
+    Marcar un rango como completamente cargado
+
+    Args:
+        table_name: Nombre de la tabla
+        range_start: Inicio del rango
+    """
+    await execute_query(
+        """
+        UPDATE etl_watermark_checkpoints
+        SET status = 'completed', updated_at = CURRENT_TIMESTAMP
+        WHERE table_name = $1 AND range_start = $2
+        """,
+        table_name,
+        range_start
+    )
+
+
+async def prune_checkpoints(table_name: str, watermark: datetime) -> None:
+    """
+    Eliminar checkpoints de rangos ya cubiertos por el watermark
+
+    Args:
+        table_name: Nombre de la tabla
+        watermark: Watermark vigente
+    """
+    await execute_query(
+        "DELETE FROM etl_watermark_checkpoints WHERE table_name = $1 AND range_end <= $2",
+        table_name,
+        watermark
+    )
+
+
+async def get_checkpoint_progress(table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    🆕 Progreso por tabla a partir de los checkpoints: filas/s y ETA
+
+    El avance se mide en tiempo de la columna incremental cubierto
+    (checkpoint_value - range_start) sobre el total del rango; la ETA
+    extrapola el ritmo de la corrida actual.
+
+    Args:
+        table_name: Filtrar por tabla (None = todas)
+
+    Returns:
+        Lista de dicts por tabla con rows_loaded, rows_per_second, progress_pct y eta_seconds
+    """
+    query = """
+    SELECT
+        table_name,
+        COUNT(*) FILTER (WHERE status = 'running') AS ranges_running,
+        COUNT(*) FILTER (WHERE status = 'completed') AS ranges_completed,
+        MIN(range_start) AS range_start,
+        MAX(range_end) AS range_end,
+        MAX(checkpoint_value) AS checkpoint_value,
+        SUM(rows_loaded) AS rows_loaded,
+        SUM(run_rows) AS run_rows,
+        MIN(run_started_at) AS run_started_at,
+        MAX(updated_at) AS updated_at,
+        SUM(EXTRACT(EPOCH FROM range_end - range_start)) AS total_span_seconds,
+        SUM(EXTRACT(EPOCH FROM
+            CASE
+                WHEN status = 'completed' THEN range_end - range_start
+                WHEN checkpoint_value IS NULL THEN INTERVAL '0'
+                ELSE LEAST(checkpoint_value, range_end) - range_start
+            END
+        )) AS covered_span_seconds
+    FROM etl_watermark_checkpoints
+    WHERE ($1::text IS NULL OR table_name = $1)
+    GROUP BY table_name
+    ORDER BY table_name
+    """
+
+    rows = await execute_query(query, table_name, fetch="all")
+
+    progress = []
+    for row in rows:
+        elapsed = (row['updated_at'] - row['run_started_at']).total_seconds() if row['run_started_at'] else 0
+        total_span = float(row['total_span_seconds'] or 0)
+        covered_span = float(row['covered_span_seconds'] or 0)
+        fraction = min(covered_span / total_span, 1.0) if total_span > 0 else 0.0
+
+        rows_per_second = row['run_rows'] / elapsed if elapsed > 0 else None
+        eta_seconds = None
+        if row['ranges_running'] == 0:
+            eta_seconds = 0.0
+        elif 0 < fraction < 1 and elapsed > 0:
+            eta_seconds = elapsed * (1 - fraction) / fraction
+
+        progress.append({
+            "table_name": row['table_name'],
+            "status": "running" if row['ranges_running'] else "completed",
+            "ranges_running": row['ranges_running'],
+            "ranges_completed": row['ranges_completed'],
+            "range_start": row['range_start'].isoformat() if row['range_start'] else None,
+            "range_end": row['range_end'].isoformat() if row['range_end'] else None,
+            "checkpoint_value": row['checkpoint_value'].isoformat() if row['checkpoint_value'] else None,
+            "rows_loaded": int(row['rows_loaded'] or 0),
+            "rows_per_second": round(rows_per_second, 1) if rows_per_second is not None else None,
+            "progress_pct": round(fraction * 100, 1),
+            "eta_seconds": round(eta_seconds, 1) if eta_seconds is not None else None
+        })
+
+    return progress
+
+
 # ===============================================
 # FUNCIONES DE CONVENIENCIA PARA COMPATIBILIDAD
 # ===============================================
@@ -325,6 +540,10 @@ class SimpleWatermarkManager:
         """🆕 Get watermark system status"""
         return await get_watermark_status()
 
+    async def get_progress(self, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """🆕 Per-table progress (rows/s, ETA) from batch checkpoints"""
+        return await get_checkpoint_progress(table_name)
+
 
 # Singleton para compatibilidad
 _watermark_manager: Optional[SimpleWatermarkManager] = None
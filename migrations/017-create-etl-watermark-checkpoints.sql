@@ -0,0 +1,24 @@
+-- 017: Create per-batch checkpoints for resumable incremental ETL
+-- depends: 016-create-simple-watermarks-table
+-- Description: Creates etl_watermark_checkpoints, written in the same transaction as each loaded batch
+
+CREATE TABLE IF NOT EXISTS etl_watermark_checkpoints (
+    table_name VARCHAR(100) NOT NULL,
+    range_start TIMESTAMP WITH TIME ZONE NOT NULL,
+    range_end TIMESTAMP WITH TIME ZONE NOT NULL,
+    checkpoint_value TIMESTAMP WITH TIME ZONE,
+    rows_loaded BIGINT NOT NULL DEFAULT 0,
+    run_rows BIGINT NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'running',
+    run_started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (table_name, range_start)
+);
+
+-- Add comments for documentation
+COMMENT ON TABLE etl_watermark_checkpoints IS 'Per-range batch checkpoints - lets an interrupted incremental load resume mid-window';
+COMMENT ON COLUMN etl_watermark_checkpoints.range_start IS 'Exclusive start of the extraction range (watermark or slice boundary)';
+COMMENT ON COLUMN etl_watermark_checkpoints.checkpoint_value IS 'Highest incremental-column value committed for this range';
+COMMENT ON COLUMN etl_watermark_checkpoints.rows_loaded IS 'Rows committed for this range across all runs';
+COMMENT ON COLUMN etl_watermark_checkpoints.run_rows IS 'Rows committed by the current run (for rows/s)';
+COMMENT ON COLUMN etl_watermark_checkpoints.status IS 'running | completed';
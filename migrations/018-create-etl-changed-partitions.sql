@@ -0,0 +1,21 @@
+-- 018: Create change log of (archivo, fecha) partitions touched by raw loads
+-- depends: 017-create-etl-watermark-checkpoints
+-- Description: Creates etl_changed_partitions, written in the same transaction as each loaded batch
+-- and consumed by the incremental aux/mart rebuild
+
+CREATE TABLE IF NOT EXISTS etl_changed_partitions (
+    change_id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(100) NOT NULL,
+    archivo TEXT,
+    fecha DATE,
+    recorded_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_etl_changed_partitions_partition
+    ON etl_changed_partitions (table_name, (COALESCE(archivo, '')), (COALESCE(fecha, '-infinity'::date)));
+
+-- Add comments for documentation
+COMMENT ON TABLE etl_changed_partitions IS 'Pending (archivo, fecha) partitions changed by raw loads - drives the incremental aux/mart rebuild';
+COMMENT ON COLUMN etl_changed_partitions.change_id IS 'Renewed on every re-touch, so a rebuild only clears the versions it has read';
+COMMENT ON COLUMN etl_changed_partitions.archivo IS 'Campaign archivo as loaded (NULL = every campaign)';
+COMMENT ON COLUMN etl_changed_partitions.fecha IS 'Day touched (NULL = every day of the campaign)';
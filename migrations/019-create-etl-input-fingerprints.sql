@@ -0,0 +1,14 @@
+-- 019: Create content fingerprints of untracked aux/mart stage inputs
+-- depends: 018-create-etl-changed-partitions
+-- Description: Creates etl_input_fingerprints, used by the aux/mart DAG runner to detect
+-- changed dimension tables (full refresh, no etl_changed_partitions rows)
+
+CREATE TABLE IF NOT EXISTS etl_input_fingerprints (
+    table_name VARCHAR(100) PRIMARY KEY,
+    fingerprint VARCHAR(32) NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add comments for documentation
+COMMENT ON TABLE etl_input_fingerprints IS 'md5 of each dimension table content as of the last successful aux/mart run';
+COMMENT ON COLUMN etl_input_fingerprints.fingerprint IS 'md5 of the rows without extraction_timestamp/created_at/updated_at';
@@ -0,0 +1,16 @@
+-- 020: Add base counters to mart dashboard_data for the Postgres dashboard engine
+-- depends: 019-create-etl-input-fingerprints
+-- Description: The API re-aggregates dashboard_data by cartera/servicio/periodo in SQL, so ratios
+-- (cierre, intensidad) need their additive numerators stored, not only the per-row percentages
+
+ALTER TABLE mart_P3fV4dWNeMkN5RJMhV8e.dashboard_data
+    ADD COLUMN IF NOT EXISTS cuentas_pagadoras INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_gestiones INTEGER NOT NULL DEFAULT 0;
+
+-- "Última foto": MAX(fecha_foto) por campaña hasta la fecha de corte
+CREATE INDEX IF NOT EXISTS idx_mart_dd_archivo_fecha_foto
+    ON mart_P3fV4dWNeMkN5RJMhV8e.dashboard_data(archivo, fecha_foto DESC);
+
+-- Add comments for documentation
+COMMENT ON COLUMN mart_P3fV4dWNeMkN5RJMhV8e.dashboard_data.cuentas_pagadoras IS 'Clients with at least one valid payment up to fecha_foto';
+COMMENT ON COLUMN mart_P3fV4dWNeMkN5RJMhV8e.dashboard_data.total_gestiones IS 'Gestiones up to fecha_foto (numerator of inten)';
@@ -0,0 +1,32 @@
+-- 021: Agent × day and agent × hour productivity rollups maintained by the ETL
+-- depends: 020-add-dashboard-data-base-counters
+-- Description: productivity_data (008) becomes the agent × day rollup of human gestiones and
+-- productivity_hourly the agent × hour one; both are rebuilt per (campaign, day) by the
+-- productivity_data rebuild stage, so the API answers any date range with plain range sums
+
+ALTER TABLE mart_P3fV4dWNeMkN5RJMhV8e.productivity_data
+    ADD COLUMN IF NOT EXISTS monto_compromiso NUMERIC(15,2) NOT NULL DEFAULT 0;
+
+COMMENT ON COLUMN mart_P3fV4dWNeMkN5RJMhV8e.productivity_data.monto_compromiso IS 'Committed amount of the agent''s PDPs that day (sum over accounts)';
+
+CREATE TABLE IF NOT EXISTS mart_P3fV4dWNeMkN5RJMhV8e.productivity_hourly (
+    fecha_foto DATE NOT NULL, -- For TimescaleDB partitioning
+    hora SMALLINT NOT NULL CHECK (hora BETWEEN 0 AND 23),
+    correo_agente VARCHAR(100) NOT NULL,
+    archivo VARCHAR(100) NOT NULL,
+    total_gestiones INTEGER NOT NULL DEFAULT 0,
+    contactos_efectivos INTEGER NOT NULL DEFAULT 0,
+    total_pdp INTEGER NOT NULL DEFAULT 0,
+    monto_compromiso NUMERIC(15,2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (fecha_foto, hora, correo_agente, archivo)
+);
+SELECT create_hypertable('mart_P3fV4dWNeMkN5RJMhV8e.productivity_hourly', 'fecha_foto', chunk_time_interval => INTERVAL '7 days', if_not_exists => TRUE);
+SELECT add_retention_policy('mart_P3fV4dWNeMkN5RJMhV8e.productivity_hourly', INTERVAL '2 years', if_not_exists => TRUE);
+COMMENT ON TABLE mart_P3fV4dWNeMkN5RJMhV8e.productivity_hourly IS 'Hourly productivity metrics by agent for project P3fV4dWNeMkN5RJMhV8e.';
+
+-- Rebuild deletes by (archivo, fecha_foto)
+CREATE INDEX IF NOT EXISTS idx_mart_prd_archivo_fecha_foto
+    ON mart_P3fV4dWNeMkN5RJMhV8e.productivity_data(archivo, fecha_foto);
+CREATE INDEX IF NOT EXISTS idx_mart_prh_archivo_fecha_foto
+    ON mart_P3fV4dWNeMkN5RJMhV8e.productivity_hourly(archivo, fecha_foto);
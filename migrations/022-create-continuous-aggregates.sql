@@ -0,0 +1,69 @@
+-- 022: Daily continuous aggregates over dashboard_data and gestion_cuenta_impact
+-- depends: 021-add-productivity-rollups
+-- transactional: false
+-- Description: dashboard_daily (day × cartera × servicio) and gestion_cuenta_impact_daily
+-- (day × campaign × canal) roll the hypertables up once, so time-series queries read one row
+-- per day instead of recomputing the sums from every snapshot / gestion. Refresh policies keep
+-- the recent window current and the ETL refreshes the exact range each rebuild touched.
+-- Non-transactional: refresh_continuous_aggregate cannot run inside a transaction block.
+
+-- Daily snapshot totals across campaigns (counters are cumulative up to the day, as in dashboard_data)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mart_P3fV4dWNeMkN5RJMhV8e.dashboard_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = true) AS
+SELECT
+    time_bucket(INTERVAL '1 day', fecha_foto) AS dia,
+    cartera,
+    servicio,
+    COUNT(*) AS campanas,
+    SUM(cuentas) AS cuentas,
+    SUM(clientes) AS clientes,
+    SUM(deuda_asig) AS deuda_asig,
+    SUM(deuda_act) AS deuda_act,
+    SUM(cuentas_gestionadas) AS cuentas_gestionadas,
+    SUM(cuentas_cd) AS cuentas_cd,
+    SUM(cuentas_ci) AS cuentas_ci,
+    SUM(cuentas_sc) AS cuentas_sc,
+    SUM(cuentas_sg) AS cuentas_sg,
+    SUM(cuentas_pdp) AS cuentas_pdp,
+    SUM(cuentas_pagadoras) AS cuentas_pagadoras,
+    SUM(total_gestiones) AS total_gestiones,
+    SUM(recupero) AS recupero
+FROM mart_P3fV4dWNeMkN5RJMhV8e.dashboard_data
+GROUP BY 1, 2, 3
+WITH NO DATA;
+
+COMMENT ON MATERIALIZED VIEW mart_P3fV4dWNeMkN5RJMhV8e.dashboard_daily IS 'Daily dashboard_data totals by cartera and servicio for project P3fV4dWNeMkN5RJMhV8e.';
+
+SELECT add_continuous_aggregate_policy('mart_P3fV4dWNeMkN5RJMhV8e.dashboard_daily',
+    start_offset => INTERVAL '60 days',
+    end_offset => NULL,
+    schedule_interval => INTERVAL '1 hour',
+    if_not_exists => TRUE);
+
+-- Daily gestion activity per campaign and channel (days in Lima time, like the ETL partitions)
+CREATE MATERIALIZED VIEW IF NOT EXISTS aux_P3fV4dWNeMkN5RJMhV8e.gestion_cuenta_impact_daily
+WITH (timescaledb.continuous, timescaledb.materialized_only = true) AS
+SELECT
+    time_bucket(INTERVAL '1 day', timestamp_gestion, 'America/Lima') AS dia,
+    archivo,
+    canal_origen,
+    COUNT(*) AS gestiones,
+    COUNT(*) FILTER (WHERE es_contacto_efectivo) AS contactos_efectivos,
+    COUNT(*) FILTER (WHERE es_compromiso) AS compromisos,
+    SUM(peso_gestion) AS peso_total,
+    SUM(monto_deuda_momento) AS monto_deuda_gestionada
+FROM aux_P3fV4dWNeMkN5RJMhV8e.gestion_cuenta_impact
+GROUP BY 1, 2, 3
+WITH NO DATA;
+
+COMMENT ON MATERIALIZED VIEW aux_P3fV4dWNeMkN5RJMhV8e.gestion_cuenta_impact_daily IS 'Daily gestion activity by campaign and channel for project P3fV4dWNeMkN5RJMhV8e.';
+
+SELECT add_continuous_aggregate_policy('aux_P3fV4dWNeMkN5RJMhV8e.gestion_cuenta_impact_daily',
+    start_offset => INTERVAL '60 days',
+    end_offset => INTERVAL '1 hour',
+    schedule_interval => INTERVAL '1 hour',
+    if_not_exists => TRUE);
+
+-- Materialize the existing history once (the policies only cover the last 60 days)
+CALL refresh_continuous_aggregate('mart_P3fV4dWNeMkN5RJMhV8e.dashboard_daily', NULL, NULL);
+CALL refresh_continuous_aggregate('aux_P3fV4dWNeMkN5RJMhV8e.gestion_cuenta_impact_daily', NULL, NULL);
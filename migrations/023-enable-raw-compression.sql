@@ -0,0 +1,26 @@
+-- 023: Enable native compression on the large raw hypertables
+-- depends: 022-create-continuous-aggregates
+-- Description: asignaciones, trandeuda and pagos are compressed per campaign (segment by archivo)
+-- and ordered by account / document so the rebuild's per-account lookups stay selective.
+-- cod_cuenta leads the order-by instead of being a segment-by column: one segment per account
+-- would hold a few dozen rows and barely compress. No compression or retention policies are
+-- added here: the ETL storage lifecycle (etl/storage_lifecycle.py) compresses old chunks, drops
+-- chunks of retired campaigns and decompresses chunks before a backfill writes into them.
+
+ALTER TABLE raw_P3fV4dWNeMkN5RJMhV8e.asignaciones SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'archivo',
+    timescaledb.compress_orderby = 'cuenta, cod_luna, fecha_asignacion DESC'
+);
+
+ALTER TABLE raw_P3fV4dWNeMkN5RJMhV8e.trandeuda SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'archivo',
+    timescaledb.compress_orderby = 'cod_cuenta, nro_documento, fecha_proceso DESC'
+);
+
+ALTER TABLE raw_P3fV4dWNeMkN5RJMhV8e.pagos SET (
+    timescaledb.compress,
+    timescaledb.compress_segmentby = 'archivo',
+    timescaledb.compress_orderby = 'nro_documento, fecha_pago DESC, monto_cancelado'
+);
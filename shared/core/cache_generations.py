@@ -0,0 +1,87 @@
+"""
+🔢 Cache generations - Invalidación O(1) de la caché de la API por mart
+
+Cada mart (etapa de ETLConfig.REBUILD_STAGES, ej. "dashboard_data") tiene un
+número de generación en Redis. La API lo incluye en sus claves de caché: al
+reconstruir el mart el ETL hace INCR y todas las claves anteriores quedan
+huérfanas (expiran solas por TTL). No hay KEYS ni borrados masivos.
+
+El ETL además publica MART_REBUILT_CHANNEL para que la API precaliente las
+combinaciones de filtros más pedidas.
+
+Compartido por el ETL (escribe) y la API (lee); no depende de app/.
+"""
+
+import json
+import logging
+from typing import Dict, Iterable
+
+import redis.asyncio as redis
+
+from shared.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Invalidación de los L1 en memoria de la API (ver app.core.local_cache)
+INVALIDATION_CHANNEL = "pulso:cache:invalidate"
+# Aviso de marts reconstruidos: {"marts": {"dashboard_data": 42}}
+MART_REBUILT_CHANNEL = "pulso:cache:mart_rebuilt"
+
+GENERATION_KEY_PREFIX = "cache:gen:"
+
+
+def generation_key(mart: str) -> str:
+    return f"{GENERATION_KEY_PREFIX}{mart}"
+
+
+async def bump_generations(redis_client: redis.Redis, marts: Iterable[str], origin: str = "etl") -> Dict[str, int]:
+    """
+    Avanzar la generación de los marts y avisar a la API
+
+    Args:
+        redis_client: Cliente redis.asyncio
+        marts: Marts reconstruidos
+        origin: Quién avanza la generación (para los L1 de la API)
+
+    Returns:
+        Nueva generación por mart
+    """
+    marts = sorted(set(marts))
+    if not marts:
+        return {}
+
+    async with redis_client.pipeline(transaction=True) as pipe:
+        for mart in marts:
+            pipe.incr(generation_key(mart))
+        generations = dict(zip(marts, await pipe.execute()))
+
+    keys = [generation_key(mart) for mart in marts]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps({"origin": origin, "keys": keys, "pattern": None}))
+        pipe.publish(MART_REBUILT_CHANNEL, json.dumps({"marts": generations}))
+        await pipe.execute()
+
+    return generations
+
+
+async def notify_marts_rebuilt(marts: Iterable[str]) -> Dict[str, int]:
+    """
+    Avanzar generaciones desde un proceso sin pool de Redis propio (ETL)
+
+    Un fallo de Redis no debe fallar el ETL: se registra y la API seguirá
+    sirviendo la generación anterior hasta su TTL.
+    """
+    marts = list(marts)
+    if not marts:
+        return {}
+
+    client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        generations = await bump_generations(client, marts)
+        logger.info(f"🔢 Cache generations bumped: {generations}")
+        return generations
+    except Exception as e:
+        logger.warning(f"⚠️ Could not bump cache generations for {marts}: {e}")
+        return {}
+    finally:
+        await client.close()
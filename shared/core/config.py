@@ -30,6 +30,8 @@ class Settings(BaseSettings):
     
     # Data Source Configuration
     DATA_SOURCE_TYPE: str = Field(default="bigquery", description="Data source type: bigquery or postgresql")
+    PROJECT_UID: str = Field(default="P3fV4dWNeMkN5RJMhV8e", description="Project id used in raw_/aux_/mart_ schema names")
+    DASHBOARD_BIGQUERY_FALLBACK: bool = Field(default=True, description="Fall back to BigQuery if the Postgres mart query fails")
     
     # Database
     POSTGRES_HOST: str = Field(default="localhost")
@@ -52,6 +54,13 @@ class Settings(BaseSettings):
     BIGQUERY_PROJECT_ID: str = Field(default="mibot-222814")
     BIGQUERY_DATASET: str = Field(default="BI_USA")
     BIGQUERY_LOCATION: str = Field(default="US")
+    BIGQUERY_RESULT_CACHE_MAX_BYTES: int = Field(default=64 * 1024 * 1024)  # Query results kept in memory per worker
+    BIGQUERY_RESULT_CACHE_REDIS: bool = Field(default=False)  # Share query results across workers through Redis
+    BIGQUERY_PRICE_PER_TIB_USD: float = Field(default=6.25)  # On-demand price, for cost-avoided metrics
+    BIGQUERY_COST_GATE: str = Field(default="downgrade")  # off | downgrade (batch priority) | reject, for API queries over budget
+    BIGQUERY_QUERY_BYTES_BUDGET: int = Field(default=10 * 1024 ** 3)  # Estimated bytes per API query before the gate acts
+    BIGQUERY_MAXIMUM_BYTES_BILLED: int = Field(default=100 * 1024 ** 3)  # Hard per-query limit (always enforced)
+    BIGQUERY_DRY_RUN_TTL_SECONDS: int = Field(default=3600)  # How long a query template's byte estimate is reused
     
     # ETL Configuration
     ETL_SCHEDULE_CRON: str = Field(default="0 */3 * * *")
@@ -63,6 +72,18 @@ class Settings(BaseSettings):
     CACHE_TTL_DASHBOARD: int = Field(default=1800)  # 30 minutes
     CACHE_TTL_EVOLUTION: int = Field(default=3600)  # 1 hour
     CACHE_TTL_ASSIGNMENT: int = Field(default=7200)  # 2 hours
+    CACHE_L1_MAX_ENTRIES: int = Field(default=1024)  # In-process cache per worker (0 = disabled)
+    CACHE_L1_TTL_SECONDS: float = Field(default=30.0)  # Max staleness if an invalidation is missed
+    CACHE_LOCK_TTL_SECONDS: int = Field(default=60)  # Single-flight lock while a miss is being computed
+    CACHE_LOCK_WAIT_SECONDS: float = Field(default=30.0)  # Max wait for another worker's computation
+    CACHE_STALE_TTL_SECONDS: int = Field(default=21600)  # 6 hours served stale (while refreshing) after the TTL
+    CACHE_MAX_BACKGROUND_REFRESHES: int = Field(default=4)  # Concurrent stale refreshes per worker
+    CACHE_PREWARM_TOP_N: int = Field(default=20)  # Most requested filter combinations recomputed after a mart rebuild
+    CACHE_TAG_TTL_SECONDS: int = Field(default=172800)  # 2 days, longer than any hard TTL
+    CACHE_INVALIDATION_CHUNK_SIZE: int = Field(default=500)  # Keys per SCAN/ZSCAN page and UNLINK batch
+    CACHE_SERIALIZER: str = Field(default="json")  # json (orjson) | msgpack (needs the "cache" extra)
+    CACHE_COMPRESSOR: str = Field(default="zlib")  # zlib | zstd, lz4 (need the "cache" extra) | none
+    CACHE_COMPRESSION_MIN_BYTES: int = Field(default=1024)
     
     # Security
     SECRET_KEY: str = Field(default="dev-secret-key-change-in-production")
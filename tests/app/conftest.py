@@ -0,0 +1,120 @@
+import pytest
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis.asyncio calls the cache layer makes.
+
+    Strings, hashes and sorted sets live in separate dicts; TTLs are plain
+    numbers the tests set or read (nothing expires on its own).
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.ttls = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def _exists(self, key):
+        return key in self.values or key in self.hashes or key in self.zsets
+
+    # Strings
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    async def setex(self, key, seconds, value):
+        self.values[key] = value
+        self.ttls[key] = seconds
+        return True
+
+    async def exists(self, key):
+        return int(self._exists(key))
+
+    async def eval(self, script, numkeys, key, token):
+        # Only the compare-and-delete lock release script is used
+        if self.values.get(key) == token:
+            del self.values[key]
+            return 1
+        return 0
+
+    # Hashes
+    async def hset(self, key, mapping):
+        self.hashes[key] = {
+            field.encode(): value if isinstance(value, bytes) else str(value).encode()
+            for field, value in mapping.items()
+        }
+
+    async def hgetall(self, key):
+        return self.hashes.get(key, {})
+
+    # Sorted sets
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    async def zremrangebyscore(self, key, low, high):
+        members = self.zsets.get(key, {})
+        expired = [member for member, score in members.items() if score <= float(high)]
+        for member in expired:
+            del members[member]
+        return len(expired)
+
+    async def zscan_iter(self, key, count=None):
+        for member, score in list(self.zsets.get(key, {}).items()):
+            yield member, score
+
+    # Keys
+    async def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    async def ttl(self, key):
+        if not self._exists(key):
+            return -2
+        return self.ttls.get(key, -1)
+
+    async def unlink(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self._exists(key)
+            for store in (self.values, self.hashes, self.zsets, self.ttls):
+                store.pop(key, None)
+        return removed
+
+
+class FakePipeline:
+    """Queues calls and runs them against the FakeRedis on execute()."""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args, **kwargs) for name, args, kwargs in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from app.core.cache_codec import (
+    COMPRESSOR_NONE,
+    COMPRESSOR_ZLIB,
+    HEADER_BASE,
+    SERIALIZER_JSON,
+    CacheCodec,
+)
+
+VALUE = {
+    "segmentoData": [{"name": f"CARTERA_{i}", "cuentas": i, "cobertura": i / 3} for i in range(50)],
+    "fecha": "2025-06-20",
+    "vacio": None,
+}
+
+
+@pytest.mark.parametrize("serializer", ["json", "msgpack"])
+@pytest.mark.parametrize("compressor", ["none", "zlib", "zstd", "lz4"])
+def test_round_trip_for_each_serializer_and_compressor(serializer, compressor):
+    codec = CacheCodec(serializer=serializer, compressor=compressor, compression_min_bytes=0)
+    if codec.SERIALIZER_IDS[serializer] != codec.serializer_id:
+        pytest.skip(f"{serializer} is not installed")
+    if compressor != "none" and codec.COMPRESSOR_IDS[compressor] != codec.compressor_id:
+        pytest.skip(f"{compressor} is not installed")
+
+    encoded = codec.encode(VALUE)
+
+    assert encoded[0] == HEADER_BASE | (codec.serializer_id << 2) | codec.compressor_id
+    assert codec.decode(encoded) == VALUE
+
+
+def test_small_values_are_not_compressed():
+    codec = CacheCodec(serializer="json", compressor="zlib", compression_min_bytes=1024)
+
+    encoded = codec.encode({"total": 1})
+
+    assert encoded[0] == HEADER_BASE | (SERIALIZER_JSON << 2) | COMPRESSOR_NONE
+    assert encoded[1:] == b'{"total":1}'
+
+
+def test_values_that_do_not_shrink_are_stored_uncompressed():
+    codec = CacheCodec(serializer="json", compressor="zlib", compression_min_bytes=0)
+    value = "ok"  # zlib's framing makes it bigger
+
+    encoded = codec.encode(value)
+
+    assert encoded[0] & 0x03 == COMPRESSOR_NONE
+    assert codec.decode(encoded) == value
+
+
+def test_values_written_by_another_compressor_are_readable():
+    writer = CacheCodec(serializer="json", compressor="zlib", compression_min_bytes=0)
+    reader = CacheCodec(serializer="json", compressor="none")
+
+    encoded = writer.encode(VALUE)
+
+    assert encoded[0] & 0x03 == COMPRESSOR_ZLIB
+    assert reader.decode(encoded) == VALUE
+
+
+@pytest.mark.parametrize("legacy", [json.dumps(VALUE).encode(), json.dumps(VALUE), b"[1, 2, 3]", b"42"])
+def test_legacy_json_entries_are_decoded(legacy):
+    assert legacy[0] < 0x80 if isinstance(legacy, bytes) else ord(legacy[0]) < 0x80
+
+    assert CacheCodec().decode(legacy) == json.loads(legacy)
+
+
+def test_empty_value_is_a_miss():
+    assert CacheCodec().decode(None) is None
+    assert CacheCodec().decode(b"") is None
+
+
+def test_unknown_header_is_rejected():
+    with pytest.raises(ValueError):
+        CacheCodec().decode(bytes([0x90]) + b"{}")
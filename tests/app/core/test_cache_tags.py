@@ -0,0 +1,53 @@
+import pytest
+
+from app.core import cache_tags
+from app.core.cache_tags import invalidate_tags, register_tags, tag_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 1_000_000.0}
+    monkeypatch.setattr(cache_tags.time, "time", lambda: now["value"])
+    return now
+
+
+async def _register(redis, key, tags, ttl):
+    redis.values[key] = b"body"
+    async with redis.pipeline(transaction=False) as pipe:
+        register_tags(pipe, key, tags, ttl)
+        await pipe.execute()
+
+
+@pytest.mark.asyncio
+async def test_members_are_scored_by_entry_expiry(clock, fake_redis):
+    redis = fake_redis
+    await _register(redis, "dashboard:a", ["cartera:TEMPRANA"], ttl=300)
+
+    assert redis.zsets[tag_key("cartera:TEMPRANA")] == {"dashboard:a": clock["value"] + 300}
+    assert redis.ttls[tag_key("cartera:TEMPRANA")] >= 300
+
+
+@pytest.mark.asyncio
+async def test_writes_drop_expired_members(clock, fake_redis):
+    redis = fake_redis
+    await _register(redis, "dashboard:old", ["endpoint:dashboard"], ttl=60)
+
+    clock["value"] += 61
+    del redis.values["dashboard:old"]  # Redis already expired the entry
+    await _register(redis, "dashboard:new", ["endpoint:dashboard"], ttl=60)
+
+    assert list(redis.zsets[tag_key("endpoint:dashboard")]) == ["dashboard:new"]
+
+
+@pytest.mark.asyncio
+async def test_invalidation_skips_expired_members(clock, fake_redis):
+    redis = fake_redis
+    await _register(redis, "dashboard:old", ["cartera:TEMPRANA"], ttl=60)
+    await _register(redis, "dashboard:live", ["cartera:TEMPRANA"], ttl=600)
+
+    clock["value"] += 61
+    deleted = [key async for chunk in invalidate_tags(redis, ["cartera:TEMPRANA"]) for key in chunk]
+
+    assert deleted == ["dashboard:live"]
+    assert "dashboard:live" not in redis.values
+    assert tag_key("cartera:TEMPRANA") not in redis.zsets
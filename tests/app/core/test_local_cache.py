@@ -0,0 +1,156 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core import local_cache as local_cache_module
+from app.core.local_cache import (
+    INSTANCE_ID,
+    CacheInvalidationListener,
+    LocalCache,
+    apply_invalidation,
+    invalidation_message,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(local_cache_module.time, "monotonic", lambda: now["value"])
+    return now
+
+
+def _from_other_worker(keys=(), pattern=None):
+    return json.dumps({"origin": "other-worker", "keys": list(keys), "pattern": pattern})
+
+
+class FakePubSubRedis:
+    """redis.pubsub() whose successive subscriptions replay scripted listen() streams."""
+
+    def __init__(self, *streams):
+        self.streams = list(streams)
+        self.subscribed = []
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def subscribe(self, channel):
+        self.redis.subscribed.append(channel)
+
+    def listen(self):
+        return self.redis.streams.pop(0)()
+
+
+def test_lru_evicts_the_least_recently_used_entry(clock):
+    cache = LocalCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+
+
+def test_entries_expire_and_ttl_is_capped_by_the_default(clock):
+    cache = LocalCache(default_ttl=30)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=3600)
+
+    clock["value"] += 6
+    assert cache.get("short") == (False, None)
+    assert cache.get("long") == (True, 2)
+
+    clock["value"] += 25
+    assert cache.get("long") == (False, None)
+    assert len(cache) == 0
+
+
+def test_non_positive_ttl_is_not_cached(clock):
+    cache = LocalCache()
+
+    cache.set("stale", 1, ttl=0)
+
+    assert len(cache) == 0
+
+
+def test_invalidations_from_other_workers_drop_keys_and_patterns():
+    cache = LocalCache()
+    for key in ("dashboard:1", "assignment:1", "assignment:2"):
+        cache.set(key, 1)
+
+    removed = apply_invalidation(cache, _from_other_worker(keys=["dashboard:1"], pattern="assignment:*"))
+
+    assert removed == 3
+    assert len(cache) == 0
+
+
+def test_own_invalidation_messages_are_skipped():
+    cache = LocalCache()
+    cache.set("dashboard:1", 1)
+
+    assert json.loads(invalidation_message(keys=["dashboard:1"]))["origin"] == INSTANCE_ID
+    assert apply_invalidation(cache, invalidation_message(keys=["dashboard:1"])) == 0
+    assert cache.get("dashboard:1") == (True, 1)
+
+
+def test_malformed_invalidation_message_is_ignored():
+    cache = LocalCache()
+    cache.set("dashboard:1", 1)
+
+    assert apply_invalidation(cache, "not json") == 0
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_listener_clears_on_every_subscribe_and_applies_messages():
+    cache = LocalCache()
+    cache.set("missed-while-offline", 1)
+    first_done, drop_connection, second_subscribed = asyncio.Event(), asyncio.Event(), asyncio.Event()
+    seen_after_resubscribe = []
+
+    async def first_subscription():
+        yield {"type": "subscribe", "data": 1}
+        cache.set("dashboard:1", 1)
+        cache.set("dashboard:2", 2)
+        yield {"type": "message", "data": _from_other_worker(keys=["dashboard:1"])}
+        first_done.set()
+        await drop_connection.wait()
+        cache.set("missed-while-reconnecting", 3)
+        raise ConnectionError("connection lost")
+
+    async def second_subscription():
+        seen_after_resubscribe.append(len(cache))
+        second_subscribed.set()
+        await asyncio.Event().wait()
+        yield
+
+    redis = FakePubSubRedis(first_subscription, second_subscription)
+    listener = CacheInvalidationListener(redis, cache)
+    listener.RECONNECT_DELAY_SECONDS = 0
+    listener.start()
+    try:
+        await asyncio.wait_for(first_done.wait(), 1)
+        assert cache.get("missed-while-offline") == (False, None)
+        assert cache.get("dashboard:1") == (False, None)
+        assert cache.get("dashboard:2") == (True, 2)
+
+        drop_connection.set()
+        await asyncio.wait_for(second_subscribed.wait(), 1)
+        assert seen_after_resubscribe == [0]
+        assert len(redis.subscribed) == 2
+    finally:
+        await listener.stop()
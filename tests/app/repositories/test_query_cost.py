@@ -0,0 +1,150 @@
+import pytest
+from google.cloud.bigquery import QueryPriority
+
+from app.repositories.bigquery_repo import BigQueryRepository
+from app.repositories.query_cost import QueryCostExceededError, QueryCostGate
+
+GB = 1024 ** 3
+
+
+class FakeJob:
+    def __init__(self, total_bytes_processed):
+        self.total_bytes_processed = total_bytes_processed
+        self.slot_millis = 10
+        self.cache_hit = False
+
+    def result(self, max_results=None):
+        return [{"total": 1}]
+
+
+class FakeClient:
+    """BigQuery client whose jobs report the bytes chosen by the test."""
+
+    def __init__(self, estimated_bytes, processed_bytes=None):
+        self.estimated_bytes = estimated_bytes
+        self.processed_bytes = estimated_bytes if processed_bytes is None else processed_bytes
+        self.dry_runs = []
+        self.jobs = []
+
+    def query(self, query, job_config=None):
+        if job_config.dry_run:
+            self.dry_runs.append(query)
+            return FakeJob(self.estimated_bytes)
+        self.jobs.append(job_config)
+        return FakeJob(self.processed_bytes)
+
+
+def _gate(mode="downgrade"):
+    return QueryCostGate(mode=mode, budget_bytes=1 * GB, max_bytes_billed=10 * GB, estimate_ttl=600)
+
+
+def _repo(client, gate):
+    repo = BigQueryRepository(max_workers=1, cost_gate=gate)
+    # Skip the real connection: the scheduled connect() sees a connected client
+    repo.client = client
+    repo.is_connected = True
+    return repo
+
+
+def _dry_run(estimated_bytes, calls):
+    async def dry_run():
+        calls.append(estimated_bytes)
+        return estimated_bytes
+    return dry_run
+
+
+@pytest.mark.asyncio
+async def test_query_within_budget_is_allowed():
+    decision = await _gate().check("t", "dashboard", _dry_run(GB // 2, []))
+
+    assert decision.action == "allow"
+    assert decision.estimated_bytes == GB // 2
+
+
+@pytest.mark.asyncio
+async def test_query_over_budget_is_downgraded():
+    decision = await _gate("downgrade").check("t", "dashboard", _dry_run(2 * GB, []))
+
+    assert decision.downgrade
+    assert decision.estimated_bytes == 2 * GB
+
+
+@pytest.mark.asyncio
+async def test_query_over_budget_is_rejected_in_reject_mode():
+    with pytest.raises(QueryCostExceededError) as exc_info:
+        await _gate("reject").check("t", "dashboard", _dry_run(2 * GB, []))
+
+    assert exc_info.value.limit_bytes == 1 * GB
+
+
+@pytest.mark.asyncio
+async def test_query_over_maximum_bytes_billed_is_always_rejected():
+    with pytest.raises(QueryCostExceededError) as exc_info:
+        await _gate("downgrade").check("t", "dashboard", _dry_run(11 * GB, []))
+
+    assert exc_info.value.limit_bytes == 10 * GB
+
+
+@pytest.mark.asyncio
+async def test_dry_run_is_cached_per_template():
+    gate = _gate()
+    calls = []
+
+    await gate.check("template-a", "dashboard", _dry_run(GB // 2, calls))
+    await gate.check("template-a", "dashboard", _dry_run(GB // 2, calls))
+    await gate.check("template-b", "dashboard", _dry_run(GB // 2, calls))
+
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_actual_bytes_replace_the_estimate():
+    gate = _gate()
+    await gate.check("t", "dashboard", _dry_run(GB // 2, []))
+
+    gate.record_actual("t", 2 * GB, cache_hit=False)
+
+    assert (await gate.check("t", "dashboard", _dry_run(GB // 2, []))).downgrade
+
+
+@pytest.mark.asyncio
+async def test_failed_dry_run_does_not_block_the_query():
+    async def failing_dry_run():
+        raise RuntimeError("dry-run unavailable")
+
+    assert (await _gate().check("t", "dashboard", failing_dry_run)).action == "allow"
+
+
+@pytest.mark.asyncio
+async def test_gate_off_skips_the_dry_run():
+    calls = []
+
+    assert (await _gate("off").check("t", "dashboard", _dry_run(11 * GB, calls))).action == "allow"
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_repository_caps_every_job_and_downgrades_over_budget():
+    client = FakeClient(estimated_bytes=GB // 2, processed_bytes=2 * GB)
+    repo = _repo(client, _gate())
+    query = "SELECT SUM(cuentas) AS total FROM t WHERE cartera IN UNNEST(@carteras)"
+
+    await repo.execute_query(query, {"carteras": ["TEMPRANA"]}, endpoint="dashboard")
+    # Same template with other values: no new dry-run, but the last job scanned 2 GB
+    await repo.execute_query(query, {"carteras": ["ALTAS_NUEVAS"]}, endpoint="dashboard")
+
+    assert len(client.dry_runs) == 1
+    assert [job.maximum_bytes_billed for job in client.jobs] == [10 * GB, 10 * GB]
+    assert client.jobs[0].priority != QueryPriority.BATCH
+    assert client.jobs[1].priority == QueryPriority.BATCH
+
+
+@pytest.mark.asyncio
+async def test_repository_does_not_run_rejected_queries():
+    client = FakeClient(estimated_bytes=2 * GB)
+    repo = _repo(client, _gate("reject"))
+
+    with pytest.raises(QueryCostExceededError):
+        await repo.execute_query("SELECT * FROM t", endpoint="dashboard")
+
+    assert client.jobs == []
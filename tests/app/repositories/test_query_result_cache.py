@@ -0,0 +1,110 @@
+import orjson
+import pytest
+
+from app.core.cache import cache as redis_cache
+from app.core.cache_codec import cache_codec
+from app.repositories import query_result_cache
+from app.repositories.query_result_cache import (
+    REDIS_KEY_PREFIX,
+    QueryResultCache,
+    normalize_sql,
+    query_cache_key,
+)
+
+ROWS = [{"cartera": "TEMPRANA", "cuentas": 10}]
+ROW_BYTES = len(orjson.dumps(ROWS))
+
+
+def _type_of(value):
+    return {bool: "BOOL", int: "INT64", float: "FLOAT64", str: "STRING"}[type(value)]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 1000.0}
+    monkeypatch.setattr(query_result_cache.time, "monotonic", lambda: now["value"])
+    return now
+
+
+@pytest.fixture
+def redis_tier(monkeypatch, fake_redis):
+    monkeypatch.setattr(redis_cache, "binary_redis", fake_redis)
+    return fake_redis
+
+
+def test_normalize_sql_drops_comments_and_spacing_but_not_literals():
+    query = """
+        SELECT  cartera, -- dimensión
+                SUM(cuentas)   /* total */
+        FROM t WHERE servicio = 'MOVIL  FIJA'
+    """
+
+    assert normalize_sql(query) == "SELECT cartera, SUM(cuentas) FROM t WHERE servicio = 'MOVIL  FIJA'"
+
+
+def test_cache_key_ignores_formatting_and_param_order():
+    first = query_cache_key("SELECT *\n  FROM t WHERE a = @a AND b = @b", {"a": 1, "b": "x"}, _type_of)
+    second = query_cache_key("SELECT * FROM t WHERE a = @a AND b = @b -- same", {"b": "x", "a": 1}, _type_of)
+
+    assert first == second
+
+
+def test_cache_key_distinguishes_parameter_types():
+    assert query_cache_key("SELECT @a", {"a": 1}, _type_of) != query_cache_key("SELECT @a", {"a": "1"}, _type_of)
+
+
+@pytest.mark.asyncio
+async def test_memory_tier_is_bounded_in_bytes_with_lru_eviction(clock):
+    cache = QueryResultCache(max_bytes=ROW_BYTES * 2, use_redis=False)
+    await cache.set("a", ROWS, 100, ttl=60)
+    await cache.set("b", ROWS, 100, ttl=60)
+    assert await cache.get("a") == ROWS  # "b" is now the least recently used
+
+    await cache.set("c", ROWS, 100, ttl=60)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == ROWS
+    assert await cache.get("c") == ROWS
+    assert cache.total_bytes == ROW_BYTES * 2
+
+
+@pytest.mark.asyncio
+async def test_results_larger_than_the_bound_are_not_kept(clock):
+    cache = QueryResultCache(max_bytes=ROW_BYTES - 1, use_redis=False)
+
+    await cache.set("a", ROWS, 100, ttl=60)
+
+    assert len(cache) == 0
+    assert cache.total_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_their_ttl(clock):
+    cache = QueryResultCache(max_bytes=10_000, use_redis=False)
+    await cache.set("a", ROWS, 100, ttl=60)
+
+    clock["value"] += 59
+    assert await cache.get("a") == ROWS
+    clock["value"] += 2
+    assert await cache.get("a") is None
+    assert cache.total_bytes == 0
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_shared_between_workers(clock, redis_tier):
+    writer = QueryResultCache(max_bytes=10_000, use_redis=True)
+    reader = QueryResultCache(max_bytes=10_000, use_redis=True)
+
+    await writer.set("a", ROWS, 100, ttl=60)
+
+    assert redis_tier.ttls[f"{REDIS_KEY_PREFIX}a"] == 60
+    assert await reader.get("a") == ROWS
+    assert len(reader) == 1  # Promoted to the reader's memory tier
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("raw", [b"\xc0{not json", bytes([0xCF]) + b"payload", cache_codec.encode(["no", "rows"])])
+async def test_unreadable_redis_entry_is_a_miss(clock, redis_tier, raw):
+    await redis_tier.setex(f"{REDIS_KEY_PREFIX}a", 60, raw)
+
+    assert await QueryResultCache(max_bytes=10_000, use_redis=True).get("a") is None
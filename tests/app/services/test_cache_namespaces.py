@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.local_cache import LocalCache
+from app.services.cache_namespaces import CacheGenerations, MartRebuiltListener
+from shared.core.cache_generations import generation_key
+
+
+class RecordingPrewarmer:
+    """Records the generation the prewarm would version its keys with."""
+
+    def __init__(self, l1):
+        self.l1 = l1
+        self.seen = []
+
+    async def prewarm(self, redis_client, generations):
+        self.seen.append(await CacheGenerations(redis_client, self.l1).get("dashboard_data"))
+        return {}
+
+
+@pytest.mark.asyncio
+async def test_prewarm_uses_the_generation_from_the_rebuild_message():
+    l1 = LocalCache()
+    l1.set(generation_key("dashboard_data"), 41)  # Invalidation not delivered yet
+    prewarmer = RecordingPrewarmer(l1)
+    listener = MartRebuiltListener(redis_client=None, cache_prewarmer=prewarmer, l1_cache=l1)
+
+    listener._on_message(json.dumps({"marts": {"dashboard_data": 42}}))
+    await asyncio.gather(*listener._prewarm_tasks)
+
+    assert prewarmer.seen == [42]
+
+
+@pytest.mark.asyncio
+async def test_late_rebuild_message_does_not_roll_the_generation_back():
+    l1 = LocalCache()
+    l1.set(generation_key("dashboard_data"), 43)
+    listener = MartRebuiltListener(redis_client=None, cache_prewarmer=RecordingPrewarmer(l1), l1_cache=l1)
+
+    listener._on_message(json.dumps({"marts": {"dashboard_data": 42}}))
+    await asyncio.gather(*listener._prewarm_tasks)
+
+    assert l1.get(generation_key("dashboard_data")) == (True, 43)
+
+
+def test_invalid_rebuild_message_is_ignored():
+    l1 = LocalCache()
+    listener = MartRebuiltListener(redis_client=None, cache_prewarmer=RecordingPrewarmer(l1), l1_cache=l1)
+
+    listener._on_message("not json")
+
+    assert not listener._prewarm_tasks
+    assert len(l1) == 0
@@ -0,0 +1,86 @@
+import pytest
+
+from app.services.dashboard_engines import (
+    BASE_METRIC_COLUMNS,
+    BigQueryDashboardEngine,
+    DashboardEngine,
+    PostgresDashboardEngine,
+)
+
+
+class FakeBigQueryRepo:
+    """Answers the INFORMATION_SCHEMA lookup and then the dashboard query."""
+
+    def __init__(self, columns, records=None):
+        self.columns = columns
+        self.records = records or []
+        self.queries = []
+
+    async def execute_query(self, query, params=None, endpoint="other"):
+        self.queries.append(query)
+        if "INFORMATION_SCHEMA" in query:
+            return [{"column_name": column} for column in self.columns]
+        return self.records
+
+
+def test_split_by_dimension_leaves_the_records_untouched():
+    records = [
+        {"dimension": "cartera", "name": "TEMPRANA", "cuentas_asignadas": 10},
+        {"dimension": "servicio", "name": "MOVIL", "cuentas_asignadas": 7},
+        {"dimension": "servicio", "name": None, "cuentas_asignadas": 1},
+    ]
+
+    totals = DashboardEngine._split_by_dimension(records, ["cartera", "servicio"])
+
+    assert totals == {
+        "cartera": [{"name": "TEMPRANA", "cuentas_asignadas": 10}],
+        "servicio": [{"name": "MOVIL", "cuentas_asignadas": 7}],
+    }
+    assert all("dimension" in record for record in records)
+
+
+def test_build_query_reports_missing_columns_as_zero():
+    engine = BigQueryDashboardEngine(repo=None)
+    available = [column for column in BASE_METRIC_COLUMNS if column != "cuentas_pagadoras"]
+
+    query = engine.build_query(["cartera"], "1=1", available)
+
+    assert "0 AS cuentas_pagadoras" in query
+    assert "SUM(cuentas_pagadoras)" not in query
+    assert "SUM(cuentas_asignadas) AS cuentas_asignadas" in query
+
+
+@pytest.mark.asyncio
+async def test_table_columns_are_read_once():
+    repo = FakeBigQueryRepo(
+        columns=["TIPO_CARTERA", "cuentas_asignadas", "deuda_inicial_total"],
+        records=[{"dimension": "cartera", "name": "TEMPRANA", "cuentas_asignadas": 10}],
+    )
+    engine = BigQueryDashboardEngine(repo)
+
+    await engine.get_dimension_totals({}, ["cartera"])
+    totals = await engine.get_dimension_totals({}, ["cartera"])
+
+    assert totals == {"cartera": [{"name": "TEMPRANA", "cuentas_asignadas": 10}]}
+    assert sum("INFORMATION_SCHEMA" in query for query in repo.queries) == 1
+    assert "0 AS total_gestiones_validas" in repo.queries[-1]
+    assert "SUM(deuda_inicial_total)" in repo.queries[-1]
+
+
+def test_engines_must_implement_dimension_totals():
+    class IncompleteEngine(DashboardEngine):
+        source_name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteEngine(repo=None)
+
+
+def test_postgres_periodo_is_the_campaign_period_from_calendario():
+    engine = PostgresDashboardEngine(repo=None, schema="mart_test")
+
+    query = engine.build_query(["periodo"])
+
+    assert "TO_CHAR" not in query
+    assert "p.periodo_mes" in query
+    assert f"FROM {engine.calendar_table} c" in query
+    assert "p.periodo_mes = ANY($4::text[])" in query
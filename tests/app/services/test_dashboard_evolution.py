@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from app.services.dashboard_engines import DailySeriesUnavailableError, DashboardEngine
+from app.services.dashboard_service_v2 import DashboardServiceV2
+
+
+class SnapshotOnlyEngine(DashboardEngine):
+    """Like BigQuery: dimension totals only, no daily history."""
+
+    source_name = "bigquery"
+
+    async def get_dimension_totals(self, filters, dimensions, fecha_corte=None):
+        return {}
+
+
+class DailyEngine(SnapshotOnlyEngine):
+    source_name = "postgresql"
+
+    def __init__(self, records=None, error=None):
+        super().__init__(repo=None)
+        self.records = records or []
+        self.error = error
+
+    async def get_daily_totals(self, filters, fecha_inicio, fecha_fin):
+        if self.error:
+            raise self.error
+        return self.records
+
+
+RANGE = (date(2025, 6, 1), date(2025, 6, 2))
+
+
+@pytest.mark.asyncio
+async def test_engine_without_daily_series_is_reported_as_unavailable():
+    service = DashboardServiceV2(SnapshotOnlyEngine(repo=None))
+
+    with pytest.raises(DailySeriesUnavailableError):
+        await service.get_evolution_data({}, *RANGE)
+
+
+@pytest.mark.asyncio
+async def test_daily_engine_failure_is_reported_as_unavailable():
+    service = DashboardServiceV2(DailyEngine(error=ConnectionError("mart down")))
+
+    with pytest.raises(DailySeriesUnavailableError) as exc_info:
+        await service.get_evolution_data({}, *RANGE)
+    assert isinstance(exc_info.value.__cause__, ConnectionError)
+
+
+@pytest.mark.asyncio
+async def test_evolution_reads_the_daily_engine_not_the_primary():
+    daily = DailyEngine(records=[{
+        "dia": date(2025, 6, 1), "cuentas_asignadas": 10, "deuda_inicial_total": 100,
+        "deuda_actual_total": 80, "cuentas_gestionadas": 5, "cuentas_con_contacto_directo": 2,
+        "cuentas_con_contacto_indirecto": 1, "cuentas_con_compromiso": 1, "cuentas_pagadoras": 1,
+        "total_gestiones_validas": 10, "recupero": 20,
+    }])
+    service = DashboardServiceV2(SnapshotOnlyEngine(repo=None), daily_engine=daily)
+
+    points = (await service.get_evolution_data({}, *RANGE))["evolutionData"]
+
+    assert len(points) == 1
+    assert points[0]["fecha"] == "2025-06-01"
+    assert points[0]["dia_gestion"] == 1
+    assert points[0]["cobertura"] == 50.0
+    assert points[0]["cd"] == 20.0
@@ -0,0 +1,113 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models.productivity import ProductivityRequest
+from app.services.productivity_service import ProductivityService
+
+
+class FakeRollupRepo:
+    """Returns canned rows per rollup query and records the parameters."""
+
+    def __init__(self, rows_by_marker):
+        self.rows_by_marker = rows_by_marker
+        self.calls = []
+
+    async def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        for marker, rows in self.rows_by_marker.items():
+            if marker in query:
+                return rows
+        return []
+
+
+def _service(rows_by_marker):
+    return ProductivityService(FakeRollupRepo(rows_by_marker), cache_service=None, schema="mart_test")
+
+
+def _request(**kwargs):
+    kwargs.setdefault("fecha_inicio", date(2025, 5, 20))
+    kwargs.setdefault("fecha_fin", date(2025, 6, 19))
+    return ProductivityRequest(**kwargs)
+
+
+@pytest.mark.asyncio
+async def test_agent_ranking_maps_rows_and_keeps_global_rank_when_filtering():
+    service = _service({"NTILE(4)": [
+        {"correo_agente": "a@x", "agent_name": "Ana", "calls": 100, "direct_contacts": 40, "commitments": 20,
+         "amount_recovered": Decimal("1500.50"), "rank": 1, "quartile": 1, "closing_rate": Decimal("50.00"),
+         "commitment_conversion": Decimal("20.00")},
+        {"correo_agente": "b@x", "agent_name": "Beto", "calls": 80, "direct_contacts": 10, "commitments": 5,
+         "amount_recovered": Decimal("300"), "rank": 2, "quartile": 2, "closing_rate": Decimal("50.00"),
+         "commitment_conversion": Decimal("6.25")},
+    ]})
+
+    ranking = await service._get_agent_ranking(_request(agente="Beto"))
+
+    assert [(row.id, row.rank, row.quartile) for row in ranking] == [("b@x", 2, 2)]
+    assert ranking[0].amountRecovered == 300.0
+    query, params = service.db_repo.calls[0]
+    assert "mart_test.productivity_data" in query
+    assert list(params) == ["fecha_inicio", "fecha_fin", "archivos", "carteras"]
+
+
+@pytest.mark.asyncio
+async def test_daily_trend_has_one_point_per_date_across_months():
+    service = _service({"GROUP BY p.fecha_foto": [
+        {"fecha_foto": date(2025, 5, 20), "llamadas": 10, "compromisos": 2, "recupero": Decimal("100")},
+        {"fecha_foto": date(2025, 6, 20), "llamadas": 30, "compromisos": 4, "recupero": Decimal("250")},
+    ]})
+
+    trend = await service._get_daily_trends(_request())
+
+    assert [(point.fecha, point.day, point.llamadas) for point in trend] == [
+        ("2025-05-20", 20, 10),
+        ("2025-06-20", 20, 30),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hourly_trend_formats_hours_from_the_hourly_rollup():
+    service = _service({"GROUP BY p.hora": [
+        {"hora": 9, "llamadas": 12, "compromisos": 3},
+        {"hora": 14, "llamadas": 7, "compromisos": 1},
+    ]})
+
+    trend = await service._get_hourly_trends(_request())
+
+    assert [(point.hour, point.llamadas) for point in trend] == [("09:00", 12), ("14:00", 7)]
+    assert "mart_test.productivity_hourly" in service.db_repo.calls[0][0]
+
+
+@pytest.mark.asyncio
+async def test_heatmap_keys_days_by_date_so_months_do_not_collide():
+    service = _service({"GROUP BY p.correo_agente, p.fecha_foto": [
+        {"correo_agente": "a@x", "agent_name": "Ana", "dni": "1", "fecha_foto": date(2025, 5, 20),
+         "gestiones": 5, "contactos_efectivos": 2, "compromisos": 1},
+        {"correo_agente": "a@x", "agent_name": "Ana", "dni": "1", "fecha_foto": date(2025, 6, 20),
+         "gestiones": 9, "contactos_efectivos": 4, "compromisos": 2},
+    ]})
+
+    heatmap = await service._get_agent_heatmap(_request())
+
+    assert len(heatmap) == 1
+    performance = heatmap[0].dailyPerformance
+    assert sorted(performance) == ["2025-05-20", "2025-06-20"]
+    assert performance["2025-05-20"].gestiones == 5
+    assert performance["2025-06-20"].gestiones == 9
+
+
+def test_query_params_normalize_filters_and_default_range():
+    service = _service({})
+
+    params = service._build_query_params(ProductivityRequest(
+        fecha_fin=date(2025, 6, 30), filtros={"archivo": ["CAMP_A", "CAMP_B.txt"], "cartera": ["TODAS"]}
+    ))
+
+    assert params == {
+        "fecha_inicio": date(2025, 5, 31),
+        "fecha_fin": date(2025, 6, 30),
+        "archivos": ["CAMP_A.txt", "CAMP_B.txt"],
+        "carteras": None,
+    }
@@ -0,0 +1,138 @@
+import asyncio
+import gzip
+
+import orjson
+import pytest
+from starlette.requests import Request
+
+from app.services.cache_service import SingleFlight
+from app.services.response_cache import ResponseCache, _etag_matches
+
+
+def _request(**headers):
+    return Request({
+        "type": "http",
+        "headers": [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def _builder(payload):
+    calls = []
+
+    async def build():
+        calls.append(1)
+        return payload
+
+    return build, calls
+
+
+SMALL = {"segmentoData": [{"name": "TEMPRANA", "cuentas": 10}]}
+LARGE = {"segmentoData": [{"name": f"CARTERA_{i}", "cuentas": i} for i in range(200)]}
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('W/"abc"', True),
+    ('"abc"', True),
+    ('W/"xyz", W/"abc"', True),
+    ('"xyz" ,  "abc"', True),
+    ("*", True),
+    ('W/"xyz"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches_weakly(if_none_match, expected):
+    assert _etag_matches(if_none_match, 'W/"abc"') is expected
+
+
+@pytest.mark.asyncio
+async def test_miss_builds_stores_and_serves_the_body(fake_redis):
+    cache = ResponseCache(fake_redis)
+    build, calls = _builder(SMALL)
+
+    response = await cache.get_or_build(_request(), "dash:1", build, expire_in=60)
+
+    assert response.status_code == 200
+    assert orjson.loads(response.body) == SMALL
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in response.headers
+    assert cache.redis.ttls["dash:1"] == 60
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_matching_etag_gets_304_without_rebuilding(fake_redis):
+    cache = ResponseCache(fake_redis)
+    build, calls = _builder(SMALL)
+    etag = (await cache.get_or_build(_request(), "dash:1", build, expire_in=60)).headers["etag"]
+
+    response = await cache.get_or_build(_request(if_none_match=etag), "dash:1", build, expire_in=60)
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+    assert len(calls) == 1
+
+
+def test_gzip_only_at_or_above_the_threshold(fake_redis):
+    cache = ResponseCache(fake_redis)
+
+    assert cache.build(b"x" * (ResponseCache.GZIP_MIN_BYTES - 1)).content_encoding is None
+    compressed = cache.build(b"x" * ResponseCache.GZIP_MIN_BYTES)
+    assert compressed.content_encoding == "gzip"
+    assert gzip.decompress(compressed.body) == b"x" * ResponseCache.GZIP_MIN_BYTES
+
+
+def test_etag_does_not_depend_on_compression(fake_redis):
+    body = orjson.dumps(LARGE)
+
+    compressed = ResponseCache(fake_redis).build(body)
+    plain = ResponseCache(fake_redis, gzip_min_bytes=10**9).build(body)
+
+    assert compressed.content_encoding == "gzip" and plain.content_encoding is None
+    assert compressed.etag == plain.etag
+
+
+@pytest.mark.asyncio
+async def test_gzip_body_is_sent_only_to_clients_that_accept_it(fake_redis):
+    cache = ResponseCache(fake_redis)
+    build, _ = _builder(LARGE)
+    await cache.get_or_build(_request(), "dash:big", build, expire_in=60)
+
+    gzipped = await cache.get_or_build(_request(accept_encoding="br, gzip"), "dash:big", build, expire_in=60)
+    plain = await cache.get_or_build(_request(accept_encoding="gzip;q=0"), "dash:big", build, expire_in=60)
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert orjson.loads(gzip.decompress(gzipped.body)) == LARGE
+    assert "content-encoding" not in plain.headers
+    assert orjson.loads(plain.body) == LARGE
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_and_refreshed_in_background(fake_redis):
+    cache = ResponseCache(fake_redis)
+    old_build, _ = _builder({"version": 1})
+    await cache.get_or_build(_request(), "dash:swr", old_build, expire_in=60, stale_ttl=300)
+    assert fake_redis.ttls["dash:swr"] == 360
+
+    fake_redis.ttls["dash:swr"] = 120  # Soft TTL passed, still within stale_ttl
+    new_build, calls = _builder({"version": 2})
+    response = await cache.get_or_build(_request(), "dash:swr", new_build, expire_in=60, stale_ttl=300)
+
+    assert orjson.loads(response.body) == {"version": 1}
+    await asyncio.gather(*SingleFlight._refresh_tasks)
+    assert len(calls) == 1
+    assert orjson.loads(fake_redis.hashes["dash:swr"][b"body"]) == {"version": 2}
+    assert fake_redis.ttls["dash:swr"] == 360
+
+
+@pytest.mark.asyncio
+async def test_fresh_entry_is_not_refreshed(fake_redis):
+    cache = ResponseCache(fake_redis)
+    build, calls = _builder(SMALL)
+    await cache.get_or_build(_request(), "dash:fresh", build, expire_in=60, stale_ttl=300)
+
+    await cache.get_or_build(_request(), "dash:fresh", build, expire_in=60, stale_ttl=300)
+
+    assert not SingleFlight._refresh_tasks
+    assert len(calls) == 1
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.services.cache_service import SingleFlight
+
+
+async def _no_value():
+    return None
+
+
+@pytest.fixture
+def flight(fake_redis):
+    return SingleFlight(fake_redis, namespace="test")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_computation(flight):
+    calls = 0
+    release = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"total": 42}
+
+    tasks = [asyncio.create_task(flight.run("k", compute, _no_value)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == [{"total": 42}] * 5
+    assert calls == 1
+    assert "test:k" not in SingleFlight._inflight
+
+
+@pytest.mark.asyncio
+async def test_leader_exception_reaches_followers(flight):
+    release = asyncio.Event()
+
+    async def compute():
+        await release.wait()
+        raise ValueError("bigquery down")
+
+    tasks = [asyncio.create_task(flight.run("k", compute, _no_value)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert "test:k" not in SingleFlight._inflight
+
+
+@pytest.mark.asyncio
+async def test_leader_cancellation_does_not_cancel_followers(flight):
+    calls = 0
+    started = asyncio.Event()
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            started.set()
+            await asyncio.Event().wait()  # The leader's request goes away here
+        await asyncio.sleep(0.01)
+        return "fresh"
+
+    leader = asyncio.create_task(flight.run("k", compute, _no_value))
+    await started.wait()
+    followers = [asyncio.create_task(flight.run("k", compute, _no_value)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+    # One follower takes over the computation; the others wait for it
+    assert await asyncio.gather(*followers) == ["fresh"] * 3
+    assert calls == 2
+    assert "test:k" not in SingleFlight._inflight
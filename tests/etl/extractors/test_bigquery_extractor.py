@@ -0,0 +1,81 @@
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from etl.extractors.bigquery_extractor import BigQueryExtractor, RowBatch
+
+
+def test_record_batch_to_rows_keeps_native_types():
+    pa = pytest.importorskip("pyarrow")
+    creado_el = datetime(2025, 6, 1, 12, 30, tzinfo=timezone.utc)
+    record_batch = pa.RecordBatch.from_pydict({
+        "uid": ["a", "b"],
+        "creado_el": pa.array([creado_el, None], type=pa.timestamp("us", tz="UTC")),
+        "monto": pa.array([Decimal("10.50"), Decimal("3.00")], type=pa.decimal128(10, 2)),
+    })
+
+    row_batch = BigQueryExtractor._record_batch_to_rows(record_batch)
+
+    assert row_batch.columns == ["uid", "creado_el", "monto"]
+    assert len(row_batch) == 2
+    assert row_batch.rows[0] == ("a", creado_el, Decimal("10.50"))
+    assert row_batch.rows[1][1] is None
+
+
+def test_rechunk_respects_batch_size():
+    source = [RowBatch(["uid"], [(i,) for i in range(7)]), RowBatch(["uid"], [(7,), (8,)])]
+
+    chunks = list(BigQueryExtractor._rechunk(source, batch_size=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 4, 1]
+    assert [row for chunk in chunks for row in chunk.rows] == [(i,) for i in range(9)]
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_runs_off_the_event_loop():
+    extractor = BigQueryExtractor(max_workers=2)
+    loop_thread = threading.get_ident()
+    seen_threads = set()
+
+    def pages():
+        for i in range(5):
+            seen_threads.add(threading.get_ident())
+            yield i
+
+    items = [item async for item in extractor._iterate_in_executor(pages())]
+
+    assert items == [0, 1, 2, 3, 4]
+    assert loop_thread not in seen_threads
+    await extractor.close()
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_executor_propagates_errors_and_stops_early():
+    extractor = BigQueryExtractor(max_workers=2)
+    produced = []
+
+    def failing_pages():
+        yield 1
+        raise RuntimeError("page fetch failed")
+
+    with pytest.raises(RuntimeError, match="page fetch failed"):
+        async for _ in extractor._iterate_in_executor(failing_pages()):
+            pass
+
+    def endless_pages():
+        i = 0
+        while True:
+            produced.append(i)
+            yield i
+            i += 1
+
+    stream = extractor._iterate_in_executor(endless_pages())
+    async for item in stream:
+        if item == 2:
+            break
+    await stream.aclose()
+
+    assert len(produced) < 10
+    await extractor.close()
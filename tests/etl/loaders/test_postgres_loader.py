@@ -0,0 +1,259 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timezone
+
+from etl.change_tracking import record_changed_partitions
+from etl.config import ETLConfig, TableType, LoadStrategy
+from etl.loaders.postgres_loader import PostgresLoader
+from etl.watermarks import BatchCheckpoint
+
+
+class FakeConnection:
+    """Records the calls the loader makes against an asyncpg connection."""
+
+    def __init__(self, inserted=0, updated=0):
+        self.executed = []
+        self.copied = None
+        self.executemany_rows = None
+        self.counts = {"inserted_count": inserted, "updated_count": updated}
+        self.transaction_depth = 0
+        self.checkpoint_depth = None
+        self.changes = None
+
+    @asynccontextmanager
+    async def transaction(self):
+        self.transaction_depth += 1
+        try:
+            yield
+        finally:
+            self.transaction_depth -= 1
+
+    async def execute(self, query, *args):
+        self.executed.append(query)
+        if "etl_watermark_checkpoints" in query:
+            self.checkpoint_depth = self.transaction_depth
+        if "etl_changed_partitions" in query:
+            self.changes = (self.transaction_depth, args)
+
+    async def executemany(self, query, rows):
+        self.executemany_rows = rows
+
+    async def copy_records_to_table(self, table_name, records, columns):
+        self.copied = (table_name, list(records), columns)
+
+    async def fetch(self, query, *args):
+        return [{"column_name": name} for name in ("uid", "valor", "creado_el")]
+
+    async def fetchrow(self, query, *args):
+        self.executed.append(query)
+        return self.counts
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.conn
+
+
+class FakeDbManager:
+    def __init__(self, conn):
+        self.pool = FakePool(conn)
+
+    async def get_pool(self):
+        return self.pool
+
+
+def _columns(*names):
+    async def fetch(query, *args):
+        return [{"column_name": name} for name in names]
+    return fetch
+
+
+def _records(n):
+    return [{"uid": str(i), "valor": i} for i in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_copy_merge_reports_inserted_and_updated():
+    conn = FakeConnection(inserted=700, updated=300)
+    loader = PostgresLoader(FakeDbManager(conn))
+
+    result = await loader.load_data_batch(
+        table_name="voicebot_gestiones",
+        table_type=TableType.RAW,
+        data=_records(1000),
+        primary_key=["uid"],
+    )
+
+    assert result.status == "success"
+    assert result.inserted_records == 700
+    assert result.updated_records == 300
+    assert conn.executemany_rows is None
+    staging_table, rows, columns = conn.copied
+    assert staging_table == "_stg_voicebot_gestiones"
+    assert columns == ["uid", "valor"]
+    assert len(rows) == 1000
+    assert any("ON COMMIT DROP" in q for q in conn.executed)
+    assert any("ON CONFLICT (\"uid\") DO UPDATE" in q for q in conn.executed)
+
+
+@pytest.mark.asyncio
+async def test_copy_merge_keeps_last_duplicate_primary_key():
+    conn = FakeConnection(inserted=999)
+    loader = PostgresLoader(FakeDbManager(conn))
+    data = _records(999) + [{"uid": "0", "valor": -1}]
+
+    result = await loader.load_data_batch(
+        table_name="voicebot_gestiones",
+        table_type=TableType.RAW,
+        data=data,
+        primary_key=["uid"],
+        load_strategy=LoadStrategy.COPY_MERGE,
+    )
+
+    _, rows, _ = conn.copied
+    assert len(rows) == 999
+    assert ["0", -1] in rows
+    assert result.skipped_records == 1
+    assert result.total_records == 1000
+
+
+@pytest.mark.asyncio
+async def test_small_batches_and_upsert_tables_use_executemany():
+    conn = FakeConnection()
+    loader = PostgresLoader(FakeDbManager(conn))
+
+    assert ETLConfig.get_config("calendario").load_strategy == LoadStrategy.UPSERT
+    result = await loader.load_data_batch(
+        table_name="voicebot_gestiones",
+        table_type=TableType.RAW,
+        data=_records(ETLConfig.COPY_MERGE_MIN_BATCH_SIZE - 1),
+        primary_key=["uid"],
+    )
+
+    assert conn.copied is None
+    assert len(conn.executemany_rows) == ETLConfig.COPY_MERGE_MIN_BATCH_SIZE - 1
+    assert result.inserted_records == ETLConfig.COPY_MERGE_MIN_BATCH_SIZE - 1
+    assert result.updated_records == 0
+
+
+@pytest.mark.asyncio
+async def test_load_rows_batch_aligns_tuples_to_target_columns():
+    conn = FakeConnection()
+    loader = PostgresLoader(FakeDbManager(conn))
+
+    result = await loader.load_rows_batch(
+        table_name="calendario",
+        table_type=TableType.RAW,
+        columns=["VALOR", "extra", "UID"],
+        rows=[(1, "x", "a"), (2, "y", None)],
+        primary_key=["uid"],
+    )
+
+    assert result.status == "success"
+    assert result.inserted_records == 1
+    assert result.skipped_records == 1
+    assert conn.executemany_rows == [("a", 1)]
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_is_saved_in_the_batch_transaction():
+    conn = FakeConnection()
+    loader = PostgresLoader(FakeDbManager(conn))
+    checkpoint = BatchCheckpoint(
+        table_name="voicebot_gestiones",
+        range_start=datetime(2025, 6, 1, tzinfo=timezone.utc),
+        checkpoint_value=datetime(2025, 6, 1, 12, tzinfo=timezone.utc),
+        rows=3,
+    )
+
+    result = await loader.load_data_batch(
+        table_name="voicebot_gestiones",
+        table_type=TableType.RAW,
+        data=_records(3),
+        primary_key=["uid"],
+        checkpoint=checkpoint,
+    )
+
+    assert result.status == "success"
+    assert conn.checkpoint_depth == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_partitions_are_recorded_in_the_batch_transaction():
+    conn = FakeConnection()
+    loader = PostgresLoader(FakeDbManager(conn))
+    conn.fetch = _columns("nro_documento", "fecha_pago", "monto_cancelado", "archivo")
+
+    result = await loader.load_rows_batch(
+        table_name="pagos",
+        table_type=TableType.RAW,
+        columns=["nro_documento", "fecha_pago", "monto_cancelado", "archivo"],
+        rows=[
+            ("d1", date(2025, 6, 1), 10, "CAMP.txt"),
+            ("d2", date(2025, 6, 1), 20, "CAMP.txt"),
+            ("d3", date(2025, 6, 2), 30, "CAMP.txt"),
+        ],
+        primary_key=["nro_documento", "fecha_pago", "monto_cancelado"],
+        load_strategy=LoadStrategy.UPSERT,
+    )
+
+    assert result.status == "success"
+    depth, (table_name, archivos, fechas) = conn.changes
+    assert depth == 1
+    assert table_name == "pagos"
+    assert list(zip(archivos, fechas)) == [("CAMP.txt", date(2025, 6, 1)), ("CAMP.txt", date(2025, 6, 2))]
+
+
+@pytest.mark.asyncio
+async def test_changed_partitions_are_recorded_in_a_fixed_order():
+    conn = FakeConnection()
+
+    await record_changed_partitions(conn, "pagos", {
+        (None, date(2025, 6, 2)),
+        ("B.txt", None),
+        ("B.txt", date(2025, 6, 1)),
+        ("A.txt", date(2025, 6, 3)),
+        (None, None),
+    })
+
+    _, (_, archivos, fechas) = conn.changes
+    assert list(zip(archivos, fechas)) == [
+        ("A.txt", date(2025, 6, 3)),
+        ("B.txt", date(2025, 6, 1)),
+        ("B.txt", None),
+        (None, date(2025, 6, 2)),
+        (None, None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_batch_decompresses_covered_chunks_in_its_transaction():
+    conn = FakeConnection()
+    loader = PostgresLoader(FakeDbManager(conn))
+    conn.fetch = _columns("nro_documento", "fecha_pago", "monto_cancelado", "archivo")
+    calls = []
+    execute = conn.execute
+
+    async def recording_execute(query, *args):
+        calls.append((conn.transaction_depth, query, args))
+        await execute(query, *args)
+
+    conn.execute = recording_execute
+
+    result = await loader.load_rows_batch(
+        table_name="pagos",
+        table_type=TableType.RAW,
+        columns=["nro_documento", "fecha_pago", "monto_cancelado", "archivo"],
+        rows=[("d1", date(2025, 3, 4), 10, "CAMP.txt"), ("d2", date(2025, 1, 20), 20, "CAMP.txt")],
+        primary_key=["nro_documento", "fecha_pago", "monto_cancelado"],
+        load_strategy=LoadStrategy.UPSERT,
+    )
+
+    assert result.status == "success"
+    decompress = [(depth, args) for depth, query, args in calls if "decompress_chunk" in query]
+    # Chunks overlapping [min, max] of the batch dates, before the rows are written
+    assert decompress == [(1, (ETLConfig.get_fq_table_name("pagos"), date(2025, 3, 4), date(2025, 1, 20)))]
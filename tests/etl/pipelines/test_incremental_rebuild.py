@@ -0,0 +1,269 @@
+import asyncio
+import re
+import uuid
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+import pytest
+
+from etl.change_tracking import collect_changed_partitions
+from etl.pipelines import incremental_rebuild as rebuild_module
+from etl.pipelines.incremental_rebuild import CampaignWindow, IncrementalRebuildEngine
+
+TODAY = date(2025, 6, 20)
+WINDOWS = {
+    "CAMP_A": CampaignWindow("CAMP_A", date(2025, 6, 1), date(2025, 6, 10), date(2025, 6, 2)),
+    "CAMP_B": CampaignWindow("CAMP_B", date(2025, 6, 5), None, None),
+}
+
+
+def _days(start, end):
+    return {start + timedelta(days=i) for i in range((end - start).days + 1)}
+
+
+def _change(table_name, archivo, fecha, change_id=1):
+    return {"change_id": change_id, "table_name": table_name, "archivo": archivo, "fecha": fecha}
+
+
+def test_collect_changed_partitions_keeps_distinct_days():
+    rows = [("CAMP_A.txt", "2025-06-03"), ("CAMP_A.txt", date(2025, 6, 3)), ("CAMP_B.txt", None)]
+
+    partitions = collect_changed_partitions(["ARCHIVO", "fecha"], rows, "archivo", "fecha")
+
+    assert partitions == {("CAMP_A.txt", None), ("CAMP_A.txt", date(2025, 6, 3)), ("CAMP_B.txt", None)}
+    assert collect_changed_partitions(["uid"], rows, "archivo", None) == {(None, None)}
+
+
+def test_payment_change_spreads_forward_through_the_stages():
+    scopes = IncrementalRebuildEngine().plan_scopes(
+        [_change("pagos", "CAMP_A.txt", date(2025, 6, 8))], WINDOWS, TODAY
+    )
+
+    assert scopes["gestiones_unificadas"] == {}
+    assert scopes["pagos_dedup"] == {"CAMP_A": {date(2025, 6, 8)}}
+    assert scopes["cuenta_estado_diario"] == {"CAMP_A": _days(date(2025, 6, 8), date(2025, 6, 10))}
+    assert scopes["dashboard_data"] == {"CAMP_A": _days(date(2025, 6, 8), date(2025, 6, 10))}
+
+
+def test_gestiones_change_without_archivo_hits_every_open_campaign():
+    scopes = IncrementalRebuildEngine().plan_scopes(
+        [_change("voicebot_gestiones", None, date(2025, 6, 7))], WINDOWS, TODAY
+    )
+
+    assert scopes["gestiones_unificadas"] == {"CAMP_A": {date(2025, 6, 7)}, "CAMP_B": {date(2025, 6, 7)}}
+    assert scopes["pagos_dedup"] == {}
+    assert scopes["dashboard_data"]["CAMP_B"] == _days(date(2025, 6, 7), TODAY)
+
+
+def test_trandeuda_change_only_rebuilds_gestiones_on_fecha_trandeuda():
+    scopes = IncrementalRebuildEngine().plan_scopes(
+        [_change("trandeuda", "CAMP_A.txt", date(2025, 6, 9)), _change("trandeuda", "CAMP_B.txt", date(2025, 6, 9))],
+        WINDOWS,
+        TODAY,
+    )
+
+    assert scopes["gestiones_unificadas"] == {"CAMP_A": {date(2025, 6, 2)}}
+    assert scopes["pagos_dedup"] == {"CAMP_A": {date(2025, 6, 9)}, "CAMP_B": {date(2025, 6, 9)}}
+
+
+def test_dimension_change_rebuilds_every_campaign_from_gestiones_on():
+    scopes = IncrementalRebuildEngine().plan_scopes(
+        [_change("homologacion_voicebot", None, None)], WINDOWS, TODAY
+    )
+
+    assert scopes["gestiones_unificadas"] == {
+        "CAMP_A": _days(date(2025, 6, 1), date(2025, 6, 10)),
+        "CAMP_B": _days(date(2025, 6, 5), TODAY),
+    }
+    assert scopes["pagos_dedup"] == {}
+    assert scopes["gestion_cuenta_impact"] == scopes["gestiones_unificadas"]
+
+
+class FakeConnection:
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.executed = []
+        self.logged = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetchval(self, query):
+        return TODAY
+
+    async def fetch(self, query):
+        return [
+            {"archivo": w.archivo, "fecha_apertura": w.fecha_apertura,
+             "fecha_cierre": w.fecha_cierre, "fecha_trandeuda": w.fecha_trandeuda}
+            for w in WINDOWS.values()
+        ]
+
+    async def execute(self, query, *args):
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("boom")
+        await asyncio.sleep(0)
+        self.executed.append((query, args))
+
+    async def executemany(self, query, rows):
+        assert "etl_execution_log" in query
+        self.logged.extend(rows)
+
+
+class FakeDbManager:
+    def __init__(self, conn):
+        self.conn = conn
+        self.in_use = 0
+        self.max_in_use = 0
+
+    async def get_pool(self):
+        return self
+
+    @asynccontextmanager
+    async def acquire(self):
+        self.in_use += 1
+        self.max_in_use = max(self.max_in_use, self.in_use)
+        try:
+            yield self.conn
+        finally:
+            self.in_use -= 1
+
+
+def _statements_for(conn, table):
+    """Statements writing into the table (INSERT INTO / DELETE FROM)"""
+    target = re.compile(rf"(INTO|DELETE FROM)\s+\w+\.{table}\b")
+    return [args for query, args in conn.executed if target.search(query)]
+
+
+@pytest.fixture
+def fake_tracking(monkeypatch):
+    state = {"cleared": [], "saved": None, "changes": [], "fingerprints": {}, "saved_fingerprints": {}}
+
+    async def fake_get_pending_changes():
+        return state["changes"]
+
+    async def fake_clear_changes(change_ids):
+        state["cleared"].extend(change_ids)
+        return len(change_ids)
+
+    async def fake_compute_table_fingerprints(conn, table_names):
+        return {table_name: state["fingerprints"].get(table_name, "same") for table_name in table_names}
+
+    async def fake_get_saved_fingerprints(conn):
+        return state["saved_fingerprints"]
+
+    async def fake_save_fingerprints(conn, fingerprints):
+        state["saved"] = fingerprints
+
+    monkeypatch.setattr(rebuild_module, "get_pending_changes", fake_get_pending_changes)
+    monkeypatch.setattr(rebuild_module, "clear_changes", fake_clear_changes)
+    monkeypatch.setattr(rebuild_module, "compute_table_fingerprints", fake_compute_table_fingerprints)
+    monkeypatch.setattr(rebuild_module, "get_saved_fingerprints", fake_get_saved_fingerprints)
+    monkeypatch.setattr(rebuild_module, "save_fingerprints", fake_save_fingerprints)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_rebuild_runs_dag_in_parallel_and_logs_each_stage(fake_tracking):
+    fake_tracking["changes"] = [_change("pagos", "CAMP_A.txt", date(2025, 6, 9), change_id=7)]
+    conn = FakeConnection()
+    db = FakeDbManager(conn)
+
+    result = await IncrementalRebuildEngine(db).rebuild()
+
+    statuses = {r["stage_name"]: r["status"] for r in result["stage_results"]}
+    assert result["status"] == "success"
+    assert fake_tracking["cleared"] == [7]
+    assert statuses == {
+        "gestiones_unificadas": "unchanged", "pagos_dedup": "success", "cuenta_estado_diario": "success",
+        "gestion_cuenta_impact": "success", "pagos_diarios": "success", "dashboard_data": "success",
+        "productivity_data": "unchanged",
+    }
+    assert _statements_for(conn, "pago_deduplication") == [(["CAMP_A"], [date(2025, 6, 9)])]
+    # Per-partition stages get the archivo as stored in aux: DELETE + INSERT per day
+    assert _statements_for(conn, "dashboard_data") == [
+        ("CAMP_A.txt", date(2025, 6, 9)), ("CAMP_A.txt", date(2025, 6, 9)),
+        ("CAMP_A.txt", date(2025, 6, 10)), ("CAMP_A.txt", date(2025, 6, 10)),
+    ]
+    # cuenta_estado_diario and pagos_diarios only depend on pagos_dedup
+    assert db.max_in_use >= 2
+    assert [row[1] for row in conn.logged] == [f"aux_mart.{name}" for name in statuses]
+    assert {row[0] for row in conn.logged} == {uuid.UUID(result["execution_id"])}
+
+
+@pytest.mark.asyncio
+async def test_gestion_change_rebuilds_productivity_rollups_for_that_day(fake_tracking):
+    fake_tracking["changes"] = [_change("mibotair_gestiones", "CAMP_B.txt", date(2025, 6, 12))]
+    conn = FakeConnection()
+
+    result = await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild()
+
+    statuses = {r["stage_name"]: r["status"] for r in result["stage_results"]}
+    assert statuses["productivity_data"] == "success"
+    # DELETE + INSERT of the agent × day and agent × hour rollups, only for the changed day
+    assert _statements_for(conn, "productivity_data") == [("CAMP_B.txt", date(2025, 6, 12))] * 2
+    assert _statements_for(conn, "productivity_hourly") == [("CAMP_B.txt", date(2025, 6, 12))] * 2
+
+
+@pytest.mark.asyncio
+async def test_rebuild_refreshes_continuous_aggregates_over_rebuilt_days(fake_tracking):
+    fake_tracking["changes"] = [_change("pagos", "CAMP_A.txt", date(2025, 6, 9))]
+    conn = FakeConnection()
+
+    result = await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild()
+
+    calls = [query for query, _ in conn.executed if query.startswith("CALL refresh_continuous_aggregate")]
+    # dashboard_data rebuilt 06-09..06-10: the window adds a day on each side for whole buckets
+    assert calls[0] == (
+        "CALL refresh_continuous_aggregate('mart_P3fV4dWNeMkN5RJMhV8e.dashboard_daily', "
+        "'2025-06-08', '2025-06-12')"
+    )
+    assert "gestion_cuenta_impact_daily" in calls[1]
+    assert [r["status"] for r in result["continuous_aggregates"]] == ["success", "success"]
+
+
+@pytest.mark.asyncio
+async def test_retired_campaigns_are_not_rebuilt(fake_tracking, monkeypatch):
+    # CAMP_A closed on 2025-06-10: retired 5 days later, its raw data may already be dropped
+    monkeypatch.setattr(rebuild_module.ETLConfig, "RAW_RETENTION_DAYS_AFTER_CLOSE", 5)
+    fake_tracking["changes"] = [_change("pagos", "CAMP_A.txt", date(2025, 6, 9), change_id=7)]
+    conn = FakeConnection()
+
+    result = await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild()
+
+    assert result["status"] == "success"
+    assert {r["status"] for r in result["stage_results"]} == {"unchanged"}
+    assert fake_tracking["cleared"] == [7]
+
+
+@pytest.mark.asyncio
+async def test_failed_stage_skips_dependents_and_keeps_changes(fake_tracking):
+    fake_tracking["changes"] = [_change("pagos", "CAMP_A.txt", date(2025, 6, 9), change_id=7)]
+    conn = FakeConnection(fail_on="pagos_diarios")
+
+    result = await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild()
+
+    statuses = {r["stage_name"]: r["status"] for r in result["stage_results"]}
+    assert result["status"] == "failed"
+    assert statuses["pagos_diarios"] == "failed"
+    assert statuses["gestion_cuenta_impact"] == "success"
+    assert statuses["dashboard_data"] == "skipped"
+    assert fake_tracking["cleared"] == []
+    assert fake_tracking["saved"] is None
+
+
+@pytest.mark.asyncio
+async def test_changed_dimension_fingerprint_triggers_rebuild(fake_tracking):
+    fake_tracking["saved_fingerprints"] = {"ejecutivos": "old", "homologacion_voicebot": "same"}
+    fake_tracking["fingerprints"] = {"ejecutivos": "new"}
+    conn = FakeConnection()
+
+    result = await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild()
+
+    statuses = {r["stage_name"]: r["status"] for r in result["stage_results"]}
+    assert statuses["gestiones_unificadas"] == "success"
+    assert statuses["pagos_dedup"] == "unchanged"
+    assert fake_tracking["saved"]["ejecutivos"] == "new"
+
+    fake_tracking["saved_fingerprints"] = fake_tracking["saved"]
+    assert (await IncrementalRebuildEngine(FakeDbManager(conn)).rebuild())["status"] == "up_to_date"
@@ -0,0 +1,226 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from etl.config import ETLConfig, SliceInterval
+from etl.extractors.bigquery_extractor import RowBatch
+from etl.loaders.postgres_loader import LoadResult
+from etl.pipelines import simple_incremental_pipeline as pipeline_module
+from etl.pipelines.simple_incremental_pipeline import SimpleIncrementalPipeline
+
+
+class FakeExtractor:
+    def __init__(self, batches):
+        self.batches = batches
+        self.produced = 0
+        self.queries = []
+
+    async def stream_custom_query_rows(self, query, batch_size=10000):
+        self.queries.append(query)
+        for batch in self.batches:
+            self.produced += 1
+            yield RowBatch(columns=["uid"], rows=[(record["uid"],) for record in batch])
+
+
+class FakeLoader:
+    def __init__(self, queue_probe, fail_on_batch=None):
+        self.queue_probe = queue_probe
+        self.fail_on_batch = fail_on_batch
+        self.loaded_batches = 0
+        self.max_buffered = 0
+        self.checkpoints = []
+
+    async def load_rows_batch(self, table_name, table_type, columns, rows, primary_key, checkpoint=None):
+        self.checkpoints.append(checkpoint)
+        self.max_buffered = max(self.max_buffered, self.queue_probe().qsize())
+        await asyncio.sleep(0)
+        self.loaded_batches += 1
+        if self.loaded_batches == self.fail_on_batch:
+            return LoadResult(table_name, len(rows), 0, 0, len(rows), 0.0, "failed", "boom")
+        return LoadResult(table_name, len(rows), len(rows), 0, 0, 0.0, "success")
+
+
+def _make_pipeline(monkeypatch, batches, fail_on_batch=None, resume=None):
+    async def no_watermark(table_name):
+        return None
+
+    async def fake_start_checkpoint_range(table_name, range_start, range_end):
+        return resume or {"status": "running", "checkpoint_value": None, "rows_loaded": 0}
+
+    completed = []
+
+    async def fake_complete_checkpoint_range(table_name, range_start):
+        completed.append(range_start)
+
+    monkeypatch.setattr(pipeline_module, "get_last_extracted_date", no_watermark)
+    monkeypatch.setattr(pipeline_module, "start_checkpoint_range", fake_start_checkpoint_range)
+    monkeypatch.setattr(pipeline_module, "complete_checkpoint_range", fake_complete_checkpoint_range)
+
+    queues = []
+    original_queue = asyncio.Queue
+
+    def tracking_queue(*args, **kwargs):
+        queue = original_queue(*args, **kwargs)
+        queues.append(queue)
+        return queue
+
+    monkeypatch.setattr(pipeline_module.asyncio, "Queue", tracking_queue)
+
+    pipeline = SimpleIncrementalPipeline()
+    pipeline._initialized = True
+    pipeline.extractor = FakeExtractor(batches)
+    pipeline.loader = FakeLoader(lambda: queues[-1], fail_on_batch)
+    pipeline.completed_ranges = completed
+    return pipeline
+
+
+@pytest.mark.asyncio
+async def test_extract_and_load_streams_through_bounded_queue(monkeypatch):
+    batches = [[{"uid": f"{b}-{i}"} for i in range(3)] for b in range(10)]
+    pipeline = _make_pipeline(monkeypatch, batches)
+
+    extraction_result, load_result = await pipeline.extract_and_load("voicebot_gestiones")
+
+    assert extraction_result["status"] == "success"
+    assert extraction_result["record_count"] == 30
+    assert load_result["status"] == "success"
+    assert load_result["records_loaded"] == 30
+    assert pipeline.loader.max_buffered <= ETLConfig.PIPELINE_QUEUE_MAX_BATCHES
+
+
+@pytest.mark.asyncio
+async def test_load_failure_stops_extraction_and_keeps_watermark(monkeypatch):
+    batches = [[{"uid": str(b)}] for b in range(20)]
+    pipeline = _make_pipeline(monkeypatch, batches, fail_on_batch=2)
+
+    extraction_result, load_result = await pipeline.extract_and_load("voicebot_gestiones")
+
+    assert load_result["status"] == "failed"
+    assert extraction_result["status"] != "success"
+    assert pipeline.extractor.produced < len(batches)
+    assert not await pipeline.update_watermark_after_success(extraction_result, load_result)
+    assert pipeline.completed_ranges == []
+
+
+@pytest.mark.asyncio
+async def test_extract_and_load_resumes_from_checkpoint(monkeypatch):
+    checkpoint = datetime(2025, 6, 3, 12, 0, tzinfo=timezone.utc)
+    resume = {"status": "running", "checkpoint_value": checkpoint, "rows_loaded": 500}
+    pipeline = _make_pipeline(monkeypatch, [[{"uid": "a"}]], resume=resume)
+
+    extraction_result, load_result = await pipeline.extract_and_load("voicebot_gestiones")
+
+    assert load_result["status"] == "success"
+    assert f">= TIMESTAMP('{checkpoint.isoformat()}')" in pipeline.extractor.queries[0]
+    saved = pipeline.loader.checkpoints[0]
+    assert saved.range_start == extraction_result["start_date"]
+    assert saved.rows == 1
+    assert pipeline.completed_ranges == [extraction_result["start_date"]]
+
+
+@pytest.mark.asyncio
+async def test_extract_and_load_skips_completed_range(monkeypatch):
+    resume = {"status": "completed", "checkpoint_value": None, "rows_loaded": 10}
+    pipeline = _make_pipeline(monkeypatch, [[{"uid": "a"}]], resume=resume)
+
+    extraction_result, load_result = await pipeline.extract_and_load("voicebot_gestiones")
+
+    assert extraction_result["status"] == "success"
+    assert load_result["already_loaded"] == 10
+    assert pipeline.extractor.produced == 0
+
+
+def test_batch_checkpoint_value_normalizes_to_utc():
+    naive = datetime(2025, 6, 1, 10, 0)
+    batch = RowBatch(columns=["uid", "FECHA"], rows=[("a", naive), ("b", None), ("c", datetime(2025, 5, 1))])
+
+    assert SimpleIncrementalPipeline._batch_checkpoint_value(batch, "fecha") == naive.replace(tzinfo=timezone.utc)
+    assert SimpleIncrementalPipeline._batch_checkpoint_value(
+        [{"fecha": "2025-06-02T00:00:00Z"}, {"fecha": "2025-06-01T23:00:00+00:00"}], "fecha"
+    ) == datetime(2025, 6, 2, tzinfo=timezone.utc)
+    assert SimpleIncrementalPipeline._batch_checkpoint_value(batch, "missing") is None
+
+
+@pytest.mark.asyncio
+async def test_process_tables_runs_in_parallel_after_dependencies():
+    pipeline = SimpleIncrementalPipeline()
+    pipeline._initialized = True
+    started, running = [], []
+    max_running = 0
+
+    async def fake_process_table(table_name):
+        nonlocal max_running
+        started.append(table_name)
+        running.append(table_name)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0.01)
+        running.remove(table_name)
+        status = "failed" if table_name == "calendario" else "success"
+        return {"table_name": table_name, "status": status, "records_extracted": 1, "records_loaded": 1}
+
+    pipeline.process_table = fake_process_table
+    tables = ["asignaciones", "calendario", "voicebot_gestiones", "mibotair_gestiones", "ejecutivos"]
+
+    result = await pipeline.process_tables(tables, max_workers=2)
+
+    statuses = {r["table_name"]: r["status"] for r in result["table_results"]}
+    assert statuses["asignaciones"] == "skipped"
+    assert "asignaciones" not in started
+    assert max_running == 2
+    assert result["successful_tables"] == 3
+    assert result["skipped_tables"] == 1
+    assert [r["table_name"] for r in result["table_results"]] == tables
+
+
+def test_plan_slices_aligns_to_utc_days():
+    start = datetime(2025, 6, 1, 15, 30, tzinfo=timezone.utc)
+    end = datetime(2025, 6, 4, 8, 0, tzinfo=timezone.utc)
+
+    slices = SimpleIncrementalPipeline._plan_slices(start, end, SliceInterval.DAY)
+
+    assert slices[0] == (start, datetime(2025, 6, 2, tzinfo=timezone.utc))
+    assert slices[-1] == (datetime(2025, 6, 4, tzinfo=timezone.utc), end)
+    assert len(slices) == 4
+    assert all(a[1] == b[0] for a, b in zip(slices, slices[1:]))
+    assert SimpleIncrementalPipeline._plan_slices(start, start + timedelta(hours=5), SliceInterval.DAY) == [
+        (start, start + timedelta(hours=5))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sliced_watermark_stops_at_first_failed_slice(monkeypatch):
+    watermarks = []
+
+    async def fake_update_watermark(table_name, extracted_until):
+        watermarks.append(extracted_until)
+
+    async def fake_prune_checkpoints(table_name, watermark):
+        pass
+
+    monkeypatch.setattr(pipeline_module, "update_watermark", fake_update_watermark)
+    monkeypatch.setattr(pipeline_module, "prune_checkpoints", fake_prune_checkpoints)
+
+    start = datetime(2025, 6, 1, tzinfo=timezone.utc)
+    slices = SimpleIncrementalPipeline._plan_slices(start, start + timedelta(days=4), SliceInterval.DAY)
+    pipeline = SimpleIncrementalPipeline()
+    pipeline._initialized = True
+
+    async def fake_extract_and_load(table_name, plan):
+        failed = plan["start_date"] == slices[2][0]
+        extraction = {"table_name": table_name, "record_count": 5, "status": "failed" if failed else "success"}
+        load = {"table_name": table_name, "status": "failed" if failed else "success", "records_loaded": 0 if failed else 5}
+        return extraction, load
+
+    pipeline.extract_and_load = fake_extract_and_load
+    plan = {"start_date": start, "end_date": slices[-1][1], "extraction_type": "incremental", "query": ""}
+
+    extraction_result, load_result, watermark_updated = await pipeline.extract_and_load_slices(
+        "voicebot_gestiones", plan, slices
+    )
+
+    assert watermark_updated
+    assert max(watermarks) == slices[1][1]
+    assert extraction_result["failed_slices"] == 1
+    assert load_result["status"] == "failed"
+    assert load_result["records_loaded"] == 15
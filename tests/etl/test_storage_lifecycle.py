@@ -0,0 +1,138 @@
+import pytest
+from contextlib import asynccontextmanager
+from datetime import date, timedelta
+
+from etl.config import ETLConfig, StorageLifecycleConfig
+from etl.storage_lifecycle import StorageLifecycleManager
+
+TODAY = date(2025, 6, 30)
+
+
+class FakeConnection:
+    """
+    Answers the lifecycle queries from an in-memory calendario and chunk list.
+
+    campaigns: (archivo, fecha_apertura, fecha_cierre or None)
+    chunks: table -> list of chunk names returned by the chunk listing
+    """
+
+    def __init__(self, campaigns, chunks=None, failing_tables=()):
+        self.campaigns = campaigns
+        self.chunks = chunks or {}
+        self.failing_tables = set(failing_tables)
+        self.dropped = []
+        self.compressed = []
+        self.chunk_queries = []
+
+    async def fetchval(self, query, *args):
+        if "CURRENT_DATE" in query:
+            return TODAY
+        # Campaigns still open, or closed on/after $1, keep their data
+        (closed_since,) = args
+        active = [apertura for _, apertura, cierre in self.campaigns if cierre is None or cierre >= closed_since]
+        return min(active) if active else None
+
+    async def fetch(self, query, *args):
+        table = args[0].rsplit(".", 1)[-1]
+        if table in self.failing_tables:
+            raise RuntimeError(f"{table} is locked")
+        if "drop_chunks" in query:
+            self.dropped.append((table, args[1]))
+            return [{"chunk": f"{table}_old"}]
+        self.chunk_queries.append((table, args[1]))
+        return [{"chunk": chunk} for chunk in self.chunks.get(table, [])]
+
+    async def execute(self, query, *args):
+        self.compressed.append(args[0])
+
+
+class FakeDbManager:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def get_pool(self):
+        manager = self
+
+        class Pool:
+            @asynccontextmanager
+            async def acquire(self):
+                yield manager.conn
+
+        return Pool()
+
+
+def _closed(days_ago):
+    return TODAY - timedelta(days=days_ago)
+
+
+@pytest.mark.asyncio
+async def test_cutoff_follows_the_oldest_campaign_that_is_not_retired():
+    conn = FakeConnection([
+        ("RETIRADA", date(2024, 1, 1), _closed(ETLConfig.RAW_RETENTION_DAYS_AFTER_CLOSE + 1)),
+        ("CERRADA_RECIENTE", date(2025, 1, 10), _closed(30)),
+        ("ABIERTA", date(2025, 5, 1), None),
+    ])
+
+    cutoff = await StorageLifecycleManager().retention_cutoff(conn, TODAY)
+
+    assert cutoff == date(2025, 1, 10) - timedelta(days=ETLConfig.RAW_RETENTION_MARGIN_DAYS)
+
+
+@pytest.mark.asyncio
+async def test_open_campaign_holds_back_the_cutoff():
+    conn = FakeConnection([
+        ("ABIERTA_ANTIGUA", date(2024, 6, 1), None),
+        ("CERRADA_RECIENTE", date(2025, 1, 10), _closed(30)),
+    ])
+
+    cutoff = await StorageLifecycleManager().retention_cutoff(conn, TODAY)
+
+    assert cutoff == date(2024, 6, 1) - timedelta(days=ETLConfig.RAW_RETENTION_MARGIN_DAYS)
+
+
+@pytest.mark.asyncio
+async def test_no_active_campaigns_drops_nothing():
+    conn = FakeConnection(
+        [("RETIRADA", date(2024, 1, 1), _closed(ETLConfig.RAW_RETENTION_DAYS_AFTER_CLOSE + 1))],
+        chunks={"pagos": ["_hyper_1_1_chunk"]},
+    )
+
+    result = await StorageLifecycleManager(FakeDbManager(conn)).run()
+
+    assert result["status"] == "success"
+    assert result["retention_cutoff"] is None
+    assert conn.dropped == []
+    assert conn.compressed == ["_hyper_1_1_chunk"]
+
+
+@pytest.mark.asyncio
+async def test_old_chunks_are_compressed_one_by_one_after_compress_after_days():
+    conn = FakeConnection([], chunks={"trandeuda": ["_hyper_2_1_chunk", "_hyper_2_2_chunk"]})
+    lifecycle = StorageLifecycleConfig("trandeuda", time_column="fecha_proceso", compress_after_days=45)
+
+    compressed = await StorageLifecycleManager().compress_old_chunks(conn, lifecycle, TODAY)
+
+    assert compressed == 2
+    assert conn.compressed == ["_hyper_2_1_chunk", "_hyper_2_2_chunk"]
+    assert conn.chunk_queries == [("trandeuda", TODAY - timedelta(days=45))]
+
+
+@pytest.mark.asyncio
+async def test_a_failing_table_does_not_stop_the_others():
+    conn = FakeConnection(
+        [("ABIERTA", date(2025, 5, 1), None)],
+        chunks={"asignaciones": ["_hyper_1_1_chunk"], "pagos": ["_hyper_3_1_chunk"]},
+        failing_tables={"trandeuda"},
+    )
+
+    result = await StorageLifecycleManager(FakeDbManager(conn)).run()
+
+    by_table = {table["table_name"]: table for table in result["table_results"]}
+    assert result["status"] == "failed"
+    assert by_table["trandeuda"]["status"] == "failed"
+    assert "locked" in by_table["trandeuda"]["error"]
+    assert by_table["asignaciones"] == {
+        "table_name": "asignaciones", "dropped_chunks": 1, "compressed_chunks": 1, "status": "success"
+    }
+    assert by_table["pagos"]["status"] == "success"
+    assert [table for table, _ in conn.dropped] == ["asignaciones", "pagos"]
@@ -0,0 +1,122 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from etl.extractors.bigquery_extractor import RowBatch
+from etl.transformers.columnar_transformer import ColumnarTransformEngine, TABLE_SPECS
+from etl.transformers.raw_data_transformer import RawDataTransformer, RawTransformerRegistry
+
+EXTRACTED_AT = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+
+# Values cycled through every column, whatever its rule
+MIXED_VALUES = [
+    None, "", "  texto  ", "   ", "1,234", "-12", "12.7", "abc", "-", 7, 0, -3, 2.9, float("nan"),
+    Decimal("10.50"), True, False, "true", "Sí", "2025-06-01", " 2025-02-30 ", "9999-12-31",
+    "2025-06-01T10:30:00Z", "2025-06-01 10:30:00.123456+05:00", "20250601",
+    date(2025, 6, 1), datetime(2025, 6, 1, 8, 0), datetime(2025, 6, 1, 8, 0, tzinfo=timezone(timedelta(hours=-5))),
+]
+
+# Homogeneous columns exercise the vectorized fast paths
+TYPED_VALUES = {
+    "str": lambda i: f" v{i % 7} " if i % 5 else None,
+    "int": lambda i: i - 20 if i % 6 else None,
+    "float": lambda i: i * 1.5 - 30 if i % 4 else None,
+    "int_str": lambda i: f"{i * 1000:,}" if i % 3 else "",
+    "decimal": lambda i: Decimal(i) / 4 if i % 8 else None,
+    "bool": lambda i: bool(i % 2) if i % 9 else None,
+    "date": lambda i: date(2025, 1, 1) + timedelta(days=i) if i % 7 else None,
+    "date_str": lambda i: f"2025-03-{i % 28 + 1:02d}" if i % 10 else "2025-13-01",
+    "datetime": lambda i: datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(hours=i) if i % 5 else None,
+    "naive_datetime": lambda i: datetime(2025, 1, 1) + timedelta(minutes=i),
+    "datetime_str": lambda i: f"2025-05-0{i % 9 + 1}T0{i % 10}:15:00Z" if i % 6 else "no-date",
+}
+
+
+def _source_fields(table_name):
+    return [column.source_field for column in TABLE_SPECS[table_name].columns]
+
+
+def _mixed_records(table_name, n=len(MIXED_VALUES) * 2):
+    fields = _source_fields(table_name)
+    return [
+        {
+            **{f: MIXED_VALUES[(i + j) % len(MIXED_VALUES)] for j, f in enumerate(fields)},
+            "extraction_timestamp": EXTRACTED_AT,
+        }
+        for i in range(n)
+    ]
+
+
+def _typed_records(table_name, kind, n=60):
+    return [
+        {
+            **{f: TYPED_VALUES[kind](i + j) for j, f in enumerate(_source_fields(table_name))},
+            "extraction_timestamp": EXTRACTED_AT if i % 2 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def _row_path(table_name, records):
+    registry = RawTransformerRegistry()
+    return registry.raw_transformer_mapping[table_name]([dict(r) for r in records])
+
+
+def _assert_same(expected, actual):
+    assert len(actual) == len(expected)
+    for expected_row, actual_row in zip(expected, actual):
+        assert list(actual_row) == list(expected_row)
+        for key, value in expected_row.items():
+            if key == "extraction_timestamp" and value != EXTRACTED_AT:
+                # Defaulted to "now": per-row and per-batch clocks differ
+                assert actual_row[key].tzinfo is not None
+                continue
+            if isinstance(value, float) and value != value:
+                assert actual_row[key] != actual_row[key]
+                continue
+            assert type(actual_row[key]) is type(value), key
+            assert actual_row[key] == value, key
+
+
+@pytest.mark.parametrize("table_name", sorted(TABLE_SPECS))
+def test_columnar_engine_matches_row_path_on_mixed_values(table_name):
+    records = _mixed_records(table_name)
+
+    _assert_same(_row_path(table_name, records), ColumnarTransformEngine().transform(table_name, records))
+
+
+@pytest.mark.parametrize("kind", sorted(TYPED_VALUES))
+@pytest.mark.parametrize("table_name", sorted(TABLE_SPECS))
+def test_columnar_engine_matches_row_path_on_typed_columns(table_name, kind):
+    records = _typed_records(table_name, kind)
+
+    _assert_same(_row_path(table_name, records), ColumnarTransformEngine().transform(table_name, records))
+
+
+@pytest.mark.parametrize("table_name", sorted(TABLE_SPECS))
+def test_transform_batch_matches_record_path(table_name):
+    records = _mixed_records(table_name)
+    batch = RowBatch(
+        columns=[field.upper() for field in records[0]] + ["ignored"],
+        rows=[tuple(record.values()) + ("x",) for record in records],
+    )
+
+    result = ColumnarTransformEngine().transform_batch(table_name, batch)
+
+    expected = ColumnarTransformEngine().transform(table_name, records)
+    assert result.columns == [column.target for column in TABLE_SPECS[table_name].columns]
+    _assert_same(expected, [dict(zip(result.columns, row)) for row in result.rows])
+
+
+def test_registry_uses_columnar_engine_and_keeps_stats():
+    registry = RawTransformerRegistry()
+    records = _typed_records("trandeuda", "str", n=10)
+
+    transformed = registry.transform_raw_table_data("trandeuda", records)
+
+    stats = registry.get_transformation_stats()
+    assert stats["records_processed"] == 10
+    assert stats["records_transformed"] == len(transformed)
+    assert stats["records_skipped"] == 10 - len(transformed)
+    assert not RawDataTransformer().get_transformation_stats()["records_processed"]